@@ -0,0 +1,204 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlparse, parse_qs
+
+from benchmarks.synthetic_store import business_days, synthetic_bars, synthetic_intraday_bars
+
+AGGS_PATTERN = re.compile(
+    r"^/v2/aggs/ticker/(?P<ticker>[^/]+)/range/(?P<multiplier>\d+)/(?P<timespan>\w+)"
+    r"/(?P<start>\d{4}-\d{2}-\d{2})/(?P<end>\d{4}-\d{2}-\d{2})$"
+)
+REFERENCE_PATTERN = re.compile(r"^/v3/reference/tickers/(?P<ticker>[^/]+)$")
+CORPORATE_ACTIONS_PATTERN = re.compile(r"^/v3/reference/(?P<kind>splits|dividends)$")
+
+
+class FakePolygonServer:
+    """
+    Servidor HTTP local que imita los endpoints de agregados y de referencia de Polygon.io.
+    Los datos son deterministas (mismo generador que synthetic_store) y se puede
+    configurar la latencia de cada respuesta y la frecuencia de errores 429.
+
+    Uso:
+        with FakePolygonServer(latency=0.05) as server:
+            os.environ["POLYGON_API_URL"] = server.url
+    """
+    def __init__(self,
+                 latency: float = 0.0,
+                 rate_limit_every: int = 0,
+                 requests_per_minute: int = 0,
+                 seed: int = 0,
+                 port: int = 0,
+                 max_page_size: int = 50000,
+                 corporate_actions: Optional[Dict[str, Dict[str, List[Dict[str, Any]]]]] = None):
+        """
+        Args:
+            latency (float): Segundos de espera antes de cada respuesta
+            rate_limit_every (int): Si es > 0, cada N-ésimo request responde 429
+            requests_per_minute (int): Si es > 0, responde 429 al superar esa cantidad en 60 segundos
+            seed (int): Semilla de los precios generados
+            port (int): Puerto a usar (0 elige uno libre)
+            max_page_size (int): Resultados máximos por página aunque se pida un `limit` mayor
+            corporate_actions (Dict, optional): Splits y dividendos por ticker, con el formato
+                de la API (ej: {"AAPL": {"splits": [...], "dividends": [...]}})
+        """
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.requests_per_minute = requests_per_minute
+        self.seed = seed
+        self.max_page_size = max_page_size
+        self.corporate_actions = corporate_actions or {}
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self._window = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakePolygonServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-polygon", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def _is_rate_limited(self) -> bool:
+        with self._lock:
+            self.request_count += 1
+            now = time.monotonic()
+            limited = bool(self.rate_limit_every) and self.request_count % self.rate_limit_every == 0
+            if self.requests_per_minute:
+                while self._window and now - self._window[0] > 60:
+                    self._window.popleft()
+                if len(self._window) >= self.requests_per_minute:
+                    limited = True
+                else:
+                    self._window.append(now)
+            if limited:
+                self.rate_limited_count += 1
+            return limited
+
+    def aggs_payload(self,
+                     ticker: str,
+                     start: str,
+                     end: str,
+                     multiplier: int = 1,
+                     timespan: str = 'day',
+                     limit: int = 5000,
+                     cursor: int = 0) -> Dict[str, Any]:
+        days = business_days(datetime.strptime(start, '%Y-%m-%d').date(),
+                             datetime.strptime(end, '%Y-%m-%d').date())
+        if timespan in ('minute', 'hour'):
+            results = synthetic_intraday_bars(ticker, days, multiplier, timespan, self.seed)
+        else:
+            results = synthetic_bars(ticker, days, self.seed) if len(days) else []
+        # Paginación como la API real: a lo sumo `limit` resultados y next_url para seguir
+        limit = min(limit, self.max_page_size)
+        has_more = cursor + limit < len(results)
+        results = results[cursor:cursor + limit]
+        payload = {
+            'ticker': ticker,
+            'queryCount': len(results),
+            'resultsCount': len(results),
+            'adjusted': True,
+            'status': 'OK',
+            'request_id': f"fake-{self.request_count}",
+        }
+        if results:
+            payload['results'] = results
+        if has_more:
+            path = f"/v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/{start}/{end}"
+            payload['next_url'] = f"{self.url}{path}?cursor={cursor + limit}&limit={limit}"
+        return payload
+
+    def reference_payload(self, ticker: str) -> Dict[str, Any]:
+        return {
+            'status': 'OK',
+            'request_id': f"fake-{self.request_count}",
+            'results': {
+                'ticker': ticker,
+                'name': f"{ticker} Synthetic Corp.",
+                'market': 'stocks',
+                'active': True
+            }
+        }
+
+    def corporate_actions_payload(self, kind: str, ticker: str) -> Dict[str, Any]:
+        return {
+            'status': 'OK',
+            'request_id': f"fake-{self.request_count}",
+            'results': [
+                {'ticker': ticker, **action}
+                for action in self.corporate_actions.get(ticker, {}).get(kind, [])
+            ]
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status: int, payload: Dict[str, Any]):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                if server._is_rate_limited():
+                    self._send(429, {
+                        'status': 'ERROR',
+                        'error': "You've exceeded the maximum requests per minute."
+                    })
+                    return
+
+                parsed = urlparse(self.path)
+                path = parsed.path
+                query = parse_qs(parsed.query)
+                match = AGGS_PATTERN.match(path)
+                if match:
+                    self._send(200, server.aggs_payload(
+                        match['ticker'], match['start'], match['end'],
+                        int(match['multiplier']), match['timespan'],
+                        int(query.get('limit', ['5000'])[0]), int(query.get('cursor', ['0'])[0])
+                    ))
+                    return
+                match = REFERENCE_PATTERN.match(path)
+                if match:
+                    self._send(200, server.reference_payload(match['ticker']))
+                    return
+                match = CORPORATE_ACTIONS_PATTERN.match(path)
+                if match:
+                    self._send(200, server.corporate_actions_payload(
+                        match['kind'], query.get('ticker', [''])[0]
+                    ))
+                    return
+                self._send(404, {'status': 'NOT_FOUND', 'error': f"Ruta desconocida: {path}"})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
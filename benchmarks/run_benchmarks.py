@@ -0,0 +1,226 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, List, Optional
+
+# Permitir ejecutar el script directamente desde la raíz del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Sin límite de cuota: el servidor local no lo necesita y los tiempos medirían la espera
+os.environ.setdefault('POLYGON_REQUESTS_PER_MINUTE', '0')
+# Sin actualizaciones de splits y dividendos en segundo plano: competirían con los casos medidos
+os.environ.setdefault('CORPORATE_ACTIONS_AUTO', '0')
+
+from benchmarks.fake_polygon import FakePolygonServer
+from benchmarks.synthetic_store import generate_store, synthetic_bars, business_days
+from src.api.api_finanzas import FinanceAPI, decode_json
+from src.models.storage import aggs_columns
+from src.models.ticker_model import TickerModel
+from src.services.ticker_service import TickerService
+from src.services.screener import ScreenerService
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def measure(run: Callable[[Any], Any],
+            setup: Optional[Callable[[], Any]] = None,
+            repeat: int = 5) -> Dict[str, float]:
+    """
+    Mide `repeat` ejecuciones de `run`. El tiempo de `setup` no se incluye en la medición.
+
+    Args:
+        run (Callable): Función a medir, recibe el resultado de `setup`
+        setup (Callable, optional): Preparación previa a cada ejecución
+        repeat (int): Cantidad de ejecuciones
+
+    Returns:
+        Dict[str, float]: Tiempos mínimo, mediana y promedio en milisegundos
+    """
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        run(state)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.mean(timings), 3)
+    }
+
+
+def run_suite(n_tickers: int, years: int, repeat: int, latency: float, workdir: str) -> Dict[str, Dict[str, float]]:
+    """
+    Ejecuta todos los benchmarks sobre una base sintética y un servidor Polygon.io local
+
+    Args:
+        n_tickers (int): Tickers de la base sintética
+        years (int): Años de historia por ticker
+        repeat (int): Repeticiones por benchmark
+        latency (float): Latencia simulada de la API en segundos
+        workdir (str): Directorio temporal de trabajo
+
+    Returns:
+        Dict[str, Dict[str, float]]: Resultados por benchmark
+    """
+    store_path = os.path.join(workdir, 'store.db')
+    info = generate_store(store_path, n_tickers, years)
+    ticker = info['tickers'][0]
+    start_date, end_date = info['start_date'], info['end_date']
+    model = TickerModel(store_path)
+
+    results = {}
+
+    # save: un ticker completo sobre una base vacía
+    payload = {'results': synthetic_bars(ticker, business_days(
+        datetime.strptime(start_date, '%Y-%m-%d').date(),
+        datetime.strptime(end_date, '%Y-%m-%d').date()))}
+
+    def fresh_model():
+        path = os.path.join(workdir, 'save.db')
+        if os.path.exists(path):
+            os.remove(path)
+        return TickerModel(path)
+
+    results['save'] = measure(lambda m: m.save_ticker_data(ticker, payload), fresh_model, repeat)
+
+    # decode: decodificar y validar la respuesta de la API con la historia completa
+    body = json.dumps(payload).encode()
+    results['decode'] = measure(lambda _: aggs_columns(decode_json(body)), repeat=repeat)
+
+    # read: historia completa de un ticker
+    results['read'] = measure(lambda _: model.get_ticker_data(ticker, start_date, end_date), repeat=repeat)
+
+    # summary: resumen de todos los tickers almacenados
+    results['summary'] = measure(lambda _: model.get_stored_tickers(), repeat=repeat)
+
+    # screen: filtro sobre las últimas barras de todos los tickers (en el proceso actual)
+    screener = ScreenerService(model, screens_path=os.path.join(workdir, 'screens.json'), workers=1)
+    results['screen'] = measure(
+        lambda _: screener.run("close > sma(close, 200) and rsi(close, 14) < 30 and volume > 2 * sma(volume, 20)"),
+        repeat=repeat)
+
+    with FakePolygonServer(latency=latency) as server:
+        os.environ['POLYGON_API_URL'] = server.url
+        os.environ.setdefault('POLYGON_API_KEY', 'benchmark')
+        service = TickerService(api=FinanceAPI(), model=model)
+
+        # coverage: lectura local y cálculo de fechas faltantes
+        results['coverage'] = measure(
+            lambda _: service.get_historical_data(ticker, start_date, end_date), repeat=repeat)
+
+        # get_ticker_data con todos los datos en la base local
+        results['get_ticker_data_db_hit'] = measure(
+            lambda _: service.get_ticker_data(ticker, start_date, end_date), repeat=repeat)
+
+        # get_ticker_data con un hueco de un año antes de los datos almacenados
+        gap_start = (datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=365)).strftime('%Y-%m-%d')
+
+        gap_runs = itertools.count()
+
+        def gap_service():
+            # Un archivo por repetición: la escritura diferida de la anterior puede seguir pendiente
+            path = os.path.join(workdir, f'gap-{next(gap_runs)}.db')
+            shutil.copyfile(store_path, path)
+            return TickerService(api=FinanceAPI(), model=TickerModel(path))
+
+        results['get_ticker_data_api_gap'] = measure(
+            lambda s: s.get_ticker_data(ticker, gap_start, end_date), gap_service, repeat)
+
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Any],
+            tolerance: float) -> List[str]:
+    """
+    Compara los resultados con la línea base usando el tiempo mínimo (el menos sensible al ruido)
+
+    Returns:
+        List[str]: Benchmarks cuyo tiempo mínimo supera al de la línea base por más de `tolerance`
+    """
+    regressions = []
+    base_results = baseline.get('results', {})
+    print(f"\n{'benchmark':<28}{'baseline':>12}{'actual':>12}{'ratio':>9}")
+    for name, stats in results.items():
+        base = base_results.get(name)
+        if not base:
+            print(f"{name:<28}{'-':>12}{stats['min_ms']:>12.3f}{'-':>9}")
+            continue
+        ratio = stats['min_ms'] / base['min_ms'] if base['min_ms'] else float('inf')
+        flag = ''
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = '  REGRESIÓN'
+        print(f"{name:<28}{base['min_ms']:>12.3f}{stats['min_ms']:>12.3f}{ratio:>8.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks reproducibles de TickerModel y TickerService")
+    parser.add_argument("--tickers", type=int, default=50, help="Tickers de la base sintética")
+    parser.add_argument("--years", type=int, default=5, help="Años de historia por ticker")
+    parser.add_argument("--repeat", type=int, default=10, help="Repeticiones por benchmark")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latencia simulada de la API (segundos)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Archivo JSON con la línea base")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar los resultados como nueva línea base")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Incremento relativo del tiempo mínimo tolerado antes de marcar una regresión")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tickers-bench-")
+    try:
+        results = run_suite(args.tickers, args.years, args.repeat, args.latency, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform()
+        },
+        'params': {
+            'tickers': args.tickers,
+            'years': args.years,
+            'repeat': args.repeat,
+            'latency': args.latency
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Línea base guardada en {args.baseline}")
+
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('params') != report['params']:
+            print("Advertencia: los parámetros difieren de los de la línea base")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegresiones detectadas: {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
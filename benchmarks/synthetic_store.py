@@ -0,0 +1,209 @@
+import argparse
+import os
+import sqlite3
+import string
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+from src.models.ticker_model import TickerModel
+
+# Fecha de fin fija para que las bases generadas sean reproducibles
+DEFAULT_END_DATE = date(2024, 6, 28)
+
+# Minutos de la sesión regular (9:30 a 16:00)
+SESSION_MINUTES = 390
+
+
+def make_tickers(n_tickers: int) -> List[str]:
+    """
+    Genera símbolos sintéticos válidos para TickerService.validate_ticker (AAAA, AAAB, ...)
+
+    Args:
+        n_tickers (int): Cantidad de tickers a generar
+
+    Returns:
+        List[str]: Lista de símbolos de 4 letras
+    """
+    letters = string.ascii_uppercase
+    tickers = []
+    for i in range(n_tickers):
+        symbol = ''
+        value = i
+        for _ in range(4):
+            value, rem = divmod(value, 26)
+            symbol = letters[rem] + symbol
+        tickers.append(symbol)
+    return tickers
+
+
+def business_days(start: date, end: date) -> pd.DatetimeIndex:
+    return pd.date_range(start=start, end=end, freq='B')
+
+
+def date_to_ms(day: date) -> int:
+    """
+    Convierte una fecha al timestamp en milisegundos que usa Polygon.io.
+    Se usa la medianoche local para que TickerModel recupere la misma fecha.
+    """
+    return int(datetime(day.year, day.month, day.day).timestamp() * 1000)
+
+
+def synthetic_bars(ticker: str, days: pd.DatetimeIndex, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Genera barras diarias deterministas con el formato de la API de agregados de Polygon.io
+
+    Args:
+        ticker (str): Símbolo del ticker (define la semilla junto con `seed`)
+        days (pd.DatetimeIndex): Días hábiles a generar
+        seed (int): Semilla base
+
+    Returns:
+        List[Dict[str, Any]]: Resultados con los campos t, o, h, l, c, v y vw
+    """
+    rng = np.random.default_rng([seed] + [ord(ch) for ch in ticker])
+    n = len(days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, n)))
+    volume = rng.integers(100_000, 10_000_000, n)
+    vwap = (high + low + close) / 3
+    return [
+        {
+            't': date_to_ms(day.date()),
+            'o': round(float(open_[i]), 4),
+            'h': round(float(high[i]), 4),
+            'l': round(float(low[i]), 4),
+            'c': round(float(close[i]), 4),
+            'v': int(volume[i]),
+            'vw': round(float(vwap[i]), 4)
+        }
+        for i, day in enumerate(days)
+    ]
+
+
+def synthetic_intraday_bars(ticker: str,
+                            days: pd.DatetimeIndex,
+                            multiplier: int = 1,
+                            timespan: str = 'minute',
+                            seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Genera barras intradiarias deterministas de la sesión regular (9:30 a 16:00 de
+    Nueva York, 390 minutos por día) con el formato de la API de agregados
+
+    Args:
+        ticker (str): Símbolo del ticker (define la semilla junto con `seed`)
+        days (pd.DatetimeIndex): Días hábiles a generar
+        multiplier (int): Minutos u horas por barra
+        timespan (str): "minute" o "hour"
+        seed (int): Semilla base
+
+    Returns:
+        List[Dict[str, Any]]: Resultados con los campos t, o, h, l, c, v, vw y n
+    """
+    if not len(days):
+        return []
+    rng = np.random.default_rng([seed, 1] + [ord(ch) for ch in ticker])
+    opens = pd.DatetimeIndex(days.date).tz_localize('America/New_York') + pd.Timedelta(hours=9, minutes=30)
+    minute = np.arange(SESSION_MINUTES, dtype=np.int64) * 60_000
+    t = (opens.as_unit('ms').asi8[:, None] + minute[None, :]).ravel()
+    n = len(t)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0008, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.0005, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.0005, n)))
+    frame = pd.DataFrame({
+        't': t, 'o': open_, 'h': high, 'l': low, 'c': close,
+        'v': rng.integers(100, 50_000, n), 'n': rng.integers(1, 500, n),
+    })
+    frame['pv'] = (high + low + close) / 3 * frame['v']
+
+    unit_ms = (60_000 if timespan == 'minute' else 3_600_000) * multiplier
+    if unit_ms > 60_000:
+        frame = frame.groupby(frame['t'] // unit_ms * unit_ms).agg(
+            o=('o', 'first'), h=('h', 'max'), l=('l', 'min'), c=('c', 'last'),
+            v=('v', 'sum'), n=('n', 'sum'), pv=('pv', 'sum')
+        ).reset_index()
+    frame['vw'] = frame['pv'] / frame['v']
+    return [
+        {
+            't': int(row.t), 'o': round(row.o, 4), 'h': round(row.h, 4), 'l': round(row.l, 4),
+            'c': round(row.c, 4), 'v': int(row.v), 'vw': round(row.vw, 4), 'n': int(row.n)
+        }
+        for row in frame.itertuples(index=False)
+    ]
+
+
+def generate_store(db_path: str,
+                   n_tickers: int,
+                   years: int,
+                   end_date: date = DEFAULT_END_DATE,
+                   seed: int = 0) -> Dict[str, Any]:
+    """
+    Crea una base tickers.db sintética con N tickers × M años de barras diarias.
+    Las filas se insertan directamente para que la generación no dependa del
+    rendimiento de TickerModel.save_ticker_data (que es uno de los casos medidos).
+
+    Args:
+        db_path (str): Ruta de la base a crear (se reemplaza si existe)
+        n_tickers (int): Cantidad de tickers
+        years (int): Años de historia por ticker
+        end_date (date): Último día de datos
+        seed (int): Semilla de los precios
+
+    Returns:
+        Dict[str, Any]: Parámetros de la base generada (tickers, fechas y filas)
+    """
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    TickerModel(db_path)
+
+    start_date = end_date - timedelta(days=365 * years)
+    days = business_days(start_date, end_date)
+    tickers = make_tickers(n_tickers)
+    created_at = date_to_ms(end_date)
+
+    with sqlite3.connect(db_path) as conn:
+        for ticker in tickers:
+            bars = synthetic_bars(ticker, days, seed)
+            conn.executemany('''
+                INSERT INTO ticker_data
+                (ticker, date, open, high, low, close, volume, vwap)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (ticker, day.strftime('%Y-%m-%d'), b['o'], b['h'], b['l'], b['c'], b['v'], b['vw'])
+                for day, b in zip(days, bars)
+            ])
+            conn.execute('''
+                INSERT INTO ticker_ranges (ticker, start_date, end_date, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', (ticker, bars[0]['t'], bars[-1]['t'], created_at))
+        conn.commit()
+
+    return {
+        'db_path': db_path,
+        'tickers': tickers,
+        'start_date': days[0].strftime('%Y-%m-%d'),
+        'end_date': days[-1].strftime('%Y-%m-%d'),
+        'rows': len(tickers) * len(days)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera una base tickers.db sintética")
+    parser.add_argument("db_path", help="Ruta de la base a generar")
+    parser.add_argument("--tickers", type=int, default=50, help="Cantidad de tickers")
+    parser.add_argument("--years", type=int, default=5, help="Años de historia por ticker")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los precios")
+    args = parser.parse_args()
+
+    info = generate_store(args.db_path, args.tickers, args.years, seed=args.seed)
+    print(f"Base generada en {info['db_path']}: {len(info['tickers'])} tickers, "
+          f"{info['rows']} filas ({info['start_date']} a {info['end_date']})")
+
+
+if __name__ == "__main__":
+    main()
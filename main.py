@@ -1,30 +1,249 @@
 import os
 import sys
+import argparse
 import subprocess
 from dotenv import load_dotenv
 
+def run_streamlit():
+    """
+    Lanza la aplicación Streamlit.
+    """
+    # Directorio raíz del proyecto
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+
+    # Asegurar que src sea reconocible para importaciones
+    os.environ["PYTHONPATH"] = root_dir
+
+    # Ruta a la aplicación Streamlit
+    streamlit_app_path = os.path.join(root_dir, "streamlit_app", "app.py")
+
+    print("Iniciando la aplicación Streamlit...")
+    # Usar subprocess.run en lugar de os.system para mejor manejo de errores
+    subprocess.run(["streamlit", "run", streamlit_app_path], check=True)
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Construye el parser de la línea de comandos. Sin subcomando se lanza la aplicación.
+    """
+    parser = argparse.ArgumentParser(
+        description="Análisis de acciones: sin argumentos inicia la aplicación Streamlit."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    import_parser = subparsers.add_parser(
+        "import", help="Importa barras diarias desde un archivo CSV o Parquet (sin usar la API)"
+    )
+    import_parser.add_argument("path", help="Archivo a importar (.csv, .csv.gz o .parquet)")
+    import_parser.add_argument("--format", choices=["csv", "parquet"], help="Formato (por defecto según la extensión)")
+    import_parser.add_argument("--chunk-rows", type=int, default=None, help="Filas por bloque")
+    # Obligatorio si el archivo no tiene la columna raw (los exportados por la aplicación la tienen)
+    adjusted_group = import_parser.add_mutually_exclusive_group()
+    adjusted_group.add_argument(
+        "--adjusted", dest="adjusted", action="store_true", default=None,
+        help="Los precios del archivo ya están ajustados por splits y dividendos"
+    )
+    adjusted_group.add_argument(
+        "--raw", dest="adjusted", action="store_false",
+        help="Los precios del archivo no están ajustados"
+    )
+
+    export_parser = subparsers.add_parser(
+        "export", help="Exporta las barras almacenadas a un archivo CSV o Parquet"
+    )
+    export_parser.add_argument("path", help="Archivo destino (.csv, .csv.gz o .parquet)")
+    export_parser.add_argument("--format", choices=["csv", "parquet"], help="Formato (por defecto según la extensión)")
+    export_parser.add_argument("--tickers", help="Tickers separados por coma (por defecto todos)")
+    export_parser.add_argument("--start", help="Fecha mínima (YYYY-MM-DD)")
+    export_parser.add_argument("--end", help="Fecha máxima (YYYY-MM-DD)")
+    export_parser.add_argument("--chunk-rows", type=int, default=None, help="Filas por bloque")
+
+    intraday_parser = subparsers.add_parser(
+        "intraday", help="Descarga barras de un minuto y actualiza sus agregados por hora y por día"
+    )
+    intraday_parser.add_argument("ticker", help="Símbolo del ticker (ej: AAPL)")
+    intraday_parser.add_argument("--start", required=True, help="Primer día (YYYY-MM-DD)")
+    intraday_parser.add_argument("--end", required=True, help="Último día (YYYY-MM-DD)")
+
+    maintenance_parser = subparsers.add_parser(
+        "maintenance", help="Aplica la retención y libera espacio de forma incremental (apto para cron)"
+    )
+    maintenance_parser.add_argument("--retention", action="store_true", help="Aplica las reglas de RETENTION_RULES")
+    maintenance_parser.add_argument("--rules", help="Reglas de retención en lugar de RETENTION_RULES (ej: 10y,5y/90d)")
+    maintenance_parser.add_argument("--dry-run", action="store_true", help="Muestra qué se eliminaría sin eliminar")
+    maintenance_parser.add_argument("--reclaim", action="store_true", help="Libera las páginas libres con incremental_vacuum")
+    maintenance_parser.add_argument("--max-pages", type=int, default=None, help="Páginas máximas a liberar")
+    maintenance_parser.add_argument("--time-budget", type=float, default=None, help="Segundos máximos para liberar espacio")
+    maintenance_parser.add_argument("--quality", action="store_true", help="Analiza la calidad de las barras almacenadas")
+    maintenance_parser.add_argument(
+        "--refetch-issues", action="store_true",
+        help="Vuelve a descargar de la API los días con hallazgos de calidad"
+    )
+    maintenance_parser.add_argument(
+        "--corporate-actions", action="store_true",
+        help="Descarga splits y dividendos, recalcula los precios ajustados de los tickers que cambiaron "
+             "y reemplaza las barras guardadas ya ajustadas por versiones anteriores"
+    )
+    maintenance_parser.add_argument(
+        "--tickers", help="Tickers separados por coma para --corporate-actions (por defecto todos)"
+    )
+    maintenance_parser.add_argument(
+        "--enable-incremental-vacuum", action="store_true",
+        help="Conversión única de una base existente al modo incremental (ejecuta un VACUUM completo)"
+    )
+    return parser
+
+def run_command(args: argparse.Namespace):
+    """
+    Ejecuta un subcomando de la línea de comandos.
+    """
+    from src.models.storage import create_storage
+    from src.services import data_transfer
+    from src.utils import profiling
+
+    storage = create_storage()
+    chunk_rows = getattr(args, "chunk_rows", None) or data_transfer.DEFAULT_CHUNK_ROWS
+    report = lambda rows: print(f"\r{rows:,} filas procesadas", end="", flush=True)
+
+    with profiling.profile(f"cli_{args.command}"):
+        if args.command == "import":
+            result = data_transfer.import_bars(
+                storage, args.path, args.format, chunk_rows, report, adjusted=args.adjusted
+            )
+            print(f"\nImportación completa: {result['rows']:,} filas de {result['tickers']} tickers")
+        elif args.command == "export":
+            tickers = [t.strip().upper() for t in args.tickers.split(",")] if args.tickers else None
+            rows = data_transfer.export_bars(
+                storage, args.path, tickers, args.start, args.end, args.format, chunk_rows, report
+            )
+            print(f"\nExportación completa: {rows:,} filas en {args.path}")
+        elif args.command == "intraday":
+            from src.services.intraday_service import IntradayService
+            result = IntradayService().ingest(args.ticker.upper(), args.start, args.end, progress=report)
+            print(
+                f"\nDescarga completa: {result['bars']:,} barras en {result['pages']} páginas "
+                f"({result['days']} días faltantes)"
+            )
+        elif args.command == "maintenance":
+            run_maintenance(storage, args)
+
+def run_maintenance(storage, args: argparse.Namespace):
+    """
+    Ejecuta las tareas de mantenimiento pedidas.
+    """
+    from src.services import retention
+
+    if args.enable_incremental_vacuum:
+        if not hasattr(storage, "enable_incremental_vacuum"):
+            print("El backend de almacenamiento configurado no usa VACUUM")
+        else:
+            print("Convirtiendo la base al modo incremental (VACUUM completo)...")
+            storage.enable_incremental_vacuum()
+
+    if args.retention or args.rules:
+        rules = retention.parse_rules(args.rules) if args.rules else None
+        plan = retention.plan_retention(storage, rules)
+        for item in plan:
+            print(f"{item['ticker']}: {item['rows']:,} barras anteriores a {item['cutoff']} (regla {item['rule']})")
+        if not plan:
+            print("La retención no afecta a ningún ticker")
+        elif args.dry_run:
+            print("Simulación: no se eliminó ningún dato")
+        else:
+            deleted = retention.apply_retention(storage, plan)
+            print(f"Retención aplicada: {deleted:,} barras eliminadas")
+
+    if args.quality or args.refetch_issues:
+        run_quality(storage, args)
+
+    if args.corporate_actions:
+        run_corporate_actions(storage, args)
+
+    if args.reclaim:
+        freed = storage.reclaim_space(args.max_pages, args.time_budget)
+        stats = storage.get_space_stats()
+        print(
+            f"Espacio liberado: {freed / 1024:,.0f} KB "
+            f"(quedan {stats['reclaimable_bytes'] / 1024:,.0f} KB recuperables)"
+        )
+
+def run_quality(storage, args: argparse.Namespace):
+    """
+    Analiza la calidad de las barras y, si se pide, vuelve a descargar los días con hallazgos.
+    """
+    from src.services.data_quality import DataQualityService
+
+    quality = DataQualityService(storage)
+    if args.quality:
+        result = quality.scan(progress=lambda done, total: print(
+            f"\r{done:,}/{total:,} tickers revisados", end="", flush=True
+        ))
+        print(
+            f"\nAnálisis completo: {result['bars']:,} barras de {result['tickers']:,} tickers "
+            f"en {result['seconds']:.1f} s, {result['issues']:,} hallazgos"
+        )
+        for rule, count in sorted(result['by_rule'].items()):
+            print(f"  {rule}: {count:,}")
+
+    if args.refetch_issues:
+        from src.services.ticker_service import TickerService
+        result = quality.refetch(TickerService(model=storage))
+        print(f"Descarga completa: {result['ranges']} rangos, {result['bars']:,} barras recibidas")
+        for ticker, error in result['errors'].items():
+            print(f"  {ticker}: {error}")
+        if result['scan'] is not None:
+            print(f"Hallazgos restantes en los tickers descargados: {result['scan']['issues']:,}")
+
+def run_corporate_actions(storage, args: argparse.Namespace):
+    """
+    Actualiza los splits y dividendos de los tickers pedidos (o de todos los almacenados).
+    """
+    from src.services.corporate_actions import update_adjustments
+    from src.services.ticker_service import TickerService
+    from src.utils.exceptions import APIError, DatabaseError
+
+    if not storage.supports_adjusted:
+        print("El backend de almacenamiento configurado no guarda precios ajustados")
+        return
+
+    service = TickerService(model=storage)
+    tickers = [t.strip().upper() for t in args.tickers.split(",")] if args.tickers else storage.list_tickers()
+    recomputed = refetched = 0
+    for ticker in tickers:
+        try:
+            result = update_adjustments(service, ticker)
+        except (ValueError, APIError, DatabaseError) as e:
+            print(f"  {ticker}: {e}")
+            continue
+        if result['changed']:
+            recomputed += 1
+            print(
+                f"{ticker}: {result['splits']} splits, {result['dividends']} dividendos "
+                f"({result['changed']} cambios, precios ajustados recalculados)"
+            )
+        refetched += result['refetched']
+        if result['legacy']:
+            legacy = result['legacy']
+            print(f"{ticker}: barras de {legacy[0]} a {legacy[1]} descargadas sin ajustar")
+    print(
+        f"Acciones corporativas actualizadas: {len(tickers)} tickers, {recomputed} recalculados, "
+        f"{refetched:,} barras previas reemplazadas"
+    )
+
 def main():
     """
     Punto de entrada principal de la aplicación.
-    Configura el entorno y lanza la aplicación Streamlit.
+    Configura el entorno y lanza la aplicación Streamlit o ejecuta un subcomando.
     """
     try:
         # Carga variables de entorno
         load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
-        # Directorio raíz del proyecto
-        root_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        # Asegurar que src sea reconocible para importaciones
-        os.environ["PYTHONPATH"] = root_dir
-        
-        # Ruta a la aplicación Streamlit
-        streamlit_app_path = os.path.join(root_dir, "streamlit_app", "app.py")
-        
-        print("Iniciando la aplicación Streamlit...")
-        # Usar subprocess.run en lugar de os.system para mejor manejo de errores
-        subprocess.run(["streamlit", "run", streamlit_app_path], check=True)
-        
+        args = build_parser().parse_args()
+        if args.command:
+            run_command(args)
+        else:
+            run_streamlit()
+
     except FileNotFoundError:
         print("Error: No se encontró el archivo .env o la aplicación Streamlit")
         sys.exit(1)
@@ -1,24 +1,106 @@
+import json
 import requests
+import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import os
+from src.api.circuit_breaker import get_circuit_breaker
+from src.utils import metrics
 from src.utils.exceptions import (
     APIError, APIRateLimitError, APIConnectionError,
     InvalidDataError
 )
 
+try:
+    # Opcional: decodifica las respuestas grandes (ej: historias completas) varias veces más rápido
+    import orjson
+except ImportError:
+    orjson = None
+
+# Intervalos soportados por la API de agregados
+TIMESPANS = ('minute', 'hour', 'day', 'week', 'month', 'quarter', 'year')
+
+# Barras máximas por página de la API de agregados (por defecto devuelve sólo 5000)
+AGGS_PAGE_LIMIT = 50000
+
+# Resultados máximos por página de los endpoints de splits y dividendos
+CORPORATE_ACTIONS_PAGE_LIMIT = 1000
+
+# Timeouts en segundos: conexión (común) y lectura por endpoint. Sin ellos un servidor
+# lento deja el request (y la página que lo espera) colgado indefinidamente
+API_CONNECT_TIMEOUT = float(os.getenv("POLYGON_CONNECT_TIMEOUT", "3.05") or 3.05)
+API_READ_TIMEOUTS = {
+    "aggs": float(os.getenv("POLYGON_AGGS_TIMEOUT", "15") or 15),
+    "reference": float(os.getenv("POLYGON_REFERENCE_TIMEOUT", "5") or 5),
+}
+
+def decode_json(content: bytes) -> Any:
+    """
+    Decodifica el cuerpo JSON de una respuesta, con orjson si está instalado
+
+    Args:
+        content (bytes): Cuerpo de la respuesta
+
+    Raises:
+        ValueError: Si el cuerpo no es JSON válido (orjson.JSONDecodeError hereda de ValueError)
+    """
+    if orjson is None:
+        return json.loads(content)
+    return orjson.loads(content)
+
 class FinanceAPI:
     """
     Cliente para la API de Polygon.io
     """
     def __init__(self):
-        self.base_url = "https://api.polygon.io/v2"
+        # Permite apuntar el cliente a otro host (ej: un servidor local para benchmarks)
+        self.host = os.getenv("POLYGON_API_URL", "https://api.polygon.io").rstrip("/")
+        self.base_url = f"{self.host}/v2"
         # La API key debería venir de variables de entorno
         
         self.api_key = os.getenv("POLYGON_API_KEY")
         if not self.api_key:
             raise APIError("POLYGON_API_KEY no está configurada en las variables de entorno")
 
+    def _get(self, url: str, endpoint: str) -> requests.Response:
+        """
+        Realiza un GET a la API con el timeout del endpoint, pasando por su circuit
+        breaker y registrando latencia, código de estado y bytes recibidos
+        
+        Args:
+            url (str): URL completa del request
+            endpoint (str): Nombre lógico del endpoint para las métricas (ej: aggs)
+            
+        Returns:
+            requests.Response: Respuesta de la API
+            
+        Raises:
+            APICircuitOpenError: Si el circuito del endpoint está abierto
+        """
+        breaker = get_circuit_breaker(endpoint)
+        breaker.allow()
+        timeout = (API_CONNECT_TIMEOUT, API_READ_TIMEOUTS.get(endpoint, API_READ_TIMEOUTS["aggs"]))
+        
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = requests.get(url, timeout=timeout)
+            status = str(response.status_code)
+            if metrics.is_enabled():
+                metrics.inc("api_response_bytes_total", len(response.content), endpoint=endpoint)
+            return response
+        finally:
+            # Los 429 indican que el servidor responde: sólo cuentan como falla los
+            # timeouts, errores de conexión y errores 5xx
+            if status == "error" or status.startswith("5"):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if metrics.is_enabled():
+                metrics.observe("api_request_duration_seconds", time.perf_counter() - start,
+                                endpoint=endpoint, status=status)
+                metrics.inc("api_requests_total", endpoint=endpoint, status=status)
+
     def get_ticker_details(self, ticker: str) -> Dict[str, Any]:
         """
         Obtiene los detalles de un ticker desde Polygon.io
@@ -36,16 +118,18 @@ class FinanceAPI:
             InvalidDataError: Si la respuesta no tiene el formato esperado
         """
         try:
-            url = f"https://api.polygon.io/v3/reference/tickers/{ticker}?apiKey={self.api_key}"
-            
-            response = requests.get(url)
-            response.raise_for_status()
+            url = f"{self.host}/v3/reference/tickers/{ticker}?apiKey={self.api_key}"
             
-            data = response.json()
+            response = self._get(url, "reference")
             
+            # Verificar el límite antes de raise_for_status para no confundirlo con un error de conexión
             if response.status_code == 429:
                 raise APIRateLimitError(f"Límite de API excedido para {ticker}")
                 
+            response.raise_for_status()
+            
+            data = decode_json(response.content)
+            
             if data.get('status') == 'ERROR':
                 raise APIError(f"Error de API para {ticker}: {data.get('error')}")
                 
@@ -54,6 +138,8 @@ class FinanceAPI:
                 
             return data
                 
+        except requests.exceptions.Timeout as e:
+            raise APIConnectionError(f"La API no respondió a tiempo: {str(e)}")
         except requests.exceptions.RequestException as e:
             raise APIConnectionError(f"Error de conexión con la API: {str(e)}")
         except ValueError as e:
@@ -63,14 +149,25 @@ class FinanceAPI:
         except Exception as e:
             raise APIError(f"Error inesperado al obtener detalles de {ticker}: {str(e)}")
 
-    def get_stock_data(self, ticker: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    def get_stock_data(self,
+                       ticker: str,
+                       start_date: str,
+                       end_date: str,
+                       multiplier: int = 1,
+                       timespan: str = "day",
+                       adjusted: bool = True) -> Dict[str, Any]:
         """
-        Obtiene datos históricos de acciones desde Polygon.io
+        Obtiene datos históricos de acciones desde Polygon.io, siguiendo todas las
+        páginas de la respuesta
         
         Args:
             ticker (str): Símbolo del ticker (ej: AAPL)
             start_date (str): Fecha de inicio en formato YYYY-MM-DD
             end_date (str): Fecha de fin en formato YYYY-MM-DD
+            multiplier (int): Cantidad de unidades de `timespan` por barra
+            timespan (str): Unidad de cada barra (minute, hour, day, week, month, quarter o year)
+            adjusted (bool): Precios ajustados por splits (False para los almacenamientos
+                             que materializan el ajuste localmente)
             
         Returns:
             Dict[str, Any]: Datos históricos de la acción
@@ -81,31 +178,88 @@ class FinanceAPI:
             APIError: Si hay otros errores de la API
             InvalidDataError: Si la respuesta no tiene el formato esperado
         """
+        data = self.get_aggregates_page(ticker, start_date, end_date, multiplier, timespan, adjusted=adjusted)
+        next_url = data.pop('next_url', None)
+        while next_url:
+            page = self.get_aggregates_page(ticker, start_date, end_date, multiplier, timespan, next_url)
+            data['results'].extend(page['results'])
+            next_url = page.get('next_url')
+        
+        if not data['results']:
+            raise InvalidDataError(f"No se encontraron datos para {ticker} en el período {start_date} a {end_date}")
+        data['resultsCount'] = len(data['results'])
+        return data
+
+    def get_aggregates_page(self,
+                            ticker: str,
+                            start_date: str,
+                            end_date: str,
+                            multiplier: int = 1,
+                            timespan: str = "day",
+                            next_url: Optional[str] = None,
+                            adjusted: bool = True) -> Dict[str, Any]:
+        """
+        Obtiene una página de la API de agregados. Cada página trae hasta
+        AGGS_PAGE_LIMIT barras; si hay más, la respuesta incluye `next_url`.
+        
+        Args:
+            ticker (str): Símbolo del ticker (ej: AAPL)
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            multiplier (int): Cantidad de unidades de `timespan` por barra
+            timespan (str): Unidad de cada barra (minute, hour, day, week, month, quarter o year)
+            next_url (str, optional): `next_url` de la página anterior
+            adjusted (bool): Precios ajustados por splits (las páginas siguientes lo
+                             heredan de `next_url`)
+            
+        Returns:
+            Dict[str, Any]: Página de resultados (lista vacía si el período no tiene datos)
+            
+        Raises:
+            APIRateLimitError: Si se excede el límite de la API
+            APIConnectionError: Si hay problemas de conexión
+            APIError: Si hay otros errores de la API
+            InvalidDataError: Si la respuesta no tiene el formato esperado
+        """
+        if timespan not in TIMESPANS:
+            raise APIError(f"Intervalo no soportado: {timespan}. Use uno de: {', '.join(TIMESPANS)}")
+        if int(multiplier) < 1:
+            raise APIError("El multiplicador del intervalo debe ser mayor o igual a 1")
+            
         try:
-            # Construir URL
-            endpoint = f"/aggs/ticker/{ticker}/range/1/day/{start_date}/{end_date}"
-            url = f"{self.base_url}{endpoint}?apiKey={self.api_key}"
+            if next_url:
+                # next_url no incluye la API key
+                separator = '&' if '?' in next_url else '?'
+                url = f"{next_url}{separator}apiKey={self.api_key}"
+            else:
+                # Construir URL
+                endpoint = f"/aggs/ticker/{ticker}/range/{int(multiplier)}/{timespan}/{start_date}/{end_date}"
+                url = (f"{self.base_url}{endpoint}?adjusted={'true' if adjusted else 'false'}"
+                       f"&sort=asc&limit={AGGS_PAGE_LIMIT}"
+                       f"&apiKey={self.api_key}")
             
             # Realizar request
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            data = response.json()
+            response = self._get(url, "aggs")
             
+            # Verificar el límite antes de raise_for_status para no confundirlo con un error de conexión
             if response.status_code == 429:
                 raise APIRateLimitError(f"Límite de API excedido para {ticker}")
                 
+            response.raise_for_status()
+            
+            data = decode_json(response.content)
+            
             if data.get('status') == 'ERROR':
                 raise APIError(f"Error de API para {ticker}: {data.get('error')}")
                 
-            if not data.get('results'):
-                raise InvalidDataError(f"No se encontraron datos para {ticker} en el período {start_date} a {end_date}")
-                
+            data.setdefault('results', [])
             if not isinstance(data['results'], list):
                 raise InvalidDataError(f"Formato de respuesta inválido para {ticker}")
                 
             return data
                 
+        except requests.exceptions.Timeout as e:
+            raise APIConnectionError(f"La API no respondió a tiempo: {str(e)}")
         except requests.exceptions.RequestException as e:
             raise APIConnectionError(f"Error de conexión con la API: {str(e)}")
         except ValueError as e:
@@ -114,3 +268,86 @@ class FinanceAPI:
             raise
         except Exception as e:
             raise APIError(f"Error inesperado al obtener datos de {ticker}: {str(e)}")
+
+    def get_splits(self, ticker: str) -> List[Dict[str, Any]]:
+        """
+        Obtiene todos los splits de un ticker desde Polygon.io
+
+        Args:
+            ticker (str): Símbolo del ticker (ej: AAPL)
+
+        Returns:
+            List[Dict[str, Any]]: Splits con execution_date, split_from y split_to
+
+        Raises:
+            APIRateLimitError: Si se excede el límite de la API
+            APIConnectionError: Si hay problemas de conexión
+            APIError: Si hay otros errores de la API
+            InvalidDataError: Si la respuesta no tiene el formato esperado
+        """
+        return self._get_reference_list("splits", ticker)
+
+    def get_dividends(self, ticker: str) -> List[Dict[str, Any]]:
+        """
+        Obtiene todos los dividendos en efectivo de un ticker desde Polygon.io
+
+        Args:
+            ticker (str): Símbolo del ticker (ej: AAPL)
+
+        Returns:
+            List[Dict[str, Any]]: Dividendos con ex_dividend_date y cash_amount, entre otros campos
+
+        Raises:
+            APIRateLimitError: Si se excede el límite de la API
+            APIConnectionError: Si hay problemas de conexión
+            APIError: Si hay otros errores de la API
+            InvalidDataError: Si la respuesta no tiene el formato esperado
+        """
+        return self._get_reference_list("dividends", ticker)
+
+    def _get_reference_list(self, kind: str, ticker: str) -> List[Dict[str, Any]]:
+        """
+        Obtiene todas las páginas de un endpoint de referencia que lista resultados
+        de un ticker (splits o dividendos)
+        """
+        url = (f"{self.host}/v3/reference/{kind}?ticker={ticker}"
+               f"&limit={CORPORATE_ACTIONS_PAGE_LIMIT}&apiKey={self.api_key}")
+        results: List[Dict[str, Any]] = []
+        try:
+            while url:
+                response = self._get(url, "reference")
+
+                # Verificar el límite antes de raise_for_status para no confundirlo con un error de conexión
+                if response.status_code == 429:
+                    raise APIRateLimitError(f"Límite de API excedido para {ticker}")
+
+                response.raise_for_status()
+
+                data = decode_json(response.content)
+
+                if not isinstance(data, dict):
+                    raise InvalidDataError(f"Respuesta inválida de la API para {ticker}")
+
+                if data.get('status') == 'ERROR':
+                    raise APIError(f"Error de API para {ticker}: {data.get('error')}")
+
+                page = data.get('results') or []
+                if not isinstance(page, list):
+                    raise InvalidDataError(f"Formato de respuesta inválido para {ticker}")
+                results.extend(page)
+
+                # next_url no incluye la API key
+                next_url = data.get('next_url')
+                url = f"{next_url}{'&' if '?' in next_url else '?'}apiKey={self.api_key}" if next_url else None
+            return results
+
+        except requests.exceptions.Timeout as e:
+            raise APIConnectionError(f"La API no respondió a tiempo: {str(e)}")
+        except requests.exceptions.RequestException as e:
+            raise APIConnectionError(f"Error de conexión con la API: {str(e)}")
+        except ValueError as e:
+            raise InvalidDataError(f"Error al procesar la respuesta JSON: {str(e)}")
+        except (APIError, APIRateLimitError, APIConnectionError, InvalidDataError):
+            raise
+        except Exception as e:
+            raise APIError(f"Error inesperado al obtener {kind} de {ticker}: {str(e)}")
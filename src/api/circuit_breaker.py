@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from typing import Dict
+
+from src.utils import metrics
+from src.utils.exceptions import APICircuitOpenError
+
+# Fallas consecutivas (timeouts, errores de conexión o 5xx) que abren el circuito
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("POLYGON_CIRCUIT_FAILURES", "5") or 5)
+# Segundos que el circuito permanece abierto antes de dejar pasar un request de prueba
+CIRCUIT_RESET_SECONDS = float(os.getenv("POLYGON_CIRCUIT_RESET_SECONDS", "30") or 30)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de un endpoint de la API. Tras `failure_threshold` fallas seguidas
+    el circuito se abre y los requests fallan de inmediato con APICircuitOpenError, en
+    lugar de ocupar hilos esperando a un servidor caído. Pasados `reset_timeout`
+    segundos se deja pasar un único request de prueba (semiabierto): si responde el
+    circuito se cierra y si falla vuelve a abrirse.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 name: str,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def is_open(self) -> bool:
+        """
+        Indica si un request fallaría ahora sin llegar a la API (circuito abierto y
+        todavía sin cumplir la espera, o con el request de prueba en curso)
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                return time.monotonic() - self._opened_at < self.reset_timeout
+            return self._state == self.HALF_OPEN
+
+    def retry_in(self) -> float:
+        """
+        Segundos que faltan para el próximo request de prueba (0 si el circuito está cerrado)
+        """
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> None:
+        """
+        Verifica que se pueda hacer un request
+
+        Raises:
+            APICircuitOpenError: Si el circuito está abierto
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._transition(self.HALF_OPEN)
+                return
+            wait = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        metrics.inc("api_circuit_rejected_total", endpoint=self.name)
+        raise APICircuitOpenError(
+            f"La API de Polygon.io no responde; se reintentará en {wait:.0f} segundos"
+        )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self._state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        metrics.inc("api_circuit_transitions_total", endpoint=self.name, state=state)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    """
+    Obtiene el circuit breaker de un endpoint, compartido por todos los clientes del proceso
+
+    Args:
+        endpoint (str): Nombre lógico del endpoint (ej: aggs)
+
+    Returns:
+        CircuitBreaker: Circuit breaker del endpoint
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(endpoint)
+        return breaker
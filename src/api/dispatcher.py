@@ -0,0 +1,342 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from src.utils import metrics
+from src.utils.exceptions import APIRateLimitError, APIQueueTimeoutError
+
+# Espera máxima por el resultado de un request, además de su max_wait en la cola. Es un
+# tope de seguridad: un Future que no se resuelve no puede bloquear al llamador para siempre
+RESULT_TIMEOUT = float(os.getenv("POLYGON_RESULT_TIMEOUT", "900") or 900)
+
+
+class Priority(IntEnum):
+    """
+    Clases de prioridad de los requests a la API (menor valor = mayor prioridad)
+    """
+    INTERACTIVE = 0  # Consultas de un usuario esperando en la página
+    SCHEDULED = 1    # Actualizaciones programadas
+    BACKFILL = 2     # Cargas masivas y precargas en segundo plano
+
+
+class _Request:
+    __slots__ = ('key', 'fn', 'priority', 'deadline', 'seq', 'future', 'retries')
+
+    def __init__(self, key: Hashable, fn: Callable[[], Any], priority: Priority,
+                 deadline: Optional[float], seq: int):
+        self.key = key
+        self.fn = fn
+        self.priority = priority
+        self.deadline = deadline
+        self.seq = seq
+        self.future: Future = Future()
+        self.retries = 0
+
+
+class APIDispatcher:
+    """
+    Cola central de requests a la API de Polygon.io. Inicia los requests respetando
+    la cuota del plan (requests por minuto), en orden de prioridad y agrupando los
+    requests idénticos que todavía están pendientes. Si la cuota lo permite, hasta
+    `max_concurrency` requests esperan su respuesta a la vez.
+    """
+    def __init__(self, requests_per_minute: float = 5, max_retries: int = 2, max_concurrency: int = 1):
+        """
+        Args:
+            requests_per_minute (float): Cuota del plan; 0 deshabilita el límite
+            max_retries (int): Reintentos ante un error 429 antes de propagarlo
+            max_concurrency (int): Requests en curso a la vez como máximo
+        """
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self.max_retries = max_retries
+        self.max_concurrency = max(1, max_concurrency)
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []
+        self._pending: Dict[Hashable, _Request] = {}
+        # Requests que ya empezaron (incluidos los reencolados por un 429)
+        self._executing: Dict[Hashable, _Request] = {}
+        self._seq = itertools.count()
+        self._next_slot = 0.0
+        self._running = False
+        self._worker: Optional[threading.Thread] = None
+
+    def submit(self,
+               key: Hashable,
+               fn: Callable[[], Any],
+               priority: Priority = Priority.INTERACTIVE,
+               max_wait: Optional[float] = None) -> Future:
+        """
+        Encola un request. Si ya hay uno pendiente con la misma clave se reutiliza
+        (elevando su prioridad si corresponde) y se retorna el mismo Future; si hay
+        uno en ejecución, se retorna su Future.
+
+        Args:
+            key (Hashable): Identifica el request (ej: ("aggs", ticker, inicio, fin))
+            fn (Callable[[], Any]): Función que realiza el request
+            priority (Priority): Clase de prioridad
+            max_wait (float, optional): Segundos máximos de espera en la cola
+
+        Returns:
+            Future: Resultado del request
+
+        Raises:
+            APIQueueTimeoutError: Si la espera estimada ya supera `max_wait`
+        """
+        deadline = time.monotonic() + max_wait if max_wait is not None else None
+        with self._cond:
+            request = self._pending.get(key)
+            if request is not None:
+                metrics.inc("api_dispatch_total", outcome="deduplicated", priority=priority.name.lower())
+                if deadline is None or (request.deadline is not None and deadline > request.deadline):
+                    request.deadline = deadline
+                if priority < request.priority:
+                    request.priority = priority
+                    heapq.heappush(self._heap, (priority, request.seq, request))
+                    self._cond.notify_all()
+                return request.future
+
+            request = self._executing.get(key)
+            if request is not None:
+                metrics.inc("api_dispatch_total", outcome="deduplicated", priority=priority.name.lower())
+                return request.future
+
+            request = _Request(key, fn, priority, deadline, next(self._seq))
+            wait = self._estimate_locked(priority, request.seq)
+            if max_wait is not None and wait > max_wait:
+                metrics.inc("api_dispatch_total", outcome="rejected", priority=priority.name.lower())
+                raise APIQueueTimeoutError(
+                    f"La espera estimada ({wait:.1f} s) supera el máximo permitido ({max_wait:.1f} s)"
+                )
+            self._pending[key] = request
+            heapq.heappush(self._heap, (priority, request.seq, request))
+            self._ensure_worker()
+            self._cond.notify_all()
+            return request.future
+
+    def estimate_wait(self, key: Hashable) -> float:
+        """
+        Estima cuántos segundos faltan para que se ejecute un request pendiente
+
+        Args:
+            key (Hashable): Clave del request
+
+        Returns:
+            float: Segundos estimados (0 si no está en la cola)
+        """
+        with self._cond:
+            request = self._pending.get(key)
+            if request is None:
+                return 0.0
+            return self._estimate_locked(request.priority, request.seq)
+
+    def promote(self, key: Hashable, priority: Priority) -> bool:
+        """
+        Eleva la prioridad de un request pendiente (ej: una precarga en segundo plano
+        que un usuario ahora espera)
+
+        Args:
+            key (Hashable): Clave del request
+            priority (Priority): Nueva clase de prioridad
+
+        Returns:
+            bool: True si el request estaba en la cola con menor prioridad
+        """
+        with self._cond:
+            request = self._pending.get(key)
+            if request is None or request.priority <= priority:
+                return False
+            request.priority = priority
+            heapq.heappush(self._heap, (priority, request.seq, request))
+            self._cond.notify_all()
+            return True
+
+    def cancel(self, key: Hashable, priority: Priority = Priority.BACKFILL) -> bool:
+        """
+        Quita de la cola un request que todavía no empezó, siempre que su prioridad
+        no haya sido elevada por encima de `priority` (otro llamador lo necesita)
+
+        Args:
+            key (Hashable): Clave del request
+            priority (Priority): Prioridad máxima de los requests que se pueden cancelar
+
+        Returns:
+            bool: True si el request se canceló
+        """
+        with self._cond:
+            request = self._pending.get(key)
+            # Los reencolados por un 429 ya están en ejecución
+            if request is None or request.priority < priority or request.future.running():
+                return False
+            del self._pending[key]
+            request.future.cancel()
+            metrics.inc("api_dispatch_total", outcome="cancelled", priority=request.priority.name.lower())
+            return True
+
+    def queue_size(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _estimate_locked(self, priority: Priority, seq: int) -> float:
+        ahead = sum(
+            1 for r in self._pending.values()
+            if (r.priority, r.seq) < (priority, seq)
+        )
+        until_slot = max(0.0, self._next_slot - time.monotonic())
+        return until_slot + ahead * self.interval
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._running = True
+            self._worker = threading.Thread(target=self._run, name="api-dispatcher", daemon=True)
+            self._worker.start()
+
+    def _expire_locked(self, now: float) -> None:
+        """
+        Cancela los requests cuyo plazo venció mientras esperaban en la cola
+        """
+        for key, request in list(self._pending.items()):
+            if request.deadline is not None and request.deadline <= now:
+                del self._pending[key]
+                metrics.inc("api_dispatch_total", outcome="expired", priority=request.priority.name.lower())
+                if self._claim(request):
+                    request.future.set_exception(APIQueueTimeoutError(
+                        "El request se canceló porque venció su plazo de espera en la cola"
+                    ))
+
+    @staticmethod
+    def _claim(request: _Request) -> bool:
+        """
+        Marca el Future como en ejecución. Retorna False si el llamador lo canceló.
+        Los requests reencolados por un 429 ya estaban en ejecución.
+        """
+        if request.future.running():
+            return True
+        return request.future.set_running_or_notify_cancel()
+
+    def _next_request_locked(self) -> Optional[_Request]:
+        while self._heap:
+            priority, seq, request = heapq.heappop(self._heap)
+            # Entradas obsoletas: ya ejecutadas, vencidas o con prioridad elevada luego
+            if self._pending.get(request.key) is not request or priority != request.priority:
+                continue
+            del self._pending[request.key]
+            self._executing[request.key] = request
+            return request
+        return None
+
+    def _run(self) -> None:
+        while self._running:
+            with self._cond:
+                now = time.monotonic()
+                self._expire_locked(now)
+                if not self._pending:
+                    self._cond.wait(timeout=1.0)
+                    continue
+                if self._in_flight >= self.max_concurrency:
+                    self._cond.wait(timeout=1.0)
+                    continue
+                if self._next_slot > now:
+                    # Se vuelve a evaluar al despertar por si llegó algo más prioritario
+                    self._cond.wait(timeout=self._next_slot - now)
+                    continue
+                request = self._next_request_locked()
+                if request is None:
+                    continue
+                if not self._claim(request):
+                    self._executing.pop(request.key, None)
+                    continue
+                self._next_slot = now + self.interval
+                self._in_flight += 1
+
+            metrics.inc("api_dispatch_total", outcome="executed", priority=request.priority.name.lower())
+            if self.max_concurrency == 1:
+                self._execute(request)
+            else:
+                threading.Thread(target=self._execute, args=(request,), name="api-request", daemon=True).start()
+
+    def _execute(self, request: _Request) -> None:
+        """
+        Ejecuta un request y resuelve su Future (o lo reencola ante un 429)
+        """
+        try:
+            result = request.fn()
+        except APIRateLimitError as e:
+            if request.retries < self.max_retries:
+                self._retry(request)
+            else:
+                request.future.set_exception(e)
+        except BaseException as e:
+            request.future.set_exception(e)
+        else:
+            request.future.set_result(result)
+        finally:
+            with self._cond:
+                if self._executing.get(request.key) is request and request.future.done():
+                    del self._executing[request.key]
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def _retry(self, request: _Request) -> None:
+        """
+        Reencola un request rechazado por la API (429), esperando un intervalo completo de cuota
+        """
+        metrics.inc("api_retries_total", priority=request.priority.name.lower())
+        with self._cond:
+            request.retries += 1
+            self._next_slot = max(self._next_slot, time.monotonic() + max(self.interval, 1.0))
+            if self._executing.get(request.key) is request:
+                del self._executing[request.key]
+            other = self._pending.get(request.key)
+            if other is not None and other is not request:
+                # Otro request con la misma clave se encoló mientras éste se ejecutaba: se
+                # unen en el reencolado (con la mayor prioridad) y ambos Futures se resuelven
+                request.priority = min(request.priority, other.priority)
+                request.deadline = None if request.deadline is None or other.deadline is None \
+                    else max(request.deadline, other.deadline)
+                request.future.add_done_callback(lambda done, other=other: self._copy_result(done, other))
+            # El Future ya está en ejecución; se reencola con el mismo Future
+            self._pending[request.key] = request
+            heapq.heappush(self._heap, (request.priority, request.seq, request))
+            self._cond.notify_all()
+
+    def _copy_result(self, source: Future, request: _Request) -> None:
+        """
+        Resuelve el Future de un request unido a otro con el resultado de éste
+        """
+        if not self._claim(request):
+            return
+        if source.cancelled():
+            request.future.set_exception(APIQueueTimeoutError("El request se canceló en la cola"))
+        elif source.exception() is not None:
+            request.future.set_exception(source.exception())
+        else:
+            request.future.set_result(source.result())
+
+
+_dispatcher: Optional[APIDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> APIDispatcher:
+    """
+    Obtiene la cola de requests del proceso, creándola con la cuota configurada
+    en POLYGON_REQUESTS_PER_MINUTE (5 por defecto, el plan gratuito) y hasta
+    POLYGON_MAX_CONCURRENCY requests en curso a la vez
+
+    Returns:
+        APIDispatcher: Cola compartida por todas las sesiones
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = APIDispatcher(
+                float(os.getenv("POLYGON_REQUESTS_PER_MINUTE", "5") or 0),
+                max_concurrency=int(os.getenv("POLYGON_MAX_CONCURRENCY", "8") or 1)
+            )
+        return _dispatcher
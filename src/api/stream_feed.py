@@ -0,0 +1,279 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils import metrics
+from src.utils.exceptions import APIError, APIConnectionError, DataValidationError
+
+try:
+    from websockets.sync.client import connect as ws_connect
+except ImportError:
+    ws_connect = None
+
+# Endpoint de trades en tiempo real (wss://delayed.polygon.io/stocks para el feed demorado)
+POLYGON_WS_URL = os.getenv("POLYGON_WS_URL", "wss://socket.polygon.io/stocks")
+# Feed por defecto de la vista en vivo: polygon, simulated o replay:<archivo.csv>
+QUOTE_FEED = os.getenv("QUOTE_FEED", "polygon")
+
+# (símbolo, timestamp en ms, precio, tamaño)
+Tick = Tuple[str, int, float, float]
+TickHandler = Callable[[List[Tick]], None]
+
+
+class QuoteFeed(ABC):
+    """
+    Fuente de ticks en vivo. `run` se ejecuta en un hilo propio y entrega los ticks
+    en lotes a `on_ticks` hasta que se activa `stop`. Los símbolos se pueden agregar
+    y quitar mientras el feed está corriendo.
+    """
+    name = "feed"
+
+    def __init__(self):
+        self.status = "detenido"
+        self._symbols: Set[str] = set()
+        self._new_symbols: Set[str] = set()
+        self._removed_symbols: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, symbols: Iterable[str]) -> None:
+        """
+        Agrega símbolos a la suscripción
+        """
+        with self._lock:
+            new = set(symbols) - self._symbols
+            self._symbols |= new
+            self._new_symbols |= new
+            self._removed_symbols -= new
+
+    def unsubscribe(self, symbols: Iterable[str]) -> None:
+        """
+        Quita símbolos de la suscripción
+        """
+        with self._lock:
+            removed = set(symbols) & self._symbols
+            self._symbols -= removed
+            self._new_symbols -= removed
+            self._removed_symbols |= removed
+
+    @property
+    def symbols(self) -> Set[str]:
+        with self._lock:
+            return set(self._symbols)
+
+    def _take_new_symbols(self) -> Set[str]:
+        with self._lock:
+            new, self._new_symbols = self._new_symbols, set()
+            return new
+
+    def _take_removed_symbols(self) -> Set[str]:
+        with self._lock:
+            removed, self._removed_symbols = self._removed_symbols, set()
+            return removed
+
+    @abstractmethod
+    def run(self, on_ticks: TickHandler, stop: threading.Event) -> None:
+        """
+        Produce ticks hasta que `stop` se active
+        """
+
+
+class PolygonWebSocketFeed(QuoteFeed):
+    """
+    Trades en tiempo real del WebSocket de Polygon.io (canal T.<símbolo>). Ante un
+    corte de red se reconecta con espera exponencial y vuelve a suscribir los símbolos.
+    """
+    name = "polygon"
+
+    def __init__(self, api_key: Optional[str] = None, url: str = POLYGON_WS_URL, max_backoff: float = 30.0):
+        """
+        Args:
+            api_key (str, optional): API key (por defecto POLYGON_API_KEY)
+            url (str): Endpoint del WebSocket
+            max_backoff (float): Espera máxima en segundos entre reconexiones
+
+        Raises:
+            APIError: Si falta la API key o la librería websockets
+        """
+        super().__init__()
+        if ws_connect is None:
+            raise APIError("El feed de Polygon.io requiere la librería websockets (pip install websockets)")
+        self.api_key = api_key or os.getenv("POLYGON_API_KEY")
+        if not self.api_key:
+            raise APIError("POLYGON_API_KEY no está configurada en las variables de entorno")
+        self.url = url
+        self.max_backoff = max_backoff
+
+    def _subscribe(self, ws, symbols: Set[str], action: str = 'subscribe') -> None:
+        if symbols:
+            ws.send(json.dumps({'action': action, 'params': ','.join(f"T.{s}" for s in sorted(symbols))}))
+
+    def _authenticate(self, ws) -> None:
+        """
+        Envía la API key y espera la confirmación
+
+        Raises:
+            APIError: Si la API rechaza la autenticación (no tiene sentido reintentar)
+        """
+        ws.send(json.dumps({'action': 'auth', 'params': self.api_key}))
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            for event in json.loads(ws.recv(timeout=10)):
+                if event.get('ev') != 'status':
+                    continue
+                if event.get('status') == 'auth_success':
+                    return
+                if event.get('status') == 'auth_failed':
+                    raise APIError(f"Autenticación rechazada por el WebSocket de Polygon.io: {event.get('message')}")
+        raise APIConnectionError("El WebSocket de Polygon.io no confirmó la autenticación")
+
+    def run(self, on_ticks: TickHandler, stop: threading.Event) -> None:
+        backoff = 1.0
+        while not stop.is_set():
+            try:
+                self.status = "conectando"
+                with ws_connect(self.url, open_timeout=10) as ws:
+                    self._authenticate(ws)
+                    self._take_new_symbols()
+                    self._take_removed_symbols()
+                    self._subscribe(ws, self.symbols)
+                    self.status = "conectado"
+                    backoff = 1.0
+                    while not stop.is_set():
+                        self._subscribe(ws, self._take_removed_symbols(), 'unsubscribe')
+                        self._subscribe(ws, self._take_new_symbols())
+                        try:
+                            raw = ws.recv(timeout=1.0)
+                        except TimeoutError:
+                            continue
+                        ticks = [
+                            (e['sym'], int(e['t']), float(e['p']), float(e.get('s', 0)))
+                            for e in json.loads(raw) if e.get('ev') == 'T'
+                        ]
+                        if ticks:
+                            on_ticks(ticks)
+            except APIError as e:
+                if not isinstance(e, APIConnectionError):
+                    self.status = f"error: {e}"
+                    return
+                self.status = f"reconectando en {backoff:.0f} s: {e}"
+            except Exception as e:
+                # Errores de red: se reintenta con espera exponencial
+                self.status = f"reconectando en {backoff:.0f} s: {e}"
+            metrics.inc("stream_reconnects_total", feed=self.name)
+            stop.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+        self.status = "detenido"
+
+
+class SimulatedFeed(QuoteFeed):
+    """
+    Ticks sintéticos (caminata aleatoria por símbolo) para probar la vista en vivo
+    sin conexión ni API key
+    """
+    name = "simulated"
+
+    def __init__(self, ticks_per_second: float = 20.0, seed: int = 0):
+        super().__init__()
+        self.ticks_per_second = ticks_per_second
+        self.seed = seed
+        self._prices = {}
+
+    def run(self, on_ticks: TickHandler, stop: threading.Event) -> None:
+        rng = np.random.default_rng(self.seed)
+        interval = 1.0 / self.ticks_per_second
+        self.status = "conectado"
+        while not stop.wait(interval):
+            now = int(time.time() * 1000)
+            ticks = []
+            for symbol in sorted(self.symbols):
+                price = self._prices.get(symbol, 100.0) * float(np.exp(rng.normal(0, 0.0005)))
+                self._prices[symbol] = price
+                ticks.append((symbol, now, round(price, 4), float(rng.integers(1, 500))))
+            if ticks:
+                on_ticks(ticks)
+        self.status = "detenido"
+
+
+class ReplayFeed(QuoteFeed):
+    """
+    Reproduce ticks grabados en un CSV (columnas symbol, timestamp en ms, price y size)
+    respetando los intervalos originales (escalados por `speed`) y con timestamps
+    desplazados al momento actual. Al terminar vuelve a empezar.
+    """
+    name = "replay"
+
+    def __init__(self, path: str, speed: float = 1.0):
+        """
+        Args:
+            path (str): Archivo CSV de ticks
+            speed (float): Factor de velocidad (2 reproduce al doble)
+
+        Raises:
+            DataValidationError: Si el archivo no existe o le faltan columnas
+        """
+        super().__init__()
+        if not os.path.exists(path):
+            raise DataValidationError(f"No existe el archivo de ticks {path}")
+        ticks = pd.read_csv(path)
+        ticks.columns = [str(c).strip().lower() for c in ticks.columns]
+        missing = [c for c in ('symbol', 'timestamp', 'price') if c not in ticks.columns]
+        if missing:
+            raise DataValidationError(f"Faltan columnas en el archivo de ticks: {', '.join(missing)}")
+        if 'size' not in ticks.columns:
+            ticks['size'] = 0
+        self.ticks = ticks.sort_values('timestamp', kind='stable').reset_index(drop=True)
+        self.speed = speed
+
+    def run(self, on_ticks: TickHandler, stop: threading.Event) -> None:
+        symbols = self.ticks['symbol'].astype(str).str.upper().to_numpy()
+        ts = self.ticks['timestamp'].to_numpy(dtype=np.int64)
+        price = self.ticks['price'].to_numpy(dtype=np.float64)
+        size = self.ticks['size'].to_numpy(dtype=np.float64)
+        self.status = "conectado"
+        while not stop.is_set() and len(ts):
+            started = time.monotonic()
+            shift = int(time.time() * 1000) - int(ts[0])
+            i = 0
+            while i < len(ts) and not stop.is_set():
+                # Se entrega de una vez todo lo que ya debería haber llegado
+                elapsed_ms = (time.monotonic() - started) * 1000 * self.speed
+                j = int(np.searchsorted(ts, ts[0] + elapsed_ms, side='right'))
+                if j > i:
+                    subscribed = self.symbols
+                    on_ticks([
+                        (symbols[k], int(ts[k] + shift), float(price[k]), float(size[k]))
+                        for k in range(i, j) if symbols[k] in subscribed
+                    ])
+                    i = j
+                stop.wait(0.05)
+        self.status = "detenido"
+
+
+def create_feed(spec: Optional[str] = None) -> QuoteFeed:
+    """
+    Crea el feed indicado: "polygon", "simulated" o "replay:<archivo.csv>"
+
+    Args:
+        spec (str, optional): Feed a crear (por defecto QUOTE_FEED)
+
+    Returns:
+        QuoteFeed: Feed sin iniciar
+
+    Raises:
+        APIError: Si el feed de Polygon.io no puede crearse
+        DataValidationError: Si el feed es desconocido o el archivo de reproducción es inválido
+    """
+    spec = spec or QUOTE_FEED
+    if spec == "polygon":
+        return PolygonWebSocketFeed()
+    if spec == "simulated":
+        return SimulatedFeed()
+    if spec.startswith("replay:"):
+        return ReplayFeed(spec[len("replay:"):])
+    raise DataValidationError(f"Feed desconocido: {spec}. Use polygon, simulated o replay:<archivo.csv>")
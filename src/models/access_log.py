@@ -0,0 +1,285 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.models.storage import TickerStorage
+from src.utils import profiling
+from src.utils.exceptions import DatabaseError, DatabaseAccessError, DatabaseConnectionError
+
+# Registro local de las consultas interactivas (independiente del backend de barras). Por
+# defecto access_log.db en el directorio del almacenamiento (ver access_log_for)
+ACCESS_LOG_DB_PATH = os.getenv("ACCESS_LOG_DB_PATH", "")
+# Segundos mínimos entre dos registros de la última consulta de un mismo ticker (ver touch)
+ACCESS_TOUCH_INTERVAL = float(os.getenv("ACCESS_TOUCH_INTERVAL", "3600") or 0)
+
+
+class AccessLogModel:
+    """
+    Registro de los tickers y rangos consultados por cada sesión. Permite saber qué
+    tickers suelen consultarse juntos (en la misma sesión y con poco tiempo de diferencia)
+    y cuándo se consultó cada ticker por última vez (para la retención).
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._touched: Dict[str, float] = {}
+        self._touched_lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        """
+        Inicializa la base de datos y crea las tablas necesarias
+
+        Raises:
+            DatabaseAccessError: Si no se puede acceder o crear el directorio de la base de datos
+            DatabaseConnectionError: Si hay un error al conectar con la base de datos
+        """
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        if not os.path.exists(directory):
+            try:
+                os.makedirs(directory)
+            except OSError as e:
+                raise DatabaseAccessError(f"No se pudo crear el directorio de la base de datos: {str(e)}")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS ticker_access (
+                        session TEXT NOT NULL,
+                        ticker TEXT NOT NULL,
+                        start_date TEXT NOT NULL,
+                        end_date TEXT NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_ticker_access_ticker
+                    ON ticker_access (ticker, accessed_at)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_ticker_access_session
+                    ON ticker_access (session, accessed_at)
+                ''')
+                # Última consulta de cada ticker: prune no la descarta
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS ticker_last_access (
+                        ticker TEXT PRIMARY KEY,
+                        accessed_at REAL NOT NULL
+                    ) WITHOUT ROWID
+                ''')
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseConnectionError(f"Error al conectar con la base de datos: {str(e)}")
+
+    def record(self, session: str, ticker: str, start_date: str, end_date: str,
+               accessed_at: Optional[float] = None) -> None:
+        """
+        Registra una consulta
+
+        Args:
+            session (str): Identificador de la sesión que consultó
+            ticker (str): Ticker consultado
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            accessed_at (float, optional): Momento de la consulta (epoch; por defecto ahora)
+
+        Raises:
+            DatabaseError: Si hay un error al guardar el registro
+        """
+        accessed_at = time.time() if accessed_at is None else accessed_at
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                profiling.execute(cursor, '''
+                    INSERT INTO ticker_access (session, ticker, start_date, end_date, accessed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (session, ticker, start_date, end_date, accessed_at))
+                self._upsert_last_access(cursor, ticker, accessed_at)
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al registrar la consulta: {str(e)}")
+
+    def touch(self, ticker: str, accessed_at: Optional[float] = None) -> bool:
+        """
+        Registra sólo el momento de la última consulta de un ticker (sin la sesión ni el
+        rango). Si el mismo ticker se registró hace menos de ACCESS_TOUCH_INTERVAL
+        segundos no se escribe nada, así las consultas repetidas no pagan una escritura.
+
+        Args:
+            ticker (str): Ticker consultado
+            accessed_at (float, optional): Momento de la consulta (epoch; por defecto ahora)
+
+        Returns:
+            bool: True si se escribió el registro
+
+        Raises:
+            DatabaseError: Si hay un error al guardar el registro
+        """
+        accessed_at = time.time() if accessed_at is None else accessed_at
+        with self._touched_lock:
+            if accessed_at - self._touched.get(ticker, float('-inf')) < ACCESS_TOUCH_INTERVAL:
+                return False
+            self._touched[ticker] = accessed_at
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                self._upsert_last_access(conn.cursor(), ticker, accessed_at)
+                conn.commit()
+        except sqlite3.Error as e:
+            with self._touched_lock:
+                self._touched.pop(ticker, None)
+            raise DatabaseError(f"Error al registrar la consulta: {str(e)}")
+        return True
+
+    @staticmethod
+    def _upsert_last_access(cursor: sqlite3.Cursor, ticker: str, accessed_at: float) -> None:
+        profiling.execute(cursor, '''
+            INSERT INTO ticker_last_access (ticker, accessed_at) VALUES (?, ?)
+            ON CONFLICT(ticker) DO UPDATE SET accessed_at = MAX(accessed_at, excluded.accessed_at)
+        ''', (ticker, accessed_at))
+
+    def last_accessed(self) -> Dict[str, float]:
+        """
+        Obtiene el momento de la última consulta de cada ticker consultado alguna vez
+
+        Returns:
+            Dict[str, float]: Ticker -> momento de su última consulta (epoch)
+
+        Raises:
+            DatabaseError: Si hay un error al leer el registro
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                return dict(profiling.fetchall(
+                    conn.cursor(), 'SELECT ticker, accessed_at FROM ticker_last_access', ()
+                ))
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al leer el registro de consultas: {str(e)}")
+
+    def co_viewed(self,
+                  ticker: str,
+                  window_seconds: float,
+                  since: float,
+                  limit: int = 3,
+                  min_count: int = 2) -> List[Tuple[str, int]]:
+        """
+        Obtiene los tickers que más veces se consultaron en la misma sesión que `ticker`,
+        a menos de `window_seconds` de distancia
+
+        Args:
+            ticker (str): Ticker de referencia
+            window_seconds (float): Distancia máxima entre ambas consultas
+            since (float): Sólo se consideran consultas posteriores a este momento (epoch)
+            limit (int): Tickers a retornar como máximo
+            min_count (int): Veces mínimas que se consultaron juntos
+
+        Returns:
+            List[Tuple[str, int]]: (ticker, veces) de mayor a menor
+
+        Raises:
+            DatabaseError: Si hay un error al leer el registro
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                return profiling.fetchall(conn.cursor(), '''
+                    SELECT b.ticker, COUNT(DISTINCT a.rowid) AS together
+                    FROM ticker_access a
+                    JOIN ticker_access b
+                      ON b.session = a.session
+                     AND b.accessed_at BETWEEN a.accessed_at - ? AND a.accessed_at + ?
+                     AND b.ticker <> a.ticker
+                    WHERE a.ticker = ? AND a.accessed_at >= ?
+                    GROUP BY b.ticker
+                    HAVING together >= ?
+                    ORDER BY together DESC, b.ticker
+                    LIMIT ?
+                ''', (window_seconds, window_seconds, ticker, since, min_count, limit))
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al leer el registro de consultas: {str(e)}")
+
+    def prune(self, before: float) -> int:
+        """
+        Descarta las consultas anteriores a un momento dado. La última consulta de
+        cada ticker (ver last_accessed) se conserva.
+
+        Args:
+            before (float): Momento límite (epoch)
+
+        Returns:
+            int: Cantidad de consultas descartadas
+
+        Raises:
+            DatabaseError: Si hay un error al eliminar los registros
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                profiling.execute(cursor, "DELETE FROM ticker_access WHERE accessed_at < ?", (before,))
+                conn.commit()
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al depurar el registro de consultas: {str(e)}")
+
+
+# Registros de consultas compartidos por todo el proceso, por ruta de la base
+_access_logs: Dict[str, AccessLogModel] = {}
+_access_logs_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    """
+    Un proceso hijo no hereda los hilos del padre: sus locks podrían quedar tomados
+    """
+    global _access_logs_lock
+    _access_logs.clear()
+    _access_logs_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_access_log(db_path: str) -> AccessLogModel:
+    """
+    Obtiene el registro de consultas de una base, compartido por todo el proceso
+
+    Args:
+        db_path (str): Ruta de la base del registro
+
+    Returns:
+        AccessLogModel: Registro de consultas
+
+    Raises:
+        DatabaseAccessError: Si no se puede crear el directorio de la base de datos
+        DatabaseConnectionError: Si hay un error al conectar con la base de datos
+    """
+    key = os.path.abspath(db_path)
+    with _access_logs_lock:
+        access_log = _access_logs.get(key)
+        if access_log is None:
+            access_log = AccessLogModel(db_path)
+            _access_logs[key] = access_log
+        return access_log
+
+
+def access_log_for(storage: TickerStorage) -> AccessLogModel:
+    """
+    Obtiene el registro de consultas asociado a un almacenamiento: ACCESS_LOG_DB_PATH si
+    está definida o access_log.db junto a él, así las precargas y la retención leen el
+    registro de esos datos sin depender del directorio de trabajo
+
+    Args:
+        storage (TickerStorage): Almacenamiento de las barras
+
+    Returns:
+        AccessLogModel: Registro de consultas
+
+    Raises:
+        DatabaseAccessError: Si no se puede crear el directorio de la base de datos
+        DatabaseConnectionError: Si hay un error al conectar con la base de datos
+    """
+    if ACCESS_LOG_DB_PATH:
+        return get_access_log(ACCESS_LOG_DB_PATH)
+    data_dir = os.path.dirname(os.path.abspath(storage.location))
+    return get_access_log(os.path.join(data_dir, "access_log.db"))
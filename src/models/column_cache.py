@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.models.storage import TickerStorage, BAR_COLUMNS, ADJUSTED_COLUMNS
+from src.utils import metrics
+from src.utils.exceptions import DatabaseError
+
+# Configuración por variables de entorno
+COLUMN_CACHE_ENABLED = os.getenv("COLUMN_CACHE_ENABLED", "").strip().lower() in ("1", "true", "yes", "on")
+COLUMN_CACHE_MIN_HITS = int(os.getenv("COLUMN_CACHE_MIN_HITS", "3") or 3)
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+# Contadores de acceso y memmaps abiertos, compartidos por todas las instancias del proceso
+_access_counts: Dict[Tuple[str, str], int] = {}
+_open_maps: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray, List[str]]] = {}
+_state_lock = threading.Lock()
+
+
+def cached_columns(storage: TickerStorage) -> List[str]:
+    """
+    Columnas que guardan las cachés de un almacenamiento: las de BAR_COLUMNS y, si el
+    backend las materializa, las ajustadas (la lectura por defecto de los gráficos)
+    """
+    return BAR_COLUMNS + ADJUSTED_COLUMNS if storage.supports_adjusted else list(BAR_COLUMNS)
+
+
+def column_block(columns: List[str], adjusted: bool) -> Optional[slice]:
+    """
+    Filas de la matriz de una caché con las columnas pedidas (sin ajustar o ajustadas),
+    o None si la caché no las guarda
+    """
+    wanted = ADJUSTED_COLUMNS if adjusted else BAR_COLUMNS
+    try:
+        start = columns.index(wanted[0])
+    except ValueError:
+        return None
+    if columns[start:start + len(wanted)] != wanted:
+        return None
+    return slice(start, start + len(wanted))
+
+
+class ColumnCache:
+    """
+    Caché de lectura para los tickers más consultados. Por ticker guarda dos archivos
+    .npy de ancho fijo: los días (int32, días desde 1970-01-01) y una matriz float64
+    columna por columna (open, high, low, close, volume, vwap y, si el almacenamiento
+    las materializa, sus versiones ajustadas).
+
+    Los archivos se abren como memmap, así que todos los procesos de Streamlit comparten
+    la caché de páginas del sistema operativo y los rangos se sirven como slices sin copia.
+    Cada reconstrucción escribe una versión nueva y la publica reemplazando manifest.json,
+    por lo que los lectores nunca ven archivos a medio escribir.
+    """
+    def __init__(self, root: str, min_hits: int = COLUMN_CACHE_MIN_HITS):
+        """
+        Args:
+            root (str): Directorio de la caché (ej: data/columns)
+            min_hits (int): Consultas a un ticker a partir de las cuales se construye su caché
+        """
+        self.root = root
+        self.min_hits = min_hits
+
+    def _ticker_dir(self, ticker: str) -> str:
+        return os.path.join(self.root, ticker)
+
+    def _manifest(self, ticker: str) -> Optional[Dict[str, object]]:
+        path = os.path.join(self._ticker_dir(ticker), "manifest.json")
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_cached(self, ticker: str) -> bool:
+        return self._manifest(ticker) is not None
+
+    def record_access(self, ticker: str) -> bool:
+        """
+        Registra una consulta al ticker
+
+        Returns:
+            bool: True si el ticker alcanzó el umbral y todavía no tiene caché
+        """
+        key = (self.root, ticker)
+        with _state_lock:
+            _access_counts[key] = _access_counts.get(key, 0) + 1
+            hits = _access_counts[key]
+        return hits >= self.min_hits and not self.is_cached(ticker)
+
+    def rebuild(self, ticker: str, storage: TickerStorage) -> int:
+        """
+        Reconstruye los archivos del ticker a partir del almacenamiento principal
+
+        Args:
+            ticker (str): Símbolo del ticker
+            storage (TickerStorage): Almacenamiento desde el que leer las barras
+
+        Returns:
+            int: Cantidad de barras escritas
+
+        Raises:
+            DatabaseError: Si no se pueden escribir los archivos
+        """
+        columns = cached_columns(storage)
+        df = storage.scan([ticker], columns=columns)
+        if df.empty:
+            self.invalidate(ticker)
+            return 0
+
+        days = (df['date'].values.astype('datetime64[D]') - EPOCH).astype(np.int32)
+        values = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64).T)
+
+        ticker_dir = self._ticker_dir(ticker)
+        version = f"{time.time_ns()}-{os.getpid()}"
+        try:
+            os.makedirs(ticker_dir, exist_ok=True)
+            np.save(os.path.join(ticker_dir, f"days-{version}.npy"), days)
+            np.save(os.path.join(ticker_dir, f"ohlcv-{version}.npy"), values)
+            manifest_tmp = os.path.join(ticker_dir, f"manifest.json.tmp-{version}")
+            with open(manifest_tmp, 'w') as f:
+                json.dump({'version': version, 'rows': int(len(days)), 'columns': columns}, f)
+            os.replace(manifest_tmp, os.path.join(ticker_dir, "manifest.json"))
+        except OSError as e:
+            raise DatabaseError(f"Error al escribir la caché de columnas de {ticker}: {str(e)}")
+
+        self._remove_stale_versions(ticker)
+        metrics.inc("column_cache_rebuilds_total")
+        return len(days)
+
+    def _remove_stale_versions(self, ticker: str, min_age: float = 60.0) -> None:
+        """
+        Elimina versiones viejas. Se respeta una antigüedad mínima para no borrar
+        archivos que otro proceso pueda estar por publicar; los lectores que ya
+        tienen un memmap abierto siguen funcionando aunque el archivo se borre.
+        """
+        manifest = self._manifest(ticker)
+        if manifest is None:
+            return
+        current = manifest['version']
+        ticker_dir = self._ticker_dir(ticker)
+        now = time.time()
+        for name in os.listdir(ticker_dir):
+            if not name.endswith('.npy') or current in name:
+                continue
+            path = os.path.join(ticker_dir, name)
+            try:
+                if now - os.path.getmtime(path) > min_age:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def invalidate(self, ticker: str) -> None:
+        """
+        Elimina la caché del ticker (ej: al borrar sus datos)
+        """
+        manifest_path = os.path.join(self._ticker_dir(ticker), "manifest.json")
+        try:
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+        except OSError as e:
+            raise DatabaseError(f"Error al invalidar la caché de columnas de {ticker}: {str(e)}")
+        with _state_lock:
+            _access_counts.pop((self.root, ticker), None)
+            for key in [k for k in _open_maps if k[0] == self._ticker_dir(ticker)]:
+                del _open_maps[key]
+
+    def _open(self, ticker: str) -> Optional[Tuple[np.ndarray, np.ndarray, List[str]]]:
+        manifest = self._manifest(ticker)
+        if manifest is None:
+            return None
+        key = (self._ticker_dir(ticker), manifest['version'])
+        with _state_lock:
+            maps = _open_maps.get(key)
+        if maps is not None:
+            return maps
+        ticker_dir = self._ticker_dir(ticker)
+        try:
+            days = np.load(os.path.join(ticker_dir, f"days-{manifest['version']}.npy"), mmap_mode='r')
+            values = np.load(os.path.join(ticker_dir, f"ohlcv-{manifest['version']}.npy"), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        with _state_lock:
+            # Se descartan los memmaps de versiones anteriores del mismo ticker
+            for old in [k for k in _open_maps if k[0] == ticker_dir]:
+                del _open_maps[old]
+            _open_maps[key] = (days, values, manifest.get('columns', BAR_COLUMNS))
+            return _open_maps[key]
+
+    def read(self, ticker: str, start_date: str, end_date: str, adjusted: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Obtiene las barras del rango con búsqueda binaria sobre la columna de días.
+        Las columnas del DataFrame son vistas del memmap (no se copian los precios).
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            adjusted (bool): Precios ajustados (con los nombres de BAR_COLUMNS)
+
+        Returns:
+            Optional[pd.DataFrame]: DataFrame indexado por fecha, vacío si no hay barras
+                                    en el rango, o None si el ticker no está en caché
+                                    (o su caché no guarda las columnas pedidas)
+        """
+        maps = self._open(ticker)
+        block = column_block(maps[2], adjusted) if maps is not None else None
+        if block is None:
+            metrics.inc("column_cache_total", result="miss")
+            return None
+        days, values, _ = maps
+
+        start_day = (np.datetime64(start_date, 'D') - EPOCH).astype(np.int32)
+        end_day = (np.datetime64(end_date, 'D') - EPOCH).astype(np.int32)
+        lo = int(np.searchsorted(days, start_day, side='left'))
+        hi = int(np.searchsorted(days, end_day, side='right'))
+
+        index = pd.DatetimeIndex((days[lo:hi].astype('datetime64[D]')).astype('datetime64[ns]'), name='date')
+        df = pd.DataFrame(values[block, lo:hi].T, index=index, columns=BAR_COLUMNS, copy=False)
+        metrics.inc("column_cache_total", result="hit")
+        return df
+
+
+def column_cache_for(storage: TickerStorage) -> Optional[ColumnCache]:
+    """
+    Obtiene la caché de columnas asociada a un almacenamiento (directorio columns/
+    junto a él), o None si la caché está deshabilitada
+
+    Args:
+        storage (TickerStorage): Almacenamiento principal
+
+    Returns:
+        Optional[ColumnCache]: Caché de columnas o None
+    """
+    if not COLUMN_CACHE_ENABLED:
+        return None
+    data_dir = os.path.dirname(os.path.abspath(storage.location))
+    return ColumnCache(os.path.join(data_dir, "columns"))
@@ -0,0 +1,406 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Sequence, Set
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from src.models.storage import BAR_COLUMNS
+from src.utils import metrics, profiling
+from src.utils.exceptions import DatabaseError, DatabaseAccessError, DatabaseConnectionError, DataValidationError
+
+# Base separada de la diaria: los minutos son ~390 veces más filas
+INTRADAY_DB_PATH = os.getenv("INTRADAY_DB_PATH", "data/intraday.db")
+# Zona horaria del mercado: define a qué día pertenece cada barra
+MARKET_TIMEZONE = os.getenv("MARKET_TIMEZONE", "America/New_York")
+
+# Intervalos que se mantienen agregados a partir de las barras de un minuto
+ROLLUP_TIMESPANS = ('hour', 'day')
+TIMESPANS = ('minute',) + ROLLUP_TIMESPANS
+
+# Campos requeridos en cada barra intradiaria (vwap puede faltar)
+INTRADAY_FIELDS = ['t', 'o', 'h', 'l', 'c', 'v']
+
+HOUR_MS = 3_600_000
+
+
+def day_key(date_str: str) -> int:
+    """
+    Convierte una fecha YYYY-MM-DD en la clave de partición diaria (YYYYMMDD)
+    """
+    return int(date_str.replace('-', ''))
+
+
+def key_to_date(day: int) -> str:
+    """
+    Convierte una clave de partición diaria (YYYYMMDD) en una fecha YYYY-MM-DD
+    """
+    return f"{day // 10000:04d}-{day // 100 % 100:02d}-{day % 100:02d}"
+
+
+class IntradayModel:
+    """
+    Almacenamiento de barras intradiarias en SQLite. Las barras de un minuto se guardan
+    en una tabla WITHOUT ROWID con clave (ticker, día, timestamp), así que cada día de
+    cada ticker queda contiguo en disco y las lecturas por rango recorren sólo esas páginas.
+
+    Los agregados por hora y por día se mantienen en intraday_rollups y se recalculan
+    sólo para los días que recibieron barras nuevas, en la misma transacción.
+    """
+    def __init__(self, db_path: str = INTRADAY_DB_PATH, timezone: str = MARKET_TIMEZONE):
+        self.db_path = db_path
+        self.location = db_path
+        self.timezone = ZoneInfo(timezone)
+        self._init_db()
+
+    def _init_db(self):
+        """
+        Inicializa la base de datos y crea las tablas necesarias
+
+        Raises:
+            DatabaseAccessError: Si no se puede acceder o crear el directorio de la base de datos
+            DatabaseConnectionError: Si hay un error al conectar con la base de datos
+        """
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        if not os.path.exists(directory):
+            try:
+                os.makedirs(directory)
+            except OSError as e:
+                raise DatabaseAccessError(f"No se pudo crear el directorio de la base de datos: {str(e)}")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # Sólo en una base nueva: WAL deja leer mientras se ingiere y el modo
+                # incremental permite liberar espacio de a poco tras eliminar
+                cursor.execute('SELECT COUNT(*) FROM sqlite_master')
+                if cursor.fetchone()[0] == 0:
+                    cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                    cursor.execute('PRAGMA journal_mode = WAL')
+
+                # Barras de un minuto, particionadas por ticker y día
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS intraday_bars (
+                        ticker TEXT NOT NULL,
+                        day INTEGER NOT NULL,
+                        ts INTEGER NOT NULL,
+                        open REAL,
+                        high REAL,
+                        low REAL,
+                        close REAL,
+                        volume INTEGER,
+                        vwap REAL,
+                        PRIMARY KEY (ticker, day, ts)
+                    ) WITHOUT ROWID
+                ''')
+
+                # Agregados por hora y por día calculados a partir de los minutos
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS intraday_rollups (
+                        ticker TEXT NOT NULL,
+                        timespan TEXT NOT NULL,
+                        day INTEGER NOT NULL,
+                        ts INTEGER NOT NULL,
+                        open REAL,
+                        high REAL,
+                        low REAL,
+                        close REAL,
+                        volume INTEGER,
+                        vwap REAL,
+                        bars INTEGER NOT NULL,
+                        PRIMARY KEY (ticker, timespan, day, ts)
+                    ) WITHOUT ROWID
+                ''')
+
+                # Días ya consultados a la API (incluye feriados, con 0 barras)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS intraday_days (
+                        ticker TEXT NOT NULL,
+                        day INTEGER NOT NULL,
+                        bars INTEGER NOT NULL,
+                        fetched_at INTEGER NOT NULL,
+                        PRIMARY KEY (ticker, day)
+                    ) WITHOUT ROWID
+                ''')
+
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseConnectionError(f"Error al conectar con la base de datos: {str(e)}")
+
+    def _results_to_frame(self, results: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Convierte los resultados de la API en un DataFrame con la clave de día calculada
+        en la zona horaria del mercado
+
+        Raises:
+            DataValidationError: Si a alguna barra le faltan campos requeridos
+        """
+        frame = pd.DataFrame.from_records(results, columns=INTRADAY_FIELDS + ['vw'])
+        missing = [f for f in INTRADAY_FIELDS if frame[f].isna().any()]
+        if missing:
+            raise DataValidationError(f"Faltan campos requeridos en las barras: {', '.join(missing)}")
+
+        frame['t'] = frame['t'].astype(np.int64)
+        local = pd.to_datetime(frame['t'], unit='ms', utc=True).dt.tz_convert(self.timezone)
+        frame['day'] = (local.dt.year * 10000 + local.dt.month * 100 + local.dt.day).astype(np.int64)
+        return frame
+
+    @metrics.timed("db_query_duration_seconds", operation="save_intraday_bars")
+    def save_bars(self, ticker: str, results: Sequence[Dict[str, Any]]) -> int:
+        """
+        Guarda barras de un minuto (resultados de la API de agregados) y actualiza los
+        agregados por hora y por día de los días afectados, en una única transacción.
+        Las barras ya guardadas se reemplazan.
+
+        Args:
+            ticker (str): Símbolo del ticker
+            results (Sequence[Dict[str, Any]]): Resultados de una página de la API
+
+        Returns:
+            int: Cantidad de barras escritas
+
+        Raises:
+            DataValidationError: Si a alguna barra le faltan campos requeridos
+            DatabaseError: Si hay un error en la base de datos
+        """
+        if not results:
+            return 0
+        frame = self._results_to_frame(results)
+
+        # Tipos nativos de Python (sqlite3 no acepta escalares de NumPy) y NaN como NULL
+        values = frame[['day', 't', 'o', 'h', 'l', 'c', 'v', 'vw']].astype(object)
+        values = values.where(values.notna(), None)
+        rows = ((ticker,) + row for row in values.itertuples(index=False, name=None))
+        days = sorted(frame['day'].unique().tolist())
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT INTO intraday_bars
+                    (ticker, day, ts, open, high, low, close, volume, vwap)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(ticker, day, ts) DO UPDATE SET
+                        open = excluded.open,
+                        high = excluded.high,
+                        low = excluded.low,
+                        close = excluded.close,
+                        volume = excluded.volume,
+                        vwap = excluded.vwap
+                ''', rows)
+                self._refresh_rollups(cursor, ticker, days)
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error de base de datos al guardar barras intradiarias de {ticker}: {str(e)}")
+
+        metrics.inc("db_rows_total", len(frame), operation="save_intraday_bars")
+        return len(frame)
+
+    def _refresh_rollups(self, cursor: sqlite3.Cursor, ticker: str, days: List[int]) -> None:
+        """
+        Recalcula los agregados por hora y por día de los días indicados a partir de
+        las barras de un minuto guardadas, sin confirmar la transacción. Se recalcula
+        el día completo para que una página que corta un día a la mitad o una barra
+        corregida den el mismo resultado que una carga completa.
+        """
+        placeholders = ', '.join('?' for _ in days)
+        minutes = profiling.fetchall(cursor, f'''
+            SELECT day, ts, open, high, low, close, volume, vwap FROM intraday_bars
+            WHERE ticker = ? AND day IN ({placeholders})
+            ORDER BY day, ts
+        ''', [ticker] + days)
+        profiling.execute(cursor, f'''
+            DELETE FROM intraday_rollups WHERE ticker = ? AND day IN ({placeholders})
+        ''', [ticker] + days)
+        if not minutes:
+            return
+
+        frame = pd.DataFrame(minutes, columns=['day', 'ts'] + BAR_COLUMNS)
+        volume = frame['volume'].fillna(0)
+        frame['pv'] = frame['vwap'].fillna(frame['close']) * volume
+        frame['volume'] = volume
+
+        for timespan in ROLLUP_TIMESPANS:
+            if timespan == 'hour':
+                # Los husos del mercado difieren de UTC en horas enteras, así que truncar
+                # el timestamp a la hora coincide con la hora local
+                bucket = frame['ts'] // HOUR_MS * HOUR_MS
+                keys = [frame['day'], bucket.rename('bucket')]
+            else:
+                keys = [frame['day']]
+            grouped = frame.groupby(keys, sort=True)
+            rollup = grouped.agg(
+                ts=('ts', 'first'), open=('open', 'first'), high=('high', 'max'), low=('low', 'min'),
+                close=('close', 'last'), volume=('volume', 'sum'), pv=('pv', 'sum'), bars=('ts', 'size')
+            ).reset_index()
+            if timespan == 'hour':
+                rollup['ts'] = rollup['bucket']
+            else:
+                # Como en la API, la barra diaria empieza a la medianoche local
+                midnight = pd.to_datetime(rollup['day'].astype(str), format='%Y%m%d').dt.tz_localize(self.timezone)
+                rollup['ts'] = midnight.dt.tz_convert('UTC').astype('datetime64[ms, UTC]').astype(np.int64)
+            rollup['vwap'] = (rollup['pv'] / rollup['volume'].where(rollup['volume'] > 0)).round(4)
+            values = rollup[['day', 'ts'] + BAR_COLUMNS + ['bars']].astype(object)
+            values = values.where(values.notna(), None)
+            cursor.executemany('''
+                INSERT INTO intraday_rollups
+                (ticker, timespan, day, ts, open, high, low, close, volume, vwap, bars)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', ((ticker, timespan) + row for row in values.itertuples(index=False, name=None)))
+
+    @metrics.timed("db_query_duration_seconds", operation="mark_intraday_fetched")
+    def mark_fetched(self, ticker: str, start_date: str, end_date: str) -> None:
+        """
+        Registra los días del rango como ya consultados a la API, con su cantidad de
+        barras. El día en curso (en la zona del mercado) no se registra porque su
+        sesión todavía puede recibir barras.
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+
+        Raises:
+            DatabaseError: Si hay un error en la base de datos
+        """
+        today = datetime.now(self.timezone).strftime('%Y-%m-%d')
+        last = min(end_date, (datetime.strptime(today, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d'))
+        days = [day_key(d.strftime('%Y-%m-%d')) for d in pd.date_range(start_date, last, freq='D')]
+        if not days:
+            return
+        fetched_at = int(datetime.now().timestamp() * 1000)
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO intraday_days (ticker, day, bars, fetched_at)
+                    VALUES (?, ?, (SELECT COUNT(*) FROM intraday_bars WHERE ticker = ? AND day = ?), ?)
+                ''', [(ticker, day, ticker, day, fetched_at) for day in days])
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al registrar los días consultados de {ticker}: {str(e)}")
+
+    def get_fetched_days(self, ticker: str, start_date: str, end_date: str) -> Set[str]:
+        """
+        Obtiene los días del rango ya consultados a la API
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+
+        Returns:
+            Set[str]: Días en formato YYYY-MM-DD
+
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                rows = profiling.fetchall(cursor, '''
+                    SELECT day FROM intraday_days
+                    WHERE ticker = ? AND day BETWEEN ? AND ?
+                ''', (ticker, day_key(start_date), day_key(end_date)))
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al obtener los días consultados de {ticker}: {str(e)}")
+        return {key_to_date(day) for (day,) in rows}
+
+    @metrics.timed("db_query_duration_seconds", operation="get_intraday_bars")
+    def get_bars(self, ticker: str, start_date: str, end_date: str, timespan: str = 'minute') -> pd.DataFrame:
+        """
+        Obtiene las barras de un ticker entre dos días (inclusive)
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            timespan (str): "minute", "hour" o "day"
+
+        Returns:
+            pd.DataFrame: Columnas BAR_COLUMNS indexadas por el inicio de cada barra
+                          (timestamp en la zona del mercado); vacío si no hay barras
+
+        Raises:
+            DataValidationError: Si el intervalo no es soportado
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        if timespan not in TIMESPANS:
+            raise DataValidationError(f"Intervalo no soportado: {timespan}. Use uno de: {', '.join(TIMESPANS)}")
+        columns = ', '.join(['ts'] + BAR_COLUMNS)
+        if timespan == 'minute':
+            sql = f'''
+                SELECT {columns} FROM intraday_bars
+                WHERE ticker = ? AND day BETWEEN ? AND ?
+                ORDER BY day, ts
+            '''
+            params = (ticker, day_key(start_date), day_key(end_date))
+        else:
+            sql = f'''
+                SELECT {columns} FROM intraday_rollups
+                WHERE ticker = ? AND timespan = ? AND day BETWEEN ? AND ?
+                ORDER BY day, ts
+            '''
+            params = (ticker, timespan, day_key(start_date), day_key(end_date))
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                rows = profiling.fetchall(cursor, sql, params)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al obtener las barras intradiarias de {ticker}: {str(e)}")
+
+        metrics.inc("db_rows_total", len(rows), operation="get_intraday_bars")
+        frame = pd.DataFrame(rows, columns=['ts'] + BAR_COLUMNS)
+        index = pd.to_datetime(frame.pop('ts'), unit='ms', utc=True).dt.tz_convert(self.timezone)
+        frame.index = pd.DatetimeIndex(index, name='timestamp')
+        return frame
+
+    def get_stored_tickers(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene el resumen de tickers con barras intradiarias
+
+        Returns:
+            List[Dict[str, Any]]: Por ticker: ticker, days (días con barras), bars, first_day y last_day
+
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                # Los agregados diarios tienen una fila por día: resumir desde ahí es
+                # ~390 veces más barato que recorrer los minutos
+                rows = profiling.fetchall(cursor, '''
+                    SELECT ticker, COUNT(*), SUM(bars), MIN(day), MAX(day) FROM intraday_rollups
+                    WHERE timespan = 'day'
+                    GROUP BY ticker
+                    ORDER BY ticker
+                ''')
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al obtener el resumen intradiario: {str(e)}")
+        return [
+            {'ticker': ticker, 'days': days, 'bars': bars,
+             'first_day': key_to_date(first), 'last_day': key_to_date(last)}
+            for ticker, days, bars, first, last in rows
+        ]
+
+    def delete_ticker_data(self, ticker: str) -> None:
+        """
+        Elimina todas las barras intradiarias, agregados y días consultados de un ticker
+
+        Args:
+            ticker (str): Símbolo del ticker
+
+        Raises:
+            DatabaseError: Si hay un error al eliminar los datos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for table in ('intraday_bars', 'intraday_rollups', 'intraday_days'):
+                    profiling.execute(cursor, f'DELETE FROM {table} WHERE ticker = ?', (ticker,))
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al eliminar los datos intradiarios de {ticker}: {str(e)}")
@@ -0,0 +1,501 @@
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Sequence
+
+import pandas as pd
+
+from src.models.storage import (
+    TickerStorage, BAR_COLUMNS, aggs_columns, date_to_ms, merge_intervals, split_ranges
+)
+from src.utils import metrics
+from src.utils.exceptions import (
+    DatabaseError, DatabaseAccessError, DataValidationError
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+if pa is not None:
+    # Esquema de cada archivo; ticker y year se derivan de los directorios (particionado hive)
+    FILE_SCHEMA = pa.schema([
+        ('date', pa.date32()),
+        ('open', pa.float64()),
+        ('high', pa.float64()),
+        ('low', pa.float64()),
+        ('close', pa.float64()),
+        ('volume', pa.int64()),
+        ('vwap', pa.float64()),
+    ])
+    PARTITIONING = ds.partitioning(
+        pa.schema([('ticker', pa.string()), ('year', pa.int32())]), flavor='hive'
+    )
+    YEAR_PARTITIONING = ds.partitioning(pa.schema([('year', pa.int32())]), flavor='hive')
+
+
+# Lock de cada directorio de ticker (ruta absoluta), compartido por todas las instancias del
+# proceso: cada sesión de Streamlit crea su propio modelo sobre los mismos archivos
+_ticker_locks: Dict[str, threading.Lock] = {}
+_ticker_locks_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    """
+    Un lock tomado por otro hilo al bifurcar el proceso quedaría tomado para siempre en el hijo
+    """
+    global _ticker_locks_lock
+    _ticker_locks.clear()
+    _ticker_locks_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class ParquetTickerModel(TickerStorage):
+    """
+    Almacenamiento columnar de barras diarias en archivos Parquet particionados por
+    ticker y año (bars/ticker=AAPL/year=2024/part-0.parquet). Las lecturas sólo abren
+    las particiones necesarias (predicate pushdown) y las columnas pedidas (column pushdown).
+    Los rangos consultados se guardan como JSON por ticker en ranges/.
+
+    Las escrituras son atómicas por archivo. Las de un mismo ticker (lectura, combinación y
+    reescritura de sus particiones y de su archivo de rangos) se serializan con un lock por
+    directorio compartido por todas las instancias del proceso.
+    """
+    def __init__(self, root: str = "data/parquet"):
+        if pa is None:
+            raise DatabaseError("El backend Parquet requiere pyarrow (pip install pyarrow)")
+        self.root = root
+        self.location = root
+        self.bars_dir = os.path.join(root, "bars")
+        self.ranges_dir = os.path.join(root, "ranges")
+        try:
+            os.makedirs(self.bars_dir, exist_ok=True)
+            os.makedirs(self.ranges_dir, exist_ok=True)
+        except OSError as e:
+            raise DatabaseAccessError(f"No se pudo crear el directorio de almacenamiento: {str(e)}")
+
+    def _ticker_dir(self, ticker: str) -> str:
+        return os.path.join(self.bars_dir, f"ticker={ticker}")
+
+    def _ticker_lock(self, ticker: str) -> threading.Lock:
+        """
+        Obtiene el lock de las particiones y rangos del ticker
+        """
+        key = os.path.abspath(self._ticker_dir(ticker))
+        with _ticker_locks_lock:
+            lock = _ticker_locks.get(key)
+            if lock is None:
+                lock = _ticker_locks[key] = threading.Lock()
+            return lock
+
+    def _partition_path(self, ticker: str, year: int) -> str:
+        return os.path.join(self._ticker_dir(ticker), f"year={year}", "part-0.parquet")
+
+    def _ranges_path(self, ticker: str) -> str:
+        return os.path.join(self.ranges_dir, f"{ticker}.json")
+
+    def _read_ranges(self, ticker: str) -> List[Dict[str, int]]:
+        path = self._ranges_path(ticker)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_atomic(self, path: str, write) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _date_filter(start_date: Optional[str], end_date: Optional[str]):
+        """
+        Construye el filtro de fechas incluyendo el año, para descartar particiones enteras
+        """
+        expression = None
+        if start_date:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date()
+            expression = (ds.field('year') >= start.year) & (ds.field('date') >= pa.scalar(start, pa.date32()))
+        if end_date:
+            end = datetime.strptime(end_date, '%Y-%m-%d').date()
+            condition = (ds.field('year') <= end.year) & (ds.field('date') <= pa.scalar(end, pa.date32()))
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def _ticker_dataset(self, ticker: str):
+        ticker_dir = self._ticker_dir(ticker)
+        if not os.path.isdir(ticker_dir):
+            return None
+        return ds.dataset(ticker_dir, format='parquet', partitioning=YEAR_PARTITIONING)
+
+    @metrics.timed("db_query_duration_seconds", operation="save_ticker_data")
+    def save_ticker_data(self, ticker: str, data: Dict[str, Any]) -> bool:
+        """
+        Guarda los datos del ticker en las particiones anuales correspondientes.
+        Igual que en SQLite, las fechas ya almacenadas no se sobrescriben.
+
+        Args:
+            ticker (str): Símbolo del ticker
+            data (Dict[str, Any]): Respuesta de la API de agregados
+
+        Returns:
+            bool: True si los datos se guardaron correctamente
+
+        Raises:
+            InvalidDataError: Si los datos son inválidos o están vacíos
+            DataValidationError: Si los datos no cumplen con el formato esperado
+            DatabaseError: Si hay un error al escribir los archivos
+        """
+        columns = aggs_columns(data)
+        new = pd.DataFrame({
+            'date': columns['date'].astype(object),
+            **{column: columns[column] for column in BAR_COLUMNS},
+        })
+        new['volume'] = new['volume'].astype('int64')
+
+        try:
+            with self._ticker_lock(ticker):
+                written = self._merge_rows(ticker, new, keep='first')
+                metrics.inc("db_rows_total", written, operation="save_ticker_data")
+                self._append_range(ticker, int(columns['t'].min()), int(columns['t'].max()))
+            return True
+        except (OSError, pa.ArrowException) as e:
+            raise DatabaseError(f"Error al guardar datos del ticker {ticker}: {str(e)}")
+
+    def _merge_rows(self, ticker: str, new: pd.DataFrame, keep: str) -> int:
+        """
+        Combina filas nuevas (columna date como datetime.date) con las particiones anuales existentes
+
+        Args:
+            ticker (str): Símbolo del ticker
+            new (pd.DataFrame): Columnas date y BAR_COLUMNS
+            keep (str): 'first' conserva las fechas ya almacenadas, 'last' las reemplaza
+
+        Returns:
+            int: Cantidad de filas escritas
+        """
+        new = new.assign(year=[d.year for d in new['date']])
+        written = 0
+        for year, rows in new.groupby('year'):
+            path = self._partition_path(ticker, int(year))
+            rows = rows.drop(columns=['year'])
+            incoming = len(rows)
+            if os.path.exists(path):
+                existing = pq.read_table(path).to_pandas()
+                before = len(existing)
+                rows = pd.concat([existing, rows], ignore_index=True)
+                rows = rows.drop_duplicates(subset='date', keep=keep)
+                # Con keep='first' sólo cuentan las fechas nuevas; con 'last' se reescriben todas las recibidas
+                written += len(rows) - before if keep == 'first' else incoming
+            else:
+                written += incoming
+            table = pa.Table.from_pandas(rows.sort_values('date'), schema=FILE_SCHEMA, preserve_index=False)
+            self._write_atomic(path, lambda p: pq.write_table(table, p, compression='zstd'))
+        return written
+
+    def _append_range(self, ticker: str, start: int, end: int) -> None:
+        ranges = self._read_ranges(ticker)
+        if not any(r['start_date'] == start and r['end_date'] == end for r in ranges):
+            ranges.append({'start_date': start, 'end_date': end,
+                           'created_at': int(datetime.now().timestamp() * 1000)})
+            self._write_atomic(self._ranges_path(ticker), lambda p: _dump_json(ranges, p))
+
+    @metrics.timed("db_query_duration_seconds", operation="upsert_bars")
+    def upsert_bars(self, bars: pd.DataFrame) -> int:
+        """
+        Inserta o reemplaza un lote de barras, reescribiendo una vez cada partición afectada
+
+        Args:
+            bars (pd.DataFrame): Columnas ticker, date (YYYY-MM-DD) y BAR_COLUMNS
+
+        Returns:
+            int: Cantidad de filas escritas
+
+        Raises:
+            DataValidationError: Si faltan columnas o los valores son inválidos
+            DatabaseError: Si hay un error al escribir los archivos
+        """
+        missing = [c for c in ['ticker', 'date'] + BAR_COLUMNS if c not in bars.columns]
+        if missing:
+            raise DataValidationError(f"Faltan columnas requeridas en los datos: {', '.join(missing)}")
+        if bars.empty:
+            return 0
+
+        try:
+            frame = bars[['ticker', 'date'] + BAR_COLUMNS].copy()
+            frame['date'] = pd.to_datetime(frame['date'], format='%Y-%m-%d').dt.date
+            frame['volume'] = frame['volume'].astype('Int64')
+        except (ValueError, TypeError) as e:
+            raise DataValidationError(f"Error al procesar el lote de barras: {str(e)}")
+
+        try:
+            for ticker, rows in frame.groupby('ticker'):
+                with self._ticker_lock(ticker):
+                    self._merge_rows(ticker, rows.drop(columns=['ticker']), keep='last')
+        except (OSError, pa.ArrowException) as e:
+            raise DatabaseError(f"Error al guardar el lote de barras: {str(e)}")
+        metrics.inc("db_rows_total", len(frame), operation="upsert_bars")
+        return len(frame)
+
+    def add_coverage(self, ticker: str, start_date: str, end_date: str) -> None:
+        """
+        Registra un rango almacenado del ticker
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+
+        Raises:
+            DatabaseError: Si hay un error al escribir el archivo de rangos
+        """
+        try:
+            with self._ticker_lock(ticker):
+                self._append_range(ticker, date_to_ms(start_date), date_to_ms(end_date))
+        except OSError as e:
+            raise DatabaseError(f"Error al registrar el rango del ticker {ticker}: {str(e)}")
+
+    @metrics.timed("db_query_duration_seconds", operation="get_ticker_data")
+    def get_ticker_data(self, ticker: str, start_date: str, end_date: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Obtiene los datos del ticker para un rango de fechas, leyendo sólo los años necesarios
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: Lista de datos o None si no hay datos
+
+        Raises:
+            DataValidationError: Si las fechas no tienen el formato correcto
+            DatabaseError: Si hay un error al leer los archivos
+        """
+        try:
+            expression = self._date_filter(start_date, end_date)
+        except ValueError as e:
+            raise DataValidationError(f"Formato de fecha inválido: {str(e)}")
+
+        try:
+            dataset = self._ticker_dataset(ticker)
+            if dataset is None:
+                return None
+            table = dataset.to_table(columns=['date'] + BAR_COLUMNS, filter=expression)
+        except (OSError, pa.ArrowException) as e:
+            raise DatabaseError(f"Error al acceder a los datos almacenados: {str(e)}")
+
+        metrics.inc("db_rows_total", table.num_rows, operation="get_ticker_data")
+        if table.num_rows == 0:
+            return None
+        rows = table.sort_by('date').to_pylist()
+        for row in rows:
+            row['ticker'] = ticker
+            row['date'] = row['date'].strftime('%Y-%m-%d')
+        return rows
+
+    def get_coverage(self, ticker: str) -> List[Tuple[str, str]]:
+        """
+        Obtiene los intervalos de fechas cubiertos por los rangos guardados del ticker
+
+        Args:
+            ticker (str): Símbolo del ticker
+
+        Returns:
+            List[Tuple[str, str]]: Intervalos (inicio, fin) en formato YYYY-MM-DD, disjuntos y ordenados
+        """
+        return merge_intervals([
+            (
+                datetime.fromtimestamp(r['start_date'] / 1000).strftime('%Y-%m-%d'),
+                datetime.fromtimestamp(r['end_date'] / 1000).strftime('%Y-%m-%d')
+            )
+            for r in self._read_ranges(ticker)
+        ])
+
+    @metrics.timed("db_query_duration_seconds", operation="get_stored_tickers")
+    def get_stored_tickers(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene un resumen de todos los tickers almacenados y sus rangos de fechas
+
+        Returns:
+            List[Dict[str, Any]]: Lista de tickers con sus rangos, con el mismo formato que TickerModel
+
+        Raises:
+            DatabaseError: Si hay un error al leer los archivos
+        """
+        try:
+            tickers = sorted(name[:-5] for name in os.listdir(self.ranges_dir) if name.endswith('.json'))
+            result = []
+            for ticker in tickers:
+                dataset = self._ticker_dataset(ticker)
+                ranges = []
+                for r in sorted(self._read_ranges(ticker), key=lambda r: r['created_at'], reverse=True):
+                    start_date = datetime.fromtimestamp(r['start_date'] / 1000).strftime('%Y-%m-%d')
+                    end_date = datetime.fromtimestamp(r['end_date'] / 1000).strftime('%Y-%m-%d')
+                    data_points = dataset.count_rows(filter=self._date_filter(start_date, end_date)) if dataset else 0
+                    ranges.append({
+                        'start_date': start_date,
+                        'end_date': end_date,
+                        'created_at': datetime.fromtimestamp(r['created_at'] / 1000).strftime('%Y-%m-%d %H:%M:%S'),
+                        'data_points': data_points
+                    })
+                result.append({
+                    'ticker': ticker,
+                    'ranges': ranges,
+                    'total_ranges': len(ranges),
+                    'total_data_points': sum(r['data_points'] for r in ranges)
+                })
+            return result
+        except (OSError, ValueError, pa.ArrowException) as e:
+            raise DatabaseError(f"Error al obtener los tickers almacenados: {str(e)}")
+
+    def delete_ticker_data(self, ticker: str) -> None:
+        """
+        Elimina todas las particiones y rangos de un ticker
+
+        Args:
+            ticker (str): El ticker cuyos datos se eliminarán
+
+        Raises:
+            DatabaseError: Si hay un error al eliminar los archivos
+        """
+        try:
+            with self._ticker_lock(ticker):
+                if os.path.isdir(self._ticker_dir(ticker)):
+                    shutil.rmtree(self._ticker_dir(ticker))
+                if os.path.exists(self._ranges_path(ticker)):
+                    os.remove(self._ranges_path(ticker))
+        except OSError as e:
+            raise DatabaseError(f"Error al eliminar los datos del ticker {ticker}: {str(e)}")
+
+    @metrics.timed("db_query_duration_seconds", operation="delete_range")
+    def delete_range(self, ticker: str, start_date: str, end_date: str) -> int:
+        """
+        Elimina las barras del ticker en un rango de fechas, reescribiendo sólo las
+        particiones anuales afectadas, y recorta los rangos guardados
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+
+        Returns:
+            int: Cantidad de barras eliminadas
+
+        Raises:
+            DataValidationError: Si las fechas no tienen el formato correcto
+            DatabaseError: Si hay un error al escribir los archivos
+        """
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError as e:
+            raise DataValidationError(f"Formato de fecha inválido: {str(e)}")
+
+        deleted = 0
+        try:
+            with self._ticker_lock(ticker):
+                ticker_dir = self._ticker_dir(ticker)
+                years = sorted(
+                    int(name.split('=', 1)[1]) for name in (os.listdir(ticker_dir) if os.path.isdir(ticker_dir) else [])
+                    if name.startswith('year=')
+                )
+                for year in years:
+                    if year < start.year or year > end.year:
+                        continue
+                    path = self._partition_path(ticker, year)
+                    if not os.path.exists(path):
+                        continue
+                    rows = pq.read_table(path).to_pandas()
+                    keep = (rows['date'] < start) | (rows['date'] > end)
+                    removed = int((~keep).sum())
+                    if removed == 0:
+                        continue
+                    deleted += removed
+                    if keep.any():
+                        table = pa.Table.from_pandas(rows[keep], schema=FILE_SCHEMA, preserve_index=False)
+                        self._write_atomic(path, lambda p: pq.write_table(table, p, compression='zstd'))
+                    else:
+                        shutil.rmtree(os.path.dirname(path))
+
+                ranges = self._read_ranges(ticker)
+                new_ranges = split_ranges(ranges, start_date, end_date)
+                if new_ranges != ranges:
+                    self._write_atomic(self._ranges_path(ticker), lambda p: _dump_json(new_ranges, p))
+        except (OSError, pa.ArrowException) as e:
+            raise DatabaseError(f"Error al eliminar el rango del ticker {ticker}: {str(e)}")
+
+        metrics.inc("db_rows_total", deleted, operation="delete_range")
+        return deleted
+
+    @metrics.timed("db_query_duration_seconds", operation="scan")
+    def scan(self,
+             tickers: Optional[Sequence[str]] = None,
+             start_date: Optional[str] = None,
+             end_date: Optional[str] = None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Lee barras de varios tickers en formato columnar. Sólo se abren las particiones
+        de los tickers y años pedidos y sólo se leen las columnas solicitadas.
+
+        Args:
+            tickers (Sequence[str], optional): Tickers a leer (todos si es None)
+            start_date (str, optional): Fecha mínima en formato YYYY-MM-DD
+            end_date (str, optional): Fecha máxima en formato YYYY-MM-DD
+            columns (Sequence[str], optional): Columnas de precios a incluir (todas si es None)
+
+        Returns:
+            pd.DataFrame: Columnas ticker, date (datetime64) y las columnas pedidas, ordenadas por ticker y fecha
+
+        Raises:
+            DataValidationError: Si se pide una columna desconocida o las fechas son inválidas
+            DatabaseError: Si hay un error al leer los archivos
+        """
+        columns = list(columns or BAR_COLUMNS)
+        unknown = [c for c in columns if c not in BAR_COLUMNS]
+        if unknown:
+            raise DataValidationError(f"Columnas desconocidas: {', '.join(unknown)}")
+        try:
+            expression = self._date_filter(start_date, end_date)
+        except ValueError as e:
+            raise DataValidationError(f"Formato de fecha inválido: {str(e)}")
+
+        try:
+            if tickers is None:
+                dataset = ds.dataset(self.bars_dir, format='parquet', partitioning=PARTITIONING)
+            else:
+                # Se listan sólo los directorios de los tickers pedidos
+                files = [f for t in tickers for f in _parquet_files(self._ticker_dir(t))]
+                if not files:
+                    return pd.DataFrame(columns=['ticker', 'date'] + columns)
+                dataset = ds.dataset(
+                    files, format='parquet', partitioning=PARTITIONING, partition_base_dir=self.bars_dir
+                )
+            table = dataset.to_table(columns=['ticker', 'date'] + columns, filter=expression)
+        except (OSError, pa.ArrowException) as e:
+            raise DatabaseError(f"Error al leer los datos almacenados: {str(e)}")
+
+        metrics.inc("db_rows_total", table.num_rows, operation="scan")
+        df = table.sort_by([('ticker', 'ascending'), ('date', 'ascending')]).to_pandas()
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+
+def _parquet_files(directory: str) -> List[str]:
+    files = []
+    for dirpath, _, filenames in os.walk(directory):
+        files.extend(os.path.join(dirpath, f) for f in filenames if f.endswith('.parquet'))
+    return files
+
+
+def _dump_json(data: Any, path: str) -> None:
+    with open(path, 'w') as f:
+        json.dump(data, f)
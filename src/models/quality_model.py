@@ -0,0 +1,225 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from src.utils import profiling
+from src.utils.exceptions import DatabaseError, DatabaseAccessError, DatabaseConnectionError
+
+# Base de los hallazgos del análisis de calidad (independiente del backend de barras)
+DATA_QUALITY_DB_PATH = os.getenv("DATA_QUALITY_DB_PATH", "data/quality.db")
+
+ISSUE_COLUMNS = ['ticker', 'date', 'rule', 'value', 'detail']
+
+# Parámetros máximos por consulta (SQLITE_MAX_VARIABLE_NUMBER es 999 en versiones viejas)
+_IN_BATCH = 500
+
+
+class DataIssuesModel:
+    """
+    Hallazgos del análisis de calidad de las barras almacenadas: una fila por ticker,
+    fecha y regla incumplida, más un registro de cada análisis realizado. Cada análisis
+    reemplaza los hallazgos de los tickers que revisó.
+    """
+    def __init__(self, db_path: str = DATA_QUALITY_DB_PATH):
+        self.db_path = db_path
+        self._init_db()
+
+    def _init_db(self):
+        """
+        Inicializa la base de datos y crea las tablas necesarias
+
+        Raises:
+            DatabaseAccessError: Si no se puede acceder o crear el directorio de la base de datos
+            DatabaseConnectionError: Si hay un error al conectar con la base de datos
+        """
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        if not os.path.exists(directory):
+            try:
+                os.makedirs(directory)
+            except OSError as e:
+                raise DatabaseAccessError(f"No se pudo crear el directorio de la base de datos: {str(e)}")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS data_issues (
+                        ticker TEXT NOT NULL,
+                        date TEXT NOT NULL,
+                        rule TEXT NOT NULL,
+                        value REAL,
+                        detail TEXT,
+                        detected_at TEXT NOT NULL,
+                        PRIMARY KEY (ticker, date, rule)
+                    ) WITHOUT ROWID
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS quality_scans (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        started_at TEXT NOT NULL,
+                        seconds REAL NOT NULL,
+                        tickers INTEGER NOT NULL,
+                        bars INTEGER NOT NULL,
+                        issues INTEGER NOT NULL
+                    )
+                ''')
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseConnectionError(f"Error al conectar con la base de datos: {str(e)}")
+
+    def replace_issues(self, tickers: Sequence[str], issues: pd.DataFrame,
+                       detected_at: Optional[str] = None) -> None:
+        """
+        Reemplaza, en una única transacción, los hallazgos de los tickers revisados
+
+        Args:
+            tickers (Sequence[str]): Tickers revisados (sus hallazgos anteriores se descartan)
+            issues (pd.DataFrame): Hallazgos nuevos con las columnas de ISSUE_COLUMNS
+            detected_at (str, optional): Momento del análisis (por defecto ahora)
+
+        Raises:
+            DatabaseError: Si hay un error al guardar los hallazgos
+        """
+        detected_at = detected_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [
+            (ticker, date, rule, None if pd.isna(value) else float(value), detail, detected_at)
+            for ticker, date, rule, value, detail in issues[ISSUE_COLUMNS].itertuples(index=False)
+        ]
+        tickers = list(dict.fromkeys(tickers))
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for i in range(0, len(tickers), _IN_BATCH):
+                    batch = tickers[i:i + _IN_BATCH]
+                    profiling.execute(
+                        cursor,
+                        f"DELETE FROM data_issues WHERE ticker IN ({', '.join('?' for _ in batch)})",
+                        batch
+                    )
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO data_issues (ticker, date, rule, value, detail, detected_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al guardar los hallazgos de calidad: {str(e)}")
+
+    def record_scan(self, started_at: str, seconds: float, tickers: int, bars: int, issues: int) -> None:
+        """
+        Registra un análisis completo
+
+        Raises:
+            DatabaseError: Si hay un error al guardar el registro
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('''
+                    INSERT INTO quality_scans (started_at, seconds, tickers, bars, issues)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (started_at, seconds, tickers, bars, issues))
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al registrar el análisis de calidad: {str(e)}")
+
+    def get_issues(self,
+                   tickers: Optional[Sequence[str]] = None,
+                   rules: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Obtiene los hallazgos registrados
+
+        Args:
+            tickers (Sequence[str], optional): Tickers a incluir (todos si es None)
+            rules (Sequence[str], optional): Reglas a incluir (todas si es None)
+
+        Returns:
+            pd.DataFrame: Columnas de ISSUE_COLUMNS y detected_at, ordenadas por ticker y fecha
+
+        Raises:
+            DatabaseError: Si hay un error al leer los hallazgos
+        """
+        conditions, params = [], []
+        if tickers is not None:
+            conditions.append(f"ticker IN ({', '.join('?' for _ in tickers)})")
+            params.extend(tickers)
+        if rules is not None:
+            conditions.append(f"rule IN ({', '.join('?' for _ in rules)})")
+            params.extend(rules)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = profiling.fetchall(conn.cursor(), f'''
+                    SELECT ticker, date, rule, value, detail, detected_at FROM data_issues
+                    {where}
+                    ORDER BY ticker, date, rule
+                ''', params)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al leer los hallazgos de calidad: {str(e)}")
+        return pd.DataFrame(rows, columns=ISSUE_COLUMNS + ['detected_at'])
+
+    def delete_issues(self, ticker: str, dates: Optional[Sequence[str]] = None) -> int:
+        """
+        Descarta hallazgos de un ticker (todos o los de ciertas fechas)
+
+        Returns:
+            int: Cantidad de hallazgos descartados
+
+        Raises:
+            DatabaseError: Si hay un error al eliminar los hallazgos
+        """
+        sql, params = "DELETE FROM data_issues WHERE ticker = ?", [ticker]
+        if dates is not None:
+            sql += f" AND date IN ({', '.join('?' for _ in dates)})"
+            params.extend(dates)
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                profiling.execute(cursor, sql, params)
+                conn.commit()
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al eliminar los hallazgos de calidad: {str(e)}")
+
+    def get_last_scan(self) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene el último análisis registrado
+
+        Returns:
+            Optional[Dict[str, Any]]: started_at, seconds, tickers, bars e issues, o None
+                                      si todavía no se hizo ninguno
+
+        Raises:
+            DatabaseError: Si hay un error al leer el registro
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                row = conn.execute('''
+                    SELECT started_at, seconds, tickers, bars, issues FROM quality_scans
+                    ORDER BY id DESC LIMIT 1
+                ''').fetchone()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al leer el registro de análisis de calidad: {str(e)}")
+        return dict(row) if row else None
+
+    def summarize(self) -> List[Dict[str, Any]]:
+        """
+        Cuenta los hallazgos por regla
+
+        Returns:
+            List[Dict[str, Any]]: rule, issues y tickers afectados por regla
+
+        Raises:
+            DatabaseError: Si hay un error al leer los hallazgos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute('''
+                    SELECT rule, COUNT(*), COUNT(DISTINCT ticker) FROM data_issues
+                    GROUP BY rule ORDER BY rule
+                ''').fetchall()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al leer los hallazgos de calidad: {str(e)}")
+        return [{'rule': rule, 'issues': issues, 'tickers': tickers} for rule, issues, tickers in rows]
@@ -0,0 +1,424 @@
+import os
+import sqlite3
+import time
+import heapq
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.models.storage import TickerStorage, BAR_COLUMNS
+from src.models.ticker_model import TickerModel
+from src.utils import profiling
+from src.utils.exceptions import DatabaseError, DatabaseAccessError, DatabaseConnectionError
+
+# Cantidad de shards al crear un almacenamiento nuevo (luego se lee del catálogo)
+STORAGE_SHARDS = int(os.getenv("STORAGE_SHARDS", "8") or 8)
+
+
+def shard_for(ticker: str, shard_count: int) -> int:
+    """
+    Shard de un ticker: un hash estable entre procesos (a diferencia de hash())
+    """
+    return zlib.crc32(ticker.encode('utf-8')) % shard_count
+
+
+class ShardedTickerModel(TickerStorage):
+    """
+    Almacenamiento SQLite repartido en N archivos (shards/shard-00.db, ...) según un hash
+    del ticker. Cada shard es una base TickerModel independiente, así que las escrituras
+    de tickers de distintos shards no se bloquean entre sí y los lotes que abarcan varios
+    shards se guardan en paralelo.
+
+    catalog.db guarda la cantidad de shards (fija desde la creación) y el registro de
+    tickers almacenados. Las consultas sobre todo el universo (resumen, scan) se reparten
+    entre los shards y se combinan.
+    """
+    supports_adjusted = True
+
+    def __init__(self, root: str = "data/shards", shard_count: int = STORAGE_SHARDS):
+        """
+        Args:
+            root (str): Directorio del almacenamiento
+            shard_count (int): Cantidad de shards si el almacenamiento es nuevo
+        """
+        self.root = root
+        self.location = root
+        self.catalog_path = os.path.join(root, "catalog.db")
+        try:
+            os.makedirs(root, exist_ok=True)
+        except OSError as e:
+            raise DatabaseAccessError(f"No se pudo crear el directorio de almacenamiento: {str(e)}")
+        self.shard_count = self._init_catalog(shard_count)
+        self.shards = [
+            TickerModel(os.path.join(root, f"shard-{i:02d}.db")) for i in range(self.shard_count)
+        ]
+
+    def _init_catalog(self, shard_count: int) -> int:
+        """
+        Crea el catálogo si no existe y obtiene la cantidad de shards registrada
+
+        Raises:
+            DatabaseConnectionError: Si hay un error al conectar con el catálogo
+        """
+        try:
+            with sqlite3.connect(self.catalog_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS meta (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS tickers (
+                        ticker TEXT PRIMARY KEY,
+                        shard INTEGER NOT NULL
+                    ) WITHOUT ROWID
+                ''')
+                cursor.execute(
+                    "INSERT OR IGNORE INTO meta (key, value) VALUES ('shard_count', ?), ('db_id', ?)",
+                    (str(max(1, int(shard_count))), uuid.uuid4().hex)
+                )
+                conn.commit()
+                self._catalog_id = cursor.execute("SELECT value FROM meta WHERE key = 'db_id'").fetchone()[0]
+                return int(cursor.execute("SELECT value FROM meta WHERE key = 'shard_count'").fetchone()[0])
+        except sqlite3.Error as e:
+            raise DatabaseConnectionError(f"Error al conectar con el catálogo de shards: {str(e)}")
+
+    def _shard(self, ticker: str) -> TickerModel:
+        return self.shards[shard_for(ticker, self.shard_count)]
+
+    def _register(self, tickers: Sequence[str]) -> None:
+        """
+        Agrega al catálogo los tickers que no están registrados. Se llama después de cada
+        escritura en los shards y siempre consulta el catálogo (no una caché del proceso):
+        otra instancia pudo haber eliminado el ticker desde la última escritura
+        """
+        tickers = list(dict.fromkeys(tickers))
+        try:
+            with sqlite3.connect(self.catalog_path) as conn:
+                present = {row[0] for row in conn.execute(
+                    f"SELECT ticker FROM tickers WHERE ticker IN ({', '.join('?' for _ in tickers)})", tickers
+                )}
+                new = [t for t in tickers if t not in present]
+                if new:
+                    conn.executemany(
+                        'INSERT OR IGNORE INTO tickers (ticker, shard) VALUES (?, ?)',
+                        [(t, shard_for(t, self.shard_count)) for t in new]
+                    )
+                    conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al registrar tickers en el catálogo: {str(e)}")
+
+    def _unregister(self, ticker: str) -> None:
+        """
+        Quita un ticker del catálogo
+        """
+        try:
+            with sqlite3.connect(self.catalog_path) as conn:
+                conn.execute('DELETE FROM tickers WHERE ticker = ?', (ticker,))
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al eliminar el ticker {ticker} del catálogo: {str(e)}")
+
+    def _group(self, tickers: Sequence[str]) -> Dict[int, List[str]]:
+        groups: Dict[int, List[str]] = {}
+        for ticker in tickers:
+            groups.setdefault(shard_for(ticker, self.shard_count), []).append(ticker)
+        return groups
+
+    def _fan_out(self, fn: Callable[[int], Any], shards: Sequence[int]) -> List[Any]:
+        """
+        Ejecuta `fn(shard)` en paralelo sobre varios shards (sqlite3 libera el GIL
+        mientras ejecuta las consultas) y devuelve los resultados en el mismo orden
+        """
+        shards = list(shards)
+        if len(shards) <= 1:
+            return [fn(i) for i in shards]
+        with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="shard") as executor:
+            return list(executor.map(fn, shards))
+
+    def save_ticker_data(self, ticker: str, data: Dict[str, Any]) -> bool:
+        """
+        Guarda una respuesta de la API en el shard del ticker
+        """
+        saved = self._shard(ticker).save_ticker_data(ticker, data)
+        self._register([ticker])
+        return saved
+
+    def save_many(self, items: Sequence[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Guarda varias respuestas de la API: una transacción por shard, con los shards
+        en paralelo. Cada shard es atómico, pero si uno falla los demás pueden haber
+        guardado su parte (guardar de nuevo una respuesta no duplica barras).
+        """
+        if not items:
+            return
+        groups: Dict[int, List[Tuple[str, Dict[str, Any]]]] = {}
+        for ticker, data in items:
+            groups.setdefault(shard_for(ticker, self.shard_count), []).append((ticker, data))
+        self._fan_out(lambda i: self.shards[i].save_many(groups[i]), groups)
+        self._register([ticker for ticker, _ in items])
+
+    def get_ticker_data(self, ticker: str, start_date: str, end_date: str) -> Optional[List[Dict[str, Any]]]:
+        return self._shard(ticker).get_ticker_data(ticker, start_date, end_date)
+
+    def upsert_bars(self, bars: pd.DataFrame) -> int:
+        """
+        Inserta o reemplaza un lote de barras: una transacción por shard, en paralelo
+        """
+        if bars.empty or 'ticker' not in bars.columns:
+            return self.shards[0].upsert_bars(bars)
+        tickers = bars['ticker'].unique().tolist()
+        shard_of = bars['ticker'].map({t: shard_for(t, self.shard_count) for t in tickers})
+        groups = {int(i): group for i, group in bars.groupby(shard_of.to_numpy(), sort=False)}
+        written = sum(self._fan_out(lambda i: self.shards[i].upsert_bars(groups[i]), groups))
+        self._register(tickers)
+        return written
+
+    def add_coverage(self, ticker: str, start_date: str, end_date: str) -> None:
+        self._shard(ticker).add_coverage(ticker, start_date, end_date)
+        self._register([ticker])
+
+    def get_coverage(self, ticker: str) -> List[Tuple[str, str]]:
+        return self._shard(ticker).get_coverage(ticker)
+
+    def get_stored_tickers(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene el resumen de todos los shards (consultados en paralelo), ordenado por ticker
+        """
+        parts = self._fan_out(lambda i: self.shards[i].get_stored_tickers(), range(self.shard_count))
+        return sorted((item for part in parts for item in part), key=lambda item: item['ticker'])
+
+    def list_tickers(self) -> List[str]:
+        """
+        Obtiene los tickers registrados en el catálogo, sin consultar los shards
+
+        Raises:
+            DatabaseError: Si hay un error al acceder al catálogo
+        """
+        try:
+            with sqlite3.connect(self.catalog_path) as conn:
+                cursor = conn.cursor()
+                rows = profiling.fetchall(cursor, 'SELECT ticker FROM tickers ORDER BY ticker')
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al obtener los tickers almacenados: {str(e)}")
+        return [row[0] for row in rows]
+
+    def _range_shards(self, ticker: Optional[str]) -> List[int]:
+        return [shard_for(ticker, self.shard_count)] if ticker is not None else list(range(self.shard_count))
+
+    def query_ranges(self,
+                     ticker: Optional[str] = None,
+                     ticker_prefix: Optional[str] = None,
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None,
+                     sort: str = 'ticker',
+                     descending: bool = False,
+                     after: Optional[tuple] = None,
+                     limit: int = 50) -> Dict[str, Any]:
+        """
+        Obtiene una página de los rangos guardados: cada shard devuelve su propia página
+        después de la misma clave y se combinan por clave, que es única entre shards
+        porque cada ticker vive en uno solo
+        """
+        shards = self._range_shards(ticker)
+        parts = self._fan_out(
+            lambda i: self.shards[i]._query_ranges_keyed(
+                ticker, ticker_prefix, start_date, end_date, sort, descending, after, limit + 1
+            ),
+            shards
+        )
+        merged = list(heapq.merge(*parts, key=lambda item: item[0], reverse=descending))[:limit + 1]
+        page = merged[:limit]
+        return {
+            'rows': [row for _, row in page],
+            'next': page[-1][0] if len(merged) > limit else None,
+        }
+
+    def count_ranges(self,
+                     ticker: Optional[str] = None,
+                     ticker_prefix: Optional[str] = None,
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> Dict[str, int]:
+        """
+        Cuenta los rangos de todos los shards (los tickers no se repiten entre shards)
+        """
+        parts = self._fan_out(
+            lambda i: self.shards[i].count_ranges(ticker, ticker_prefix, start_date, end_date),
+            self._range_shards(ticker)
+        )
+        return {key: sum(part[key] for part in parts) for key in ('ranges', 'tickers', 'bars')}
+
+    def delete_ticker_data(self, ticker: str) -> None:
+        self._shard(ticker).delete_ticker_data(ticker)
+        self._unregister(ticker)
+
+    def delete_range(self, ticker: str, start_date: str, end_date: str) -> int:
+        """
+        Elimina un rango de barras del shard del ticker y, si era lo último que quedaba
+        (ej: por la retención), también lo quita del catálogo
+        """
+        shard = self._shard(ticker)
+        deleted = shard.delete_range(ticker, start_date, end_date)
+        if deleted and not shard.has_ticker(ticker):
+            self._unregister(ticker)
+        return deleted
+
+    def replace_range(self, ticker: str, start_date: str, end_date: str, data: Dict[str, Any]) -> int:
+        deleted = self._shard(ticker).replace_range(ticker, start_date, end_date, data)
+        self._register([ticker])
+        return deleted
+
+    def save_corporate_actions(self,
+                               ticker: str,
+                               splits: Sequence[Dict[str, Any]],
+                               dividends: Sequence[Dict[str, Any]]) -> int:
+        return self._shard(ticker).save_corporate_actions(ticker, splits, dividends)
+
+    def get_corporate_actions(self, ticker: str) -> Dict[str, List[Dict[str, Any]]]:
+        return self._shard(ticker).get_corporate_actions(ticker)
+
+    def legacy_range(self, ticker: str) -> Optional[Tuple[str, str]]:
+        return self._shard(ticker).legacy_range(ticker)
+
+    def count_bars(self, ticker: str, before: str) -> int:
+        return self._shard(ticker).count_bars(ticker, before)
+
+    def data_version(self) -> Optional[str]:
+        """
+        Obtiene la versión de los datos: el identificador del catálogo y los contadores
+        de escritura de cada shard
+        """
+        counters = []
+        for shard in self.shards:
+            version = shard.data_version()
+            if version is None:
+                return None
+            counters.append(version.rsplit(':', 1)[1])
+        return f"{self._catalog_id}:{'.'.join(counters)}"
+
+    def get_space_stats(self) -> Dict[str, Any]:
+        """
+        Suma el uso de espacio de todos los shards (y del catálogo)
+        """
+        stats = [shard.get_space_stats() for shard in self.shards]
+        modes = {s['auto_vacuum'] for s in stats}
+        catalog_size = os.path.getsize(self.catalog_path) if os.path.exists(self.catalog_path) else 0
+        return {
+            'size_bytes': sum(s['size_bytes'] for s in stats) + catalog_size,
+            'reclaimable_bytes': sum(s['reclaimable_bytes'] for s in stats),
+            'page_size': stats[0]['page_size'],
+            'free_pages': sum(s['free_pages'] for s in stats),
+            'auto_vacuum': modes.pop() if len(modes) == 1 else 'mixed',
+            'shards': len(stats)
+        }
+
+    def reclaim_space(self, max_pages: Optional[int] = None, time_budget: Optional[float] = None) -> int:
+        """
+        Libera espacio shard por shard, repartiendo el límite de páginas y de tiempo
+        """
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        remaining = max_pages
+        freed = 0
+        for shard in self.shards:
+            budget = None if deadline is None else deadline - time.monotonic()
+            if (remaining is not None and remaining <= 0) or (budget is not None and budget <= 0):
+                break
+            page_size = shard.get_space_stats()['page_size']
+            step = shard.reclaim_space(remaining, budget)
+            freed += step
+            if remaining is not None:
+                remaining -= step // page_size
+        return freed
+
+    def enable_incremental_vacuum(self) -> None:
+        """
+        Convierte cada shard al modo auto_vacuum incremental (VACUUM completo de cada uno)
+        """
+        for shard in self.shards:
+            shard.enable_incremental_vacuum()
+
+    def scan(self,
+             tickers: Optional[Sequence[str]] = None,
+             start_date: Optional[str] = None,
+             end_date: Optional[str] = None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Lee barras de varios tickers consultando en paralelo sólo los shards involucrados
+
+        Returns:
+            pd.DataFrame: Columnas ticker, date (datetime64) y las columnas pedidas, ordenadas por ticker y fecha
+        """
+        if tickers is None:
+            groups: Dict[int, Optional[List[str]]] = {i: None for i in range(self.shard_count)}
+        else:
+            groups = self._group(tickers) or {0: []}
+        parts = self._fan_out(
+            lambda i: self.shards[i].scan(groups[i], start_date, end_date, columns), groups
+        )
+        df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        # Cada shard ya viene ordenado y los tickers no se repiten entre shards
+        return df.sort_values('ticker', kind='stable', ignore_index=True)
+
+    def latest_bars(self,
+                    tickers: Sequence[str],
+                    bars: int,
+                    columns: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lee las últimas `bars` barras de cada ticker desde su shard, en paralelo
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Fecha de la última barra de cada ticker y valores
+                                           con forma (columnas, tickers, bars)
+        """
+        columns = list(columns or BAR_COLUMNS)
+        last_dates = np.full(len(tickers), None, dtype=object)
+        values = np.full((len(columns), len(tickers), bars), np.nan)
+        positions: Dict[int, List[int]] = {}
+        for position, ticker in enumerate(tickers):
+            positions.setdefault(shard_for(ticker, self.shard_count), []).append(position)
+        parts = self._fan_out(
+            lambda i: self.shards[i].latest_bars([tickers[p] for p in positions[i]], bars, columns),
+            positions
+        )
+        for i, (shard_dates, shard_values) in zip(positions, parts):
+            last_dates[positions[i]] = shard_dates
+            values[:, positions[i], :] = shard_values
+        return last_dates, values
+
+    def iter_bars(self,
+                  tickers: Optional[Sequence[str]] = None,
+                  start_date: Optional[str] = None,
+                  end_date: Optional[str] = None,
+                  chunk_rows: int = 50000) -> Iterator[pd.DataFrame]:
+        """
+        Recorre las barras shard por shard, cada uno paginado por clave
+        
+        Yields:
+            pd.DataFrame: Columnas ticker, date (YYYY-MM-DD), BAR_COLUMNS y raw
+        """
+        if tickers is None:
+            groups: Dict[int, Optional[List[str]]] = {i: None for i in range(self.shard_count)}
+        else:
+            groups = self._group(tickers)
+        for i in sorted(groups):
+            yield from self.shards[i].iter_bars(groups[i], start_date, end_date, chunk_rows)
+
+    def iter_ticker_frames(self,
+                           ticker: str,
+                           start_date: Optional[str] = None,
+                           end_date: Optional[str] = None,
+                           chunk_rows: int = 50000,
+                           columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Recorre la historia de un ticker en bloques, leyéndola de su shard
+
+        Yields:
+            pd.DataFrame: DataFrame indexado por fecha, en orden cronológico
+        """
+        return self._shard(ticker).iter_ticker_frames(ticker, start_date, end_date, chunk_rows, columns)
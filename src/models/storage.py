@@ -0,0 +1,807 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Tuple, Sequence, Iterator
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+import pandas as pd
+
+from src.utils.exceptions import DatabaseError, InvalidDataError, DataValidationError
+
+# Columnas de precios comunes a todos los backends
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'vwap']
+
+# Columnas ajustadas por splits y dividendos, materializadas por los backends que las soportan
+ADJUSTED_COLUMNS = [f'adj_{column}' for column in BAR_COLUMNS]
+
+# Ordenamientos de la consulta paginada de rangos: columnas de la clave de paginación.
+# La clave es única en todo el almacenamiento (incluye ticker, inicio y fin del rango)
+RANGE_SORTS = {
+    'ticker': ('ticker', 'start_date', 'end_date'),
+    'created_at': ('created_at', 'ticker', 'start_date', 'end_date'),
+    'start_date': ('start_date', 'ticker', 'end_date'),
+    'end_date': ('end_date', 'ticker', 'start_date'),
+}
+
+# Campos requeridos en cada resultado de la API de agregados
+REQUIRED_FIELDS = ['t', 'o', 'h', 'l', 'c', 'v', 'vw']
+
+
+def validate_aggs_payload(data: Dict[str, Any]) -> None:
+    """
+    Valida que una respuesta de la API de agregados pueda guardarse
+
+    Args:
+        data (Dict[str, Any]): Respuesta de la API
+
+    Raises:
+        InvalidDataError: Si los datos son inválidos o están vacíos
+        DataValidationError: Si a algún resultado le faltan campos requeridos
+    """
+    aggs_columns(data)
+
+
+def aggs_columns(data: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Valida una respuesta de la API de agregados y la convierte en columnas. Cada campo
+    se extrae de los resultados una sola vez y la validación se hace sobre los arrays
+    (un campo ausente o nulo queda como NaN), sin recorrer los resultados por cada regla.
+
+    Args:
+        data (Dict[str, Any]): Respuesta de la API
+
+    Returns:
+        Dict[str, np.ndarray]: t (int64, milisegundos), date (datetime64[D], día local)
+            y BAR_COLUMNS (float64), en el orden de la respuesta
+
+    Raises:
+        InvalidDataError: Si los datos son inválidos o están vacíos
+        DataValidationError: Si a algún resultado le faltan campos requeridos o no son numéricos
+    """
+    # Validar entrada
+    if not data or not isinstance(data, dict):
+        raise InvalidDataError("Los datos proporcionados son inválidos o están vacíos")
+        
+    # Validar que existan resultados
+    if not data.get('results'):
+        raise InvalidDataError("No hay resultados en los datos proporcionados")
+        
+    results = data['results']
+    if not isinstance(results, list) or len(results) == 0:
+        raise InvalidDataError("El formato de los resultados es inválido o está vacío")
+
+    count = len(results)
+    try:
+        # Cada campo se convierte directamente del iterador, sin listas intermedias
+        arrays = {
+            field: np.fromiter(map(itemgetter(field), results), dtype=np.float64, count=count)
+            for field in REQUIRED_FIELDS
+        }
+    except (KeyError, TypeError, ValueError):
+        # Campo ausente, resultado que no es un diccionario o valor no numérico: se repite
+        # por el camino lento para informar el error preciso
+        try:
+            values = {field: [result.get(field) for result in results] for field in REQUIRED_FIELDS}
+        except AttributeError:
+            raise InvalidDataError("El formato de los resultados es inválido o está vacío")
+        try:
+            arrays = {field: np.asarray(column, dtype=np.float64) for field, column in values.items()}
+        except (TypeError, ValueError) as e:
+            raise DataValidationError(f"Valores no numéricos en los datos: {str(e)}")
+
+    # Validar estructura de datos
+    missing_fields = [field for field, array in arrays.items() if np.isnan(array).any()]
+    if missing_fields:
+        raise DataValidationError(f"Faltan campos requeridos en los datos: {', '.join(missing_fields)}")
+
+    timestamps = arrays.pop('t').astype(np.int64)
+    columns = {'t': timestamps, 'date': ms_to_days(timestamps)}
+    columns.update(zip(BAR_COLUMNS, arrays.values()))
+    return columns
+
+
+@lru_cache(maxsize=8)
+def _local_zone(tz_env: str) -> Optional[ZoneInfo]:
+    """
+    Obtiene la zona horaria local como ZoneInfo (desde TZ o, si no está definida, desde
+    /etc/localtime), o None si no puede identificarse (ej: TZ con reglas POSIX o Windows)
+    """
+    key = tz_env.lstrip(':')
+    if not key:
+        path = os.path.realpath('/etc/localtime')
+        marker = os.path.join('zoneinfo', '')
+        if marker not in path:
+            return None
+        key = path.split(marker, 1)[1]
+    try:
+        return ZoneInfo(key)
+    except (ZoneInfoNotFoundError, ValueError, OSError):
+        return None
+
+
+def ms_to_days(timestamps: np.ndarray) -> np.ndarray:
+    """
+    Convierte timestamps en milisegundos al día en la zona horaria local, igual que
+    datetime.fromtimestamp. Con la zona identificada la conversión es vectorizada (respeta
+    los cambios de horario de verano); si no, se consulta el desfase de cada timestamp.
+
+    Args:
+        timestamps (np.ndarray): Timestamps en milisegundos (int64)
+
+    Returns:
+        np.ndarray: Días (datetime64[D])
+    """
+    zone = _local_zone(os.environ.get('TZ', ''))
+    if zone is not None:
+        local = pd.to_datetime(timestamps, unit='ms', utc=True).tz_convert(zone).tz_localize(None)
+        return local.to_numpy().astype('datetime64[D]')
+
+    seconds = timestamps // 1000
+    localtime = time.localtime
+    offsets = np.fromiter(
+        (localtime(second).tm_gmtoff for second in seconds.tolist()), dtype=np.int64, count=len(seconds)
+    )
+    return ((seconds + offsets) // 86400).astype('datetime64[D]')
+
+
+def payload_to_rows(ticker: str, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Valida una respuesta de la API de agregados y la convierte en filas con el mismo
+    formato que devuelve get_ticker_data (ticker, date YYYY-MM-DD y BAR_COLUMNS)
+
+    Args:
+        ticker (str): Símbolo del ticker
+        data (Dict[str, Any]): Respuesta de la API
+
+    Returns:
+        List[Dict[str, Any]]: Filas en el orden de la respuesta
+
+    Raises:
+        InvalidDataError: Si los datos son inválidos o están vacíos
+        DataValidationError: Si a algún resultado le faltan campos requeridos
+    """
+    columns = aggs_columns(data)
+    keys = ['date'] + BAR_COLUMNS
+    return [
+        {'ticker': ticker, **dict(zip(keys, values))}
+        for values in zip(columns['date'].astype(str).tolist(),
+                          *(columns[column].tolist() for column in BAR_COLUMNS))
+    ]
+
+
+def normalize_corporate_actions(splits: Sequence[Dict[str, Any]],
+                                dividends: Sequence[Dict[str, Any]]
+                                ) -> Tuple[List[Tuple[str, float, float]], List[Tuple[str, float]]]:
+    """
+    Valida los splits y dividendos de un ticker, tal como los devuelven los endpoints de
+    referencia de la API, y los convierte en tuplas ordenadas por fecha. Los dividendos
+    con la misma fecha ex-dividendo (ej: uno ordinario y uno extraordinario) se suman.
+
+    Args:
+        splits (Sequence[Dict[str, Any]]): Splits con execution_date, split_from y split_to
+        dividends (Sequence[Dict[str, Any]]): Dividendos con ex_dividend_date y cash_amount
+
+    Returns:
+        Tuple[List[Tuple[str, float, float]], List[Tuple[str, float]]]: (fecha, split_from,
+            split_to) de cada split y (fecha ex-dividendo, monto) de cada dividendo
+
+    Raises:
+        DataValidationError: Si a alguna acción le faltan campos o tiene valores inválidos
+    """
+    try:
+        normalized_splits = {}
+        for split in splits:
+            date = datetime.strptime(split['execution_date'], '%Y-%m-%d').strftime('%Y-%m-%d')
+            split_from, split_to = float(split['split_from']), float(split['split_to'])
+            if split_from <= 0 or split_to <= 0:
+                raise ValueError(f"proporción inválida {split_from}:{split_to}")
+            normalized_splits[date] = (date, split_from, split_to)
+        cash = {}
+        for dividend in dividends:
+            date = datetime.strptime(dividend['ex_dividend_date'], '%Y-%m-%d').strftime('%Y-%m-%d')
+            amount = float(dividend['cash_amount'])
+            if amount < 0:
+                raise ValueError(f"monto inválido {amount}")
+            cash[date] = cash.get(date, 0.0) + amount
+    except (KeyError, TypeError, ValueError) as e:
+        raise DataValidationError(f"Acción corporativa inválida: {str(e)}")
+    return sorted(normalized_splits.values()), sorted(cash.items())
+
+
+def adjustment_factors(splits: Sequence[Tuple[str, float, float]],
+                       dividends: Sequence[Tuple[str, float]],
+                       previous_closes: Dict[str, Optional[float]]) -> List[Tuple[str, float, float]]:
+    """
+    Calcula los factores de ajuste acumulados de un ticker. Cada split multiplica los
+    precios anteriores a su fecha por split_from / split_to (y el volumen por la inversa);
+    cada dividendo multiplica los precios anteriores a su fecha ex-dividendo por
+    1 - monto / cierre del día hábil previo, con precios sin ajustar.
+
+    Args:
+        splits (Sequence[Tuple[str, float, float]]): (fecha, split_from, split_to)
+        dividends (Sequence[Tuple[str, float]]): (fecha ex-dividendo, monto)
+        previous_closes (Dict[str, Optional[float]]): Cierre sin ajustar anterior a cada
+            fecha ex-dividendo (None si no está almacenado: el dividendo no se aplica)
+
+    Returns:
+        List[Tuple[str, float, float]]: (fecha, factor de precios, factor de volumen) en orden
+            cronológico: las barras anteriores a `fecha` (y posteriores o iguales a la fecha
+            anterior de la lista) se multiplican por esos factores; desde la última fecha el
+            factor es 1
+    """
+    events: Dict[str, List[float]] = {}
+    for date, split_from, split_to in splits:
+        factors = events.setdefault(date, [1.0, 1.0])
+        factors[0] *= split_from / split_to
+        factors[1] *= split_to / split_from
+    for date, amount in dividends:
+        close = previous_closes.get(date)
+        if close and 0 < amount < close:
+            events.setdefault(date, [1.0, 1.0])[0] *= 1 - amount / close
+
+    result = []
+    price, volume = 1.0, 1.0
+    for date in sorted(events, reverse=True):
+        price *= events[date][0]
+        volume *= events[date][1]
+        result.append((date, price, volume))
+    return result[::-1]
+
+
+def date_to_ms(date_str: str) -> int:
+    """
+    Convierte una fecha YYYY-MM-DD al timestamp en milisegundos de su medianoche local,
+    el mismo formato con que se guardan los rangos obtenidos de la API
+
+    Args:
+        date_str (str): Fecha en formato YYYY-MM-DD
+
+    Returns:
+        int: Timestamp en milisegundos
+    """
+    return int(datetime.strptime(date_str, '%Y-%m-%d').timestamp() * 1000)
+
+
+def merge_intervals(intervals: Sequence[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    Une intervalos de fechas superpuestos o contiguos
+
+    Args:
+        intervals (Sequence[Tuple[str, str]]): Intervalos (inicio, fin) en formato YYYY-MM-DD
+
+    Returns:
+        List[Tuple[str, str]]: Intervalos disjuntos ordenados cronológicamente
+    """
+    merged: List[Tuple[str, str]] = []
+    for start, end in sorted(intervals):
+        if merged:
+            last_start, last_end = merged[-1]
+            next_day = (datetime.strptime(last_end, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+            if start <= next_day:
+                merged[-1] = (last_start, max(last_end, end))
+                continue
+        merged.append((start, end))
+    return merged
+
+
+def missing_intervals(dates: Optional[Sequence[Any]],
+                      start_date: str,
+                      end_date: str,
+                      covered: Optional[Sequence[Tuple[str, str]]] = None) -> List[Tuple[str, str, int]]:
+    """
+    Calcula los tramos de días hábiles (lunes a viernes) de [start_date, end_date] sin
+    datos. Se recorren sólo las fechas presentes: cada tramo es el hueco entre dos fechas
+    consecutivas, así que el costo no depende del largo del período. Los días dentro de
+    `covered` (ej: feriados de un rango ya descargado) no cuentan como faltantes.
+
+    Args:
+        dates (Sequence, optional): Fechas con datos (ej: el índice de un DataFrame); None si no hay
+        start_date (str): Fecha de inicio en formato YYYY-MM-DD
+        end_date (str): Fecha de fin en formato YYYY-MM-DD
+        covered (Sequence[Tuple[str, str]], optional): Intervalos (inicio, fin) ya consultados
+            a la API (ver TickerStorage.get_coverage)
+
+    Returns:
+        List[Tuple[str, str, int]]: (inicio, fin, días hábiles) de cada tramo en formato
+            YYYY-MM-DD, en orden cronológico
+    """
+    start, end = np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D')
+    one_day = np.timedelta64(1, 'D')
+    present = np.unique(np.asarray(dates if dates is not None else [], dtype='datetime64[D]'))
+    present = present[(present >= start) & (present <= end)]
+
+    # Los extremos del período actúan como fechas presentes ficticias
+    edges = np.concatenate([[start - one_day], present, [end + one_day]])
+    lower = np.busday_offset(edges[:-1] + one_day, 0, roll='forward')
+    upper = np.busday_offset(edges[1:] - one_day, 0, roll='backward')
+    gaps = lower <= upper
+    lower, upper = lower[gaps], upper[gaps]
+    if covered and len(lower):
+        lower, upper = _subtract_intervals(lower, upper, covered)
+    counts = np.busday_count(lower, upper + one_day)
+    return list(zip(lower.astype(str).tolist(), upper.astype(str).tolist(), counts.tolist()))
+
+
+def _subtract_intervals(lower: np.ndarray,
+                        upper: np.ndarray,
+                        covered: Sequence[Tuple[str, str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quita de los tramos [lower, upper] (datetime64[D], ordenados y disjuntos) los días de
+    `covered`, y ajusta los extremos resultantes al día hábil más cercano dentro del tramo
+    """
+    one_day = np.timedelta64(1, 'D')
+    intervals = sorted(
+        (np.datetime64(start, 'D'), np.datetime64(end, 'D')) for start, end in covered
+    )
+    starts, ends = [], []
+    for gap_start, gap_end in zip(lower, upper):
+        for cov_start, cov_end in intervals:
+            if cov_end < gap_start:
+                continue
+            if cov_start > gap_end:
+                break
+            if cov_start > gap_start:
+                starts.append(gap_start)
+                ends.append(cov_start - one_day)
+            gap_start = cov_end + one_day
+            if gap_start > gap_end:
+                break
+        if gap_start <= gap_end:
+            starts.append(gap_start)
+            ends.append(gap_end)
+
+    lower = np.busday_offset(np.array(starts, dtype='datetime64[D]'), 0, roll='forward')
+    upper = np.busday_offset(np.array(ends, dtype='datetime64[D]'), 0, roll='backward')
+    gaps = lower <= upper
+    return lower[gaps], upper[gaps]
+
+
+def split_ranges(ranges: Sequence[Dict[str, int]], start_date: str, end_date: str) -> List[Dict[str, int]]:
+    """
+    Recorta los rangos guardados (timestamps en ms) quitando el intervalo [start_date, end_date].
+    Un rango que contiene al intervalo se divide en dos; los demás se acortan o se eliminan.
+
+    Args:
+        ranges (Sequence[Dict[str, int]]): Rangos con start_date, end_date y created_at
+        start_date (str): Primer día eliminado en formato YYYY-MM-DD
+        end_date (str): Último día eliminado en formato YYYY-MM-DD
+
+    Returns:
+        List[Dict[str, int]]: Rangos resultantes, conservando su created_at
+    """
+    day_before = (datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+    day_after = (datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    result = []
+    for r in ranges:
+        r_start = datetime.fromtimestamp(r['start_date'] / 1000).strftime('%Y-%m-%d')
+        r_end = datetime.fromtimestamp(r['end_date'] / 1000).strftime('%Y-%m-%d')
+        if r_end < start_date or r_start > end_date:
+            result.append(dict(r))
+            continue
+        if r_start < start_date:
+            result.append({'start_date': r['start_date'], 'end_date': date_to_ms(day_before),
+                           'created_at': r['created_at']})
+        if r_end > end_date:
+            result.append({'start_date': date_to_ms(day_after), 'end_date': r['end_date'],
+                           'created_at': r['created_at']})
+    return result
+
+
+class TickerStorage(ABC):
+    """
+    Interfaz de almacenamiento de barras diarias y de los rangos consultados por ticker.
+    TickerService sólo depende de esta interfaz, por lo que los backends son intercambiables.
+    """
+    # Ruta que identifica al almacenamiento (archivo o directorio)
+    location: str
+    # True si el backend guarda acciones corporativas y materializa ADJUSTED_COLUMNS
+    supports_adjusted: bool = False
+
+    @abstractmethod
+    def save_ticker_data(self, ticker: str, data: Dict[str, Any]) -> bool:
+        """
+        Guarda una respuesta de la API de agregados y registra el rango cubierto
+        """
+
+    def save_many(self, items: Sequence[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Guarda varias respuestas de la API (ticker, datos). La implementación por
+        defecto las guarda de a una; los backends transaccionales las agrupan en
+        una única transacción.
+        """
+        for ticker, data in items:
+            self.save_ticker_data(ticker, data)
+
+    @abstractmethod
+    def get_ticker_data(self, ticker: str, start_date: str, end_date: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Obtiene las barras de un ticker en el rango [start_date, end_date] ordenadas por fecha,
+        o None si no hay datos
+        """
+
+    @abstractmethod
+    def upsert_bars(self, bars: pd.DataFrame) -> int:
+        """
+        Inserta o reemplaza un lote de barras (columnas ticker, date en formato YYYY-MM-DD
+        y BAR_COLUMNS) en una única operación. No registra cobertura. Los backends que
+        materializan precios ajustados respetan además la columna raw (0 si las barras ya
+        vienen ajustadas; ver supports_adjusted).
+        """
+
+    @abstractmethod
+    def add_coverage(self, ticker: str, start_date: str, end_date: str) -> None:
+        """
+        Registra que el rango [start_date, end_date] del ticker está almacenado
+        """
+
+    @abstractmethod
+    def get_coverage(self, ticker: str) -> List[Tuple[str, str]]:
+        """
+        Obtiene los intervalos de fechas (YYYY-MM-DD) cubiertos por los rangos guardados del ticker
+        """
+
+    @abstractmethod
+    def get_stored_tickers(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene el resumen de tickers almacenados con sus rangos y cantidad de datos
+        """
+
+    @abstractmethod
+    def delete_ticker_data(self, ticker: str) -> None:
+        """
+        Elimina todas las barras y rangos de un ticker
+        """
+
+    @abstractmethod
+    def delete_range(self, ticker: str, start_date: str, end_date: str) -> int:
+        """
+        Elimina las barras del ticker en [start_date, end_date] y recorta sus rangos guardados.
+        Retorna la cantidad de barras eliminadas.
+        """
+
+    def replace_range(self, ticker: str, start_date: str, end_date: str, data: Dict[str, Any]) -> int:
+        """
+        Reemplaza las barras del ticker en [start_date, end_date] por una respuesta de la
+        API de agregados. La implementación por defecto valida la respuesta antes de
+        eliminar nada; los backends transaccionales hacen ambos pasos en una única
+        transacción. Retorna la cantidad de barras eliminadas.
+        """
+        aggs_columns(data)
+        deleted = self.delete_range(ticker, start_date, end_date)
+        self.save_ticker_data(ticker, data)
+        return deleted
+
+    def save_corporate_actions(self,
+                               ticker: str,
+                               splits: Sequence[Dict[str, Any]],
+                               dividends: Sequence[Dict[str, Any]]) -> int:
+        """
+        Reemplaza los splits y dividendos del ticker y, si cambiaron, recalcula sus
+        columnas ajustadas. Por defecto el backend no los soporta.
+
+        Returns:
+            int: Acciones nuevas, modificadas o eliminadas (0 si no hubo cambios)
+
+        Raises:
+            DatabaseError: Si el backend no guarda acciones corporativas
+        """
+        raise DatabaseError(
+            f"El backend de almacenamiento {type(self).__name__} no guarda splits ni dividendos"
+        )
+
+    def get_corporate_actions(self, ticker: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Obtiene los splits, dividendos y factores de ajuste guardados del ticker.
+        Por defecto no hay ninguno.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: splits, dividends y factors
+        """
+        return {'splits': [], 'dividends': [], 'factors': []}
+
+    def legacy_range(self, ticker: str) -> Optional[Tuple[str, str]]:
+        """
+        Obtiene la primera y última fecha (YYYY-MM-DD) de las barras del ticker que se
+        guardaron ya ajustadas por la API y no reciben los factores de ajuste, o None
+        si no hay. Por defecto el backend no distingue barras ajustadas.
+        """
+        return None
+
+    def count_bars(self, ticker: str, before: str) -> int:
+        """
+        Cuenta las barras del ticker anteriores a una fecha (YYYY-MM-DD). La implementación
+        por defecto recorre las barras; los backends que pueden contar en la consulta la
+        reemplazan.
+        """
+        last = (datetime.strptime(before, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+        return len(self.scan([ticker], end_date=last, columns=['close']))
+
+    def data_version(self) -> Optional[str]:
+        """
+        Obtiene un identificador opaco de la versión de los datos, que cambia con cada
+        escritura. Por defecto None: el backend no versiona sus datos y las cachés
+        persistentes (ej: WarmCache) no se usan con él.
+        """
+        return None
+
+    def get_space_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de uso de espacio del almacenamiento. Por defecto sólo
+        el tamaño en disco; los backends con espacio recuperable agregan más detalle.
+        """
+        if os.path.isdir(self.location):
+            size = sum(
+                os.path.getsize(os.path.join(dirpath, f))
+                for dirpath, _, filenames in os.walk(self.location) for f in filenames
+            )
+        else:
+            size = os.path.getsize(self.location) if os.path.exists(self.location) else 0
+        return {'size_bytes': size, 'reclaimable_bytes': 0}
+
+    def reclaim_space(self, max_pages: Optional[int] = None, time_budget: Optional[float] = None) -> int:
+        """
+        Libera espacio de forma incremental. Por defecto no hace nada: los backends
+        basados en archivos liberan el espacio al eliminar.
+
+        Returns:
+            int: Bytes liberados
+        """
+        return 0
+
+    def scan(self,
+             tickers: Optional[Sequence[str]] = None,
+             start_date: Optional[str] = None,
+             end_date: Optional[str] = None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Lee barras de varios tickers a la vez para análisis (indicadores, correlaciones).
+        La implementación por defecto recorre los tickers de a uno; los backends
+        columnar la reemplazan para filtrar y proyectar columnas en la lectura.
+
+        Args:
+            tickers (Sequence[str], optional): Tickers a leer (todos si es None)
+            start_date (str, optional): Fecha mínima en formato YYYY-MM-DD
+            end_date (str, optional): Fecha máxima en formato YYYY-MM-DD
+            columns (Sequence[str], optional): Columnas de precios a incluir (todas si es None)
+
+        Returns:
+            pd.DataFrame: Columnas ticker, date (datetime64) y las columnas pedidas
+        """
+        if tickers is None:
+            tickers = [t['ticker'] for t in self.get_stored_tickers()]
+        columns = list(columns or BAR_COLUMNS)
+        frames = []
+        for ticker in tickers:
+            rows = self.get_ticker_data(ticker, start_date or '1900-01-01', end_date or '2999-12-31')
+            if rows:
+                frame = pd.DataFrame(rows)
+                frames.append(frame[['ticker', 'date'] + columns])
+        if not frames:
+            return pd.DataFrame(columns=['ticker', 'date'] + columns)
+        df = pd.concat(frames, ignore_index=True)
+        df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+        return df
+
+    def list_tickers(self) -> List[str]:
+        """
+        Obtiene los tickers almacenados, ordenados. La implementación por defecto usa
+        get_stored_tickers; los backends que pueden listarlos sin contar barras la reemplazan.
+
+        Returns:
+            List[str]: Símbolos de los tickers
+        """
+        return [t['ticker'] for t in self.get_stored_tickers()]
+
+    def query_ranges(self,
+                     ticker: Optional[str] = None,
+                     ticker_prefix: Optional[str] = None,
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None,
+                     sort: str = 'ticker',
+                     descending: bool = False,
+                     after: Optional[tuple] = None,
+                     limit: int = 50) -> Dict[str, Any]:
+        """
+        Obtiene una página de los rangos guardados, filtrada y ordenada, con paginación
+        por clave: la página siguiente se pide pasando el `next` de la anterior como
+        `after`. La implementación por defecto filtra el resumen de get_stored_tickers;
+        los backends que pueden filtrar en la consulta la reemplazan.
+
+        Args:
+            ticker (str, optional): Sólo los rangos de este ticker
+            ticker_prefix (str, optional): Sólo los tickers que empiezan con este prefijo
+            start_date (str, optional): Sólo los rangos que terminan en o después de esta fecha (YYYY-MM-DD)
+            end_date (str, optional): Sólo los rangos que empiezan en o antes de esta fecha (YYYY-MM-DD)
+            sort (str): Ordenamiento, una clave de RANGE_SORTS
+            descending (bool): Orden descendente
+            after (tuple, optional): Clave de la última fila de la página anterior
+            limit (int): Filas máximas de la página
+
+        Returns:
+            Dict[str, Any]: rows (ticker, start_date, end_date, created_at y data_points de
+                            cada rango) y next (clave para pedir la página siguiente, o None
+                            si es la última)
+
+        Raises:
+            DataValidationError: Si el ordenamiento es desconocido
+        """
+        keys = range_sort_keys(sort)
+        rows = [
+            {'ticker': info['ticker'], **r}
+            for info in self.get_stored_tickers() for r in info['ranges']
+            if (ticker is None or info['ticker'] == ticker)
+            and (not ticker_prefix or info['ticker'].startswith(ticker_prefix))
+            and (not start_date or r['end_date'] >= start_date)
+            and (not end_date or r['start_date'] <= end_date)
+        ]
+        key = lambda row: tuple(row[k] for k in keys)
+        rows.sort(key=key, reverse=descending)
+        if after is not None:
+            after = tuple(after)
+            rows = [row for row in rows if (key(row) < after if descending else key(row) > after)]
+        page = rows[:limit]
+        return {'rows': page, 'next': key(page[-1]) if len(rows) > limit else None}
+
+    def count_ranges(self,
+                     ticker: Optional[str] = None,
+                     ticker_prefix: Optional[str] = None,
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> Dict[str, int]:
+        """
+        Cuenta los rangos que cumplen los filtros de query_ranges
+
+        Returns:
+            Dict[str, int]: ranges (rangos), tickers (tickers distintos) y bars (barras
+                            almacenadas de esos tickers entre las fechas del filtro)
+        """
+        infos = [
+            info for info in self.get_stored_tickers()
+            if (ticker is None or info['ticker'] == ticker)
+            and (not ticker_prefix or info['ticker'].startswith(ticker_prefix))
+        ]
+        ranges = tickers = bars = 0
+        for info in infos:
+            matching = [
+                r for r in info['ranges']
+                if (not start_date or r['end_date'] >= start_date) and (not end_date or r['start_date'] <= end_date)
+            ]
+            if matching:
+                ranges += len(matching)
+                tickers += 1
+                bars += len(self.scan([info['ticker']], start_date, end_date, ['close']))
+        return {'ranges': ranges, 'tickers': tickers, 'bars': bars}
+
+    def latest_bars(self,
+                    tickers: Sequence[str],
+                    bars: int,
+                    columns: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lee las últimas `bars` barras de cada ticker como una matriz ticker × tiempo,
+        alineada a la derecha (la última columna es la barra más reciente de cada ticker)
+        y completada con NaN a la izquierda cuando el ticker tiene menos historia.
+        La implementación por defecto usa scan; los backends indexados la reemplazan.
+
+        Args:
+            tickers (Sequence[str]): Tickers a leer (una fila por ticker, en el mismo orden)
+            bars (int): Barras por ticker
+            columns (Sequence[str], optional): Columnas de precios (todas si es None)
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Fecha (YYYY-MM-DD) de la última barra de cada ticker
+                                           (None si no tiene datos) y valores con forma
+                                           (columnas, tickers, bars)
+        """
+        columns = list(columns or BAR_COLUMNS)
+        last_dates = np.full(len(tickers), None, dtype=object)
+        values = np.full((len(columns), len(tickers), bars), np.nan)
+        df = self.scan(tickers, columns=columns)
+        if df.empty:
+            return last_dates, values
+        df = df.sort_values(['ticker', 'date'], kind='stable')
+        rows = df['ticker'].map({t: i for i, t in enumerate(tickers)}).to_numpy()
+        from_end = df.groupby('ticker', sort=False).cumcount(ascending=False).to_numpy()
+        keep = from_end < bars
+        values[:, rows[keep], bars - 1 - from_end[keep]] = df.loc[keep, columns].to_numpy(dtype=np.float64).T
+        last = df[from_end == 0]
+        last_dates[rows[from_end == 0]] = last['date'].dt.strftime('%Y-%m-%d').to_numpy()
+        return last_dates, values
+
+    def iter_bars(self,
+                  tickers: Optional[Sequence[str]] = None,
+                  start_date: Optional[str] = None,
+                  end_date: Optional[str] = None,
+                  chunk_rows: int = 50000) -> Iterator[pd.DataFrame]:
+        """
+        Recorre las barras almacenadas en bloques de a lo sumo `chunk_rows` filas,
+        para exportar sin cargar todo en memoria. La implementación por defecto lee
+        de a un ticker; los backends que pueden paginar la lectura la reemplazan.
+
+        Args:
+            tickers (Sequence[str], optional): Tickers a leer (todos si es None)
+            start_date (str, optional): Fecha mínima en formato YYYY-MM-DD
+            end_date (str, optional): Fecha máxima en formato YYYY-MM-DD
+            chunk_rows (int): Filas máximas por bloque
+
+        Yields:
+            pd.DataFrame: Columnas ticker, date (YYYY-MM-DD) y BAR_COLUMNS (y raw en los
+                          backends que materializan precios ajustados)
+        """
+        if tickers is None:
+            tickers = [t['ticker'] for t in self.get_stored_tickers()]
+        for ticker in tickers:
+            df = self.scan([ticker], start_date, end_date)
+            df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+            for offset in range(0, len(df), chunk_rows):
+                yield df.iloc[offset:offset + chunk_rows]
+
+    def iter_ticker_frames(self,
+                           ticker: str,
+                           start_date: Optional[str] = None,
+                           end_date: Optional[str] = None,
+                           chunk_rows: int = 50000,
+                           columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Recorre la historia de un ticker en bloques de a lo sumo `chunk_rows` filas, para
+        que indicadores, exportaciones y backtests la procesen con memoria acotada. La
+        implementación por defecto lee el rango completo y lo parte; los backends que
+        pueden paginar la lectura la reemplazan.
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str, optional): Fecha mínima en formato YYYY-MM-DD
+            end_date (str, optional): Fecha máxima en formato YYYY-MM-DD
+            chunk_rows (int): Filas máximas por bloque
+            columns (Sequence[str], optional): Columnas a leer (todas las de BAR_COLUMNS si es None)
+
+        Yields:
+            pd.DataFrame: DataFrame indexado por fecha, en orden cronológico
+        """
+        df = self.scan([ticker], start_date, end_date, columns).drop(columns='ticker').set_index('date')
+        for offset in range(0, len(df), chunk_rows):
+            yield df.iloc[offset:offset + chunk_rows]
+
+
+def range_sort_keys(sort: str) -> Tuple[str, ...]:
+    """
+    Obtiene las columnas de la clave de paginación de un ordenamiento de rangos
+
+    Raises:
+        DataValidationError: Si el ordenamiento es desconocido
+    """
+    try:
+        return RANGE_SORTS[sort]
+    except KeyError:
+        raise DataValidationError(f"Ordenamiento desconocido: {sort}. Use uno de: {', '.join(RANGE_SORTS)}")
+
+
+def create_storage(backend: Optional[str] = None, path: Optional[str] = None) -> TickerStorage:
+    """
+    Crea el backend de almacenamiento configurado.
+
+    Args:
+        backend (str, optional): "sqlite", "sharded" o "parquet" (por defecto STORAGE_BACKEND o "sqlite")
+        path (str, optional): Archivo o directorio del almacenamiento (por defecto STORAGE_PATH)
+
+    Returns:
+        TickerStorage: Backend inicializado
+
+    Raises:
+        DatabaseError: Si el backend es desconocido o no puede inicializarse
+    """
+    backend = (backend or os.getenv("STORAGE_BACKEND") or "sqlite").lower()
+    path = path or os.getenv("STORAGE_PATH")
+
+    if backend == "sqlite":
+        from src.models.ticker_model import TickerModel
+        return TickerModel(path) if path else TickerModel()
+    if backend == "sharded":
+        from src.models.sharded_model import ShardedTickerModel
+        return ShardedTickerModel(path) if path else ShardedTickerModel()
+    if backend == "parquet":
+        from src.models.parquet_model import ParquetTickerModel
+        return ParquetTickerModel(path) if path else ParquetTickerModel()
+    raise DatabaseError(f"Backend de almacenamiento desconocido: {backend}")
@@ -0,0 +1,176 @@
+import os
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Ticks conservados por símbolo y barras de un minuto en vivo por símbolo
+TICK_BUFFER_SIZE = int(os.getenv("TICK_BUFFER_SIZE", "10000") or 10000)
+LIVE_BAR_CAPACITY = int(os.getenv("LIVE_BAR_CAPACITY", "390") or 390)
+
+MINUTE_MS = 60_000
+
+
+class TickRingBuffer:
+    """
+    Últimos `capacity` ticks (timestamp en ms, precio y tamaño) de un símbolo en
+    arreglos NumPy de tamaño fijo. Al llenarse se sobrescriben los más viejos, así
+    que la memoria no crece aunque el feed corra indefinidamente.
+    """
+    def __init__(self, capacity: int = TICK_BUFFER_SIZE):
+        self.capacity = capacity
+        self._ts = np.zeros(capacity, dtype=np.int64)
+        self._price = np.zeros(capacity, dtype=np.float64)
+        self._size = np.zeros(capacity, dtype=np.float64)
+        # Próxima posición a escribir y ticks recibidos desde el inicio
+        self._next = 0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def extend(self, ts: np.ndarray, price: np.ndarray, size: np.ndarray) -> None:
+        """
+        Agrega un lote de ticks en orden de llegada
+
+        Args:
+            ts (np.ndarray): Timestamps en milisegundos
+            price (np.ndarray): Precios
+            size (np.ndarray): Tamaños de cada operación
+        """
+        n = len(ts)
+        if n == 0:
+            return
+        if n > self.capacity:
+            # Del lote sólo sobreviven los últimos `capacity`
+            ts, price, size = ts[-self.capacity:], price[-self.capacity:], size[-self.capacity:]
+            skipped, n = n - self.capacity, self.capacity
+        else:
+            skipped = 0
+        with self._lock:
+            positions = (self._next + np.arange(n)) % self.capacity
+            self._ts[positions] = ts
+            self._price[positions] = price
+            self._size[positions] = size
+            self._next = (self._next + n) % self.capacity
+            self.total += n + skipped
+
+    def snapshot(self, last: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Copia los ticks guardados en orden cronológico de llegada
+
+        Args:
+            last (int, optional): Cantidad máxima de ticks (los más recientes)
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: (timestamps, precios, tamaños)
+        """
+        with self._lock:
+            count = len(self)
+            if last is not None:
+                count = min(count, last)
+            positions = (self._next - count + np.arange(count)) % self.capacity
+            return self._ts[positions], self._price[positions], self._size[positions]
+
+    def last(self) -> Optional[Tuple[int, float]]:
+        """
+        Obtiene el último tick recibido (timestamp en ms, precio) o None si no hay
+        """
+        with self._lock:
+            if self.total == 0:
+                return None
+            position = (self._next - 1) % self.capacity
+            return int(self._ts[position]), float(self._price[position])
+
+
+class MinuteBarRing:
+    """
+    Barras de un minuto construidas en vivo a partir de los ticks, en un anillo de
+    `capacity` barras. Un tick atrasado actualiza su minuto si todavía está en el
+    anillo; si es anterior a la barra más vieja se descarta.
+    """
+    def __init__(self, capacity: int = LIVE_BAR_CAPACITY):
+        self.capacity = capacity
+        self._start = np.full(capacity, -1, dtype=np.int64)
+        self._first_ts = np.zeros(capacity, dtype=np.int64)
+        self._last_ts = np.zeros(capacity, dtype=np.int64)
+        # Columnas open, high, low, close, volume y precio × volumen (para el vwap)
+        self._values = np.zeros((6, capacity), dtype=np.float64)
+        self._newest = -1
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _position(self, minute: int) -> Optional[int]:
+        """
+        Posición de la barra de `minute` en el anillo, creándola si es posterior a
+        la más reciente; None si es demasiado vieja
+        """
+        if self._count == 0 or minute > self._start[self._newest]:
+            self._newest = (self._newest + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            self._start[self._newest] = minute
+            self._first_ts[self._newest] = np.iinfo(np.int64).max
+            self._last_ts[self._newest] = np.iinfo(np.int64).min
+            self._values[:, self._newest] = (np.nan, -np.inf, np.inf, np.nan, 0.0, 0.0)
+            return self._newest
+        # Minuto anterior (puede haber minutos sin ticks, así que se busca por valor)
+        matches = np.flatnonzero(self._start == minute)
+        return int(matches[0]) if len(matches) else None
+
+    def add(self, ts: np.ndarray, price: np.ndarray, size: np.ndarray) -> None:
+        """
+        Incorpora un lote de ticks a sus barras
+
+        Args:
+            ts (np.ndarray): Timestamps en milisegundos
+            price (np.ndarray): Precios
+            size (np.ndarray): Tamaños de cada operación
+        """
+        if len(ts) == 0:
+            return
+        minutes = ts // MINUTE_MS * MINUTE_MS
+        with self._lock:
+            for minute in np.unique(minutes):
+                mask = minutes == minute
+                m_ts, m_price, m_size = ts[mask], price[mask], size[mask]
+                position = self._position(int(minute))
+                if position is None:
+                    continue
+                values = self._values[:, position]
+                first, last = int(np.argmin(m_ts)), int(np.argmax(m_ts))
+                if m_ts[first] < self._first_ts[position]:
+                    self._first_ts[position] = m_ts[first]
+                    values[0] = m_price[first]
+                if m_ts[last] >= self._last_ts[position]:
+                    self._last_ts[position] = m_ts[last]
+                    values[3] = m_price[last]
+                values[1] = max(values[1], m_price.max())
+                values[2] = min(values[2], m_price.min())
+                values[4] += m_size.sum()
+                values[5] += (m_price * m_size).sum()
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Copia las barras en orden cronológico
+
+        Returns:
+            pd.DataFrame: Columnas open, high, low, close, volume y vwap indexadas por el
+                          inicio de cada minuto (UTC)
+        """
+        with self._lock:
+            positions = (self._newest - self._count + 1 + np.arange(self._count)) % self.capacity
+            start = self._start[positions]
+            values = self._values[:, positions]
+        volume = values[4]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            vwap = np.where(volume > 0, values[5] / volume, np.nan)
+        return pd.DataFrame(
+            {'open': values[0], 'high': values[1], 'low': values[2], 'close': values[3],
+             'volume': volume, 'vwap': vwap},
+            index=pd.DatetimeIndex(pd.to_datetime(start, unit='ms', utc=True), name='timestamp')
+        )
@@ -1,25 +1,84 @@
 import sqlite3
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Sequence, Iterator
 import json
 import os
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from src.models.storage import (
+    TickerStorage, BAR_COLUMNS, ADJUSTED_COLUMNS, adjustment_factors, aggs_columns, date_to_ms,
+    merge_intervals, normalize_corporate_actions, range_sort_keys, split_ranges
+)
+from src.utils import metrics, profiling
 from src.utils.exceptions import (
     DatabaseError, DatabaseConnectionError, DatabaseAccessError,
     InvalidDataError, DataValidationError
 )
 
 
-class TickerModel:
+# Páginas liberadas por paso de incremental_vacuum; cada paso es una transacción corta
+RECLAIM_STEP_PAGES = int(os.getenv("RECLAIM_STEP_PAGES", "256") or 256)
+
+AUTO_VACUUM_MODES = {0: 'none', 1: 'full', 2: 'incremental'}
+
+# Versión del esquema (PRAGMA user_version): si la base ya la tiene no se vuelve a ejecutar el DDL
+SCHEMA_VERSION = 4
+
+# Barras de un rango guardado: sus extremos son la medianoche local en ms y ticker_data
+# guarda fechas YYYY-MM-DD, así que se comparan como fechas locales
+RANGE_DATA_POINTS = '''
+    SELECT COUNT(*)
+    FROM ticker_data td
+    WHERE td.ticker = tr.ticker
+    AND td.date BETWEEN date(tr.start_date / 1000, 'unixepoch', 'localtime')
+    AND date(tr.end_date / 1000, 'unixepoch', 'localtime')
+'''
+
+# Columnas de ticker_data que se pueden leer. Las ajustadas guardan NULL donde el factor
+# de ajuste es 1 (la mayoría de las barras), así que se leen con la columna original de respaldo.
+# raw es 1 en las barras guardadas sin ajustar (ver _init_db)
+READABLE_COLUMNS = BAR_COLUMNS + ADJUSTED_COLUMNS + ['raw']
+
+
+def _column_sql(columns: Sequence[str]) -> str:
+    """
+    Arma la lista de columnas de un SELECT sobre ticker_data
+
+    Raises:
+        DataValidationError: Si se pide una columna desconocida
+    """
+    unknown = [c for c in columns if c not in READABLE_COLUMNS]
+    if unknown:
+        raise DataValidationError(f"Columnas desconocidas: {', '.join(unknown)}")
+    return ', '.join(
+        f"COALESCE({c}, {c[len('adj_'):]}) AS {c}" if c in ADJUSTED_COLUMNS else c
+        for c in columns
+    )
+
+
+# Bases ya inicializadas por este proceso (cada sesión de Streamlit crea su propio modelo)
+_initialized_paths = set()
+_initialized_lock = threading.Lock()
+
+
+class TickerModel(TickerStorage):
     """
     Modelo para manejar las operaciones de base de datos relacionadas con los tickers
     """
+    supports_adjusted = True
+
     def __init__(self, db_path: str = "data/tickers.db"):
         self.db_path = db_path
+        self.location = db_path
         self._init_db()
 
     def _init_db(self):
         """
-        Inicializa la base de datos y crea las tablas necesarias
+        Inicializa la base de datos y crea las tablas necesarias. El DDL sólo se ejecuta
+        la primera vez: las bases con el esquema al día se reconocen por su user_version.
         
         Raises:
             DatabaseAccessError: Si no se puede acceder o crear el directorio de la base de datos
@@ -31,10 +90,29 @@ class TickerModel:
             except OSError as e:
                 raise DatabaseAccessError(f"No se pudo crear el directorio de la base de datos: {str(e)}")
         
+        key = os.path.abspath(self.db_path)
+        with _initialized_lock:
+            if key in _initialized_paths and os.path.exists(self.db_path):
+                return
+        
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
+                cursor.execute('PRAGMA user_version')
+                if cursor.fetchone()[0] >= SCHEMA_VERSION:
+                    with _initialized_lock:
+                        _initialized_paths.add(key)
+                    return
+                
+                # En una base nueva (sin tablas) el modo incremental permite liberar espacio
+                # de a poco; en una base existente sólo se aplica con un VACUUM explícito.
+                # Se evita el pragma en bases existentes: requiere un lock de escritura y
+                # varios procesos abriendo la base a la vez fallarían con "database is locked"
+                cursor.execute('SELECT COUNT(*) FROM sqlite_master')
+                if cursor.fetchone()[0] == 0:
+                    cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                
                 # Tabla para almacenar los datos históricos de los tickers
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS ticker_data (
@@ -47,10 +125,64 @@ class TickerModel:
                         close REAL,
                         volume INTEGER,
                         vwap REAL,
+                        adj_open REAL,
+                        adj_high REAL,
+                        adj_low REAL,
+                        adj_close REAL,
+                        adj_volume REAL,
+                        adj_vwap REAL,
+                        raw INTEGER NOT NULL DEFAULT 1,
                         UNIQUE(ticker, date)
                     )
                 ''')
                 
+                # Columnas ajustadas en bases creadas antes de la versión 3 (NULL equivale a
+                # factor 1, así que agregarlas no reescribe la tabla)
+                cursor.execute('PRAGMA table_info(ticker_data)')
+                existing = {row[1] for row in cursor.fetchall()}
+                for column in ADJUSTED_COLUMNS:
+                    if column not in existing:
+                        cursor.execute(f'ALTER TABLE ticker_data ADD COLUMN {column} REAL')
+                
+                # Hasta la versión 4 la API se consultaba con adjusted=true: las barras ya
+                # guardadas vienen ajustadas por splits y aplicarles los factores las
+                # ajustaría dos veces. Se marcan con raw = 0, se excluyen del ajuste y
+                # se reemplazan cuando se vuelven a descargar (ver legacy_range)
+                if 'raw' not in existing:
+                    cursor.execute('ALTER TABLE ticker_data ADD COLUMN raw INTEGER NOT NULL DEFAULT 1')
+                    cursor.execute(f'''
+                        UPDATE ticker_data SET raw = 0,
+                            {', '.join(f'{column} = NULL' for column in ADJUSTED_COLUMNS)}
+                    ''')
+                
+                # Acciones corporativas y factores de ajuste acumulados por ticker
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS splits (
+                        ticker TEXT NOT NULL,
+                        execution_date TEXT NOT NULL,
+                        split_from REAL NOT NULL,
+                        split_to REAL NOT NULL,
+                        PRIMARY KEY (ticker, execution_date)
+                    ) WITHOUT ROWID
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS dividends (
+                        ticker TEXT NOT NULL,
+                        ex_dividend_date TEXT NOT NULL,
+                        cash_amount REAL NOT NULL,
+                        PRIMARY KEY (ticker, ex_dividend_date)
+                    ) WITHOUT ROWID
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS adjustment_factors (
+                        ticker TEXT NOT NULL,
+                        date TEXT NOT NULL,
+                        price_factor REAL NOT NULL,
+                        volume_factor REAL NOT NULL,
+                        PRIMARY KEY (ticker, date)
+                    ) WITHOUT ROWID
+                ''')
+                
                 # Tabla para almacenar los rangos de fechas por ticker
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS ticker_ranges (
@@ -63,10 +195,82 @@ class TickerModel:
                     )
                 ''')
                 
+                # Índices de los ordenamientos de la consulta paginada de rangos
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_ticker_ranges_created
+                    ON ticker_ranges (created_at, ticker, start_date, end_date)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_ticker_ranges_start
+                    ON ticker_ranges (start_date, ticker, end_date)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_ticker_ranges_end
+                    ON ticker_ranges (end_date, ticker, start_date)
+                ''')
+                
+                # Identificador de la base y versión de los datos, que se incrementa en
+                # cada escritura: permite validar las cachés guardadas fuera de la base
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS meta (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    )
+                ''')
+                cursor.execute(
+                    "INSERT OR IGNORE INTO meta (key, value) VALUES ('db_id', ?), ('data_version', '0')",
+                    (uuid.uuid4().hex,)
+                )
+                
+                cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
                 conn.commit()
         except sqlite3.Error as e:
             raise DatabaseConnectionError(f"Error al conectar con la base de datos: {str(e)}")
+        
+        with _initialized_lock:
+            _initialized_paths.add(key)
+
+    @staticmethod
+    def _bump_data_version(cursor: sqlite3.Cursor) -> None:
+        """
+        Incrementa la versión de los datos dentro de la transacción de una escritura
+        """
+        cursor.execute(
+            "UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'data_version'"
+        )
+
+    @staticmethod
+    def _count_rows(counts: Dict[str, int]) -> None:
+        """
+        Informa las filas escritas por operación, una vez confirmada la transacción:
+        una escritura revertida no debe sumar filas a db_rows_total
+        """
+        for operation, rows in counts.items():
+            metrics.inc("db_rows_total", rows, operation=operation)
 
+    def data_version(self) -> Optional[str]:
+        """
+        Obtiene la versión de los datos: el identificador de la base y un contador
+        que cambia con cada escritura
+        
+        Returns:
+            Optional[str]: Versión de los datos
+            
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                values = dict(conn.execute(
+                    "SELECT key, value FROM meta WHERE key IN ('db_id', 'data_version')"
+                ).fetchall())
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al leer la versión de los datos: {str(e)}")
+        if 'db_id' not in values:
+            return None
+        return f"{values['db_id']}:{values.get('data_version', '0')}"
+
+    @metrics.timed("db_query_duration_seconds", operation="save_ticker_data")
     def save_ticker_data(self, ticker: str, data: Dict[str, Any]) -> bool:
         """
         Guarda los datos del ticker en la base de datos
@@ -83,103 +287,193 @@ class TickerModel:
             DatabaseError: Si hay un error en la base de datos
             DataValidationError: Si los datos no cumplen con el formato esperado
         """
-        # Validar entrada
-        if not data or not isinstance(data, dict):
-            raise InvalidDataError("Los datos proporcionados son inválidos o están vacíos")
+        # Validar entrada y estructura de datos
+        columns = aggs_columns(data)
+        counts: Dict[str, int] = {}
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            self._insert_payload(cursor, ticker, columns, counts)
+            self._bump_data_version(cursor)
+            conn.commit()
+        self._count_rows(counts)
+        return True
+
+    @metrics.timed("db_query_duration_seconds", operation="save_many")
+    def save_many(self, items: Sequence[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Guarda varias respuestas de la API en una única transacción: si alguna
+        falla no se guarda ninguna
+        
+        Args:
+            items (Sequence[Tuple[str, Dict[str, Any]]]): Pares (ticker, datos)
+            
+        Raises:
+            InvalidDataError: Si algún dato es inválido o está vacío
+            DatabaseError: Si hay un error en la base de datos
+            DataValidationError: Si algún dato no cumple con el formato esperado
+        """
+        parsed = [(ticker, aggs_columns(data)) for ticker, data in items]
+        counts: Dict[str, int] = {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for ticker, columns in parsed:
+                    self._insert_payload(cursor, ticker, columns, counts)
+                self._bump_data_version(cursor)
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error de base de datos al guardar el lote de respuestas: {str(e)}")
+        self._count_rows(counts)
+
+    def _insert_payload(self,
+                        cursor: sqlite3.Cursor,
+                        ticker: str,
+                        columns: Dict[str, np.ndarray],
+                        counts: Dict[str, int]) -> None:
+        """
+        Inserta las barras nuevas y el rango de una respuesta ya validada (en columnas,
+        ver aggs_columns), sin confirmar la transacción. Las fechas ya almacenadas
+        no se sobrescriben, salvo las barras previas a la versión 4 (raw = 0). Las filas
+        escritas se suman a `counts` (ver _count_rows).
+        
+        Raises:
+            DatabaseError: Si hay un error en la base de datos
+        """
+        dates = columns['date'].astype(str)
+        rows = zip(
+            [ticker] * len(dates), dates.tolist(),
+            *(columns[column].tolist() for column in BAR_COLUMNS)
+        )
+        try:
+            # UNIQUE(ticker, date) descarta las fechas existentes sin consultarlas una a una;
+            # las barras ajustadas por la API (raw = 0) se reemplazan por las sin ajustar
+            cursor.executemany('''
+                INSERT INTO ticker_data 
+                (ticker, date, open, high, low, close, volume, vwap, raw)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+                ON CONFLICT(ticker, date) DO UPDATE SET
+                    open = excluded.open,
+                    high = excluded.high,
+                    low = excluded.low,
+                    close = excluded.close,
+                    volume = excluded.volume,
+                    vwap = excluded.vwap,
+                    raw = 1
+                WHERE ticker_data.raw = 0
+            ''', rows)
+            inserted = cursor.rowcount
+            if inserted:
+                self._refresh_adjustments(
+                    cursor, ticker, str(columns['date'].min()), str(columns['date'].max()), counts
+                )
+            counts['save_ticker_data'] = counts.get('save_ticker_data', 0) + inserted
             
-        # Validar que existan resultados
-        if not data.get('results'):
-            raise InvalidDataError("No hay resultados en los datos proporcionados")
+            # Insertar el nuevo rango de fechas
+            current_time = int(datetime.now().timestamp() * 1000)  # Timestamp actual en milisegundos
+            profiling.execute(cursor, '''
+                INSERT OR IGNORE INTO ticker_ranges 
+                (ticker, start_date, end_date, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', (
+                ticker,
+                int(columns['t'].min()),
+                int(columns['t'].max()),
+                current_time
+            ))
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error de base de datos al guardar datos del ticker {ticker}: {str(e)}")
+
+    @metrics.timed("db_query_duration_seconds", operation="upsert_bars")
+    def upsert_bars(self, bars: pd.DataFrame) -> int:
+        """
+        Inserta o reemplaza un lote de barras en una única transacción. Las barras con
+        raw = 0 (precios ya ajustados por el proveedor) se guardan como las previas a la
+        versión 4: quedan fuera del ajuste local y se reemplazan al volver a descargarlas
+        (ver legacy_range)
+        
+        Args:
+            bars (pd.DataFrame): Columnas ticker, date (YYYY-MM-DD), BAR_COLUMNS y
+                                 opcionalmente raw (1 si no hay columna)
             
-        if not isinstance(data['results'], list) or len(data['results']) == 0:
-            raise InvalidDataError("El formato de los resultados es inválido o está vacío")
+        Returns:
+            int: Cantidad de filas escritas
             
-        # Validar estructura de datos
-        required_fields = ['t', 'o', 'h', 'l', 'c', 'v', 'vw']
-        for result in data['results']:
-            missing_fields = [field for field in required_fields if field not in result]
-            if missing_fields:
-                raise DataValidationError(f"Faltan campos requeridos en los datos: {', '.join(missing_fields)}")
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        Raises:
+            DataValidationError: Si faltan columnas
+            DatabaseError: Si hay un error en la base de datos
+        """
+        missing = [c for c in ['ticker', 'date'] + BAR_COLUMNS if c not in bars.columns]
+        if missing:
+            raise DataValidationError(f"Faltan columnas requeridas en los datos: {', '.join(missing)}")
+        if bars.empty:
+            return 0
             
-            # Preparar los datos para inserción masiva
-            data_to_insert = []
-            for result in data['results']:
-                timestamp = result['t']  # Ya está en milisegundos
-                date_str = datetime.fromtimestamp(timestamp/1000).strftime('%Y-%m-%d')
-                
-                # Verificar si ya existe un registro para esta fecha
-                cursor.execute('''
-                    SELECT id FROM ticker_data 
-                    WHERE ticker = ? AND date = ?
-                ''', (ticker, date_str))
-                
-                if not cursor.fetchone():
-                    # Solo agregar si no existe
-                    data_to_insert.append((
-                        ticker,
-                        date_str,
-                        result.get('o'),
-                        result.get('h'),
-                        result.get('l'),
-                        result.get('c'),
-                        result.get('v'),
-                        result.get('vw')
-                    ))
-            
-            # Insertar todos los nuevos datos de una vez
-            if data_to_insert:
-                cursor.executemany('''
-                    INSERT INTO ticker_data 
-                    (ticker, date, open, high, low, close, volume, vwap)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', data_to_insert)
+        # Tipos nativos de Python (sqlite3 no acepta escalares de NumPy) y NaN como NULL
+        frame = bars[['ticker', 'date'] + BAR_COLUMNS].astype(object)
+        frame['raw'] = bars['raw'].astype(int).astype(object) if 'raw' in bars.columns else 1
+        rows = frame.where(frame.notna(), None).itertuples(index=False, name=None)
+        counts: Dict[str, int] = {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(f'''
+                    INSERT INTO ticker_data
+                    (ticker, date, open, high, low, close, volume, vwap, raw)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(ticker, date) DO UPDATE SET
+                        open = excluded.open,
+                        high = excluded.high,
+                        low = excluded.low,
+                        close = excluded.close,
+                        volume = excluded.volume,
+                        vwap = excluded.vwap,
+                        raw = excluded.raw,
+                        {', '.join(f'{column} = NULL' for column in ADJUSTED_COLUMNS)}
+                ''', rows)
+                spans = bars.groupby('ticker', sort=False)['date'].agg(['min', 'max'])
+                for ticker, first, last in spans.itertuples(name=None):
+                    self._refresh_adjustments(cursor, ticker, first, last, counts)
+                self._bump_data_version(cursor)
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error de base de datos al guardar el lote de barras: {str(e)}")
             
-            try:
-                # Calcular el rango de fechas correcto iterando sobre todos los resultados
-                results = data['results']
-                
-                # Validar que cada resultado tenga un timestamp válido
-                timestamps = []
-                for result in results:
-                    if 't' not in result:
-                        raise InvalidDataError(f"Resultado sin timestamp encontrado: {result}")
-                    try:
-                        timestamps.append(int(result['t']))
-                    except (ValueError, TypeError) as e:
-                        raise InvalidDataError(f"Error al convertir timestamp: {result['t']}, Error: {str(e)}")
-                
-                if not timestamps:
-                    raise InvalidDataError("No se encontraron timestamps válidos en los resultados")
-                
-                # Calcular el rango de fechas usando los timestamps válidos
-                new_start = min(timestamps)  # Encontrar el timestamp más antiguo
-                new_end = max(timestamps)    # Encontrar el timestamp más reciente
-                current_time = int(datetime.now().timestamp() * 1000)  # Timestamp actual en milisegundos
-                
-                # Insertar el nuevo rango de fechas
-                cursor.execute('''
+        counts['upsert_bars'] = len(bars)
+        self._count_rows(counts)
+        return len(bars)
+
+    @metrics.timed("db_query_duration_seconds", operation="add_coverage")
+    def add_coverage(self, ticker: str, start_date: str, end_date: str) -> None:
+        """
+        Registra un rango almacenado del ticker
+        
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            
+        Raises:
+            DatabaseError: Si hay un error en la base de datos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                profiling.execute(cursor, '''
                     INSERT OR IGNORE INTO ticker_ranges 
                     (ticker, start_date, end_date, created_at)
                     VALUES (?, ?, ?, ?)
                 ''', (
                     ticker,
-                    new_start,
-                    new_end,
-                    current_time
+                    date_to_ms(start_date),
+                    date_to_ms(end_date),
+                    int(datetime.now().timestamp() * 1000)
                 ))
-                
+                self._bump_data_version(cursor)
                 conn.commit()
-                return True
-                
-            except (KeyError, IndexError, ValueError, TypeError) as e:
-                raise DataValidationError(f"Error al procesar datos del ticker {ticker}: {str(e)}")
-            except sqlite3.Error as e:
-                raise DatabaseError(f"Error de base de datos al guardar datos del ticker {ticker}: {str(e)}")
-            except Exception as e:
-                raise DatabaseError(f"Error inesperado al guardar datos del ticker {ticker}: {str(e)}")
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al registrar el rango del ticker {ticker}: {str(e)}")
 
+    @metrics.timed("db_query_duration_seconds", operation="get_ticker_data")
     def get_ticker_data(self, ticker: str, start_date: str, end_date: str) -> Optional[List[Dict[str, Any]]]:
         """
         Obtiene los datos del ticker para un rango de fechas
@@ -208,8 +502,8 @@ class TickerModel:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
-                cursor.execute('''
-                    SELECT * FROM ticker_data
+                rows = profiling.fetchall(cursor, f'''
+                    SELECT id, ticker, date, {', '.join(BAR_COLUMNS)} FROM ticker_data
                     WHERE ticker = ? 
                     AND date BETWEEN ? AND ?
                     ORDER BY date ASC
@@ -219,7 +513,7 @@ class TickerModel:
                     end_date
                 ))
                 
-                rows = cursor.fetchall()
+                metrics.inc("db_rows_total", len(rows), operation="get_ticker_data")
                 if not rows:
                     return None
                     
@@ -227,6 +521,519 @@ class TickerModel:
         except sqlite3.Error as e:
             raise DatabaseError(f"Error al acceder a la base de datos: {str(e)}")
 
+    @metrics.timed("db_query_duration_seconds", operation="get_coverage")
+    def get_coverage(self, ticker: str) -> List[Tuple[str, str]]:
+        """
+        Obtiene los intervalos de fechas cubiertos por los rangos guardados del ticker
+        
+        Args:
+            ticker (str): Símbolo del ticker
+            
+        Returns:
+            List[Tuple[str, str]]: Intervalos (inicio, fin) en formato YYYY-MM-DD, disjuntos y ordenados
+            
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                rows = profiling.fetchall(cursor, '''
+                    SELECT start_date, end_date FROM ticker_ranges
+                    WHERE ticker = ?
+                ''', (ticker,))
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al obtener la cobertura del ticker {ticker}: {str(e)}")
+            
+        return merge_intervals([
+            (
+                datetime.fromtimestamp(start/1000).strftime('%Y-%m-%d'),
+                datetime.fromtimestamp(end/1000).strftime('%Y-%m-%d')
+            )
+            for start, end in rows
+        ])
+
+    @metrics.timed("db_query_duration_seconds", operation="scan")
+    def scan(self,
+             tickers: Optional[Sequence[str]] = None,
+             start_date: Optional[str] = None,
+             end_date: Optional[str] = None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Lee barras de varios tickers con una única consulta
+        
+        Args:
+            tickers (Sequence[str], optional): Tickers a leer (todos si es None)
+            start_date (str, optional): Fecha mínima en formato YYYY-MM-DD
+            end_date (str, optional): Fecha máxima en formato YYYY-MM-DD
+            columns (Sequence[str], optional): Columnas de precios a incluir (todas si es None)
+            
+        Returns:
+            pd.DataFrame: Columnas ticker, date (datetime64) y las columnas pedidas, ordenadas por ticker y fecha
+            
+        Raises:
+            DataValidationError: Si se pide una columna desconocida
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        columns = list(columns or BAR_COLUMNS)
+        select = _column_sql(columns)
+            
+        conditions, params = [], []
+        if tickers is not None:
+            conditions.append(f"ticker IN ({', '.join('?' for _ in tickers)})")
+            params.extend(tickers)
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                rows = profiling.fetchall(cursor, f'''
+                    SELECT ticker, date, {select} FROM ticker_data
+                    {where}
+                    ORDER BY ticker, date
+                ''', params)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al leer los datos almacenados: {str(e)}")
+            
+        metrics.inc("db_rows_total", len(rows), operation="scan")
+        df = pd.DataFrame(rows, columns=['ticker', 'date'] + columns)
+        df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+        return df
+
+    @metrics.timed("db_query_duration_seconds", operation="delete_range")
+    def delete_range(self, ticker: str, start_date: str, end_date: str) -> int:
+        """
+        Elimina las barras del ticker en un rango de fechas y recorta los rangos
+        guardados, dividiéndolos si el rango eliminado queda en el medio
+        
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            
+        Returns:
+            int: Cantidad de barras eliminadas
+            
+        Raises:
+            DataValidationError: Si las fechas no tienen el formato correcto
+            DatabaseError: Si hay un error al eliminar los datos
+        """
+        try:
+            datetime.strptime(start_date, '%Y-%m-%d')
+            datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError as e:
+            raise DataValidationError(f"Formato de fecha inválido: {str(e)}")
+            
+        counts: Dict[str, int] = {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.cursor()
+                deleted = self._delete_range(cursor, ticker, start_date, end_date, counts)
+                self._bump_data_version(cursor)
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al eliminar el rango del ticker {ticker}: {str(e)}")
+            
+        self._count_rows(counts)
+        return deleted
+
+    @metrics.timed("db_query_duration_seconds", operation="replace_range")
+    def replace_range(self, ticker: str, start_date: str, end_date: str, data: Dict[str, Any]) -> int:
+        """
+        Reemplaza las barras del ticker en un rango por una respuesta de la API en una
+        única transacción: si la respuesta es inválida o la escritura falla, lo
+        almacenado no cambia
+        
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            data (Dict[str, Any]): Respuesta de la API con las barras nuevas
+            
+        Returns:
+            int: Cantidad de barras eliminadas
+            
+        Raises:
+            DataValidationError: Si las fechas o los datos no tienen el formato correcto
+            InvalidDataError: Si los datos son inválidos o están corruptos
+            DatabaseError: Si hay un error al reemplazar los datos
+        """
+        try:
+            datetime.strptime(start_date, '%Y-%m-%d')
+            datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError as e:
+            raise DataValidationError(f"Formato de fecha inválido: {str(e)}")
+        columns = aggs_columns(data)
+            
+        counts: Dict[str, int] = {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.cursor()
+                deleted = self._delete_range(cursor, ticker, start_date, end_date, counts)
+                self._insert_payload(cursor, ticker, columns, counts)
+                self._bump_data_version(cursor)
+                conn.commit()
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al reemplazar el rango del ticker {ticker}: {str(e)}")
+            
+        self._count_rows(counts)
+        return deleted
+
+    def _delete_range(self,
+                      cursor: sqlite3.Cursor,
+                      ticker: str,
+                      start_date: str,
+                      end_date: str,
+                      counts: Dict[str, int]) -> int:
+        """
+        Elimina las barras del rango y recorta los rangos guardados, sin confirmar la
+        transacción (el cursor debe usar sqlite3.Row). Las filas eliminadas se suman a
+        `counts` (ver _count_rows).
+        
+        Returns:
+            int: Cantidad de barras eliminadas
+        """
+        profiling.execute(cursor, '''
+            DELETE FROM ticker_data
+            WHERE ticker = ? AND date BETWEEN ? AND ?
+        ''', (ticker, start_date, end_date))
+        deleted = cursor.rowcount
+        counts['delete_range'] = counts.get('delete_range', 0) + deleted
+        
+        rows = profiling.fetchall(cursor, '''
+            SELECT start_date, end_date, created_at FROM ticker_ranges
+            WHERE ticker = ?
+        ''', (ticker,))
+        ranges = [dict(row) for row in rows]
+        new_ranges = split_ranges(ranges, start_date, end_date)
+        if new_ranges != ranges:
+            profiling.execute(cursor, 'DELETE FROM ticker_ranges WHERE ticker = ?', (ticker,))
+            cursor.executemany('''
+                INSERT OR IGNORE INTO ticker_ranges
+                (ticker, start_date, end_date, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', [(ticker, r['start_date'], r['end_date'], r['created_at']) for r in new_ranges])
+        
+        # Si se eliminó el cierre previo a un dividendo cambian los factores del ticker
+        self._refresh_adjustments(cursor, ticker, start_date, end_date, counts)
+        return deleted
+
+    def get_space_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene el uso de espacio de la base de datos
+        
+        Returns:
+            Dict[str, Any]: size_bytes, reclaimable_bytes (páginas libres), page_size,
+                            free_pages y auto_vacuum ('none', 'full' o 'incremental')
+            
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+                page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+                free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al obtener el uso de espacio: {str(e)}")
+            
+        return {
+            'size_bytes': page_size * page_count,
+            'reclaimable_bytes': page_size * free_pages,
+            'page_size': page_size,
+            'free_pages': free_pages,
+            'auto_vacuum': AUTO_VACUUM_MODES.get(mode, str(mode))
+        }
+
+    def reclaim_space(self, max_pages: Optional[int] = None, time_budget: Optional[float] = None) -> int:
+        """
+        Devuelve al sistema las páginas libres con incremental_vacuum, en pasos de
+        RECLAIM_STEP_PAGES páginas. Cada paso es una transacción corta, así que las
+        lecturas y escrituras de otras sesiones se intercalan entre pasos.
+        Nunca ejecuta un VACUUM completo.
+        
+        Args:
+            max_pages (int, optional): Páginas máximas a liberar (todas si es None)
+            time_budget (float, optional): Segundos máximos a dedicar
+            
+        Returns:
+            int: Bytes liberados (0 si la base no está en modo incremental)
+            
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        stats = self.get_space_stats()
+        if stats['auto_vacuum'] != 'incremental' or stats['free_pages'] == 0:
+            return 0
+            
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        remaining = stats['free_pages'] if max_pages is None else min(max_pages, stats['free_pages'])
+        freed = 0
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            while remaining > 0:
+                step = min(RECLAIM_STEP_PAGES, remaining)
+                before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                # fetchall() es necesario para que se ejecuten todos los pasos del pragma
+                conn.execute(f'PRAGMA incremental_vacuum({step})').fetchall()
+                after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if after >= before:
+                    break
+                freed += before - after
+                remaining -= before - after
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al liberar espacio: {str(e)}")
+        finally:
+            conn.close()
+            
+        metrics.inc("db_reclaimed_bytes_total", freed * stats['page_size'])
+        return freed * stats['page_size']
+
+    def enable_incremental_vacuum(self) -> None:
+        """
+        Convierte una base existente al modo auto_vacuum incremental. Requiere un
+        VACUUM completo que bloquea la base mientras se reescribe: es una operación
+        única y explícita, no parte del mantenimiento periódico.
+        
+        Raises:
+            DatabaseError: Si hay un error al convertir la base
+        """
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al convertir la base al modo incremental: {str(e)}")
+        finally:
+            conn.close()
+
+    def _iter_pages(self,
+                    ticker: Optional[str],
+                    start_date: Optional[str],
+                    end_date: Optional[str],
+                    chunk_rows: int,
+                    columns: Sequence[str],
+                    operation: str) -> Iterator[List[tuple]]:
+        """
+        Recorre las filas (ticker, date, *columns) en páginas de `chunk_rows` usando
+        paginación por clave sobre (ticker, date). Cada página es una consulta corta, así
+        que no queda una transacción de lectura abierta mientras se procesa un bloque.
+
+        Args:
+            ticker (str, optional): Ticker a leer (todos si es None)
+            start_date (str, optional): Fecha mínima en formato YYYY-MM-DD
+            end_date (str, optional): Fecha máxima en formato YYYY-MM-DD
+            chunk_rows (int): Filas máximas por página
+            columns (Sequence[str]): Columnas a leer además de ticker y date
+            operation (str): Etiqueta de la métrica db_rows_total
+
+        Yields:
+            List[tuple]: Filas de la página, ordenadas por ticker y fecha
+
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        if chunk_rows <= 0:
+            raise DataValidationError("chunk_rows debe ser mayor que cero")
+
+        conditions, params = [], []
+        if ticker is not None:
+            conditions.append("ticker = ?")
+            params.append(ticker)
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        # Con un único ticker alcanza con la fecha para continuar desde la última fila
+        keyset = "date > ?" if ticker is not None else "(ticker, date) > (?, ?)"
+        select = f"SELECT ticker, date, {_column_sql(columns)} FROM ticker_data"
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                last = None
+                while True:
+                    page_conditions, page_params = list(conditions), list(params)
+                    if last is not None:
+                        page_conditions.append(keyset)
+                        page_params.extend(last[1:] if ticker is not None else last)
+                    where = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+                    rows = profiling.fetchall(cursor, f'''
+                        {select} {where}
+                        ORDER BY ticker, date
+                        LIMIT ?
+                    ''', page_params + [chunk_rows])
+                    if not rows:
+                        return
+                    metrics.inc("db_rows_total", len(rows), operation=operation)
+                    yield rows
+                    if len(rows) < chunk_rows:
+                        return
+                    last = rows[-1][:2]
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al leer los datos almacenados: {str(e)}")
+
+    def iter_bars(self,
+                  tickers: Optional[Sequence[str]] = None,
+                  start_date: Optional[str] = None,
+                  end_date: Optional[str] = None,
+                  chunk_rows: int = 50000) -> Iterator[pd.DataFrame]:
+        """
+        Recorre las barras en bloques de a lo sumo `chunk_rows` filas, con paginación
+        por clave sobre (ticker, date)
+
+        Args:
+            tickers (Sequence[str], optional): Tickers a leer (todos si es None)
+            start_date (str, optional): Fecha mínima en formato YYYY-MM-DD
+            end_date (str, optional): Fecha máxima en formato YYYY-MM-DD
+            chunk_rows (int): Filas máximas por bloque
+
+        Yields:
+            pd.DataFrame: Columnas ticker, date (YYYY-MM-DD), BAR_COLUMNS y raw
+            
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        # Con una lista de tickersse pagina cada uno por separado: un IN combinado con la
+        # condición por clave volvería a recorrer los tickers ya leídos en cada página
+        scopes = [None] if tickers is None else sorted(set(tickers))
+        for ticker in scopes:
+            for rows in self._iter_pages(ticker, start_date, end_date, chunk_rows,
+                                         BAR_COLUMNS + ['raw'], "iter_bars"):
+                yield pd.DataFrame(rows, columns=['ticker', 'date'] + BAR_COLUMNS + ['raw'])
+
+    def iter_ticker_frames(self,
+                           ticker: str,
+                           start_date: Optional[str] = None,
+                           end_date: Optional[str] = None,
+                           chunk_rows: int = 50000,
+                           columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Recorre la historia de un ticker en bloques de a lo sumo `chunk_rows` filas, para
+        procesar historias muy largas sin materializarlas completas en memoria
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str, optional): Fecha mínima en formato YYYY-MM-DD
+            end_date (str, optional): Fecha máxima en formato YYYY-MM-DD
+            chunk_rows (int): Filas máximas por bloque
+            columns (Sequence[str], optional): Columnas a leer (todas las de BAR_COLUMNS si es None)
+
+        Yields:
+            pd.DataFrame: DataFrame indexado por fecha, en orden cronológico
+
+        Raises:
+            DataValidationError: Si se pide una columna desconocida
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        columns = list(columns) if columns is not None else BAR_COLUMNS
+        _column_sql(columns)
+
+        for rows in self._iter_pages(ticker, start_date, end_date, chunk_rows,
+                                     columns, "iter_ticker_frames"):
+            df = pd.DataFrame([row[1:] for row in rows], columns=['date'] + columns)
+            df['date'] = pd.to_datetime(df['date'])
+            yield df.set_index('date')
+
+    def list_tickers(self) -> List[str]:
+        """
+        Obtiene los tickers almacenados, ordenados, sin contar sus barras
+        
+        Returns:
+            List[str]: Símbolos de los tickers
+            
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                rows = profiling.fetchall(cursor, 'SELECT DISTINCT ticker FROM ticker_ranges ORDER BY ticker')
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al obtener los tickers almacenados: {str(e)}")
+        return [row[0] for row in rows]
+
+    def has_ticker(self, ticker: str) -> bool:
+        """
+        Indica si quedan barras almacenadas del ticker
+        
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                return conn.execute(
+                    'SELECT 1 FROM ticker_data WHERE ticker = ? LIMIT 1', (ticker,)
+                ).fetchone() is not None
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al consultar el ticker {ticker}: {str(e)}")
+
+    @metrics.timed("db_query_duration_seconds", operation="latest_bars")
+    def latest_bars(self,
+                    tickers: Sequence[str],
+                    bars: int,
+                    columns: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lee las últimas `bars` barras de cada ticker recorriendo el índice (ticker, date)
+        hacia atrás, sin leer el resto de la historia ni las columnas no pedidas
+        
+        Args:
+            tickers (Sequence[str]): Tickers a leer (una fila por ticker, en el mismo orden)
+            bars (int): Barras por ticker
+            columns (Sequence[str], optional): Columnas de precios (todas si es None)
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Fecha de la última barra de cada ticker (None si no
+                                           tiene datos) y valores con forma (columnas, tickers, bars)
+            
+        Raises:
+            DataValidationError: Si se pide una columna desconocida
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        columns = list(columns or BAR_COLUMNS)
+        select = _column_sql(columns)
+            
+        last_dates = np.full(len(tickers), None, dtype=object)
+        values = np.full((len(columns), len(tickers), bars), np.nan)
+        total = 0
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for i, ticker in enumerate(tickers):
+                    rows = profiling.fetchall(cursor, f'''
+                        SELECT {select} FROM ticker_data
+                        WHERE ticker = ?
+                        ORDER BY date DESC
+                        LIMIT ?
+                    ''', (ticker, bars))
+                    if not rows:
+                        continue
+                    # Las filas llegan de la más reciente a la más vieja
+                    values[:, i, bars - len(rows):] = np.array(rows, dtype=np.float64).T[:, ::-1]
+                    last_dates[i] = cursor.execute(
+                        'SELECT MAX(date) FROM ticker_data WHERE ticker = ?', (ticker,)
+                    ).fetchone()[0]
+                    total += len(rows)
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al leer los datos almacenados: {str(e)}")
+            
+        metrics.inc("db_rows_total", total, operation="latest_bars")
+        return last_dates, values
+
+    @metrics.timed("db_query_duration_seconds", operation="get_stored_tickers")
     def get_stored_tickers(self) -> List[Dict[str, Any]]:
         """
         Obtiene un resumen detallado de todos los tickers almacenados y sus rangos de fechas
@@ -243,23 +1050,19 @@ class TickerModel:
                 cursor = conn.cursor()
                 
                 # Obtener todos los tickers únicos
-                cursor.execute('SELECT DISTINCT ticker FROM ticker_ranges ORDER BY ticker')
-                tickers = [row['ticker'] for row in cursor.fetchall()]
+                rows = profiling.fetchall(cursor, 'SELECT DISTINCT ticker FROM ticker_ranges ORDER BY ticker')
+                tickers = [row['ticker'] for row in rows]
                 
                 result = []
                 for ticker in tickers:
                     # Obtener todos los rangos para este ticker
-                    cursor.execute('''
+                    rows = profiling.fetchall(cursor, f'''
                         SELECT 
                             start_date,
                             end_date,
                             created_at,
                             (
-                                SELECT COUNT(*)
-                                FROM ticker_data td
-                                WHERE td.ticker = tr.ticker
-                                AND td.date BETWEEN datetime(tr.start_date/1000, 'unixepoch')
-                                AND datetime(tr.end_date/1000, 'unixepoch')
+                                {RANGE_DATA_POINTS}
                             ) as data_points
                         FROM ticker_ranges tr
                         WHERE ticker = ?
@@ -267,7 +1070,7 @@ class TickerModel:
                     ''', (ticker,))
                     
                     ranges = []
-                    for row in cursor.fetchall():
+                    for row in rows:
                         # Convertir timestamps a fechas legibles
                         start_date = datetime.fromtimestamp(row['start_date']/1000).strftime('%Y-%m-%d')
                         end_date = datetime.fromtimestamp(row['end_date']/1000).strftime('%Y-%m-%d')
@@ -287,11 +1090,188 @@ class TickerModel:
                         'total_data_points': sum(r['data_points'] for r in ranges)
                     })
                 
+                metrics.inc("db_rows_total", len(result), operation="get_stored_tickers")
                 return result
                 
         except sqlite3.Error as e:
             raise DatabaseError(f"Error al obtener los tickers almacenados: {str(e)}")
             
+    @staticmethod
+    def _range_filters(ticker: Optional[str],
+                       ticker_prefix: Optional[str],
+                       start_date: Optional[str],
+                       end_date: Optional[str]) -> Tuple[List[str], List[Any]]:
+        """
+        Arma las condiciones de los filtros de rangos sobre ticker_ranges
+        """
+        conditions, params = [], []
+        if ticker is not None:
+            conditions.append("ticker = ?")
+            params.append(ticker)
+        if ticker_prefix:
+            # Rango de claves en lugar de LIKE, para usar el índice por ticker
+            conditions.append("ticker >= ? AND ticker < ?")
+            params.extend([ticker_prefix, ticker_prefix[:-1] + chr(ord(ticker_prefix[-1]) + 1)])
+        if start_date:
+            conditions.append("end_date >= ?")
+            params.append(date_to_ms(start_date))
+        if end_date:
+            conditions.append("start_date <= ?")
+            params.append(date_to_ms(end_date))
+        return conditions, params
+
+    def _query_ranges_keyed(self,
+                            ticker: Optional[str],
+                            ticker_prefix: Optional[str],
+                            start_date: Optional[str],
+                            end_date: Optional[str],
+                            sort: str,
+                            descending: bool,
+                            after: Optional[tuple],
+                            limit: int) -> List[Tuple[tuple, Dict[str, Any]]]:
+        """
+        Lee hasta `limit` rangos después de `after`, cada uno con su clave de paginación
+
+        Returns:
+            List[Tuple[tuple, Dict[str, Any]]]: (clave, fila) en el orden pedido
+
+        Raises:
+            DataValidationError: Si el ordenamiento o las fechas son inválidos
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        keys = range_sort_keys(sort)
+        try:
+            conditions, params = self._range_filters(ticker, ticker_prefix, start_date, end_date)
+        except ValueError as e:
+            raise DataValidationError(f"Formato de fecha inválido: {str(e)}")
+        if after is not None:
+            conditions.append(
+                f"({', '.join(keys)}) {'<' if descending else '>'} ({', '.join('?' for _ in keys)})"
+            )
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = ', '.join(f"{key} {'DESC' if descending else 'ASC'}" for key in keys)
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                rows = profiling.fetchall(conn.cursor(), f'''
+                    SELECT ticker, start_date, end_date, created_at, (
+                        {RANGE_DATA_POINTS}
+                    ) AS data_points
+                    FROM ticker_ranges tr
+                    {where}
+                    ORDER BY {order}
+                    LIMIT ?
+                ''', params + [limit])
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al consultar los rangos almacenados: {str(e)}")
+
+        metrics.inc("db_rows_total", len(rows), operation="query_ranges")
+        return [
+            (tuple(row[key] for key in keys), {
+                'ticker': row['ticker'],
+                'start_date': datetime.fromtimestamp(row['start_date'] / 1000).strftime('%Y-%m-%d'),
+                'end_date': datetime.fromtimestamp(row['end_date'] / 1000).strftime('%Y-%m-%d'),
+                'created_at': datetime.fromtimestamp(row['created_at'] / 1000).strftime('%Y-%m-%d %H:%M:%S'),
+                'data_points': row['data_points'],
+            })
+            for row in rows
+        ]
+
+    @metrics.timed("db_query_duration_seconds", operation="query_ranges")
+    def query_ranges(self,
+                     ticker: Optional[str] = None,
+                     ticker_prefix: Optional[str] = None,
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None,
+                     sort: str = 'ticker',
+                     descending: bool = False,
+                     after: Optional[tuple] = None,
+                     limit: int = 50) -> Dict[str, Any]:
+        """
+        Obtiene una página de los rangos guardados. Los filtros y el orden se resuelven
+        en la consulta y la página siguiente continúa desde la clave de la última fila,
+        así que cada página lee sólo sus filas (y cuenta sólo sus barras).
+
+        Args:
+            ticker (str, optional): Sólo los rangos de este ticker
+            ticker_prefix (str, optional): Sólo los tickers que empiezan con este prefijo
+            start_date (str, optional): Sólo los rangos que terminan en o después de esta fecha (YYYY-MM-DD)
+            end_date (str, optional): Sólo los rangos que empiezan en o antes de esta fecha (YYYY-MM-DD)
+            sort (str): Ordenamiento, una clave de RANGE_SORTS
+            descending (bool): Orden descendente
+            after (tuple, optional): Clave de la última fila de la página anterior
+            limit (int): Filas máximas de la página
+
+        Returns:
+            Dict[str, Any]: rows (ticker, start_date, end_date, created_at y data_points de
+                            cada rango) y next (clave para pedir la página siguiente, o None
+                            si es la última)
+
+        Raises:
+            DataValidationError: Si el ordenamiento o las fechas son inválidos
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        keyed = self._query_ranges_keyed(
+            ticker, ticker_prefix, start_date, end_date, sort, descending, after, limit + 1
+        )
+        page = keyed[:limit]
+        return {
+            'rows': [row for _, row in page],
+            'next': page[-1][0] if len(keyed) > limit else None,
+        }
+
+    @metrics.timed("db_query_duration_seconds", operation="count_ranges")
+    def count_ranges(self,
+                     ticker: Optional[str] = None,
+                     ticker_prefix: Optional[str] = None,
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> Dict[str, int]:
+        """
+        Cuenta los rangos que cumplen los filtros de query_ranges
+
+        Returns:
+            Dict[str, int]: ranges (rangos), tickers (tickers distintos) y bars (barras
+                            almacenadas de esos tickers entre las fechas del filtro)
+
+        Raises:
+            DataValidationError: Si las fechas son inválidas
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        try:
+            conditions, params = self._range_filters(ticker, ticker_prefix, start_date, end_date)
+        except ValueError as e:
+            raise DataValidationError(f"Formato de fecha inválido: {str(e)}")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # Las barras se cuentan sobre ticker_data con los mismos filtros de ticker y fechas
+        bar_conditions, bar_params = self._range_filters(ticker, ticker_prefix, None, None)
+        if start_date:
+            bar_conditions.append("date >= ?")
+            bar_params.append(start_date)
+        if end_date:
+            bar_conditions.append("date <= ?")
+            bar_params.append(end_date)
+        if conditions:
+            bar_conditions.append(f"ticker IN (SELECT ticker FROM ticker_ranges {where})")
+            bar_params.extend(params)
+        bar_where = f"WHERE {' AND '.join(bar_conditions)}" if bar_conditions else ""
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                ranges, tickers = profiling.fetchall(cursor, f'''
+                    SELECT COUNT(*), COUNT(DISTINCT ticker) FROM ticker_ranges {where}
+                ''', params)[0]
+                bars = profiling.fetchall(cursor, f'''
+                    SELECT COUNT(*) FROM ticker_data {bar_where}
+                ''', bar_params)[0][0]
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al contar los rangos almacenados: {str(e)}")
+        return {'ranges': ranges, 'tickers': tickers, 'bars': bars}
+
+    @metrics.timed("db_query_duration_seconds", operation="delete_ticker_data")
     def delete_ticker_data(self, ticker: str) -> None:
         """
         Elimina todos los datos de un ticker específico
@@ -307,11 +1287,233 @@ class TickerModel:
                 cursor = conn.cursor()
                 
                 # Eliminar datos históricos
-                cursor.execute('DELETE FROM ticker_data WHERE ticker = ?', (ticker,))
+                profiling.execute(cursor, 'DELETE FROM ticker_data WHERE ticker = ?', (ticker,))
+                deleted = cursor.rowcount
                 
                 # Eliminar registro del rango de fechas
-                cursor.execute('DELETE FROM ticker_ranges WHERE ticker = ?', (ticker,))
+                profiling.execute(cursor, 'DELETE FROM ticker_ranges WHERE ticker = ?', (ticker,))
+                
+                # Eliminar acciones corporativas y factores de ajuste
+                for table in ('splits', 'dividends', 'adjustment_factors'):
+                    profiling.execute(cursor, f'DELETE FROM {table} WHERE ticker = ?', (ticker,))
                 
+                self._bump_data_version(cursor)
                 conn.commit()
         except sqlite3.Error as e:
             raise DatabaseError(f"Error al eliminar los datos del ticker {ticker}: {str(e)}")
+            
+        metrics.inc("db_rows_total", deleted, operation="delete_ticker_data")
+
+    def _refresh_adjustments(self,
+                             cursor: sqlite3.Cursor,
+                             ticker: str,
+                             start_date: Optional[str] = None,
+                             end_date: Optional[str] = None,
+                             counts: Optional[Dict[str, int]] = None) -> None:
+        """
+        Mantiene las columnas ajustadas del ticker dentro de la transacción de una escritura.
+        Si los factores de ajuste no cambiaron sólo se ajustan las barras de
+        [start_date, end_date] (las recién escritas); si cambiaron (una acción nueva, o se
+        guardó o eliminó el cierre previo a un dividendo) se recalcula toda su historia.
+        Sólo se ajustan las barras guardadas sin ajustar (raw = 1). Las filas ajustadas
+        se suman a `counts`, que se informa tras confirmar la transacción (ver _count_rows).
+        Los tickers sin acciones corporativas no pagan más que tres lecturas por clave.
+        """
+        splits = profiling.fetchall(cursor, '''
+            SELECT execution_date, split_from, split_to FROM splits
+            WHERE ticker = ? ORDER BY execution_date
+        ''', (ticker,))
+        dividends = profiling.fetchall(cursor, '''
+            SELECT ex_dividend_date, cash_amount FROM dividends
+            WHERE ticker = ? ORDER BY ex_dividend_date
+        ''', (ticker,))
+        stored = profiling.fetchall(cursor, '''
+            SELECT date, price_factor, volume_factor FROM adjustment_factors
+            WHERE ticker = ? ORDER BY date
+        ''', (ticker,))
+        if not splits and not dividends and not stored:
+            return
+
+        previous_closes = {}
+        for date, _ in dividends:
+            row = cursor.execute('''
+                SELECT close FROM ticker_data
+                WHERE ticker = ? AND date < ? AND raw = 1
+                ORDER BY date DESC LIMIT 1
+            ''', (ticker, date)).fetchone()
+            previous_closes[date] = row[0] if row else None
+        factors = adjustment_factors(splits, dividends, previous_closes)
+
+        if factors != [tuple(row) for row in stored]:
+            profiling.execute(cursor, 'DELETE FROM adjustment_factors WHERE ticker = ?', (ticker,))
+            cursor.executemany('''
+                INSERT INTO adjustment_factors (ticker, date, price_factor, volume_factor)
+                VALUES (?, ?, ?, ?)
+            ''', [(ticker, date, price, volume) for date, price, volume in factors])
+            start_date = end_date = None
+
+        # Un tramo por factor: [fecha anterior, fecha) y, desde la última fecha, factor 1 (NULL)
+        segments = []
+        lower = None
+        for date, price, volume in factors:
+            segments.append((lower, date, price, volume))
+            lower = date
+        segments.append((lower, None, None, None))
+
+        updated = 0
+        for lower, upper, price, volume in segments:
+            if (start_date and upper and upper <= start_date) or (end_date and lower and lower > end_date):
+                continue
+            conditions, params = ["ticker = ?", "raw = 1"], [ticker]
+            for condition, value in (("date >= ?", lower), ("date < ?", upper),
+                                     ("date >= ?", start_date), ("date <= ?", end_date)):
+                if value:
+                    conditions.append(condition)
+                    params.append(value)
+            profiling.execute(cursor, f'''
+                UPDATE ticker_data SET
+                    adj_open = open * ?, adj_high = high * ?, adj_low = low * ?,
+                    adj_close = close * ?, adj_vwap = vwap * ?, adj_volume = volume * ?
+                WHERE {' AND '.join(conditions)}
+            ''', [price] * 5 + [volume] + params)
+            updated += cursor.rowcount
+        if counts is not None:
+            counts['adjust'] = counts.get('adjust', 0) + updated
+
+    @metrics.timed("db_query_duration_seconds", operation="save_corporate_actions")
+    def save_corporate_actions(self,
+                               ticker: str,
+                               splits: Sequence[Dict[str, Any]],
+                               dividends: Sequence[Dict[str, Any]]) -> int:
+        """
+        Reemplaza los splits y dividendos del ticker (la historia completa, como la devuelve
+        la API) y, sólo si cambiaron, recalcula sus columnas ajustadas en la misma transacción
+        
+        Args:
+            ticker (str): Símbolo del ticker
+            splits (Sequence[Dict[str, Any]]): Splits con execution_date, split_from y split_to
+            dividends (Sequence[Dict[str, Any]]): Dividendos con ex_dividend_date y cash_amount
+            
+        Returns:
+            int: Acciones nuevas, modificadas o eliminadas (0 si no hubo cambios)
+            
+        Raises:
+            DataValidationError: Si alguna acción es inválida
+            DatabaseError: Si hay un error en la base de datos
+        """
+        new_splits, new_dividends = normalize_corporate_actions(splits, dividends)
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                old_splits = [tuple(row) for row in profiling.fetchall(cursor, '''
+                    SELECT execution_date, split_from, split_to FROM splits
+                    WHERE ticker = ? ORDER BY execution_date
+                ''', (ticker,))]
+                old_dividends = [tuple(row) for row in profiling.fetchall(cursor, '''
+                    SELECT ex_dividend_date, cash_amount FROM dividends
+                    WHERE ticker = ? ORDER BY ex_dividend_date
+                ''', (ticker,))]
+                changed = (len(set(new_splits) ^ set(old_splits))
+                           + len(set(new_dividends) ^ set(old_dividends)))
+                if not changed:
+                    return 0
+                
+                profiling.execute(cursor, 'DELETE FROM splits WHERE ticker = ?', (ticker,))
+                profiling.execute(cursor, 'DELETE FROM dividends WHERE ticker = ?', (ticker,))
+                cursor.executemany('''
+                    INSERT INTO splits (ticker, execution_date, split_from, split_to)
+                    VALUES (?, ?, ?, ?)
+                ''', [(ticker,) + split for split in new_splits])
+                cursor.executemany('''
+                    INSERT INTO dividends (ticker, ex_dividend_date, cash_amount)
+                    VALUES (?, ?, ?)
+                ''', [(ticker,) + dividend for dividend in new_dividends])
+                counts: Dict[str, int] = {}
+                self._refresh_adjustments(cursor, ticker, counts=counts)
+                self._bump_data_version(cursor)
+                conn.commit()
+                self._count_rows(counts)
+                return changed
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al guardar las acciones corporativas de {ticker}: {str(e)}")
+
+    def get_corporate_actions(self, ticker: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Obtiene los splits, dividendos y factores de ajuste guardados del ticker
+        
+        Args:
+            ticker (str): Símbolo del ticker
+            
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: splits (execution_date, split_from, split_to),
+                dividends (ex_dividend_date, cash_amount) y factors (date, price_factor,
+                volume_factor), en orden cronológico
+            
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        queries = {
+            'splits': 'SELECT execution_date, split_from, split_to FROM splits WHERE ticker = ? ORDER BY execution_date',
+            'dividends': 'SELECT ex_dividend_date, cash_amount FROM dividends WHERE ticker = ? ORDER BY ex_dividend_date',
+            'factors': 'SELECT date, price_factor, volume_factor FROM adjustment_factors WHERE ticker = ? ORDER BY date',
+        }
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.cursor()
+                return {
+                    key: [dict(row) for row in profiling.fetchall(cursor, sql, (ticker,))]
+                    for key, sql in queries.items()
+                }
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al leer las acciones corporativas de {ticker}: {str(e)}")
+
+    def legacy_range(self, ticker: str) -> Optional[Tuple[str, str]]:
+        """
+        Obtiene las fechas extremas de las barras del ticker guardadas antes de la
+        versión 4 del esquema (raw = 0), que la API devolvió ya ajustadas por splits
+        
+        Args:
+            ticker (str): Símbolo del ticker
+            
+        Returns:
+            Optional[Tuple[str, str]]: Primera y última fecha (YYYY-MM-DD), o None si no hay
+            
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                first, last = profiling.fetchall(cursor, '''
+                    SELECT MIN(date), MAX(date) FROM ticker_data
+                    WHERE ticker = ? AND raw = 0
+                ''', (ticker,))[0]
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al leer las barras previas al ajuste de {ticker}: {str(e)}")
+        return (first, last) if first else None
+
+    @metrics.timed("db_query_duration_seconds", operation="count_bars")
+    def count_bars(self, ticker: str, before: str) -> int:
+        """
+        Cuenta las barras del ticker anteriores a una fecha, sin leerlas
+        
+        Args:
+            ticker (str): Símbolo del ticker
+            before (str): Primera fecha que no se cuenta, en formato YYYY-MM-DD
+            
+        Returns:
+            int: Cantidad de barras
+            
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                return profiling.fetchall(cursor, '''
+                    SELECT COUNT(*) FROM ticker_data
+                    WHERE ticker = ? AND date < ?
+                ''', (ticker, before))[0][0]
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Error al contar las barras del ticker {ticker}: {str(e)}")
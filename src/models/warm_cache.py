@@ -0,0 +1,329 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.models.column_cache import EPOCH, cached_columns, column_block
+from src.models.storage import TickerStorage, BAR_COLUMNS
+from src.utils import metrics
+from src.utils.exceptions import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# Configuración por variables de entorno
+WARM_CACHE_ENABLED = os.getenv("WARM_CACHE_ENABLED", "").strip().lower() in ("1", "true", "yes", "on")
+# Tickers cuya historia completa se conserva en memoria (y en la instantánea)
+WARM_CACHE_TICKERS = int(os.getenv("WARM_CACHE_TICKERS", "64") or 64)
+# Segundos entre instantáneas; 0 sólo la guarda al terminar el proceso
+WARM_CACHE_SNAPSHOT_SECONDS = float(os.getenv("WARM_CACHE_SNAPSHOT_SECONDS", "300") or 0)
+
+Frame = Tuple[np.ndarray, np.ndarray]
+
+
+class WarmCache:
+    """
+    Caché en memoria de los datos más consultados: la historia completa de los tickers
+    recientes (días int32 y matriz float64 columna por columna, con las mismas columnas
+    que ColumnCache), el resumen de tickers almacenados y el índice de tickers.
+
+    Todo queda asociado a la versión de los datos del almacenamiento (data_version): ante
+    cualquier escritura, de este u otro proceso, la caché se descarta. Periódicamente y al
+    terminar el proceso se guarda una instantánea en un único archivo .npz; al reiniciar
+    se valida contra la versión actual y los tickers se leen de ella recién cuando se piden.
+    """
+    def __init__(self, storage: TickerStorage, path: str, max_tickers: int = WARM_CACHE_TICKERS):
+        """
+        Args:
+            storage (TickerStorage): Almacenamiento principal
+            path (str): Archivo de la instantánea
+            max_tickers (int): Tickers conservados en memoria
+        """
+        self.storage = storage
+        self.path = path
+        self.max_tickers = max_tickers
+        self.columns = cached_columns(storage)
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._frames: "OrderedDict[str, Frame]" = OrderedDict()
+        self._values: Dict[str, Any] = {}
+        self._snapshot = None
+        self._snapshot_frames: Dict[str, int] = {}
+        self._loaded = False
+        self._dirty = False
+
+    def _current_version(self) -> Optional[str]:
+        """
+        Obtiene la versión de los datos y descarta lo cacheado si cambió. La primera
+        vez carga la instantánea si corresponde a esa versión.
+        """
+        try:
+            version = self.storage.data_version()
+        except DatabaseError:
+            return None
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                self._open_snapshot(version)
+                self._version = version
+            elif version != self._version:
+                self._clear()
+                self._version = version
+        return version
+
+    def _open_snapshot(self, version: Optional[str]) -> None:
+        if version is None or not os.path.exists(self.path):
+            return
+        try:
+            snapshot = np.load(self.path, allow_pickle=False)
+            meta = json.loads(snapshot['meta'].tobytes().decode('utf-8'))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Instantánea de caché inválida %s: %s", self.path, e)
+            metrics.inc("warm_cache_snapshot_total", result="invalid")
+            return
+        # Una instantánea con otras columnas (ej: previa a las columnas ajustadas) no sirve
+        if meta.get('version') != version or meta.get('columns', BAR_COLUMNS) != self.columns:
+            snapshot.close()
+            metrics.inc("warm_cache_snapshot_total", result="stale")
+            return
+        self._snapshot = snapshot
+        self._snapshot_frames = {ticker: i for i, ticker in enumerate(meta['frames'])}
+        self._values = meta['values']
+        metrics.inc("warm_cache_snapshot_total", result="loaded")
+
+    def _clear(self) -> None:
+        self._frames.clear()
+        self._values = {}
+        self._close_snapshot()
+
+    def _close_snapshot(self) -> None:
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._snapshot = None
+        self._snapshot_frames = {}
+
+    def _load_from_snapshot(self, ticker: str) -> Optional[Frame]:
+        index = self._snapshot_frames.pop(ticker, None)
+        if index is None:
+            return None
+        try:
+            days = self._snapshot[f'days_{index}']
+            values = self._snapshot[f'values_{index}']
+        except (OSError, ValueError, KeyError):
+            return None
+        days.setflags(write=False)
+        values.setflags(write=False)
+        return days, values
+
+    def _store(self, ticker: str, frame: Frame) -> None:
+        self._frames[ticker] = frame
+        self._frames.move_to_end(ticker)
+        while len(self._frames) > self.max_tickers:
+            self._frames.popitem(last=False)
+
+    def read(self, ticker: str, start_date: str, end_date: str, adjusted: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Obtiene las barras del rango. La primera vez que se pide un ticker se lee su
+        historia completa del almacenamiento (o de la instantánea) y se conserva.
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            adjusted (bool): Precios ajustados (con los nombres de BAR_COLUMNS)
+
+        Returns:
+            Optional[pd.DataFrame]: DataFrame indexado por fecha (vacío si no hay barras en
+                                    el rango), o None si el almacenamiento no está versionado
+                                    (o no materializa precios ajustados)
+
+        Raises:
+            DatabaseError: Si hay error al leer el almacenamiento
+        """
+        block = column_block(self.columns, adjusted)
+        if block is None:
+            return None
+        version = self._current_version()
+        if version is None:
+            return None
+
+        with self._lock:
+            frame = self._frames.get(ticker)
+            result = "hit"
+            if frame is None and self._snapshot is not None:
+                frame = self._load_from_snapshot(ticker)
+                result = "snapshot"
+                if frame is not None:
+                    self._store(ticker, frame)
+            elif frame is not None:
+                self._frames.move_to_end(ticker)
+
+        if frame is None:
+            result = "miss"
+            df = self.storage.scan([ticker], columns=self.columns)
+            days = (df['date'].values.astype('datetime64[D]') - EPOCH).astype(np.int32)
+            values = np.ascontiguousarray(df[self.columns].to_numpy(dtype=np.float64).T)
+            days.setflags(write=False)
+            values.setflags(write=False)
+            frame = (days, values)
+            with self._lock:
+                # Si hubo una escritura mientras se leía, no se guarda una versión mezclada
+                if self._version == version:
+                    self._store(ticker, frame)
+                    self._dirty = True
+        metrics.inc("warm_cache_total", result=result)
+
+        days, values = frame
+        start_day = (np.datetime64(start_date, 'D') - EPOCH).astype(np.int32)
+        end_day = (np.datetime64(end_date, 'D') - EPOCH).astype(np.int32)
+        lo = int(np.searchsorted(days, start_day, side='left'))
+        hi = int(np.searchsorted(days, end_day, side='right'))
+
+        index = pd.DatetimeIndex((days[lo:hi].astype('datetime64[D]')).astype('datetime64[ns]'), name='date')
+        return pd.DataFrame(values[block, lo:hi].T, index=index, columns=BAR_COLUMNS, copy=False)
+
+    def get(self, name: str, loader: Callable[[], Any]) -> Any:
+        """
+        Obtiene un valor derivado de los datos (ej: el resumen de tickers), calculándolo
+        con `loader` si no está cacheado para la versión actual. El valor debe poder
+        guardarse como JSON.
+
+        Args:
+            name (str): Nombre del valor
+            loader (Callable[[], Any]): Función que lo calcula desde el almacenamiento
+
+        Returns:
+            Any: Valor cacheado o recién calculado
+        """
+        version = self._current_version()
+        if version is None:
+            return loader()
+        with self._lock:
+            if name in self._values:
+                metrics.inc("warm_cache_total", result="hit")
+                return self._values[name]
+        value = loader()
+        metrics.inc("warm_cache_total", result="miss")
+        with self._lock:
+            if self._version == version:
+                self._values[name] = value
+                self._dirty = True
+        return value
+
+    def discard(self, ticker: str) -> None:
+        """
+        Descarta la historia cacheada del ticker (también de la instantánea), para que la
+        próxima lectura vuelva al almacenamiento (ej: si falló una escritura diferida)
+        """
+        with self._lock:
+            dropped = self._frames.pop(ticker, None) is not None
+            dropped = self._snapshot_frames.pop(ticker, None) is not None or dropped
+            if dropped:
+                self._dirty = True
+
+    def save_snapshot(self) -> bool:
+        """
+        Guarda la instantánea si hubo cambios desde la última. Se escribe un archivo
+        temporal y se lo publica reemplazando el anterior.
+
+        Returns:
+            bool: True si se guardó una instantánea nueva
+        """
+        with self._lock:
+            if not self._dirty or self._version is None:
+                return False
+            version = self._version
+            values = dict(self._values)
+            # Los tickers de la instantánea anterior que nadie pidió se conservan, como
+            # los menos recientes
+            frames: "OrderedDict[str, Frame]" = OrderedDict()
+            for ticker in list(self._snapshot_frames):
+                frame = self._load_from_snapshot(ticker)
+                if frame is not None:
+                    frames[ticker] = frame
+            self._close_snapshot()
+            frames.update(self._frames)
+            frames = OrderedDict(list(frames.items())[-self.max_tickers:])
+            self._frames = frames.copy()
+            self._dirty = False
+
+        tickers: List[str] = list(frames)
+        meta = json.dumps({'version': version, 'columns': self.columns, 'frames': tickers, 'values': values})
+        arrays = {'meta': np.frombuffer(meta.encode('utf-8'), dtype=np.uint8)}
+        for i, (days, ohlcv) in enumerate(frames.values()):
+            arrays[f'days_{i}'] = days
+            arrays[f'values_{i}'] = ohlcv
+
+        start = time.perf_counter()
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("No se pudo guardar la instantánea de caché %s: %s", self.path, e)
+            with self._lock:
+                self._dirty = True
+            return False
+        metrics.observe("warm_cache_snapshot_seconds", time.perf_counter() - start)
+        metrics.inc("warm_cache_snapshot_total", result="saved")
+        return True
+
+    def _run_snapshots(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            self.save_snapshot()
+
+
+_caches: Dict[str, WarmCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    """
+    Un proceso hijo no hereda el hilo de instantáneas ni debe escribirlas: arma su propio registro
+    """
+    global _caches_lock
+    _caches.clear()
+    _caches_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_warm_cache(storage: TickerStorage) -> Optional[WarmCache]:
+    """
+    Obtiene la caché en memoria del almacenamiento, compartida por todas las sesiones del
+    proceso. La instantánea (<almacenamiento>.warm.npz) se guarda cada
+    WARM_CACHE_SNAPSHOT_SECONDS y al terminar el proceso.
+
+    Args:
+        storage (TickerStorage): Almacenamiento principal
+
+    Returns:
+        Optional[WarmCache]: Caché o None si WARM_CACHE_ENABLED no está activo
+    """
+    if not WARM_CACHE_ENABLED:
+        return None
+    key = os.path.abspath(storage.location)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = WarmCache(storage, f"{key}.warm.npz")
+            _caches[key] = cache
+            atexit.register(cache.save_snapshot)
+            if WARM_CACHE_SNAPSHOT_SECONDS > 0:
+                threading.Thread(
+                    target=cache._run_snapshots,
+                    args=(WARM_CACHE_SNAPSHOT_SECONDS,),
+                    name="warm-cache-snapshot",
+                    daemon=True
+                ).start()
+        return cache
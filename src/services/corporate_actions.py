@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from src.api.circuit_breaker import get_circuit_breaker
+from src.api.dispatcher import Priority
+from src.models.storage import TickerStorage
+from src.utils import metrics
+from src.utils.exceptions import APIError, DatabaseError
+
+# Actualización automática de splits y dividendos de los tickers consultados
+CORPORATE_ACTIONS_AUTO = os.getenv("CORPORATE_ACTIONS_AUTO", "1").strip().lower() in ("1", "true", "yes", "on")
+# Horas mínimas entre dos actualizaciones automáticas de un mismo ticker
+CORPORATE_ACTIONS_REFRESH_HOURS = float(os.getenv("CORPORATE_ACTIONS_REFRESH_HOURS", "24") or 24)
+
+
+def update_adjustments(service, ticker: str, priority: Priority = Priority.BACKFILL) -> Dict[str, Any]:
+    """
+    Actualiza los splits y dividendos de un ticker y vuelve a descargar sin ajustar las
+    barras que versiones anteriores guardaron ya ajustadas por la API (ver legacy_range),
+    para que los factores no las ajusten dos veces
+
+    Args:
+        service (TickerService): Servicio con el que se consultan la API y el almacenamiento
+        ticker (str): Símbolo del ticker
+        priority (Priority): Prioridad de los requests en la cola de la API
+
+    Returns:
+        Dict[str, Any]: splits, dividends y changed (ver refresh_corporate_actions), legacy
+                        (primera y última fecha reemplazadas, o None) y refetched (barras recibidas)
+
+    Raises:
+        ValueError: Si el ticker es inválido
+        APIError: Si hay error al obtener datos de la API
+        DatabaseError: Si el backend no guarda acciones corporativas o falla al guardarlas
+    """
+    result = service.refresh_corporate_actions(ticker, priority)
+    legacy = service.model.legacy_range(ticker)
+    result['legacy'] = legacy
+    result['refetched'] = service.refetch_range(ticker, *legacy, priority=priority) if legacy else 0
+    return result
+
+
+class CorporateActionsUpdater:
+    """
+    Mantiene al día en segundo plano las acciones corporativas de los tickers consultados:
+    la primera consulta de un ticker (y luego una vez cada CORPORATE_ACTIONS_REFRESH_HOURS)
+    encola la actualización de sus splits y dividendos, y el reemplazo de sus barras previas
+    al ajuste local, con prioridad de actualización programada. Las actualizaciones se
+    ejecutan de a una, sin demorar la consulta que las originó.
+    """
+    def __init__(self, refresh_hours: float = CORPORATE_ACTIONS_REFRESH_HOURS):
+        self.interval = refresh_hours * 3600
+        self._lock = threading.Lock()
+        # Último momento (time.monotonic) en que se planificó cada ticker
+        self._scheduled: Dict[str, float] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="corporate-actions")
+
+    def schedule(self, service, ticker: str) -> bool:
+        """
+        Encola la actualización del ticker si no se planificó dentro del intervalo
+
+        Args:
+            service (TickerService): Servicio que hará la actualización
+            ticker (str): Símbolo del ticker
+
+        Returns:
+            bool: True si se encoló
+        """
+        now = time.monotonic()
+        with self._lock:
+            last = self._scheduled.get(ticker)
+            if last is not None and now - last < self.interval:
+                return False
+            self._scheduled[ticker] = now
+        self._executor.submit(self._run, service, ticker)
+        metrics.inc("corporate_actions_total", outcome="scheduled")
+        return True
+
+    def _run(self, service, ticker: str) -> None:
+        outcome = "error"
+        try:
+            if get_circuit_breaker("reference").is_open() or get_circuit_breaker("aggs").is_open():
+                # Con la API caída se reintenta en la próxima consulta del ticker
+                with self._lock:
+                    self._scheduled.pop(ticker, None)
+                outcome = "skipped"
+                return
+            result = update_adjustments(service, ticker, Priority.SCHEDULED)
+            outcome = "updated" if result['changed'] or result['refetched'] else "unchanged"
+        except (ValueError, APIError, DatabaseError):
+            # Se reintenta después del intervalo (ej: el plan no incluye los endpoints de referencia)
+            outcome = "error"
+        finally:
+            metrics.inc("corporate_actions_total", outcome=outcome)
+
+
+_updaters: Dict[str, CorporateActionsUpdater] = {}
+_updaters_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    """
+    Un proceso hijo no hereda el hilo de las actualizaciones: crea el suyo
+    """
+    global _updaters_lock
+    _updaters.clear()
+    _updaters_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_corporate_actions_updater(storage: TickerStorage) -> Optional[CorporateActionsUpdater]:
+    """
+    Obtiene el actualizador de acciones corporativas del almacenamiento, compartido por
+    todas las sesiones del proceso
+
+    Args:
+        storage (TickerStorage): Almacenamiento de las barras
+
+    Returns:
+        Optional[CorporateActionsUpdater]: Actualizador o None si CORPORATE_ACTIONS_AUTO no
+                                           está activo o el backend no materializa precios ajustados
+    """
+    if not CORPORATE_ACTIONS_AUTO or not storage.supports_adjusted:
+        return None
+    key = os.path.abspath(storage.location)
+    with _updaters_lock:
+        updater = _updaters.get(key)
+        if updater is None:
+            updater = CorporateActionsUpdater()
+            _updaters[key] = updater
+        return updater
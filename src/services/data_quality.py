@@ -0,0 +1,276 @@
+import os
+import time
+from concurrent.futures import as_completed
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.api.dispatcher import Priority
+from src.models.quality_model import DataIssuesModel, ISSUE_COLUMNS
+from src.models.storage import ADJUSTED_COLUMNS, BAR_COLUMNS, TickerStorage, create_storage
+from src.utils import metrics
+from src.utils.process_pool import get_process_pool
+from src.utils.exceptions import APIError, DatabaseError
+
+# Procesos que revisan los bloques de tickers en paralelo (por defecto, uno por núcleo)
+QUALITY_WORKERS = int(os.getenv("QUALITY_WORKERS", "0") or 0) or os.cpu_count() or 1
+# Tickers por bloque: cada bloque se lee con una única consulta y se revisa vectorizado
+QUALITY_CHUNK_TICKERS = int(os.getenv("QUALITY_CHUNK_TICKERS", "200") or 200)
+# Umbral del z-score robusto (mediana y MAD por ticker) de la variación diaria del cierre
+QUALITY_ZSCORE = float(os.getenv("QUALITY_ZSCORE", "12") or 12)
+
+# Reglas del análisis y su descripción
+RULES = {
+    'ohlc': 'Precios inconsistentes: high < low, apertura o cierre fuera de [low, high], o precios no positivos',
+    'zero_volume': 'Volumen nulo o cero',
+    'weekend': 'Barra en fin de semana (fecha corrida por la conversión de zona horaria)',
+    'future': 'Barra con fecha futura',
+    'duplicate': 'Barra idéntica a la del día anterior (misma barra guardada con dos fechas)',
+    'spike': 'Variación del cierre atípica para el ticker (z-score robusto)',
+}
+
+# Variaciones mínimas de un ticker para estimar su dispersión
+_MIN_RETURNS = 20
+# Días agregados a cada lado de una fecha con hallazgos al volver a descargarla
+_REFETCH_MARGIN_DAYS = 3
+# Tolerancia relativa al comparar precios (redondeos de la API)
+_PRICE_TOLERANCE = 1e-6
+
+
+def check_bars(bars: pd.DataFrame,
+               zscore: float = QUALITY_ZSCORE,
+               today: Optional[str] = None) -> pd.DataFrame:
+    """
+    Aplica las reglas de RULES a las barras de uno o varios tickers, todas a la vez
+    sobre los arreglos de columnas
+
+    Args:
+        bars (pd.DataFrame): Columnas ticker, date, open, high, low, close y volume (como TickerStorage.scan)
+        zscore (float): Umbral de la regla spike
+        today (str, optional): Fecha de referencia de la regla future (por defecto hoy)
+
+    Returns:
+        pd.DataFrame: Un hallazgo por fila, con las columnas de ISSUE_COLUMNS
+    """
+    if bars.empty:
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
+
+    bars = bars.sort_values(['ticker', 'date'], kind='stable', ignore_index=True)
+    tickers = bars['ticker'].to_numpy(dtype=object)
+    days = bars['date'].to_numpy().astype('datetime64[D]')
+    o, h, l, c, v = (bars[column].to_numpy(dtype=np.float64) for column in ('open', 'high', 'low', 'close', 'volume'))
+    # Fila con el mismo ticker que la anterior
+    same = np.zeros(len(bars), dtype=bool)
+    same[1:] = tickers[1:] == tickers[:-1]
+
+    found: List[pd.DataFrame] = []
+
+    def add(rule: str, mask: np.ndarray, values: Optional[np.ndarray], detail: Callable[[int], str]) -> None:
+        rows = np.flatnonzero(mask)
+        if rows.size == 0:
+            return
+        found.append(pd.DataFrame({
+            'ticker': tickers[rows],
+            'date': np.datetime_as_string(days[rows], unit='D'),
+            'rule': rule,
+            'value': values[rows] if values is not None else np.nan,
+            'detail': [detail(i) for i in rows],
+        }))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        prices = np.vstack([o, h, l, c])
+        tolerance = np.abs(h) * _PRICE_TOLERANCE
+        ohlc = (
+            np.isnan(prices).any(axis=0) | (prices <= 0).any(axis=0)
+            | (h + tolerance < l)
+            | (o > h + tolerance) | (o < l - tolerance)
+            | (c > h + tolerance) | (c < l - tolerance)
+        )
+        add('ohlc', ohlc, None, lambda i: f"O={o[i]:g} H={h[i]:g} L={l[i]:g} C={c[i]:g}")
+        add('zero_volume', ~(v > 0), v, lambda i: f"Volumen {v[i]:g}")
+
+        # 1970-01-01 fue jueves: (días + 3) % 7 da 0 para los lunes
+        weekday = (days.astype(np.int64) + 3) % 7
+        add('weekend', weekday >= 5, None,
+            lambda i: "Sábado" if weekday[i] == 5 else "Domingo")
+        limit = np.datetime64(today or datetime.now().strftime('%Y-%m-%d'), 'D')
+        add('future', days > limit, None, lambda i: "Fecha posterior a la actual")
+
+        duplicate = same.copy()
+        for column in (o, h, l, c, v):
+            duplicate[1:] &= column[1:] == column[:-1]
+        add('duplicate', duplicate, None,
+            lambda i: f"Igual a la barra del {np.datetime_as_string(days[i - 1], unit='D')}")
+
+        # Variación logarítmica del cierre respecto de la barra anterior del mismo ticker
+        log_close = np.log(np.where(c > 0, c, np.nan))
+        returns = np.full(len(bars), np.nan)
+        returns[1:] = np.where(same[1:], log_close[1:] - log_close[:-1], np.nan)
+        grouped = pd.Series(returns).groupby(tickers)
+        median = grouped.transform('median').to_numpy()
+        mad = pd.Series(np.abs(returns - median)).groupby(tickers).transform('median').to_numpy()
+        count = grouped.transform('count').to_numpy()
+        # 1.4826 * MAD estima el desvío estándar sin que los propios saltos lo inflen
+        z = (returns - median) / (1.4826 * mad)
+        spike = (count >= _MIN_RETURNS) & (mad > 0) & (np.abs(z) > zscore)
+        add('spike', spike, z, lambda i: f"Variación {np.expm1(returns[i]) * 100:+.1f}% (z={z[i]:.1f})")
+
+    if not found:
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
+    return pd.concat(found, ignore_index=True)
+
+
+def _check_chunk(storage: TickerStorage,
+                 tickers: Sequence[str],
+                 zscore: float) -> Tuple[int, pd.DataFrame]:
+    """
+    Lee y revisa un bloque de tickers
+
+    Returns:
+        Tuple[int, pd.DataFrame]: Barras revisadas y hallazgos
+    """
+    if storage.supports_adjusted:
+        # Con precios ajustados un split no aparece como un salto atípico del cierre
+        bars = storage.scan(tickers, columns=ADJUSTED_COLUMNS)
+        bars = bars.rename(columns={f'adj_{c}': c for c in BAR_COLUMNS})
+    else:
+        bars = storage.scan(tickers)
+    return len(bars), check_bars(bars, zscore)
+
+
+def _check_chunk_in_worker(storage_class: type, location: str, tickers: Sequence[str],
+                           zscore: float) -> Tuple[int, pd.DataFrame]:
+    # En los procesos del pool se recrea el almacenamiento a partir de su ubicación
+    return _check_chunk(storage_class(location), tickers, zscore)
+
+
+class DataQualityService:
+    """
+    Análisis de calidad de las barras almacenadas: revisa cada ticker con las reglas
+    de RULES y registra los hallazgos en la tabla data_issues. Los tickers se leen en
+    bloques de QUALITY_CHUNK_TICKERS, repartidos entre QUALITY_WORKERS procesos; los
+    hallazgos de cada bloque se guardan apenas termina.
+    """
+
+    def __init__(self,
+                 model: Optional[TickerStorage] = None,
+                 issues: Optional[DataIssuesModel] = None,
+                 workers: int = QUALITY_WORKERS,
+                 zscore: float = QUALITY_ZSCORE):
+        self.model = model or create_storage()
+        self.issues = issues or DataIssuesModel()
+        self.workers = workers
+        self.zscore = zscore
+
+    @metrics.timed("quality_scan_duration_seconds")
+    def scan(self,
+             tickers: Optional[Sequence[str]] = None,
+             progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Revisa los tickers almacenados y reemplaza sus hallazgos
+
+        Args:
+            tickers (Sequence[str], optional): Tickers a revisar (todos los almacenados si es None)
+            progress (Callable[[int, int], None], optional): Recibe los tickers revisados y el total
+
+        Returns:
+            Dict[str, Any]: tickers (revisados), bars (barras revisadas), issues (hallazgos),
+                            by_rule (hallazgos por regla) y seconds (duración)
+
+        Raises:
+            DatabaseError: Si hay un error al leer las barras o guardar los hallazgos
+        """
+        started_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        start = time.perf_counter()
+        full = tickers is None
+        tickers = list(tickers) if tickers is not None else self.model.list_tickers()
+        chunks = [tickers[i:i + QUALITY_CHUNK_TICKERS] for i in range(0, len(tickers), QUALITY_CHUNK_TICKERS)]
+
+        if self.workers > 1 and len(chunks) > 1:
+            pool = get_process_pool(self.workers)
+            futures = {
+                pool.submit(_check_chunk_in_worker, type(self.model), self.model.location, chunk, self.zscore): chunk
+                for chunk in chunks
+            }
+            results = ((futures[future], future.result()) for future in as_completed(futures))
+        else:
+            results = ((chunk, _check_chunk(self.model, chunk, self.zscore)) for chunk in chunks)
+
+        done = bars = 0
+        by_rule: Dict[str, int] = {}
+        for chunk, (chunk_bars, found) in results:
+            self.issues.replace_issues(chunk, found, started_at)
+            for rule, count in found['rule'].value_counts().items():
+                by_rule[rule] = by_rule.get(rule, 0) + int(count)
+                metrics.inc("quality_issues_total", int(count), rule=rule)
+            done += len(chunk)
+            bars += chunk_bars
+            if progress:
+                progress(done, len(tickers))
+
+        seconds = time.perf_counter() - start
+        issues = sum(by_rule.values())
+        # Sólo los análisis de todo el universo quedan registrados como el último análisis
+        if full:
+            self.issues.record_scan(started_at, seconds, len(tickers), bars, issues)
+        return {'tickers': len(tickers), 'bars': bars, 'issues': issues, 'by_rule': by_rule, 'seconds': seconds}
+
+    def get_issues(self,
+                   tickers: Optional[Sequence[str]] = None,
+                   rules: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Obtiene los hallazgos registrados (ver DataIssuesModel.get_issues)
+        """
+        return self.issues.get_issues(tickers, rules)
+
+    def refetch(self,
+                ticker_service,
+                tickers: Optional[Sequence[str]] = None,
+                rules: Optional[Sequence[str]] = None,
+                priority: Priority = Priority.BACKFILL) -> Dict[str, Any]:
+        """
+        Vuelve a descargar de la API los días con hallazgos (con un margen de
+        _REFETCH_MARGIN_DAYS días a cada lado) y revisa nuevamente los tickers afectados
+
+        Args:
+            ticker_service (TickerService): Servicio que descarga y reemplaza los rangos
+            tickers (Sequence[str], optional): Tickers a descargar (todos los que tienen hallazgos si es None)
+            rules (Sequence[str], optional): Reglas cuyos hallazgos se descargan (todas si es None)
+            priority (Priority): Prioridad de los requests en la cola de la API
+
+        Returns:
+            Dict[str, Any]: ranges (rangos descargados), bars (barras recibidas), errors
+                            (mensaje por ticker que no se pudo descargar) y scan (resultado
+                            del nuevo análisis)
+        """
+        issues = self.issues.get_issues(tickers, rules)
+        today = datetime.now().date()
+        margin = timedelta(days=_REFETCH_MARGIN_DAYS)
+        ranges = bars = 0
+        errors: Dict[str, str] = {}
+
+        for ticker, group in issues.groupby('ticker', sort=True):
+            # Rangos de fechas con hallazgos, unidos cuando se superponen
+            merged: List[List[datetime]] = []
+            for day in sorted(pd.to_datetime(group['date'].unique()).date):
+                start, end = day - margin, min(day + margin, today)
+                if start > end:
+                    continue
+                if merged and start <= merged[-1][1] + timedelta(days=1):
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            try:
+                for start, end in merged:
+                    bars += ticker_service.refetch_range(
+                        ticker, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'), priority
+                    )
+                    ranges += 1
+            except (ValueError, APIError, DatabaseError) as e:
+                errors[ticker] = str(e)
+
+        scanned = sorted(set(issues['ticker']) - set(errors))
+        scan = self.scan(scanned) if scanned else None
+        return {'ranges': ranges, 'bars': bars, 'errors': errors, 'scan': scan}
@@ -0,0 +1,287 @@
+import gzip
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.models.column_cache import column_cache_for
+from src.models.storage import TickerStorage, BAR_COLUMNS, ms_to_days
+from src.utils.exceptions import DataValidationError, DatabaseError
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Filas por bloque al importar o exportar; la memoria usada depende sólo de este valor
+DEFAULT_CHUNK_ROWS = int(os.getenv("TRANSFER_CHUNK_ROWS", "50000") or 50000)
+
+EXPORT_COLUMNS = ['ticker', 'date'] + BAR_COLUMNS
+# Columna opcional: 1 si los precios de la barra no están ajustados por splits y dividendos
+RAW_COLUMN = 'raw'
+
+# Días hábiles sin barras que no cortan la cobertura importada (feriados); un hueco
+# más largo queda sin cobertura y se pide a la API
+COVERAGE_MAX_GAP_DAYS = 3
+
+# Nombres alternativos habituales en volcados de proveedores
+COLUMN_ALIASES = {
+    'symbol': 'ticker',
+    'timestamp': 'date',
+    'o': 'open',
+    'h': 'high',
+    'l': 'low',
+    'c': 'close',
+    'v': 'volume',
+    'vw': 'vwap',
+}
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """
+    Determina el formato de un archivo de importación o exportación
+
+    Args:
+        path (str): Ruta del archivo (.csv, .csv.gz o .parquet)
+        fmt (str, optional): Formato explícito ("csv" o "parquet")
+
+    Returns:
+        str: "csv" o "parquet"
+
+    Raises:
+        DataValidationError: Si el formato no es soportado
+    """
+    if fmt:
+        fmt = fmt.lower()
+    elif path.endswith(('.csv', '.csv.gz')):
+        fmt = 'csv'
+    elif path.endswith('.parquet'):
+        fmt = 'parquet'
+    if fmt not in ('csv', 'parquet'):
+        raise DataValidationError(f"Formato no soportado para {path}; use .csv, .csv.gz o .parquet")
+    if fmt == 'parquet' and pa is None:
+        raise DataValidationError("El formato Parquet requiere pyarrow (pip install pyarrow)")
+    return fmt
+
+
+def _read_chunks(path: str, fmt: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    if fmt == 'csv':
+        with pd.read_csv(path, chunksize=chunk_rows, dtype={'ticker': str, 'symbol': str}) as reader:
+            yield from reader
+    else:
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+
+
+def normalize_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normaliza un bloque leído de un volcado: nombres de columnas, ticker en
+    mayúsculas y fechas en formato YYYY-MM-DD
+
+    Args:
+        chunk (pd.DataFrame): Bloque tal como se leyó del archivo
+
+    Returns:
+        pd.DataFrame: Columnas ticker, date y BAR_COLUMNS (vwap vacío si no venía), y raw
+                      (0 o 1) si venía en el archivo
+                      
+    Raises:
+        DataValidationError: Si faltan columnas o hay fechas, tickers o valores de raw inválidos
+    """
+    chunk = chunk.rename(columns=lambda c: str(c).strip().lower())
+    chunk = chunk.rename(columns={k: v for k, v in COLUMN_ALIASES.items() if v not in chunk.columns})
+    if 'vwap' not in chunk.columns:
+        chunk['vwap'] = float('nan')
+    missing = [c for c in EXPORT_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise DataValidationError(f"Faltan columnas requeridas en el archivo: {', '.join(missing)}")
+
+    columns = EXPORT_COLUMNS + [RAW_COLUMN] if RAW_COLUMN in chunk.columns else EXPORT_COLUMNS
+    chunk = chunk[columns].copy()
+    if RAW_COLUMN in chunk.columns and not chunk[RAW_COLUMN].isin([0, 1]).all():
+        raise DataValidationError("La columna raw sólo admite los valores 0 y 1")
+    if chunk['ticker'].isna().any():
+        raise DataValidationError("Hay filas sin ticker en el archivo")
+    chunk['ticker'] = chunk['ticker'].astype(str).str.strip().str.upper()
+    try:
+        if pd.api.types.is_numeric_dtype(chunk['date']):
+            # Timestamps en milisegundos, como los devuelve la API: el día se toma en la
+            # zona local, igual que al guardar una respuesta de la API
+            if chunk['date'].isna().any():
+                raise DataValidationError("Hay filas sin fecha en el archivo")
+            dates = pd.Series(ms_to_days(chunk['date'].to_numpy(dtype='int64')), index=chunk.index)
+        else:
+            dates = pd.to_datetime(chunk['date'])
+    except (ValueError, TypeError) as e:
+        raise DataValidationError(f"Fechas inválidas en el archivo: {str(e)}")
+    if dates.isna().any():
+        raise DataValidationError("Hay filas sin fecha en el archivo")
+    chunk['date'] = dates.dt.strftime('%Y-%m-%d')
+    return chunk
+
+
+def _merge_runs(runs: Sequence[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    Une tramos de fechas (YYYY-MM-DD) superpuestos o separados por hasta
+    COVERAGE_MAX_GAP_DAYS días hábiles
+    """
+    merged: List[Tuple[str, str]] = []
+    for start, end in sorted(runs):
+        if merged and np.busday_count(merged[-1][1], start) <= COVERAGE_MAX_GAP_DAYS + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _date_runs(dates: np.ndarray) -> List[Tuple[str, str]]:
+    """
+    Agrupa fechas (YYYY-MM-DD) en tramos continuos, con la tolerancia de _merge_runs
+    """
+    days = np.unique(dates.astype('datetime64[D]'))
+    breaks = np.flatnonzero(np.busday_count(days[:-1], days[1:]) > COVERAGE_MAX_GAP_DAYS + 1) + 1
+    return [(str(run[0]), str(run[-1])) for run in np.split(days, breaks)]
+
+
+def import_bars(storage: TickerStorage,
+                path: str,
+                fmt: Optional[str] = None,
+                chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                progress: Optional[Callable[[int], None]] = None,
+                adjusted: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Importa un volcado de barras diarias (CSV o Parquet) por bloques, sin llamadas a la API.
+    Cada bloque se guarda con una única operación de upsert; al terminar se registra la
+    cobertura de cada ticker importado (un rango por cada tramo continuo de fechas, así
+    los huecos del archivo no quedan cubiertos) para que no se vuelva a pedir a la API.
+    
+    En los backends que ajustan los precios localmente, cada barra se guarda según la
+    columna raw del archivo (la que escribe export_bars) o, si no la tiene, según
+    `adjusted`: las barras ya ajustadas quedan fuera del ajuste local y se reemplazan por
+    las sin ajustar cuando se actualizan las acciones corporativas del ticker.
+    
+    Args:
+        storage (TickerStorage): Almacenamiento destino
+        path (str): Archivo a importar
+        fmt (str, optional): Formato ("csv" o "parquet"); por defecto según la extensión
+        chunk_rows (int): Filas por bloque
+        progress (Callable[[int], None], optional): Recibe las filas importadas hasta el momento
+        adjusted (bool, optional): Si los precios del archivo ya están ajustados por splits y
+                                   dividendos; obligatorio si el archivo no tiene la columna raw
+                                   
+    Returns:
+        Dict[str, Any]: rows (filas importadas) y tickers (cantidad de tickers)
+        
+    Raises:
+        DataValidationError: Si el archivo no tiene el formato esperado o no indica si sus
+                             precios están ajustados
+        DatabaseError: Si hay un error al guardar los datos
+    """
+    fmt = detect_format(path, fmt)
+    if not os.path.exists(path):
+        raise DataValidationError(f"No existe el archivo {path}")
+
+    coverage: Dict[str, List[Tuple[str, str]]] = {}
+    total = 0
+    for chunk in _read_chunks(path, fmt, chunk_rows):
+        chunk = normalize_chunk(chunk)
+        if chunk.empty:
+            continue
+        if storage.supports_adjusted and RAW_COLUMN not in chunk.columns:
+            if adjusted is None:
+                raise DataValidationError(
+                    "El archivo no tiene la columna raw: indique si sus precios están ajustados "
+                    "por splits y dividendos"
+                )
+            chunk[RAW_COLUMN] = 0 if adjusted else 1
+        total += storage.upsert_bars(chunk)
+
+        for ticker, dates in chunk.groupby('ticker')['date']:
+            coverage[ticker] = _merge_runs(coverage.get(ticker, []) + _date_runs(dates.to_numpy()))
+        if progress:
+            progress(total)
+
+    for ticker, runs in coverage.items():
+        for start, end in runs:
+            storage.add_coverage(ticker, start, end)
+
+    # Los archivos de la caché de columnas de estos tickers quedaron desactualizados
+    column_cache = column_cache_for(storage)
+    if column_cache is not None:
+        for ticker in coverage:
+            column_cache.invalidate(ticker)
+
+    return {'rows': total, 'tickers': len(coverage)}
+
+
+def export_bars(storage: TickerStorage,
+                path: str,
+                tickers: Optional[Sequence[str]] = None,
+                start_date: Optional[str] = None,
+                end_date: Optional[str] = None,
+                fmt: Optional[str] = None,
+                chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Exporta las barras almacenadas a CSV (opcionalmente comprimido con gzip) o Parquet,
+    escribiendo bloque por bloque. En los backends que ajustan los precios localmente se
+    agrega la columna raw, para que import_bars guarde cada barra como estaba
+
+    Args:
+        storage (TickerStorage): Almacenamiento de origen
+        path (str): Archivo destino
+        tickers (Sequence[str], optional): Tickers a exportar (todos si es None)
+        start_date (str, optional): Fecha mínima en formato YYYY-MM-DD
+        end_date (str, optional): Fecha máxima en formato YYYY-MM-DD
+        fmt (str, optional): Formato ("csv" o "parquet"); por defecto según la extensión
+        chunk_rows (int): Filas por bloque
+        progress (Callable[[int], None], optional): Recibe las filas exportadas hasta el momento
+
+    Returns:
+        int: Cantidad de filas exportadas
+
+    Raises:
+        DataValidationError: Si el formato no es soportado
+        DatabaseError: Si hay un error al leer los datos o escribir el archivo
+    """
+    fmt = detect_format(path, fmt)
+    directory = os.path.dirname(os.path.abspath(path))
+    columns = EXPORT_COLUMNS + [RAW_COLUMN] if storage.supports_adjusted else EXPORT_COLUMNS
+    total = 0
+    try:
+        os.makedirs(directory, exist_ok=True)
+        chunks = storage.iter_bars(tickers, start_date, end_date, chunk_rows)
+        if fmt == 'csv':
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'wt', newline='') as handle:
+                # Se escribe el encabezado aunque no haya datos
+                handle.write(','.join(columns) + '\n')
+                for chunk in chunks:
+                    chunk[columns].to_csv(handle, header=False, index=False)
+                    total += len(chunk)
+                    if progress:
+                        progress(total)
+        else:
+            schema = pa.schema([
+                ('ticker', pa.string()),
+                ('date', pa.string()),
+                ('open', pa.float64()),
+                ('high', pa.float64()),
+                ('low', pa.float64()),
+                ('close', pa.float64()),
+                ('volume', pa.int64()),
+                ('vwap', pa.float64()),
+            ] + ([(RAW_COLUMN, pa.int8())] if RAW_COLUMN in columns else []))
+            with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(chunk[columns], schema=schema, preserve_index=False)
+                    writer.write_table(table)
+                    total += len(chunk)
+                    if progress:
+                        progress(total)
+    except OSError as e:
+        raise DatabaseError(f"Error al escribir el archivo {path}: {str(e)}")
+    return total
@@ -0,0 +1,263 @@
+import os
+import re
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.api.api_finanzas import FinanceAPI
+from src.api.circuit_breaker import get_circuit_breaker
+from src.api.dispatcher import Priority, RESULT_TIMEOUT, get_dispatcher
+from src.models.intraday_model import IntradayModel, TIMESPANS
+from src.services.single_flight import SingleFlight
+from src.utils import metrics
+from src.utils.exceptions import APICircuitOpenError, APIQueueTimeoutError
+
+# Compartido por todas las instancias del servicio
+_single_flight = SingleFlight()
+
+
+class IntradayService:
+    """
+    Servicio de barras intradiarias. Descarga barras de un minuto página por página
+    (cada página se guarda antes de pedir la siguiente, así que la memoria usada no
+    depende del largo del rango) y sirve minutos, horas y días desde los agregados
+    que mantiene IntradayModel.
+    """
+
+    def __init__(self, api: Optional[FinanceAPI] = None, model: Optional[IntradayModel] = None):
+        self.api = api or FinanceAPI()
+        self.model = model or IntradayModel()
+
+    @staticmethod
+    def _validate(ticker: str, start_date: str, end_date: str) -> None:
+        """
+        Valida el ticker y el rango de días (a diferencia de las consultas diarias,
+        un único día es un rango válido)
+
+        Raises:
+            ValueError: Si el ticker o las fechas son inválidos
+        """
+        if not ticker or not re.match("^[A-Z]{1,5}$", ticker):
+            raise ValueError(f"El ticker '{ticker}' es inválido. Debe tener entre 1 y 5 letras mayúsculas.")
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d')
+            end = datetime.strptime(end_date, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            raise ValueError("Formato de fecha inválido (use YYYY-MM-DD)")
+        if start > end:
+            raise ValueError("La fecha de inicio debe ser anterior o igual a la fecha de fin")
+        if end.date() > datetime.now().date():
+            raise ValueError(f"La fecha de fin ({end.strftime('%d/%m/%Y')}) no puede ser futura")
+
+    def missing_days(self, ticker: str, start_date: str, end_date: str) -> List[str]:
+        """
+        Obtiene los días hábiles del rango que todavía no se consultaron a la API.
+        El día en curso siempre se considera faltante.
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+
+        Returns:
+            List[str]: Días faltantes en formato YYYY-MM-DD, ordenados
+
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        fetched = self.model.get_fetched_days(ticker, start_date, end_date)
+        days = pd.date_range(start_date, end_date, freq='B').strftime('%Y-%m-%d')
+        return [day for day in days if day not in fetched]
+
+    @staticmethod
+    def _missing_runs(missing: List[str]) -> List[Tuple[str, str]]:
+        """
+        Agrupa los días faltantes (ordenados) en tramos de días hábiles consecutivos,
+        para no volver a pedir los días ya descargados que quedan entre dos tramos
+
+        Returns:
+            List[Tuple[str, str]]: (primer día, último día) de cada tramo
+        """
+        days = np.array(missing, dtype='datetime64[D]')
+        breaks = np.flatnonzero(np.busday_count(days[:-1], days[1:]) > 1) + 1
+        return [(str(run[0]), str(run[-1])) for run in np.split(np.array(missing), breaks)]
+
+    def ingest(self,
+               ticker: str,
+               start_date: str,
+               end_date: str,
+               priority: Priority = Priority.BACKFILL,
+               progress: Optional[Callable[[int], None]] = None,
+               max_wait: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Descarga las barras de un minuto de los días faltantes del rango y actualiza
+        los agregados por hora y por día. Los días ya descargados no se vuelven a pedir:
+        cada tramo de días faltantes consecutivos se descarga por separado.
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            priority (Priority): Prioridad de los requests en la cola de la API
+            progress (Callable[[int], None], optional): Recibe las barras guardadas hasta el momento
+            max_wait (float, optional): Segundos máximos de espera de cada página en la cola de la API
+            
+        Returns:
+            Dict[str, Any]: bars (barras guardadas), pages (requests a la API) y
+                            days (días faltantes que se pidieron)
+                            
+        Raises:
+            ValueError: Si el ticker o las fechas son inválidos
+            APICircuitOpenError: Si el circuit breaker de la API está abierto
+            APIQueueTimeoutError: Si una página no puede ejecutarse dentro de `max_wait`
+            APIError: Si hay error al obtener datos de la API
+            DatabaseError: Si hay error al guardar los datos
+        """
+        self._validate(ticker, start_date, end_date)
+        missing = self.missing_days(ticker, start_date, end_date)
+        if not missing:
+            return {'bars': 0, 'pages': 0, 'days': 0}
+
+        totals = {'bars': 0, 'pages': 0, 'days': len(missing)}
+
+        def fetch_pages(fetch_start: str, fetch_end: str) -> Dict[str, int]:
+            bars = pages = 0
+            next_url = None
+            while True:
+                page = self._call_api(
+                    ("aggs", ticker, 1, "minute", fetch_start, fetch_end, next_url),
+                    lambda url=next_url: self.api.get_aggregates_page(
+                        ticker, fetch_start, fetch_end, 1, "minute", url, adjusted=True
+                    ),
+                    priority, max_wait
+                )
+                pages += 1
+                # Cada página se guarda (con sus agregados) antes de pedir la siguiente
+                bars += self.model.save_bars(ticker, page['results'])
+                metrics.inc("intraday_bars_total", len(page['results']), operation="ingest")
+                if progress:
+                    progress(totals['bars'] + bars)
+                next_url = page.get('next_url')
+                if not next_url:
+                    break
+            self.model.mark_fetched(ticker, fetch_start, fetch_end)
+            return {'bars': bars, 'pages': pages}
+
+        for fetch_start, fetch_end in self._missing_runs(missing):
+            key = (os.path.abspath(self.model.location), ticker, fetch_start, fetch_end)
+            result, _ = _single_flight.do(
+                key, lambda start=fetch_start, end=fetch_end: fetch_pages(start, end)
+            )
+            totals['bars'] += result['bars']
+            totals['pages'] += result['pages']
+        return totals
+
+    def get_bars(self,
+                 ticker: str,
+                 start_date: str,
+                 end_date: str,
+                 timespan: str = 'minute',
+                 multiplier: int = 1,
+                 fetch_missing: bool = True,
+                 priority: Priority = Priority.INTERACTIVE,
+                 max_wait: Optional[float] = None) -> Optional[pd.DataFrame]:
+        """
+        Obtiene las barras intradiarias de un ticker, descargando antes los días faltantes
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            timespan (str): "minute", "hour" o "day"
+            multiplier (int): Minutos u horas por barra (ej: 5 con "minute" para barras de 5 minutos)
+            fetch_missing (bool): Si es False sólo se lee la base local
+            priority (Priority): Prioridad de los requests en la cola de la API
+            max_wait (float, optional): Segundos máximos de espera de cada página en la cola de la API
+            
+        Returns:
+            Optional[pd.DataFrame]: Columnas BAR_COLUMNS indexadas por timestamp (zona del mercado)
+                                    o None si no hay datos
+                                    
+        Raises:
+            ValueError: Si los parámetros son inválidos
+            APICircuitOpenError: Si el circuit breaker de la API está abierto
+            APIQueueTimeoutError: Si una página no puede ejecutarse dentro de `max_wait`
+            APIError: Si hay error al obtener datos de la API
+            DatabaseError: Si hay error al acceder a la base de datos
+        """
+        self._validate(ticker, start_date, end_date)
+        if timespan not in TIMESPANS:
+            raise ValueError(f"Intervalo no soportado: {timespan}. Use uno de: {', '.join(TIMESPANS)}")
+        if multiplier < 1 or (multiplier > 1 and timespan == 'day'):
+            raise ValueError("El multiplicador debe ser 1 para barras diarias y mayor o igual a 1 en el resto")
+
+        if fetch_missing:
+            self.ingest(ticker, start_date, end_date, priority, max_wait=max_wait)
+
+        df = self.model.get_bars(ticker, start_date, end_date, timespan)
+        if df.empty:
+            return None
+        if multiplier > 1:
+            df = self._resample(df, f"{multiplier}{'min' if timespan == 'minute' else 'h'}")
+        df.name = ticker
+        return df
+
+    @staticmethod
+    def _resample(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+        """
+        Agrupa barras en intervalos más largos (open y close de los extremos, vwap
+        ponderado por volumen), descartando los intervalos sin barras
+        """
+        volume = df['volume'].fillna(0)
+        pv = (df['vwap'].fillna(df['close']) * volume).resample(rule).sum()
+        grouped = df.resample(rule)
+        result = pd.DataFrame({
+            'open': grouped['open'].first(),
+            'high': grouped['high'].max(),
+            'low': grouped['low'].min(),
+            'close': grouped['close'].last(),
+            'volume': volume.resample(rule).sum(),
+        })
+        result['vwap'] = (pv / result['volume'].where(result['volume'] > 0)).round(4)
+        return result.dropna(subset=['open'])
+
+    def get_stored_summary(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene el resumen de tickers con barras intradiarias
+
+        Returns:
+            List[Dict[str, Any]]: Por ticker: ticker, days, bars, first_day y last_day
+
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        return self.model.get_stored_tickers()
+
+    def _call_api(self,
+                  key: tuple,
+                  fn: Callable[[], Any],
+                  priority: Priority,
+                  max_wait: Optional[float] = None) -> Any:
+        """
+        Ejecuta un request a través de la cola central de la API y espera su resultado.
+        Con el circuit breaker de agregados abierto no se encola: falla al instante.
+        
+        Raises:
+            APICircuitOpenError: Si el circuit breaker de la API está abierto
+            APIQueueTimeoutError: Si el request no puede ejecutarse dentro de `max_wait` o no
+                                  se obtiene su resultado dentro de RESULT_TIMEOUT
+            APIError: Si hay error al obtener datos de la API
+        """
+        breaker = get_circuit_breaker("aggs")
+        if breaker.is_open():
+            raise APICircuitOpenError(
+                f"La API de Polygon.io no responde; se reintentará en {breaker.retry_in():.0f} segundos"
+            )
+        timeout = (max_wait or 0) + RESULT_TIMEOUT
+        try:
+            return get_dispatcher().submit(key, fn, priority, max_wait).result(timeout=timeout)
+        except FutureTimeoutError:
+            raise APIQueueTimeoutError(f"No se obtuvo respuesta de la API en {timeout:.0f} segundos")
@@ -0,0 +1,353 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.api.dispatcher import Priority
+from src.services.ticker_service import TickerService
+from src.utils import metrics
+from src.utils.exceptions import DataValidationError, InvalidDataError
+
+# Carteras cuyos resultados se conservan en memoria para extenderlos con las barras nuevas
+PORTFOLIO_CACHE_SIZE = int(os.getenv("PORTFOLIO_CACHE_SIZE", "32") or 32)
+
+DAILY_COLUMNS = ['value', 'flows', 'pnl', 'cum_pnl', 'return', 'cum_return', 'drawdown']
+
+
+class PortfolioService:
+    """
+    Valuación de carteras sobre las barras diarias almacenadas. Las posiciones se
+    alinean en una matriz fecha × ticker y valor, resultado, rendimiento y caída
+    máxima se calculan con operaciones acumuladas sobre la matriz, sin recorrer los
+    días. Las barras faltantes se piden con TickerService.get_ticker_data y los
+    resultados se guardan en memoria: una consulta posterior sólo calcula los días
+    nuevos a partir del estado del último día calculado.
+
+    El rendimiento diario es time-weighted: las compras se consideran invertidas al
+    inicio del día y las ventas retiradas al final, así que los aportes no se cuentan
+    como ganancia.
+    
+    Cantidades, precios y cierres se expresan en acciones actuales: los cierres se leen
+    sin ajustar y se dividen, como las operaciones, por los splits posteriores a su fecha,
+    para que un split no aparezca como una pérdida. Los dividendos no se reinvierten.
+    """
+
+    def __init__(self, ticker_service: Optional[TickerService] = None):
+        self.ticker_service = ticker_service or TickerService()
+
+    def evaluate(self,
+                 transactions: Optional[Sequence[Dict[str, Any]]] = None,
+                 holdings: Optional[Dict[str, float]] = None,
+                 start_date: Optional[str] = None,
+                 end_date: Optional[str] = None,
+                 priority: Priority = Priority.INTERACTIVE) -> Dict[str, Any]:
+        """
+        Valúa una cartera día por día
+
+        Args:
+            transactions (Sequence[Dict[str, Any]], optional): Operaciones con date (YYYY-MM-DD),
+                ticker, quantity (positiva para compras, negativa para ventas), price y
+                opcionalmente fees. Una operación en un día sin barras se aplica en la
+                siguiente rueda; las posteriores a la fecha de fin se ignoran.
+            holdings (Dict[str, float], optional): Cantidades en cartera al inicio, valuadas
+                al cierre del primer día
+            start_date (str, optional): Fecha de inicio en formato YYYY-MM-DD (por defecto la
+                primera operación)
+            end_date (str, optional): Fecha de fin en formato YYYY-MM-DD (por defecto hoy)
+            priority (Priority): Prioridad de los requests en la cola de la API
+
+        Returns:
+            Dict[str, Any]:
+                - daily: DataFrame indexado por fecha con value (valor de mercado), flows
+                  (compras menos ventas, con comisiones), pnl (resultado del día), cum_pnl,
+                  return, cum_return y drawdown
+                - positions: DataFrame por ticker con quantity, close, market_value,
+                  invested, proceeds, pnl y pnl_pct
+                - source: "cache" (sin días nuevos), "incremental" o "full"
+                - partial: True si la API no estaba disponible y faltan barras (el
+                  resultado no se guarda en caché)
+
+        Raises:
+            DataValidationError: Si las operaciones o las fechas son inválidas
+            ValueError: Si el rango de fechas es inválido para la consulta de barras
+            InvalidDataError: Si no hay barras para algún ticker
+            DatabaseError: Si hay error al acceder a la base de datos
+            APIError: Si hay error al obtener las barras faltantes
+        """
+        trades = self._normalize(transactions or [], holdings or {})
+        if not start_date and trades['date'].isna().all():
+            raise DataValidationError("Indique la fecha de inicio de la cartera")
+        start_date = start_date or trades['date'].min().strftime('%Y-%m-%d')
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        if (trades['date'] < pd.Timestamp(start_date)).any():
+            raise DataValidationError("Hay operaciones anteriores a la fecha de inicio de la cartera")
+            
+        # Un resultado sólo se reutiliza si los datos no cambiaron (ej: llegó un split o se
+        # volvieron a descargar barras); los días nuevos se guardan con la versión resultante
+        model = self.ticker_service.model
+        base_key = (
+            os.path.abspath(model.location),
+            start_date,
+            tuple(map(tuple, trades.astype(str).itertuples(index=False)))
+        )
+        key = base_key + (model.data_version(),)
+        splits = {ticker: self._splits(ticker) for ticker in trades['ticker'].unique()}
+        trades = self._to_current_shares(trades, splits, start_date)
+        with _cache_lock:
+            cached = _cache.get(key)
+            if cached is not None:
+                _cache.move_to_end(key)
+
+        if cached is not None and cached['daily'].index[-1] <= pd.Timestamp(end_date):
+            last_date = cached['daily'].index[-1]
+            if last_date >= pd.Timestamp(end_date):
+                metrics.inc("portfolio_cache_total", result="hit")
+                return self._result(cached, "cache")
+            # Sólo se leen (o piden a la API) las barras posteriores al último día calculado
+            closes, partial = self._load_closes(list(cached['state']['quantity'].index),
+                                                last_date.strftime('%Y-%m-%d'), end_date, priority, splits)
+            closes = closes[closes.index > last_date]
+            if closes.empty:
+                metrics.inc("portfolio_cache_total", result="hit")
+                return self._result(cached, "cache")
+            entry = self._extend(cached, closes, trades[trades['date'] > last_date])
+            source = "incremental"
+        else:
+            tickers = sorted(trades['ticker'].unique())
+            closes, partial = self._load_closes(tickers, start_date, end_date, priority, splits)
+            if closes.empty:
+                raise InvalidDataError("No hay barras para la cartera en el período seleccionado")
+            entry = self._extend(self._empty_state(tickers), closes, trades)
+            source = "full"
+
+        metrics.inc("portfolio_cache_total", result=source)
+        if partial:
+            # Con barras faltantes por una caída de la API no se guarda el resultado: los
+            # días ya calculados no se vuelven a completar
+            return self._result(entry, source, partial=True)
+        # Las barras recién descargadas cambian la versión de los datos al guardarse
+        if self.ticker_service.writer is not None:
+            self.ticker_service.writer.flush()
+        key = base_key + (model.data_version(),)
+        with _cache_lock:
+            _cache[key] = entry
+            _cache.move_to_end(key)
+            while len(_cache) > PORTFOLIO_CACHE_SIZE:
+                _cache.popitem(last=False)
+        return self._result(entry, source)
+
+    def _normalize(self, transactions: Sequence[Dict[str, Any]], holdings: Dict[str, float]) -> pd.DataFrame:
+        """
+        Valida las operaciones y las convierte en un DataFrame (las tenencias iniciales
+        se agregan sin fecha ni precio: se aplican el primer día al cierre)
+        """
+        if not transactions and not holdings:
+            raise DataValidationError("La cartera no tiene operaciones ni tenencias")
+        trades = pd.DataFrame(list(transactions), columns=['date', 'ticker', 'quantity', 'price', 'fees'])
+        try:
+            trades['date'] = pd.to_datetime(trades['date'], format='%Y-%m-%d')
+        except (TypeError, ValueError):
+            raise DataValidationError("Fecha de operación inválida (use YYYY-MM-DD)")
+        try:
+            trades['quantity'] = trades['quantity'].astype(float)
+            trades['price'] = trades['price'].astype(float)
+            trades['fees'] = trades['fees'].fillna(0).astype(float)
+        except (TypeError, ValueError) as e:
+            raise DataValidationError(f"Operaciones inválidas: {str(e)}")
+        if trades[['date', 'ticker', 'quantity', 'price']].isna().any().any():
+            raise DataValidationError("Cada operación debe tener date, ticker, quantity y price")
+        if (trades['price'] <= 0).any() or (trades['quantity'] == 0).any():
+            raise DataValidationError("Las operaciones deben tener precio positivo y cantidad distinta de cero")
+        trades['ticker'] = trades['ticker'].astype(str).str.upper()
+
+        if holdings:
+            initial = pd.DataFrame({
+                'date': pd.NaT,
+                'ticker': [str(t).upper() for t in holdings],
+                'quantity': [float(q) for q in holdings.values()],
+                'price': np.nan,
+                'fees': 0.0,
+            })
+            trades = pd.concat([initial, trades], ignore_index=True) if len(trades) else initial
+
+        for ticker in trades['ticker'].unique():
+            is_valid, error_msg = self.ticker_service.validate_ticker(ticker)
+            if not is_valid:
+                raise DataValidationError(error_msg)
+        return trades.sort_values('date', kind='stable', na_position='first').reset_index(drop=True)
+
+    def _splits(self, ticker: str) -> List[Tuple[pd.Timestamp, float]]:
+        """
+        Obtiene los splits guardados del ticker como (fecha de ejecución, acciones nuevas
+        por acción anterior), en orden cronológico
+        """
+        return [
+            (pd.Timestamp(split['execution_date']), split['split_to'] / split['split_from'])
+            for split in self.ticker_service.model.get_corporate_actions(ticker)['splits']
+            if split['split_from'] and split['split_to']
+        ]
+
+    @staticmethod
+    def _share_factors(splits: List[Tuple[pd.Timestamp, float]], dates: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Calcula, para cada fecha, las acciones actuales que equivalen a una acción de esa
+        fecha (el producto de los splits ejecutados después)
+        """
+        if not splits:
+            return np.ones(len(dates))
+        executed = pd.DatetimeIndex([date for date, _ in splits])
+        after = np.append(np.cumprod([ratio for _, ratio in splits][::-1])[::-1], 1.0)
+        return after[executed.searchsorted(dates, side='right')]
+
+    @classmethod
+    def _to_current_shares(cls, trades: pd.DataFrame, splits: Dict[str, List[Tuple[pd.Timestamp, float]]],
+                           start_date: str) -> pd.DataFrame:
+        """
+        Expresa cantidades y precios de las operaciones en acciones actuales (las tenencias
+        iniciales, con los splits posteriores a la fecha de inicio)
+        """
+        trades = trades.copy()
+        dates = pd.DatetimeIndex(trades['date'].fillna(pd.Timestamp(start_date)))
+        factors = np.ones(len(trades))
+        for ticker, ticker_splits in splits.items():
+            mask = (trades['ticker'] == ticker).to_numpy()
+            factors[mask] = cls._share_factors(ticker_splits, dates[mask])
+        trades['quantity'] = trades['quantity'] * factors
+        trades['price'] = trades['price'] / factors
+        return trades
+
+    def _load_closes(self, tickers: List[str], start_date: str, end_date: str,
+                     priority: Priority,
+                     splits: Dict[str, List[Tuple[pd.Timestamp, float]]]) -> Tuple[pd.DataFrame, bool]:
+        """
+        Obtiene los cierres de todos los tickers, en acciones actuales, como una matriz
+        fecha × ticker, completando las barras faltantes desde la API. Indica además si algún
+        ticker quedó incompleto porque la API no estaba disponible.
+        """
+        closes = {}
+        partial = False
+        for ticker, result, error in self.ticker_service.iter_tickers_data(tickers, start_date, end_date, priority):
+            if error is not None:
+                raise error
+            if result is None or result['data']['close'].dropna().empty:
+                raise InvalidDataError(f"No hay barras de {ticker} entre {start_date} y {end_date}")
+            close = result['data']['close']
+            factors = self._share_factors(splits.get(ticker, []), close.index)
+            legacy = self.ticker_service.model.legacy_range(ticker)
+            if legacy:
+                # Barras guardadas ya ajustadas por la API (se reemplazan al actualizar el ticker)
+                factors[(close.index >= legacy[0]) & (close.index <= legacy[1])] = 1.0
+            closes[ticker] = close / factors
+            partial = partial or result['partial']
+        return pd.DataFrame(closes, columns=tickers).sort_index(), partial
+
+    @staticmethod
+    def _empty_state(tickers: List[str]) -> Dict[str, Any]:
+        zeros = pd.Series(0.0, index=tickers)
+        return {
+            'daily': pd.DataFrame(columns=DAILY_COLUMNS, dtype=float),
+            'state': {
+                'quantity': zeros, 'close': pd.Series(np.nan, index=tickers),
+                'cum_pnl': zeros, 'invested': zeros, 'proceeds': zeros,
+                'value': 0.0, 'wealth': 1.0, 'peak': 1.0,
+            }
+        }
+
+    @staticmethod
+    def _extend(entry: Dict[str, Any], closes: pd.DataFrame, trades: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Calcula los días de `closes` a partir del estado del último día calculado de `entry`
+        y devuelve la entrada extendida (no modifica la original)
+        """
+        state = entry['state']
+        tickers = list(state['quantity'].index)
+        dates = closes.index
+        # Cierres alineados: los días sin barra de un ticker repiten su último cierre
+        closes = closes.reindex(columns=tickers)
+        closes.iloc[0] = closes.iloc[0].fillna(state['close'])
+        close = closes.ffill().bfill().to_numpy()
+        prev_close = np.vstack([state['close'].fillna(pd.Series(close[0], index=tickers)).to_numpy(), close[:-1]])
+
+        # Cada operación cae en la primera rueda desde su fecha (las tenencias iniciales, en la
+        # primera); las posteriores a la última barra se aplican cuando se calculen esos días
+        rows = np.searchsorted(dates.to_numpy(), trades['date'].fillna(dates[0]).to_numpy())
+        trades, rows = trades[rows < len(dates)], rows[rows < len(dates)]
+        cols = trades['ticker'].map({t: i for i, t in enumerate(tickers)}).to_numpy()
+        quantity = trades['quantity'].to_numpy()
+        price = trades['price'].fillna(pd.Series(close[rows, cols], index=trades.index)).to_numpy()
+        fees = trades['fees'].to_numpy()
+
+        def scatter(values: np.ndarray) -> np.ndarray:
+            matrix = np.zeros(close.shape)
+            np.add.at(matrix, (rows, cols), values)
+            return matrix
+
+        bought = quantity > 0
+        delta = scatter(quantity)
+        buys = scatter(np.where(bought, quantity * price, 0.0) + np.where(bought, fees, 0.0))
+        sells = scatter(np.where(bought, 0.0, -quantity * price) - np.where(bought, 0.0, fees))
+        # Resultado de cada operación en su día: diferencia entre el cierre y el precio, menos comisiones
+        trade_pnl = scatter(quantity * (close[rows, cols] - price) - fees)
+
+        held = state['quantity'].to_numpy() + np.cumsum(delta, axis=0)
+        prev_held = np.vstack([state['quantity'].to_numpy(), held[:-1]])
+        pnl = prev_held * (close - prev_close) + trade_pnl
+
+        value = (held * close).sum(axis=1)
+        prev_value = np.concatenate([[state['value']], value[:-1]])
+        daily_pnl = pnl.sum(axis=1)
+        invested_base = prev_value + buys.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = np.where(invested_base > 0, daily_pnl / invested_base, 0.0)
+        wealth = state['wealth'] * np.cumprod(1 + returns)
+        peak = np.maximum(state['peak'], np.maximum.accumulate(wealth))
+
+        daily = pd.DataFrame({
+            'value': value,
+            'flows': buys.sum(axis=1) - sells.sum(axis=1),
+            'pnl': daily_pnl,
+            'cum_pnl': float(state['cum_pnl'].sum()) + np.cumsum(daily_pnl),
+            'return': returns,
+            'cum_return': wealth - 1,
+            'drawdown': wealth / peak - 1,
+        }, index=dates)
+        daily.index.name = 'date'
+
+        return {
+            'daily': pd.concat([entry['daily'], daily]) if len(entry['daily']) else daily,
+            'state': {
+                'quantity': pd.Series(held[-1], index=tickers),
+                'close': pd.Series(close[-1], index=tickers),
+                'cum_pnl': state['cum_pnl'] + pnl.sum(axis=0),
+                'invested': state['invested'] + buys.sum(axis=0),
+                'proceeds': state['proceeds'] + sells.sum(axis=0),
+                'value': float(value[-1]),
+                'wealth': float(wealth[-1]),
+                'peak': float(peak[-1]),
+            }
+        }
+
+    @staticmethod
+    def _result(entry: Dict[str, Any], source: str, partial: bool = False) -> Dict[str, Any]:
+        state = entry['state']
+        positions = pd.DataFrame({
+            'quantity': state['quantity'],
+            'close': state['close'],
+            'market_value': state['quantity'] * state['close'],
+            'invested': state['invested'],
+            'proceeds': state['proceeds'],
+            'pnl': state['cum_pnl'],
+        })
+        positions['pnl_pct'] = (positions['pnl'] / positions['invested'].where(positions['invested'] > 0)) * 100
+        positions.index.name = 'ticker'
+        return {'daily': entry['daily'].copy(), 'positions': positions, 'source': source, 'partial': partial}
+
+
+# Resultados por (almacenamiento, inicio, operaciones, versión de los datos), compartidos por
+# las sesiones del proceso
+_cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
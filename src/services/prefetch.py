@@ -0,0 +1,328 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from src.api.circuit_breaker import get_circuit_breaker
+from src.api.dispatcher import Priority, get_dispatcher
+from src.models.access_log import AccessLogModel, access_log_for
+from src.models.storage import TickerStorage, missing_intervals
+from src.utils import metrics
+from src.utils.exceptions import APIError, DatabaseError
+
+# Precarga en segundo plano del período anterior y de los tickers que suelen consultarse juntos
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "").strip().lower() in ("1", "true", "yes", "on")
+# Precargas en cola o en curso como máximo (todo el proceso)
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", "4") or 0)
+# Requests por minuto que pueden usar las precargas (por defecto, la mitad de la cuota del plan; 0 sin límite)
+_PLAN_REQUESTS_PER_MINUTE = float(os.getenv("POLYGON_REQUESTS_PER_MINUTE", "5") or 0)
+PREFETCH_REQUESTS_PER_MINUTE = float(
+    os.getenv("PREFETCH_REQUESTS_PER_MINUTE", "") or _PLAN_REQUESTS_PER_MINUTE / 2
+)
+# Tickers relacionados que se precargan tras cada consulta
+PREFETCH_RELATED_TICKERS = int(os.getenv("PREFETCH_RELATED_TICKERS", "2") or 0)
+# Segundos entre dos consultas de una sesión para considerarlas "consultadas juntas"
+PREFETCH_COVIEW_WINDOW = float(os.getenv("PREFETCH_COVIEW_WINDOW", "1800") or 1800)
+# Veces mínimas que dos tickers se consultaron juntos para precargar uno tras el otro
+PREFETCH_MIN_COVIEWS = int(os.getenv("PREFETCH_MIN_COVIEWS", "2") or 2)
+# Días de historia del registro de consultas
+ACCESS_LOG_DAYS = int(os.getenv("ACCESS_LOG_DAYS", "90") or 90)
+
+# Rangos precargados recordados para contar los aciertos
+_PREFETCHED_MEMORY = 256
+
+
+class _RequestBudget:
+    """
+    Balde de fichas con la cuota de requests por minuto de las precargas
+    """
+    def __init__(self, requests_per_minute: float):
+        self.capacity = max(1.0, requests_per_minute) if requests_per_minute > 0 else 0.0
+        self.rate = requests_per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        if self.capacity <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class _PrefetchTask:
+    __slots__ = ('session', 'ticker', 'start_date', 'end_date', 'reason', 'future', 'api_key', 'cancelled')
+
+    def __init__(self, session: str, ticker: str, start_date: str, end_date: str, reason: str):
+        self.session = session
+        self.ticker = ticker
+        self.start_date = start_date
+        self.end_date = end_date
+        self.reason = reason
+        self.future: Optional[Future] = None
+        self.api_key: Optional[tuple] = None
+        self.cancelled = False
+
+
+def preceding_range(start_date: str, end_date: str) -> Tuple[str, str]:
+    """
+    Calcula el período de igual duración inmediatamente anterior a un rango
+
+    Args:
+        start_date (str): Fecha de inicio en formato YYYY-MM-DD
+        end_date (str): Fecha de fin en formato YYYY-MM-DD
+
+    Returns:
+        Tuple[str, str]: (inicio, fin) del período anterior
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    previous_end = start - timedelta(days=1)
+    previous_start = previous_end - (end - start)
+    return previous_start.strftime('%Y-%m-%d'), previous_end.strftime('%Y-%m-%d')
+
+
+class Prefetcher:
+    """
+    Precarga en segundo plano los rangos que probablemente se consulten a continuación:
+    el período anterior de igual duración y el mismo rango de los tickers que suelen
+    consultarse junto al actual, según el registro local de consultas. Los requests
+    van a la cola de la API con prioridad de carga masiva, limitados por una cuota propia
+    y por una cantidad máxima de precargas pendientes, y sólo si la cola no tiene otros
+    requests esperando. Cada sesión puede cancelar sus precargas pendientes.
+    """
+    def __init__(self, storage: TickerStorage, access_log: Optional[AccessLogModel] = None):
+        self.location = os.path.abspath(storage.location)
+        try:
+            self.access_log = access_log or access_log_for(storage)
+            self.access_log.prune(time.time() - ACCESS_LOG_DAYS * 86400)
+        except DatabaseError:
+            # Sin registro de consultas sólo se precarga el período anterior
+            self.access_log = None
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, List[_PrefetchTask]] = {}
+        self._in_api = 0
+        self._budget = _RequestBudget(PREFETCH_REQUESTS_PER_MINUTE)
+        self._prefetched: "OrderedDict[Tuple[str, str, str], None]" = OrderedDict()
+        self._planner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch-plan")
+        self._executor = ThreadPoolExecutor(max_workers=max(1, PREFETCH_MAX_PENDING),
+                                            thread_name_prefix="prefetch")
+
+    def pending(self, session: Optional[str] = None) -> int:
+        """
+        Cuenta las precargas en cola o en curso (de una sesión o de todas)
+        """
+        with self._lock:
+            if session is not None:
+                return len(self._tasks.get(session, ()))
+            return sum(len(tasks) for tasks in self._tasks.values())
+
+    def cancel(self, session: str, keep: Optional[str] = None) -> int:
+        """
+        Cancela las precargas pendientes de una sesión. Las que ya esperan en la cola
+        de la API se quitan de ella, salvo que otro llamador haya elevado su prioridad.
+
+        Args:
+            session (str): Sesión cuyas precargas se cancelan
+            keep (str, optional): Ticker cuyas precargas se conservan (ej: el que se
+                                  está consultando, que puede reutilizarlas)
+
+        Returns:
+            int: Cantidad de precargas canceladas
+        """
+        with self._lock:
+            tasks = [task for task in self._tasks.get(session, ()) if task.ticker != keep]
+            for task in tasks:
+                task.cancelled = True
+        cancelled = 0
+        dispatcher = get_dispatcher()
+        for task in tasks:
+            if task.future.cancel():
+                # No llegó a ejecutarse: no pasa por _run y se descarta aquí
+                self._forget(task)
+                cancelled += 1
+            elif task.api_key is not None and dispatcher.cancel(task.api_key, Priority.BACKFILL):
+                cancelled += 1
+        if cancelled:
+            metrics.inc("prefetch_total", cancelled, outcome="cancelled")
+        return cancelled
+
+    def after_request(self, service, ticker: str, start_date: str, end_date: str,
+                      source: str, prefetch: bool = True) -> None:
+        """
+        Registra una consulta interactiva ya respondida y, si corresponde, planifica
+        sus precargas. No bloquea: el registro y la planificación se hacen en segundo plano.
+
+        Args:
+            service (TickerService): Servicio que realizó la consulta (y hará las precargas)
+            ticker (str): Ticker consultado
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            source (str): Origen de la respuesta ("db", "api" o "mixed")
+            prefetch (bool): False para sólo registrar la consulta
+        """
+        if source == "db" and self._was_prefetched(ticker, start_date, end_date):
+            metrics.inc("prefetch_total", outcome="hit")
+        self._planner.submit(self._plan, service, service.session_id, ticker, start_date, end_date, prefetch)
+
+    def _was_prefetched(self, ticker: str, start_date: str, end_date: str) -> bool:
+        with self._lock:
+            return any(
+                t == ticker and s <= start_date and end_date <= e
+                for t, s, e in self._prefetched
+            )
+
+    def _plan(self, service, session: str, ticker: str, start_date: str, end_date: str,
+              prefetch: bool) -> None:
+        related = []
+        if self.access_log is not None:
+            try:
+                self.access_log.record(session, ticker, start_date, end_date)
+                if prefetch and PREFETCH_RELATED_TICKERS > 0:
+                    related = self.access_log.co_viewed(
+                        ticker, PREFETCH_COVIEW_WINDOW, time.time() - ACCESS_LOG_DAYS * 86400,
+                        PREFETCH_RELATED_TICKERS, PREFETCH_MIN_COVIEWS
+                    )
+            except DatabaseError:
+                related = []
+        if not prefetch:
+            return
+
+        previous_start, previous_end = preceding_range(start_date, end_date)
+        self._schedule(service, _PrefetchTask(session, ticker, previous_start, previous_end, "previous"))
+        for other, _ in related:
+            self._schedule(service, _PrefetchTask(session, other, start_date, end_date, "related"))
+
+    def _schedule(self, service, task: _PrefetchTask) -> None:
+        with self._lock:
+            pending = sum(len(tasks) for tasks in self._tasks.values())
+            duplicate = any(
+                (t.ticker, t.start_date, t.end_date) == (task.ticker, task.start_date, task.end_date)
+                for tasks in self._tasks.values() for t in tasks
+            )
+            if duplicate or pending >= PREFETCH_MAX_PENDING:
+                metrics.inc("prefetch_total", outcome="skipped", reason=task.reason)
+                return
+            self._tasks.setdefault(task.session, []).append(task)
+            task.future = self._executor.submit(self._run, service, task)
+        metrics.inc("prefetch_total", outcome="scheduled", reason=task.reason)
+
+    def _forget(self, task: _PrefetchTask) -> None:
+        with self._lock:
+            tasks = self._tasks.get(task.session)
+            if tasks and task in tasks:
+                tasks.remove(task)
+                if not tasks:
+                    del self._tasks[task.session]
+
+    def _missing_range(self, service, task: _PrefetchTask) -> Optional[Tuple[str, str]]:
+        """
+        Calcula el rango a pedir a la API: de la primera a la última fecha hábil del
+        período que no está almacenada ni fue consultada (sin contar hoy, cuya barra
+        todavía no cerró)
+        """
+        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        end_date = min(task.end_date, yesterday)
+        if task.start_date > end_date:
+            return None
+        rows = service.model.get_ticker_data(task.ticker, task.start_date, end_date) or []
+        stored = {row['date'] for row in rows}
+        if service.writer is not None:
+            stored.update(row['date'] for row in service.writer.pending_rows(task.ticker, task.start_date, end_date))
+        missing = missing_intervals(sorted(stored), task.start_date, end_date)
+        if missing:
+            # Los días de los rangos ya consultados (ej: feriados) no se precargan
+            missing = missing_intervals(sorted(stored), task.start_date, end_date, service._coverage(task.ticker))
+        return (missing[0][0], missing[-1][1]) if missing else None
+
+    def _api_busy(self) -> bool:
+        """
+        True si la cola de la API tiene requests esperando además de las precargas propias
+        """
+        with self._lock:
+            in_api = self._in_api
+        return get_dispatcher().queue_size() > in_api
+
+    def _run(self, service, task: _PrefetchTask) -> None:
+        outcome = "error"
+        in_api = False
+        try:
+            missing = self._missing_range(service, task)
+            if missing is None:
+                outcome = "stored"
+                return
+            if get_circuit_breaker("aggs").is_open() or self._api_busy() or not self._budget.try_acquire():
+                outcome = "skipped"
+                return
+            with self._lock:
+                if task.cancelled:
+                    outcome = "cancelled"
+                    return
+                task.api_key = ("aggs", task.ticker, missing[0], missing[1])
+                self._in_api += 1
+                in_api = True
+            rows = service._fetch_missing_range(task.ticker, missing[0], missing[1], Priority.BACKFILL)
+            outcome = "fetched" if rows else "empty"
+            with self._lock:
+                self._prefetched[(task.ticker, task.start_date, task.end_date)] = None
+                while len(self._prefetched) > _PREFETCHED_MEMORY:
+                    self._prefetched.popitem(last=False)
+        except CancelledError:
+            # Ya contada por cancel()
+            outcome = None
+        except (APIError, DatabaseError):
+            outcome = "error"
+        finally:
+            if in_api:
+                with self._lock:
+                    self._in_api -= 1
+            self._forget(task)
+            if outcome is not None:
+                metrics.inc("prefetch_total", outcome=outcome, reason=task.reason)
+
+
+_prefetchers: Dict[str, Prefetcher] = {}
+_prefetchers_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    """
+    Un proceso hijo no hereda los hilos de las precargas: crea los suyos
+    """
+    global _prefetchers_lock
+    _prefetchers.clear()
+    _prefetchers_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_prefetcher(storage: TickerStorage) -> Optional[Prefetcher]:
+    """
+    Obtiene el precargador del almacenamiento, compartido por todas las sesiones del proceso
+
+    Args:
+        storage (TickerStorage): Almacenamiento donde se guardan las precargas
+
+    Returns:
+        Optional[Prefetcher]: Precargador o None si PREFETCH_ENABLED no está activo
+    """
+    if not PREFETCH_ENABLED or PREFETCH_MAX_PENDING <= 0:
+        return None
+    key = os.path.abspath(storage.location)
+    with _prefetchers_lock:
+        prefetcher = _prefetchers.get(key)
+        if prefetcher is None:
+            prefetcher = Prefetcher(storage)
+            _prefetchers[key] = prefetcher
+        return prefetcher
@@ -0,0 +1,333 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from src.api.stream_feed import QUOTE_FEED, QuoteFeed, Tick, create_feed
+from src.models.tick_buffer import MinuteBarRing, TickRingBuffer, TICK_BUFFER_SIZE, LIVE_BAR_CAPACITY
+from src.utils import metrics
+from src.utils.exceptions import DataValidationError
+
+# Símbolos máximos por feed (cada uno reserva sus buffers de tamaño fijo)
+MAX_STREAM_SYMBOLS = int(os.getenv("MAX_STREAM_SYMBOLS", "50") or 50)
+# Segundos sin actividad tras los cuales se liberan las suscripciones de una sesión
+STREAM_SESSION_TIMEOUT = float(os.getenv("STREAM_SESSION_TIMEOUT", "120") or 120)
+
+
+class _SymbolBuffers:
+    __slots__ = ('ticks', 'bars')
+
+    def __init__(self, tick_capacity: int, bar_capacity: int):
+        self.ticks = TickRingBuffer(tick_capacity)
+        self.bars = MinuteBarRing(bar_capacity)
+
+
+class QuoteStream:
+    """
+    Cotizaciones en vivo: un hilo consume el feed y vuelca cada lote de ticks en los
+    buffers circulares de su símbolo. Las lecturas sólo copian los buffers, así que la
+    vista puede consultarlos seguido sin afectar al feed. La memoria queda acotada por
+    MAX_STREAM_SYMBOLS × (TICK_BUFFER_SIZE ticks + LIVE_BAR_CAPACITY barras).
+    Las suscripciones se cuentan por sesión: un símbolo se quita del feed cuando ninguna
+    sesión lo sigue, y el feed se detiene cuando no queda ninguna. Una sesión sin
+    actividad (ver touch) durante STREAM_SESSION_TIMEOUT segundos se da por terminada.
+    """
+
+    def __init__(self,
+                 feed: QuoteFeed,
+                 tick_capacity: int = TICK_BUFFER_SIZE,
+                 bar_capacity: int = LIVE_BAR_CAPACITY,
+                 max_symbols: int = MAX_STREAM_SYMBOLS,
+                 session_timeout: float = STREAM_SESSION_TIMEOUT):
+        self.feed = feed
+        self.tick_capacity = tick_capacity
+        self.bar_capacity = bar_capacity
+        self.max_symbols = max_symbols
+        self.session_timeout = session_timeout
+        self._buffers: Dict[str, _SymbolBuffers] = {}
+        # Símbolos de cada sesión y su última actividad (time.monotonic)
+        self._sessions: Dict[str, Set[str]] = {}
+        self._seen: Dict[str, float] = {}
+        self._next_expiry = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(self, symbols: Iterable[str], session_id: str = "default") -> List[str]:
+        """
+        Suscribe símbolos de una sesión al feed y reserva los buffers de los nuevos
+
+        Args:
+            symbols (Iterable[str]): Símbolos a agregar
+            session_id (str): Sesión que los sigue
+
+        Returns:
+            List[str]: Símbolos seguidos por la sesión
+
+        Raises:
+            DataValidationError: Si se supera MAX_STREAM_SYMBOLS
+        """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        self._expire_sessions()
+        with self._lock:
+            new = [s for s in symbols if s not in self._buffers]
+            if len(self._buffers) + len(new) > self.max_symbols:
+                raise DataValidationError(
+                    f"Se pueden seguir hasta {self.max_symbols} símbolos en vivo a la vez"
+                )
+            for symbol in new:
+                self._buffers[symbol] = _SymbolBuffers(self.tick_capacity, self.bar_capacity)
+            session = self._sessions.setdefault(session_id, set())
+            session.update(symbols)
+            self._seen[session_id] = time.monotonic()
+            subscribed = sorted(session)
+        self.feed.subscribe(new)
+        return subscribed
+
+    def unsubscribe(self, symbols: Iterable[str], session_id: str = "default") -> None:
+        """
+        Deja de seguir símbolos en una sesión. Los que ya no sigue ninguna sesión se
+        quitan del feed (con sus buffers); sin sesiones, el feed se detiene.
+
+        Args:
+            symbols (Iterable[str]): Símbolos a quitar
+            session_id (str): Sesión que los seguía
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return
+            session.difference_update(s.upper() for s in symbols)
+            if not session:
+                del self._sessions[session_id]
+                self._seen.pop(session_id, None)
+        self._drop_unused()
+
+    def release(self, session_id: str) -> None:
+        """
+        Quita todas las suscripciones de una sesión (ej: la sesión terminó o se detuvo)
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._seen.pop(session_id, None)
+        self._drop_unused()
+
+    def touch(self, session_id: str) -> None:
+        """
+        Registra actividad de la sesión, para que sus suscripciones no expiren, y libera
+        las de las sesiones que ya no la tienen
+        """
+        with self._lock:
+            if session_id in self._sessions:
+                self._seen[session_id] = time.monotonic()
+        self._expire_sessions()
+
+    def _expire_sessions(self) -> None:
+        """
+        Libera (a lo sumo una vez por segundo) las sesiones sin actividad reciente
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_expiry:
+                return
+            self._next_expiry = now + min(1.0, self.session_timeout)
+            expired = [sid for sid, seen in self._seen.items() if now - seen > self.session_timeout]
+            for session_id in expired:
+                self._sessions.pop(session_id, None)
+                self._seen.pop(session_id, None)
+        if expired:
+            metrics.inc("stream_sessions_expired_total", len(expired), feed=self.feed.name)
+            self._drop_unused()
+
+    def _drop_unused(self) -> None:
+        """
+        Quita del feed los símbolos que no sigue ninguna sesión y lo detiene si no quedan
+        """
+        with self._lock:
+            used = set().union(*self._sessions.values())
+            unused = [s for s in self._buffers if s not in used]
+            for symbol in unused:
+                del self._buffers[symbol]
+            idle = not self._sessions
+        if unused:
+            self.feed.unsubscribe(unused)
+        if idle and self.running:
+            self.stop()
+
+    def start(self) -> None:
+        """
+        Inicia el hilo del feed (no hace nada si ya está corriendo)
+        """
+        if self.running:
+            if not self._stop.is_set():
+                return
+            # El feed se está deteniendo (ej: la última sesión se fue): se espera su hilo
+            self._thread.join(5.0)
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name=f"quote-feed-{self.feed.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Detiene el feed para todas las sesiones y espera a que termine su hilo
+        """
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        try:
+            self.feed.run(self._on_ticks, self._stop)
+        except Exception as e:
+            self.error = str(e)
+            self.feed.status = f"error: {e}"
+
+    def _on_ticks(self, ticks: List[Tick]) -> None:
+        """
+        Agrupa el lote por símbolo y lo agrega de una vez a cada buffer
+        """
+        if not ticks:
+            return
+        symbols = np.array([t[0] for t in ticks])
+        ts = np.fromiter((t[1] for t in ticks), dtype=np.int64, count=len(ticks))
+        price = np.fromiter((t[2] for t in ticks), dtype=np.float64, count=len(ticks))
+        size = np.fromiter((t[3] for t in ticks), dtype=np.float64, count=len(ticks))
+        for symbol in np.unique(symbols):
+            buffers = self._buffers.get(str(symbol))
+            if buffers is None:
+                continue
+            mask = symbols == symbol
+            buffers.ticks.extend(ts[mask], price[mask], size[mask])
+            buffers.bars.add(ts[mask], price[mask], size[mask])
+        metrics.inc("stream_ticks_total", len(ticks), feed=self.feed.name)
+        # Sin vistas abiertas nadie más libera las sesiones terminadas
+        self._expire_sessions()
+
+    def symbols(self, session_id: Optional[str] = None) -> List[str]:
+        """
+        Obtiene los símbolos seguidos por una sesión, o por todas si no se indica
+        """
+        with self._lock:
+            if session_id is None:
+                return list(self._buffers)
+            return sorted(self._sessions.get(session_id, ()))
+
+    def _get(self, symbol: str) -> Optional[_SymbolBuffers]:
+        with self._lock:
+            return self._buffers.get(symbol.upper())
+
+    def snapshot(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Resume el estado en vivo de un símbolo
+
+        Args:
+            symbol (str): Símbolo suscripto
+
+        Returns:
+            Optional[Dict[str, Any]]: price, timestamp (UTC), change (respecto a la apertura de la
+                                      barra más vieja), ticks (recibidos desde el inicio) y
+                                      volume (de la barra en curso); None si no hay ticks
+        """
+        buffers = self._get(symbol)
+        if buffers is None:
+            return None
+        last = buffers.ticks.last()
+        if last is None:
+            return None
+        bars = buffers.bars.to_frame()
+        first_open = bars['open'].iloc[0] if not bars.empty else None
+        return {
+            'price': last[1],
+            'timestamp': pd.Timestamp(last[0], unit='ms', tz='UTC'),
+            'change': (last[1] / first_open - 1) * 100 if first_open else None,
+            'ticks': buffers.ticks.total,
+            'volume': bars['volume'].iloc[-1] if not bars.empty else 0.0,
+        }
+
+    def get_ticks(self, symbol: str, last: Optional[int] = None) -> pd.DataFrame:
+        """
+        Obtiene los ticks guardados de un símbolo
+
+        Args:
+            symbol (str): Símbolo suscripto
+            last (int, optional): Cantidad máxima de ticks (los más recientes)
+
+        Returns:
+            pd.DataFrame: Columnas price y size indexadas por timestamp (UTC)
+        """
+        buffers = self._get(symbol)
+        if buffers is None:
+            return pd.DataFrame(columns=['price', 'size'])
+        ts, price, size = buffers.ticks.snapshot(last)
+        return pd.DataFrame(
+            {'price': price, 'size': size},
+            index=pd.DatetimeIndex(pd.to_datetime(ts, unit='ms', utc=True), name='timestamp')
+        )
+
+    def get_minute_bars(self, symbol: str) -> pd.DataFrame:
+        """
+        Obtiene las barras de un minuto construidas en vivo
+
+        Args:
+            symbol (str): Símbolo suscripto
+
+        Returns:
+            pd.DataFrame: Columnas open, high, low, close, volume y vwap indexadas por minuto (UTC)
+        """
+        buffers = self._get(symbol)
+        if buffers is None:
+            return pd.DataFrame(columns=['open', 'high', 'low', 'close', 'volume', 'vwap'])
+        return buffers.bars.to_frame()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Obtiene el estado del feed
+
+        Returns:
+            Dict[str, Any]: feed, status, running, symbols (de todas las sesiones), sessions y error
+        """
+        with self._lock:
+            sessions = len(self._sessions)
+        return {
+            'feed': self.feed.name,
+            'status': self.feed.status,
+            'running': self.running,
+            'symbols': self.symbols(),
+            'sessions': sessions,
+            'error': self.error,
+        }
+
+
+# Un stream por feed y por proceso, compartido por todas las sesiones
+_streams: Dict[str, QuoteStream] = {}
+_streams_lock = threading.Lock()
+
+
+def get_quote_stream(spec: Optional[str] = None) -> QuoteStream:
+    """
+    Obtiene el stream del feed indicado, creándolo la primera vez
+
+    Args:
+        spec (str, optional): Feed ("polygon", "simulated" o "replay:<archivo.csv>")
+
+    Returns:
+        QuoteStream: Stream compartido del proceso
+
+    Raises:
+        APIError: Si el feed de Polygon.io no puede crearse
+        DataValidationError: Si el feed es desconocido o inválido
+    """
+    spec = spec or QUOTE_FEED
+    with _streams_lock:
+        if spec not in _streams:
+            _streams[spec] = QuoteStream(create_feed(spec))
+        return _streams[spec]
@@ -0,0 +1,149 @@
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from src.models.access_log import AccessLogModel, access_log_for
+from src.models.column_cache import column_cache_for
+from src.models.storage import TickerStorage
+from src.services.write_behind import get_writer
+from src.utils.exceptions import DatabaseError, DataValidationError
+
+# Reglas de retención separadas por coma, ej: "10y,5y/90d" conserva 10 años de todos
+# los tickers y 5 años de los que no se consultan hace más de 90 días
+RETENTION_RULES = os.getenv("RETENTION_RULES", "")
+
+_RULE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)y(?:\s*/\s*(\d+)d)?\s*$')
+
+
+class RetentionRule:
+    """
+    Regla de retención: conservar los últimos `keep_years` años de datos, para todos
+    los tickers o sólo para los inactivos (sin consultas en `inactive_days` días).
+    """
+    def __init__(self, keep_years: float, inactive_days: Optional[int] = None):
+        self.keep_years = keep_years
+        self.inactive_days = inactive_days
+
+    def applies_to(self, last_activity: datetime, now: datetime) -> bool:
+        """
+        Indica si la regla aplica a un ticker según su última actividad
+        """
+        if self.inactive_days is None:
+            return True
+        return now - last_activity > timedelta(days=self.inactive_days)
+
+    def cutoff(self, now: datetime) -> str:
+        """
+        Obtiene la primera fecha (YYYY-MM-DD) que se conserva
+        """
+        return (now - timedelta(days=round(self.keep_years * 365.25))).strftime('%Y-%m-%d')
+
+    def __repr__(self) -> str:
+        suffix = f"/{self.inactive_days}d" if self.inactive_days is not None else ""
+        return f"{self.keep_years:g}y{suffix}"
+
+
+def parse_rules(spec: str) -> List[RetentionRule]:
+    """
+    Interpreta reglas de retención con el formato "<años>y[/<días>d]" separadas por coma
+
+    Args:
+        spec (str): Reglas, ej: "10y,5y/90d"
+
+    Returns:
+        List[RetentionRule]: Reglas interpretadas (vacía si spec está vacío)
+
+    Raises:
+        DataValidationError: Si alguna regla no tiene el formato esperado
+    """
+    rules = []
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        match = _RULE_PATTERN.match(part)
+        if not match:
+            raise DataValidationError(
+                f"Regla de retención inválida: '{part}'. Use <años>y o <años>y/<días>d (ej: 5y/90d)"
+            )
+        rules.append(RetentionRule(float(match.group(1)), int(match.group(2)) if match.group(2) else None))
+    return rules
+
+
+def plan_retention(storage: TickerStorage,
+                   rules: Optional[List[RetentionRule]] = None,
+                   now: Optional[datetime] = None,
+                   access_log: Optional[AccessLogModel] = None) -> List[Dict[str, Any]]:
+    """
+    Calcula qué datos eliminaría la retención, sin eliminar nada. A cada ticker se
+    le aplica la más estricta de las reglas que le corresponden; la actividad de un
+    ticker es su última consulta según el registro de consultas (incluidas las que
+    se sirvieron desde la base) o, si es posterior, su última descarga.
+
+    Args:
+        storage (TickerStorage): Almacenamiento a analizar
+        rules (List[RetentionRule], optional): Reglas (por defecto RETENTION_RULES)
+        now (datetime, optional): Momento de referencia (por defecto ahora)
+        access_log (AccessLogModel, optional): Registro de consultas (por defecto el del
+            almacenamiento, ver access_log_for)
+
+    Returns:
+        List[Dict[str, Any]]: Por ticker afectado: ticker, rule, cutoff (primera fecha
+                              conservada) y rows (barras a eliminar)
+    """
+    rules = parse_rules(RETENTION_RULES) if rules is None else rules
+    now = now or datetime.now()
+    if not rules:
+        return []
+
+    try:
+        last_accessed = (access_log or access_log_for(storage)).last_accessed()
+    except DatabaseError:
+        # Sin registro de consultas sólo se conoce la fecha de descarga
+        last_accessed = {}
+
+    plan = []
+    for info in storage.get_stored_tickers():
+        if not info['ranges']:
+            continue
+        last_activity = max(
+            datetime.strptime(r['created_at'], '%Y-%m-%d %H:%M:%S') for r in info['ranges']
+        )
+        if info['ticker'] in last_accessed:
+            last_activity = max(last_activity, datetime.fromtimestamp(last_accessed[info['ticker']]))
+        applicable = [rule for rule in rules if rule.applies_to(last_activity, now)]
+        if not applicable:
+            continue
+        rule = min(applicable, key=lambda r: r.keep_years)
+        cutoff = rule.cutoff(now)
+        rows = storage.count_bars(info['ticker'], cutoff)
+        if rows:
+            plan.append({'ticker': info['ticker'], 'rule': repr(rule), 'cutoff': cutoff, 'rows': rows})
+    return plan
+
+
+def apply_retention(storage: TickerStorage, plan: List[Dict[str, Any]]) -> int:
+    """
+    Elimina los datos anteriores al corte de cada ticker del plan. Antes se guardan las
+    respuestas pendientes de la escritura diferida, para que no vuelvan a insertar
+    barras del período eliminado
+
+    Args:
+        storage (TickerStorage): Almacenamiento
+        plan (List[Dict[str, Any]]): Resultado de plan_retention
+
+    Returns:
+        int: Cantidad de barras eliminadas
+
+    Raises:
+        DatabaseError: Si hay un error al eliminar los datos
+    """
+    writer = get_writer(storage)
+    if writer is not None:
+        writer.flush()
+    column_cache = column_cache_for(storage)
+    deleted = 0
+    for item in plan:
+        last_deleted = (datetime.strptime(item['cutoff'], '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+        deleted += storage.delete_range(item['ticker'], '1900-01-01', last_deleted)
+        if column_cache is not None:
+            column_cache.invalidate(item['ticker'])
+    return deleted
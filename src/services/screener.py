@@ -0,0 +1,414 @@
+import ast
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.models.storage import TickerStorage, BAR_COLUMNS, create_storage
+from src.models.warm_cache import get_warm_cache
+from src.utils import metrics
+from src.utils.process_pool import get_process_pool
+from src.utils.exceptions import DataValidationError
+
+# Procesos que evalúan los bloques de tickers en paralelo (por defecto, uno por núcleo)
+SCREENER_WORKERS = int(os.getenv("SCREENER_WORKERS", "0") or 0) or os.cpu_count() or 1
+# Tickers por bloque: cada bloque se lee y se evalúa como una matriz ticker × tiempo
+SCREENER_CHUNK_TICKERS = int(os.getenv("SCREENER_CHUNK_TICKERS", "500") or 500)
+# Archivo con los filtros guardados
+SCREENS_PATH = os.getenv("SCREENS_PATH", "data/screens.json")
+
+# Filtros disponibles antes de guardar ninguno
+DEFAULT_SCREENS = {
+    "Sobrevendidos en tendencia alcista": "close > sma(close, 200) and rsi(close, 14) < 30",
+    "Volumen inusual": "volume > 2 * sma(volume, 20)",
+    "Máximos de 52 semanas": "close >= highest(high, 252)",
+    "Cruce dorado": "sma(close, 50) > sma(close, 200) and prev(sma(close, 50)) <= prev(sma(close, 200))",
+}
+
+# Barras extra para que los promedios exponenciales (ema, rsi) se estabilicen
+WARMUP_FACTOR = 3
+
+
+def _rolling_mean(x: np.ndarray, n: int) -> np.ndarray:
+    """
+    Promedio de las últimas `n` barras; NaN si alguna falta
+    """
+    valid = ~np.isnan(x)
+    sums = np.zeros((x.shape[0], x.shape[1] + 1))
+    counts = np.zeros((x.shape[0], x.shape[1] + 1), dtype=np.int64)
+    np.cumsum(np.where(valid, x, 0.0), axis=1, out=sums[:, 1:])
+    np.cumsum(valid, axis=1, out=counts[:, 1:])
+    out = np.full(x.shape, np.nan)
+    if n <= x.shape[1]:
+        window = counts[:, n:] - counts[:, :-n]
+        out[:, n - 1:] = np.where(window == n, (sums[:, n:] - sums[:, :-n]) / n, np.nan)
+    return out
+
+
+def _rolling_extreme(x: np.ndarray, n: int, reduce: Callable) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if n <= x.shape[1]:
+        out[:, n - 1:] = reduce(np.lib.stride_tricks.sliding_window_view(x, n, axis=1), axis=2)
+    return out
+
+
+def _ema(x: np.ndarray, n: int) -> np.ndarray:
+    """
+    Promedio exponencial (alpha = 2 / (n + 1)) iniciado en el primer valor, con NaN
+    hasta acumular `n` barras
+    """
+    alpha = 2.0 / (n + 1)
+    out = np.full(x.shape, np.nan)
+    state = np.full(x.shape[0], np.nan)
+    count = np.zeros(x.shape[0], dtype=np.int64)
+    for j in range(x.shape[1]):
+        col = x[:, j]
+        valid = ~np.isnan(col)
+        state = np.where(valid, np.where(np.isnan(state), col, alpha * col + (1 - alpha) * state), state)
+        count += valid
+        out[:, j] = np.where(count >= n, state, np.nan)
+    return out
+
+
+def _rsi(x: np.ndarray, n: int) -> np.ndarray:
+    """
+    RSI de Wilder: las primeras `n` variaciones se promedian y luego se suavizan con 1/n
+    """
+    diff = np.diff(x, axis=1)
+    gains, losses = np.clip(diff, 0, None), np.clip(-diff, 0, None)
+    avg_gain = np.zeros(x.shape[0])
+    avg_loss = np.zeros(x.shape[0])
+    count = np.zeros(x.shape[0], dtype=np.int64)
+    out = np.full(x.shape, np.nan)
+    for j in range(diff.shape[1]):
+        valid = ~np.isnan(diff[:, j])
+        count += valid
+        seeding = count <= n
+        gain = np.where(valid, gains[:, j], 0.0)
+        loss = np.where(valid, losses[:, j], 0.0)
+        avg_gain = np.where(valid, np.where(seeding, avg_gain + gain / n, (avg_gain * (n - 1) + gain) / n), avg_gain)
+        avg_loss = np.where(valid, np.where(seeding, avg_loss + loss / n, (avg_loss * (n - 1) + loss) / n), avg_loss)
+        rsi = np.where(avg_loss > 0, 100 - 100 / (1 + avg_gain / np.where(avg_loss > 0, avg_loss, 1)), 100.0)
+        out[:, j + 1] = np.where(count >= n, rsi, np.nan)
+    return out
+
+
+def _shift(x: np.ndarray, n: int) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if n < x.shape[1]:
+        out[:, n:] = x[:, :x.shape[1] - n]
+    return out
+
+
+# Funciones del lenguaje de filtros: (implementación, ventana por defecto, barras previas necesarias)
+FUNCTIONS: Dict[str, Tuple[Callable[[np.ndarray, int], np.ndarray], Optional[int], Callable[[int], int]]] = {
+    'sma': (_rolling_mean, None, lambda n: n - 1),
+    'ema': (_ema, None, lambda n: WARMUP_FACTOR * n),
+    'rsi': (_rsi, 14, lambda n: WARMUP_FACTOR * n + 1),
+    'highest': (lambda x, n: _rolling_extreme(x, n, np.max), None, lambda n: n - 1),
+    'lowest': (lambda x, n: _rolling_extreme(x, n, np.min), None, lambda n: n - 1),
+    'prev': (_shift, 1, lambda n: n),
+    'change': (lambda x, n: (x / _shift(x, n) - 1) * 100, 1, lambda n: n),
+}
+
+_BIN_OPS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide}
+_COMPARE_OPS = {ast.Gt: np.greater, ast.GtE: np.greater_equal, ast.Lt: np.less,
+                ast.LtE: np.less_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal}
+
+
+class ScreenExpression:
+    """
+    Condición de un filtro, por ejemplo
+    "close > sma(close, 200) and rsi(close, 14) < 30 and volume > 2 * sma(volume, 20)".
+    Se interpreta con `ast` (sólo columnas, números, aritmética, comparaciones, and/or/not
+    y las funciones de FUNCTIONS; no se ejecuta código arbitrario) y se evalúa sobre
+    matrices ticker × tiempo, todas las series a la vez.
+    """
+
+    def __init__(self, text: str):
+        """
+        Args:
+            text (str): Expresión del filtro
+
+        Raises:
+            DataValidationError: Si la expresión es inválida
+        """
+        self.text = (text or '').strip()
+        if not self.text:
+            raise DataValidationError("La expresión del filtro está vacía")
+        try:
+            tree = ast.parse(self.text.lower(), mode='eval')
+        except SyntaxError as e:
+            raise DataValidationError(f"Expresión inválida: {e.msg}")
+        self._root = tree.body
+        self.columns: List[str] = []
+        self.indicators: List[str] = []
+        self.lookback = self._check(self._root)
+        if not self._is_condition(self._root):
+            raise DataValidationError("La expresión debe ser una condición (por ejemplo: close > sma(close, 50))")
+        # Columnas en el orden de BAR_COLUMNS, para leerlas siempre igual
+        self.columns = [c for c in BAR_COLUMNS if c in self.columns]
+
+    def _window(self, node: ast.expr, name: str) -> int:
+        if not (isinstance(node, ast.Constant) and type(node.value) is int and node.value >= 1):
+            raise DataValidationError(f"La ventana de {name} debe ser un entero positivo")
+        return node.value
+
+    def _check(self, node: ast.expr) -> int:
+        """
+        Valida el nodo y devuelve las barras que necesita para tener valor en la última
+        """
+        if isinstance(node, ast.Name):
+            if node.id not in BAR_COLUMNS:
+                raise DataValidationError(f"Columna desconocida: {node.id}. Use una de: {', '.join(BAR_COLUMNS)}")
+            if node.id not in self.columns:
+                self.columns.append(node.id)
+            return 1
+        if isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise DataValidationError(f"Valor no soportado: {node.value!r}")
+            return 1
+        if isinstance(node, ast.Call):
+            name = node.func.id if isinstance(node.func, ast.Name) else None
+            if name not in FUNCTIONS:
+                raise DataValidationError(
+                    f"Función desconocida: {ast.unparse(node.func)}. Use una de: {', '.join(FUNCTIONS)}"
+                )
+            _, default, history = FUNCTIONS[name]
+            if node.keywords or not 1 <= len(node.args) <= 2 or (len(node.args) == 1 and default is None):
+                usage = f"{name}(serie, ventana)"
+                if default is not None:
+                    usage += f" (la ventana es opcional, por defecto {default})"
+                raise DataValidationError(f"Uso: {usage}")
+            n = self._window(node.args[1], name) if len(node.args) == 2 else default
+            needed = self._check(node.args[0]) + history(n)
+            label = ast.unparse(node)
+            if label not in self.indicators:
+                self.indicators.append(label)
+            return needed
+        if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+            return max(self._check(node.left), self._check(node.right))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd, ast.Not)):
+            return self._check(node.operand)
+        if isinstance(node, ast.Compare) and all(type(op) in _COMPARE_OPS for op in node.ops):
+            return max(self._check(n) for n in [node.left, *node.comparators])
+        if isinstance(node, ast.BoolOp):
+            return max(self._check(v) for v in node.values)
+        raise DataValidationError(f"Operación no soportada en el filtro: {ast.unparse(node)}")
+
+    @classmethod
+    def _is_condition(cls, node: ast.expr) -> bool:
+        if isinstance(node, ast.Compare):
+            return True
+        if isinstance(node, ast.BoolOp):
+            return all(cls._is_condition(v) for v in node.values)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return cls._is_condition(node.operand)
+        return False
+
+    def evaluate(self, series: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Evalúa la condición sobre matrices ticker × tiempo
+
+        Args:
+            series (Dict[str, np.ndarray]): Matriz por columna usada (tickers, barras)
+
+        Returns:
+            Tuple[np.ndarray, Dict[str, np.ndarray]]: Tickers que cumplen la condición en la
+                                                      última barra y valor de cada indicador
+                                                      en esa barra
+        """
+        cache: Dict[str, np.ndarray] = {}
+
+        def visit(node: ast.expr):
+            if isinstance(node, ast.Name):
+                return series[node.id]
+            if isinstance(node, ast.Constant):
+                return float(node.value)
+            if isinstance(node, ast.Call):
+                label = ast.unparse(node)
+                if label not in cache:
+                    fn, default, _ = FUNCTIONS[node.func.id]
+                    n = node.args[1].value if len(node.args) == 2 else default
+                    cache[label] = fn(np.broadcast_to(visit(node.args[0]), self._shape(series)).astype(np.float64), n)
+                return cache[label]
+            if isinstance(node, ast.BinOp):
+                return _BIN_OPS[type(node.op)](visit(node.left), visit(node.right))
+            if isinstance(node, ast.UnaryOp):
+                operand = visit(node.operand)
+                if isinstance(node.op, ast.Not):
+                    return np.logical_not(operand)
+                return -operand if isinstance(node.op, ast.USub) else operand
+            if isinstance(node, ast.Compare):
+                result, left = True, visit(node.left)
+                for op, comparator in zip(node.ops, node.comparators):
+                    right = visit(comparator)
+                    result = np.logical_and(result, _COMPARE_OPS[type(op)](left, right))
+                    left = right
+                return result
+            reduce = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return reduce.reduce([np.broadcast_to(visit(v), self._shape(series)) for v in node.values])
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mask = np.broadcast_to(visit(self._root), self._shape(series))[:, -1]
+        return mask, {label: cache[label][:, -1] for label in self.indicators}
+
+    @staticmethod
+    def _shape(series: Dict[str, np.ndarray]) -> Tuple[int, int]:
+        return next(iter(series.values())).shape
+
+
+def _screen_chunk(storage: TickerStorage,
+                  expression: ScreenExpression,
+                  bars: int,
+                  tickers: Sequence[str]) -> Tuple[int, pd.DataFrame]:
+    """
+    Lee y evalúa un bloque de tickers
+
+    Returns:
+        Tuple[int, pd.DataFrame]: Tickers con datos y filas de los que cumplen la condición
+    """
+    columns = list(dict.fromkeys(expression.columns + ['close']))
+    # Con precios ajustados un split no aparece como una caída en los indicadores
+    read_columns = [f'adj_{c}' for c in columns] if storage.supports_adjusted else columns
+    last_dates, values = storage.latest_bars(tickers, bars, read_columns)
+    has_data = last_dates != None  # noqa: E711 (comparación elemento a elemento)
+    series = {column: values[i] for i, column in enumerate(columns)}
+    mask, indicators = expression.evaluate(series)
+    mask = mask & has_data
+    matches = pd.DataFrame({
+        'ticker': np.asarray(tickers, dtype=object)[mask],
+        'date': last_dates[mask],
+        'close': series['close'][mask, -1],
+        **{label: values_[mask] for label, values_ in indicators.items()},
+    })
+    return int(has_data.sum()), matches
+
+
+def _screen_chunk_in_worker(storage_class: type, location: str, text: str, bars: int,
+                            tickers: Sequence[str]) -> Tuple[int, pd.DataFrame]:
+    # En los procesos del pool se recrea el almacenamiento a partir de su ubicación
+    return _screen_chunk(storage_class(location), ScreenExpression(text), bars, tickers)
+
+
+class ScreenerService:
+    """
+    Filtros sobre todo el universo almacenado: evalúa una condición sobre las últimas
+    barras de cada ticker y devuelve los que la cumplen. Los tickers se procesan en
+    bloques de SCREENER_CHUNK_TICKERS, repartidos entre SCREENER_WORKERS procesos.
+    """
+
+    def __init__(self,
+                 model: Optional[TickerStorage] = None,
+                 screens_path: str = SCREENS_PATH,
+                 workers: int = SCREENER_WORKERS):
+        self.model = model or create_storage()
+        self.screens_path = screens_path
+        self.workers = workers
+
+    @metrics.timed("screener_duration_seconds")
+    def run(self,
+            expression: str,
+            tickers: Optional[Sequence[str]] = None,
+            bars: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Ejecuta un filtro sobre los tickers almacenados
+
+        Args:
+            expression (str): Condición a evaluar en la última barra de cada ticker
+            tickers (Sequence[str], optional): Universo a filtrar (todos los almacenados si es None)
+            bars (int, optional): Barras a leer por ticker (como mínimo las que pide la expresión)
+
+        Returns:
+            Dict[str, Any]: matches (DataFrame con ticker, date, close y el valor de cada
+                            indicador), screened (tickers con datos), bars (barras leídas
+                            por ticker) y seconds (duración)
+
+        Raises:
+            DataValidationError: Si la expresión es inválida
+            DatabaseError: Si hay un error al acceder a los datos
+        """
+        start = time.perf_counter()
+        parsed = ScreenExpression(expression)
+        if tickers is None:
+            warm_cache = get_warm_cache(self.model)
+            tickers = warm_cache.get("tickers", self.model.list_tickers) if warm_cache else self.model.list_tickers()
+        tickers = list(tickers)
+        bars = max(bars or 0, parsed.lookback)
+        chunks = [tickers[i:i + SCREENER_CHUNK_TICKERS] for i in range(0, len(tickers), SCREENER_CHUNK_TICKERS)]
+
+        if self.workers > 1 and len(chunks) > 1:
+            pool = get_process_pool(self.workers)
+            results = list(pool.map(
+                _screen_chunk_in_worker,
+                [type(self.model)] * len(chunks),
+                [self.model.location] * len(chunks),
+                [parsed.text] * len(chunks),
+                [bars] * len(chunks),
+                chunks
+            ))
+        else:
+            results = [_screen_chunk(self.model, parsed, bars, chunk) for chunk in chunks]
+
+        frames = [matches for _, matches in results if not matches.empty]
+        columns = ['ticker', 'date', 'close'] + parsed.indicators
+        matches = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        return {
+            'matches': matches.sort_values('ticker', ignore_index=True),
+            'screened': sum(screened for screened, _ in results),
+            'bars': bars,
+            'seconds': time.perf_counter() - start,
+        }
+
+    def list_screens(self) -> Dict[str, str]:
+        """
+        Obtiene los filtros guardados (los predefinidos si todavía no se guardó ninguno)
+
+        Returns:
+            Dict[str, str]: Expresión de cada filtro por nombre
+
+        Raises:
+            DataValidationError: Si el archivo de filtros está dañado
+        """
+        if not os.path.exists(self.screens_path):
+            return dict(DEFAULT_SCREENS)
+        try:
+            with open(self.screens_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise DataValidationError(f"No se pudo leer el archivo de filtros {self.screens_path}: {str(e)}")
+
+    def save_screen(self, name: str, expression: str) -> None:
+        """
+        Guarda (o reemplaza) un filtro con nombre
+
+        Raises:
+            DataValidationError: Si el nombre está vacío o la expresión es inválida
+        """
+        name = (name or '').strip()
+        if not name:
+            raise DataValidationError("El filtro debe tener un nombre")
+        ScreenExpression(expression)
+        screens = self.list_screens()
+        screens[name] = expression.strip()
+        self._write_screens(screens)
+
+    def delete_screen(self, name: str) -> None:
+        """
+        Elimina un filtro guardado
+        """
+        screens = self.list_screens()
+        if screens.pop(name, None) is not None:
+            self._write_screens(screens)
+
+    def _write_screens(self, screens: Dict[str, str]) -> None:
+        directory = os.path.dirname(self.screens_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.screens_path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(screens, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.screens_path)
@@ -0,0 +1,216 @@
+import glob
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Segundos sin uso tras los cuales se borra el archivo de lock de una clave
+LOCK_FILE_MAX_AGE = float(os.getenv("LOCK_FILE_MAX_AGE", "3600") or 3600)
+
+# Última limpieza de archivos viejos por directorio (time.time)
+_last_cleanup: Dict[str, float] = {}
+_last_cleanup_lock = threading.Lock()
+
+
+def _lock_file(handle, blocking: bool) -> bool:
+    """
+    Toma el lock exclusivo del archivo abierto
+
+    Returns:
+        bool: False si otro proceso lo retiene (sin esperar si no es bloqueante)
+    """
+    if fcntl:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(handle.fileno(), flags)
+        except BlockingIOError:
+            return False
+        return True
+    # msvcrt sólo reintenta durante 10 segundos: la espera la hace quien llama
+    handle.seek(0)
+    try:
+        msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock_file(handle) -> None:
+    if fcntl:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _is_current(handle, path: str) -> bool:
+    """
+    True si el archivo abierto sigue siendo el de la ruta (no se borró ni reemplazó)
+    """
+    try:
+        return os.fstat(handle.fileno()).st_ino == os.stat(path).st_ino
+    except OSError:
+        return False
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave dentro del proceso: sólo la
+    primera (líder) ejecuta la función y el resto espera y comparte su resultado.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Ejecuta `fn` una única vez por clave entre todos los hilos que la pidan a la vez
+
+        Args:
+            key (Hashable): Clave que identifica la operación
+            fn (Callable[[], Any]): Función a ejecutar
+
+        Returns:
+            Tuple[Any, bool]: (resultado, shared) donde shared indica si el resultado
+                              fue calculado por otro hilo
+
+        Raises:
+            Exception: La excepción lanzada por `fn`, también para los hilos que esperaban
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return result, False
+
+
+class InterProcessLock:
+    """
+    Lock exclusivo basado en archivos para coordinar procesos (ej: varios workers de Streamlit).
+    Cada clave usa su propio archivo, así las claves distintas no se esperan entre sí. El
+    archivo guarda además el momento de la última operación exitosa, lo que permite a un
+    proceso que esperaba saber si otro ya hizo el trabajo. Los archivos sin uso durante
+    LOCK_FILE_MAX_AGE segundos se borran, para que no crezcan con los rangos consultados.
+    """
+    def __init__(self, lock_dir: str, key: Hashable):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        self.path = os.path.join(lock_dir, f"{digest}.lock")
+        os.makedirs(lock_dir, exist_ok=True)
+        self._remove_stale_files(lock_dir)
+
+    @staticmethod
+    def _remove_stale_files(lock_dir: str) -> None:
+        """
+        Borra (a lo sumo una vez cada LOCK_FILE_MAX_AGE por proceso y directorio) los archivos
+        de lock sin uso. Sólo se borra un archivo con su lock tomado; quien lo esperaba
+        detecta el borrado y usa el archivo nuevo (ver acquire)
+        """
+        now = time.time()
+        with _last_cleanup_lock:
+            if now - _last_cleanup.get(lock_dir, 0.0) < LOCK_FILE_MAX_AGE:
+                return
+            _last_cleanup[lock_dir] = now
+        for path in glob.glob(os.path.join(lock_dir, '*.lock')):
+            try:
+                if now - os.path.getmtime(path) < LOCK_FILE_MAX_AGE:
+                    continue
+                with open(path, 'a+') as handle:
+                    if not _lock_file(handle, blocking=False):
+                        continue
+                    try:
+                        stale = now - os.fstat(handle.fileno()).st_mtime >= LOCK_FILE_MAX_AGE
+                        if stale and _is_current(handle, path):
+                            os.remove(path)
+                    finally:
+                        _unlock_file(handle)
+            except OSError:
+                # En uso (o ya borrado por otro proceso)
+                pass
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Bloquea hasta obtener el lock exclusivo sobre el archivo
+
+        Args:
+            timeout (float, optional): Segundos máximos de espera (sin límite si es None)
+
+        Yields:
+            InterProcessLock: El propio lock, para consultar o registrar completados
+
+        Raises:
+            TimeoutError: Si otro proceso retiene el lock más de `timeout` segundos
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            handle = open(self.path, 'a+')
+            try:
+                while not _lock_file(handle, blocking=deadline is None):
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise TimeoutError(f"No se obtuvo el lock {self.path} en {timeout:g} segundos")
+                    time.sleep(0.05)
+            except BaseException:
+                handle.close()
+                raise
+            if _is_current(handle, self.path):
+                break
+            # El archivo se borró por viejo mientras se esperaba: se toma el nuevo
+            _unlock_file(handle)
+            handle.close()
+
+        self._handle = handle
+        try:
+            # Un archivo en uso no se considera viejo
+            os.utime(self.path)
+            yield self
+        finally:
+            _unlock_file(handle)
+            handle.close()
+            self._handle = None
+
+    def completed_at(self) -> float:
+        """
+        Obtiene el momento (epoch) de la última operación completada bajo este lock
+
+        Returns:
+            float: Timestamp en segundos o 0 si nunca se completó
+        """
+        self._handle.seek(0)
+        try:
+            return float(self._handle.read().strip() or 0)
+        except ValueError:
+            return 0.0
+
+    def mark_completed(self) -> None:
+        """
+        Registra que la operación protegida terminó correctamente
+        """
+        self._handle.seek(0)
+        self._handle.truncate()
+        self._handle.write(repr(time.time()))
+        self._handle.flush()
@@ -1,25 +1,74 @@
+import os
 import re
-from datetime import datetime
-from typing import Optional, List, Dict, Any, Union, Tuple
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Union, Tuple, Iterator, Sequence
 import pandas as pd
 
 from src.api.api_finanzas import FinanceAPI
-from src.models.ticker_model import TickerModel
+from src.api.circuit_breaker import get_circuit_breaker
+from src.api.dispatcher import Priority, RESULT_TIMEOUT, get_dispatcher
+from src.models.storage import (
+    TickerStorage, BAR_COLUMNS, ADJUSTED_COLUMNS, RANGE_SORTS, create_storage, missing_intervals,
+    payload_to_rows
+)
+from src.models.access_log import access_log_for
+from src.models.column_cache import column_cache_for
+from src.models.warm_cache import get_warm_cache
+from src.services.corporate_actions import get_corporate_actions_updater
+from src.services.prefetch import get_prefetcher
+from src.services.single_flight import SingleFlight, InterProcessLock
+from src.services.write_behind import get_writer
+from src.utils import metrics
 from src.utils.validators import validate_dates
 from src.utils.exceptions import (
     DatabaseError, APIError, APIRateLimitError, APIConnectionError,
-    InvalidDataError, DataValidationError
+    APICircuitOpenError, APIQueueTimeoutError, InvalidDataError, DataValidationError
 )
 
+# Compartido por todas las instancias del servicio (una por sesión de Streamlit)
+_single_flight = SingleFlight()
+
+# Espera máxima en la cola de la API para obtener el nombre de la compañía (dato accesorio)
+COMPANY_NAME_MAX_WAIT = 5
+
+# Espera máxima por el lock entre procesos de un rango: quien lo retiene puede estar
+# esperando en la cola de la API. Al vencer se pide el rango sin coordinar
+FETCH_LOCK_TIMEOUT = float(os.getenv("FETCH_LOCK_TIMEOUT", "30") or 30)
+
+# Tickers que se cargan a la vez al consultar varios (ej: página de comparación)
+COMPARE_MAX_WORKERS = int(os.getenv("COMPARE_MAX_WORKERS", "8") or 8)
+
 class TickerService:
     """
     Servicio para manejar la lógica de negocio relacionada con los tickers.
     """
     
-    def __init__(self):
-        self.api = FinanceAPI()
-        self.model = TickerModel()
-    
+    def __init__(self,
+                 api: Optional[FinanceAPI] = None,
+                 model: Optional[TickerStorage] = None,
+                 session_id: Optional[str] = None):
+        self.api = api or FinanceAPI()
+        # Identifica al usuario en el registro de consultas y en las precargas
+        self.session_id = session_id or uuid.uuid4().hex
+        # SQLite por defecto; STORAGE_BACKEND permite elegir otro backend
+        self.model = model or create_storage()
+        # Caché de columnas mapeadas en memoria, junto al almacenamiento principal
+        self.column_cache = column_cache_for(self.model)
+        # Caché en memoria de los tickers recientes y del resumen, con instantánea en disco.
+        # Se crea antes que la escritura diferida para que al terminar el proceso la
+        # instantánea se guarde después de vaciar la cola (atexit es LIFO)
+        self.warm_cache = get_warm_cache(self.model)
+        # Escritura diferida de las respuestas de la API, compartida por las sesiones del proceso
+        self.writer = get_writer(self.model)
+        # Precarga de los rangos probablemente consultados a continuación (si está habilitada)
+        self.prefetcher = get_prefetcher(self.model)
+        # Splits y dividendos de los tickers consultados, actualizados en segundo plano
+        self.corporate_actions = get_corporate_actions_updater(self.model)
+
     def validate_ticker(self, ticker: str) -> tuple[bool, str]:
         """
         Valida que el ticker tenga el formato correcto.
@@ -100,7 +149,11 @@ class TickerService:
             Optional[Dict[str, Any]]: Diccionario con:
                 - data: DataFrame con los datos históricos
                 - source: Origen de los datos ("db")
-                - missing_dates: Lista de fechas sin datos disponibles
+                - missing_ranges: Tramos de días hábiles sin datos, como tuplas
+                  (inicio, fin, días hábiles) en formato YYYY-MM-DD
+                - missing_days: Cantidad total de días hábiles sin datos
+                - partial: True si faltan fechas porque la API no estaba disponible
+                - api_error: Motivo por el que no se consultó la API (o None)
                 O None si no hay datos
             
         Raises:
@@ -118,26 +171,24 @@ class TickerService:
             raise ValueError(error_msg)
             
         try:
-            # Obtener datos solo de la base de datos
-            data = self.model.get_ticker_data(ticker, start_date, end_date)
+            # Obtener datos solo del almacenamiento local
+            df = self._read_stored_frame(ticker, start_date, end_date)
             
-            if data:
-                # Convertir a DataFrame
-                df = pd.DataFrame(data)
-                df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
-                df.set_index('date', inplace=True)
+            if df is not None:
                 df.name = ticker
                 
                 # Verificar cobertura de datos
-                start_dt = pd.to_datetime(start_date)
-                end_dt = pd.to_datetime(end_date)
-                date_range = pd.date_range(start=start_dt, end=end_dt, freq='B')
-                missing_dates = date_range.difference(df.index)
-                
+                missing_ranges = missing_intervals(df.index, start_date, end_date)
+                if missing_ranges:
+                    missing_ranges = missing_intervals(
+                        df.index, start_date, end_date, self._coverage(ticker)
+                    )
+
                 return {
                     'data': df,
                     'source': 'db',
-                    'missing_dates': [d.strftime('%d/%m/%Y') for d in missing_dates] if len(missing_dates) > 0 else []
+                    'missing_ranges': missing_ranges,
+                    'missing_days': sum(days for _, _, days in missing_ranges)
                 }
             
             return None
@@ -147,32 +198,52 @@ class TickerService:
         except Exception as e:
             raise InvalidDataError(f"Error al obtener datos históricos del ticker: {str(e)}")
             
+    @metrics.timed("service_request_duration_seconds")
     def get_ticker_data(self, 
                        ticker: str, 
                        start_date: str, 
                        end_date: str,
-                       status_callback=None) -> Optional[Dict[str, Any]]:
+                       status_callback=None,
+                       priority: Priority = Priority.INTERACTIVE,
+                       max_wait: Optional[float] = None,
+                       prefetch: bool = True,
+                       adjusted: bool = False) -> Optional[Dict[str, Any]]:
         """
         Obtiene los datos del ticker para el período especificado.
         Primero busca en la base de datos local, si no encuentra datos
-        los solicita a la API y los guarda.
-        
+        los solicita a la API y los guarda. Si la API no responde (o su circuit
+        breaker está abierto) y hay datos locales, se devuelven marcados como parciales.
+        Las consultas interactivas cancelan las precargas pendientes de la sesión y, al
+        terminar, precargan en segundo plano el período anterior y los tickers relacionados.
+        Cada ticker consultado encola además la actualización de sus splits y dividendos.
+
         Args:
             ticker (str): El ticker a consultar
             start_date (str): Fecha de inicio en formato YYYY-MM-DD
             end_date (str): Fecha de fin en formato YYYY-MM-DD
             status_callback (Callable[[str], None], optional): Función para reportar el estado del proceso
-            
+            priority (Priority): Prioridad del request en la cola de la API
+            max_wait (float, optional): Segundos máximos de espera en la cola de la API
+            prefetch (bool): False para no cancelar ni planificar precargas (la consulta
+                             igual se registra)
+            adjusted (bool): Precios ajustados por splits y dividendos (en los backends que
+                             los materializan; el resto ya guarda los precios ajustados por la API)
+                             
         Returns:
             Optional[Dict[str, Any]]: Diccionario con:
                 - data: DataFrame con los datos históricos
                 - source: Origen de los datos ("db", "api", o "mixed")
-                - missing_dates: Lista de fechas sin datos disponibles
+                - missing_ranges: Tramos de días hábiles sin datos, como tuplas
+                  (inicio, fin, días hábiles) en formato YYYY-MM-DD
+                - missing_days: Cantidad total de días hábiles sin datos
+                - partial: True si faltan fechas porque la API no estaba disponible
+                - api_error: Motivo por el que no se consultó la API (o None)
                 O None si no hay datos
             
         Raises:
             ValueError: Si los parámetros son inválidos
             DatabaseError: Si hay error al acceder a la base de datos
+            APIConnectionError: Si la API no está disponible y no hay datos locales
             APIError: Si hay error al obtener datos de la API
             InvalidDataError: Si los datos no tienen el formato esperado
         """
@@ -184,66 +255,77 @@ class TickerService:
         is_valid, error_msg = validate_dates(start_date, end_date)
         if not is_valid:
             raise ValueError(error_msg)
+        
+        interactive = self.prefetcher is not None and priority == Priority.INTERACTIVE
+        if interactive and prefetch:
+            # El usuario pasó a otra consulta: las precargas pendientes ya no sirven
+            self.prefetcher.cancel(self.session_id, keep=ticker)
             
         try:
             # Primero intentar obtener de la base de datos local
             try:
-                data = self.model.get_ticker_data(ticker, start_date, end_date)
-                source = "db"
+                db_data = self._read_stored_frame(ticker, start_date, end_date, adjusted)
             except DatabaseError:
-                data = None
-            
-            # Verificar cobertura de datos
-            start_dt = pd.to_datetime(start_date)
-            end_dt = pd.to_datetime(end_date)
-            date_range = pd.date_range(start=start_dt, end=end_dt, freq='B')  # B for business days
-            
-            db_data = None
+                db_data = None
+                
             api_data = None
+            api_error = None
             source = "db"
             
-            # Intentar obtener datos de la base de datos
-            if data:
-                db_data = pd.DataFrame(data)
-                db_data['date'] = pd.to_datetime(db_data['date'])
-                db_data.set_index('date', inplace=True)
-            
-            # Verificar si necesitamos datos de la API
-            missing_dates = []
-            if db_data is not None:
-                missing_dates = date_range.difference(db_data.index)
-            else:
-                missing_dates = date_range
+            # Verificar cobertura de datos (días hábiles sin datos locales). Los días de los
+            # rangos ya consultados a la API (ej: feriados) no se vuelven a pedir
+            stored_dates = db_data.index if db_data is not None else None
+            missing_ranges = missing_intervals(stored_dates, start_date, end_date)
+            coverage = self._coverage(ticker) if missing_ranges else []
+            if coverage:
+                missing_ranges = missing_intervals(stored_dates, start_date, end_date, coverage)
+
+            metrics.inc("service_cache_total", result="miss" if missing_ranges else "hit")
             
             # Si faltan fechas, intentar obtener de la API
-            if len(missing_dates) > 0:
+            fetched = []
+            if missing_ranges:
                 if status_callback:
                     status_callback(f"Obteniendo datos faltantes de {ticker} desde la API de Polygon.io...")
-                
+                    
+                new_rows = []
                 try:
-                    # Convertir las fechas al formato requerido por la API
-                    api_start = missing_dates.min().strftime('%Y-%m-%d')
-                    api_end = missing_dates.max().strftime('%Y-%m-%d')
+                    # Con la API caída no se encolan más requests: se responde al instante
+                    # con lo que haya en la base de datos
+                    breaker = get_circuit_breaker("aggs")
+                    if breaker.is_open():
+                        raise APICircuitOpenError(
+                            f"La API de Polygon.io no responde; se reintentará en "
+                            f"{breaker.retry_in():.0f} segundos"
+                        )
                     
-                    api_response = self.api.get_stock_data(ticker, api_start, api_end)
-                    if api_response and api_response.get('results'):
-                        # Guardar nuevos datos
-                        self.model.save_ticker_data(ticker, api_response)
-                        
-                        # Convertir datos de la API a DataFrame
-                        new_data = self.model.get_ticker_data(ticker, api_start, api_end)
+                    # Un request por tramo faltante: los días guardados entre tramos no se piden.
+                    # Sólo un fetch por (ticker, rango) a la vez; el resto comparte el resultado
+                    for api_start, api_end, _ in missing_ranges:
+                        new_data = self._fetch_missing_range(
+                            ticker, api_start, api_end, priority, max_wait, status_callback
+                        )
+                        fetched.append((api_start, api_end))
                         if new_data:
-                            api_data = pd.DataFrame(new_data)
-                            api_data['date'] = pd.to_datetime(api_data['date'])
-                            api_data.set_index('date', inplace=True)
-                            source = "api"
-                except (APIError, APIRateLimitError, APIConnectionError) as e:
+                            new_rows.extend(new_data)
+                except APIConnectionError as e:
+                    # API caída o lenta: se devuelven los datos locales (y los tramos ya
+                    # recibidos) marcados como parciales
+                    if db_data is None and not new_rows:
+                        raise
+                    api_error = str(e)
+                    metrics.inc("service_partial_total", reason=type(e).__name__)
+                except (APIError, APIRateLimitError) as e:
                     # Si hay error con la API pero tenemos algunos datos, continuamos con advertencia
                     if db_data is not None:
                         raise InvalidDataError(f"No se pudieron obtener todos los datos: {str(e)}")
                     else:
                         raise APIError(f"Error al obtener datos de la API: {str(e)}")
-            
+                if new_rows:
+                    # Convertir datos de la API a DataFrame
+                    api_data = self._rows_to_frame(new_rows)
+                    source = "api"
+
             # Combinar datos de ambas fuentes si es necesario
             if db_data is not None and api_data is not None:
                 df = pd.concat([db_data, api_data]).sort_index()
@@ -255,17 +337,36 @@ class TickerService:
                 df = api_data
             else:
                 return None
-            
+                
+            if adjusted and api_data is not None and self.model.supports_adjusted:
+                # Las barras descargadas se ajustan al guardarse: se lee la serie ajustada
+                try:
+                    stored = self._read_stored_frame(ticker, start_date, end_date, adjusted=True)
+                except DatabaseError:
+                    stored = None
+                if stored is not None:
+                    df = stored
+                    
             # Verificar cobertura final y preparar resultado
             df.name = ticker
-            missing_dates = date_range.difference(df.index)
-            
+            missing_ranges = missing_intervals(df.index, start_date, end_date, coverage + fetched)
+
             result = {
                 'data': df,
                 'source': source,
-                'missing_dates': [d.strftime('%d/%m/%Y') for d in missing_dates] if len(missing_dates) > 0 else []
+                'missing_ranges': missing_ranges,
+                'missing_days': sum(days for _, _, days in missing_ranges),
+                'partial': api_error is not None,
+                'api_error': api_error
             }
             
+            metrics.inc("service_requests_total", source=source)
+            if interactive:
+                self.prefetcher.after_request(self, ticker, start_date, end_date, source, prefetch)
+            elif priority == Priority.INTERACTIVE:
+                self._touch_access(ticker)
+            if self.corporate_actions is not None:
+                self.corporate_actions.schedule(self, ticker)
             return result
             
         except (DatabaseError, APIError, InvalidDataError) as e:
@@ -273,6 +374,365 @@ class TickerService:
         except Exception as e:
             raise ValueError(f"Error inesperado al obtener datos del ticker: {str(e)}")
 
+    def iter_tickers_data(self,
+                          tickers: Sequence[str],
+                          start_date: str,
+                          end_date: str,
+                          priority: Priority = Priority.INTERACTIVE,
+                          max_workers: int = COMPARE_MAX_WORKERS,
+                          adjusted: bool = False
+                          ) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Obtiene los datos de varios tickers en paralelo y los entrega a medida que
+        terminan, así quien consume puede mostrar cada uno apenas está disponible.
+        Las lecturas locales se solapan; los requests a la API siguen pasando por la
+        cola central, que respeta la cuota del plan.
+        
+        Args:
+            tickers (Sequence[str]): Tickers a consultar
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            priority (Priority): Prioridad de los requests en la cola de la API
+            max_workers (int): Tickers cargados a la vez
+            adjusted (bool): Precios ajustados por splits y dividendos (ver get_ticker_data)
+            
+        Yields:
+            Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]: (ticker, resultado de
+                get_ticker_data, error) en orden de llegada; un error no interrumpe al resto
+        """
+        if not tickers:
+            return
+        if priority == Priority.INTERACTIVE:
+            # Cada ticker sólo se registra: las precargas de la comparación no se cancelan entre sí
+            self.cancel_prefetch()
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers))),
+                                      thread_name_prefix="ticker-load")
+        try:
+            futures = {
+                executor.submit(self.get_ticker_data, ticker, start_date, end_date, None, priority,
+                                prefetch=False, adjusted=adjusted): ticker
+                for ticker in tickers
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+        finally:
+            # Si quien consume se detiene (ej: Streamlit reinicia la página) no se esperan los pendientes
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def cancel_prefetch(self) -> int:
+        """
+        Cancela las precargas pendientes de la sesión
+
+        Returns:
+            int: Cantidad de precargas canceladas
+        """
+        if self.prefetcher is None:
+            return 0
+        return self.prefetcher.cancel(self.session_id)
+
+    def iter_stored_frames(self,
+                           ticker: str,
+                           start_date: Optional[str] = None,
+                           end_date: Optional[str] = None,
+                           chunk_rows: int = 50000,
+                           columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Recorre en bloques la historia almacenada de un ticker, sin consultar la API.
+        Pensado para historias muy largas (indicadores, exportaciones, backtests) que
+        no conviene materializar completas en memoria.
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str, optional): Fecha mínima en formato YYYY-MM-DD
+            end_date (str, optional): Fecha máxima en formato YYYY-MM-DD
+            chunk_rows (int): Filas máximas por bloque
+            columns (Sequence[str], optional): Columnas a leer (todas las de BAR_COLUMNS si es None)
+
+        Returns:
+            Iterator[pd.DataFrame]: Bloques indexados por fecha, en orden cronológico
+
+        Raises:
+            ValueError: Si el ticker o las fechas son inválidos
+        """
+        is_valid, error_msg = self.validate_ticker(ticker)
+        if not is_valid:
+            raise ValueError(error_msg)
+        if start_date and end_date and start_date > end_date:
+            raise ValueError("La fecha de inicio debe ser anterior o igual a la fecha de fin")
+        if chunk_rows <= 0:
+            raise ValueError("chunk_rows debe ser mayor que cero")
+
+        # Las barras que esperan en la cola de escritura también forman parte de la historia
+        if self.writer is not None:
+            self.writer.flush()
+        return self.model.iter_ticker_frames(ticker, start_date, end_date, chunk_rows, columns)
+
+    @staticmethod
+    def _rows_to_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Convierte filas del almacenamiento en un DataFrame indexado por fecha
+        con las columnas de precios (sin columnas internas como el id)
+        """
+        df = pd.DataFrame(rows)
+        df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+        return df.set_index('date')[BAR_COLUMNS]
+
+    def _read_stored_frame(self,
+                           ticker: str,
+                           start_date: str,
+                           end_date: str,
+                           adjusted: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Lee un rango del almacenamiento local. Los tickers más consultados se sirven
+        desde la caché de columnas (slices sin copia de archivos mapeados en memoria)
+        o desde la caché en memoria; el resto, desde el almacenamiento principal.
+        
+        Args:
+            ticker (str): El ticker a consultar
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            adjusted (bool): Precios ajustados, con los nombres de BAR_COLUMNS (se ignora
+                             si el backend no los materializa)
+                             
+        Returns:
+            Optional[pd.DataFrame]: DataFrame indexado por fecha o None si no hay datos
+            
+        Raises:
+            DatabaseError: Si hay error al acceder al almacenamiento
+        """
+        adjusted = adjusted and self.model.supports_adjusted
+        if adjusted and self.writer is not None and self.writer.pending_rows(ticker, start_date, end_date):
+            # Las barras que esperan en la cola de escritura se ajustan recién al guardarse
+            self.writer.flush()
+            
+        cached = None
+        if self.column_cache is not None:
+            if self.column_cache.record_access(ticker):
+                try:
+                    self.column_cache.rebuild(ticker, self.model)
+                except DatabaseError:
+                    # La caché es opcional: ante un error se sigue leyendo de la base
+                    pass
+            cached = self.column_cache.read(ticker, start_date, end_date, adjusted)
+        if cached is None and self.warm_cache is not None:
+            cached = self.warm_cache.read(ticker, start_date, end_date, adjusted)
+            
+        if cached is not None:
+            df = cached if not cached.empty else None
+        elif adjusted:
+            df = self.model.scan([ticker], start_date, end_date, ADJUSTED_COLUMNS)
+            if df.empty:
+                df = None
+            else:
+                df = df.set_index('date')[ADJUSTED_COLUMNS]
+                df.columns = BAR_COLUMNS
+        else:
+            data = self.model.get_ticker_data(ticker, start_date, end_date)
+            df = self._rows_to_frame(data) if data else None
+        
+        # Respuestas de la API que todavía esperan ser guardadas
+        pending = self.writer.pending_rows(ticker, start_date, end_date) if self.writer else []
+        if pending:
+            pending_df = self._rows_to_frame(pending)
+            if df is None:
+                df = pending_df
+            else:
+                # Como al guardar, las fechas ya almacenadas tienen prioridad
+                df = pd.concat([df, pending_df])
+                df = df[~df.index.duplicated(keep='first')].sort_index()
+        return df
+
+    def _touch_access(self, ticker: str) -> None:
+        """
+        Registra la consulta interactiva de un ticker sin precargas (con precargas la
+        registra el precargador), para que la retención lo considere activo aunque se
+        sirva desde la base
+        """
+        try:
+            access_log_for(self.model).touch(ticker)
+        except DatabaseError:
+            # Sin registro de consultas la retención usa la fecha de descarga
+            pass
+
+    def _coverage(self, ticker: str) -> List[Tuple[str, str]]:
+        """
+        Intervalos del ticker ya consultados a la API; vacío si no se pueden leer (los
+        días sin barras de esos intervalos se piden de nuevo)
+        """
+        try:
+            return self.model.get_coverage(ticker)
+        except DatabaseError:
+            return []
+
+    def _record_coverage(self, ticker: str, start_date: str, end_date: str) -> None:
+        """
+        Registra como consultado el rango pedido a la API, sin incluir hoy (su barra todavía
+        no cerró), para que sus días sin barras no cuenten como faltantes
+        """
+        end_date = min(end_date, (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d'))
+        if start_date > end_date:
+            return
+        try:
+            self.model.add_coverage(ticker, start_date, end_date)
+        except DatabaseError:
+            # Sin el registro, esos días sólo se vuelven a pedir
+            pass
+
+    def _api_adjusted(self) -> bool:
+        """
+        Indica si las barras se piden a la API ya ajustadas: sólo los backends que no
+        materializan el ajuste localmente las guardan así
+        """
+        return not self.model.supports_adjusted
+
+    def _refresh_column_cache(self, ticker: str) -> None:
+        """
+        Reconstruye la caché de columnas del ticker tras guardar datos nuevos, si la tiene
+        """
+        if self.column_cache is not None and self.column_cache.is_cached(ticker):
+            try:
+                self.column_cache.rebuild(ticker, self.model)
+            except DatabaseError:
+                # Una caché desactualizada no debe servirse
+                self.column_cache.invalidate(ticker)
+
+    def _call_api(self,
+                  key: tuple,
+                  fn,
+                  priority: Priority,
+                  max_wait: Optional[float] = None,
+                  status_callback=None) -> Any:
+        """
+        Ejecuta un request a través de la cola central de la API, informando la espera estimada.
+        
+        Args:
+            key (tuple): Identificador del request para agrupar pedidos idénticos
+            fn (Callable[[], Any]): Función que realiza el request
+            priority (Priority): Prioridad del request
+            max_wait (float, optional): Segundos máximos de espera en la cola
+            status_callback (Callable[[str], None], optional): Función para reportar el estado del proceso
+            
+        Returns:
+            Any: Resultado de `fn`
+            
+        Raises:
+            APIQueueTimeoutError: Si el request no puede ejecutarse dentro de `max_wait` o no
+                                  se obtiene su resultado dentro de RESULT_TIMEOUT
+            APIError: Si hay error al obtener datos de la API
+        """
+        dispatcher = get_dispatcher()
+        future = dispatcher.submit(key, fn, priority, max_wait)
+        timeout = (max_wait or 0) + RESULT_TIMEOUT
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = dispatcher.estimate_wait(key)
+            if status_callback and wait >= 1:
+                status_callback(
+                    f"La consulta está en cola por el límite de la API de Polygon.io. "
+                    f"Se ejecutará en aproximadamente {wait:.0f} segundos..."
+                )
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise APIQueueTimeoutError(f"No se obtuvo respuesta de la API en {timeout:.0f} segundos")
+            try:
+                return future.result(timeout=min(5, remaining))
+            except FutureTimeoutError:
+                continue
+
+    def _fetch_missing_range(self,
+                             ticker: str,
+                             start_date: str,
+                             end_date: str,
+                             priority: Priority = Priority.INTERACTIVE,
+                             max_wait: Optional[float] = None,
+                             status_callback=None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Obtiene un rango faltante de la API y retorna sus filas, construidas directamente
+        de la respuesta. El guardado se encola en la escritura diferida, así que no se
+        espera el commit ni se vuelve a leer lo recién guardado.
+        Las llamadas concurrentes para el mismo (ticker, rango) se agrupan: dentro del
+        proceso sólo un hilo hace el request y, entre procesos, un lock de archivo
+        garantiza que quien esperaba reutilice lo que otro proceso acaba de guardar.
+        Con escritura diferida, ese lock se libera recién cuando los datos se guardaron.
+        
+        Args:
+            ticker (str): El ticker a consultar
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            priority (Priority): Prioridad del request en la cola de la API
+            max_wait (float, optional): Segundos máximos de espera en la cola de la API
+            status_callback (Callable[[str], None], optional): Función para reportar el estado del proceso
+            
+        Returns:
+            Optional[List[Dict[str, Any]]]: Filas del rango o None si la API no devolvió datos
+            
+        Raises:
+            APIError: Si hay error al obtener datos de la API
+            DatabaseError: Si hay error al guardar o leer los datos
+        """
+        key = (os.path.abspath(self.model.location), ticker, start_date, end_date)
+        role = "leader"
+        # Si el rango se estaba precargando, quien lo espera ahora no queda detrás de las cargas masivas
+        get_dispatcher().promote(("aggs", ticker, start_date, end_date), priority)
+        
+        def fetch_and_store():
+            nonlocal role
+            lock_dir = os.path.join(os.path.dirname(os.path.abspath(self.model.location)), "locks")
+            requested_at = time.time()
+            stack = ExitStack()
+            try:
+                lock = stack.enter_context(InterProcessLock(lock_dir, key).acquire(FETCH_LOCK_TIMEOUT))
+            except TimeoutError:
+                # Otro proceso retiene el lock (ej: su request espera en la cola): se pide el rango
+                # sin coordinar; guardar dos veces el mismo rango no duplica barras
+                lock = None
+                role = "lock_timeout"
+            try:
+                # Otro proceso terminó este mismo fetch mientras esperábamos el lock
+                if lock is not None and lock.completed_at() >= requested_at:
+                    role = "shared_process"
+                    return self.model.get_ticker_data(ticker, start_date, end_date)
+                
+                api_response = self._call_api(
+                    ("aggs", ticker, start_date, end_date),
+                    lambda: self.api.get_stock_data(ticker, start_date, end_date, adjusted=self._api_adjusted()),
+                    priority, max_wait, status_callback
+                )
+                if not api_response or not api_response.get('results'):
+                    # Rango sin barras (ej: feriados): se registra para no volver a pedirlo
+                    self._record_coverage(ticker, start_date, end_date)
+                    return None
+                    
+                if self.writer is None:
+                    self.model.save_ticker_data(ticker, api_response)
+                    self._record_coverage(ticker, start_date, end_date)
+                    self._refresh_column_cache(ticker)
+                    if lock is not None:
+                        lock.mark_completed()
+                    return payload_to_rows(ticker, api_response)
+                    
+                def on_commit(stack=stack):
+                    self._record_coverage(ticker, start_date, end_date)
+                    self._refresh_column_cache(ticker)
+                    if lock is not None:
+                        lock.mark_completed()
+                    stack.close()
+                
+                rows = self.writer.submit(ticker, api_response, on_commit=on_commit, on_error=stack.close)
+                # El hilo de escritura libera el lock al guardar los datos
+                stack = None
+                return rows
+            finally:
+                if stack is not None:
+                    stack.close()
+        
+        result, shared = _single_flight.do(key, fetch_and_store)
+        metrics.inc("service_singleflight_total", role="shared_thread" if shared else role)
+        return result
+
     def get_company_name(self, ticker: str) -> Optional[str]:
         """
         Obtiene el nombre de la compañía para un ticker.
@@ -288,7 +748,12 @@ class TickerService:
             InvalidDataError: Si los datos recibidos no tienen el formato esperado
         """
         try:
-            details = self.api.get_ticker_details(ticker)
+            details = self._call_api(
+                ("reference", ticker),
+                lambda: self.api.get_ticker_details(ticker),
+                Priority.INTERACTIVE,
+                max_wait=COMPANY_NAME_MAX_WAIT
+            )
             if not details or 'results' not in details:
                 raise InvalidDataError(f"Datos inválidos recibidos para el ticker {ticker}")
                 
@@ -380,10 +845,106 @@ class TickerService:
             DatabaseError: Si hay un error al acceder a la base de datos
         """
         try:
+            if self.warm_cache is not None:
+                return self.warm_cache.get("stored_tickers", self.model.get_stored_tickers)
             return self.model.get_stored_tickers()
         except Exception as e:
             raise DatabaseError(f"Error al obtener el resumen de tickers: {str(e)}")
         
+    def list_stored_tickers(self) -> List[str]:
+        """
+        Obtiene los símbolos de los tickers almacenados, ordenados
+        
+        Raises:
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        if self.warm_cache is not None:
+            return self.warm_cache.get("tickers", self.model.list_tickers)
+        return self.model.list_tickers()
+
+    @staticmethod
+    def _range_filters(ticker_prefix: Optional[str],
+                       start_date: Optional[str],
+                       end_date: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        Normaliza y valida los filtros de la consulta de rangos
+
+        Raises:
+            ValueError: Si las fechas son inválidas
+        """
+        ticker_prefix = (ticker_prefix or '').strip().upper() or None
+        for value in (start_date, end_date):
+            if value:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    raise ValueError(f"Formato de fecha inválido: {value} (use YYYY-MM-DD)")
+        if start_date and end_date and start_date > end_date:
+            raise ValueError("La fecha de inicio debe ser anterior o igual a la fecha de fin")
+        return ticker_prefix, start_date or None, end_date or None
+
+    def get_ranges_page(self,
+                        ticker_prefix: Optional[str] = None,
+                        start_date: Optional[str] = None,
+                        end_date: Optional[str] = None,
+                        sort: str = 'created_at',
+                        descending: bool = True,
+                        cursor: Optional[tuple] = None,
+                        page_size: int = 50,
+                        ticker: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Obtiene una página de los rangos almacenados, filtrada y ordenada en la base
+        de datos. Para la página siguiente se pasa el `next` de la anterior como `cursor`.
+        
+        Args:
+            ticker_prefix (str, optional): Prefijo de los tickers a incluir
+            start_date (str, optional): Sólo los rangos que terminan en o después de esta fecha (YYYY-MM-DD)
+            end_date (str, optional): Sólo los rangos que empiezan en o antes de esta fecha (YYYY-MM-DD)
+            sort (str): Columna por la que se ordena: ticker, created_at, start_date o end_date
+            descending (bool): Orden descendente
+            cursor (tuple, optional): Clave devuelta como `next` por la página anterior
+            page_size (int): Filas por página
+            ticker (str, optional): Sólo los rangos de este ticker
+            
+        Returns:
+            Dict[str, Any]: rows (ticker, start_date, end_date, created_at y data_points de
+                            cada rango) y next (cursor de la página siguiente o None)
+            
+        Raises:
+            ValueError: Si los filtros, el orden o el tamaño de página son inválidos
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        if sort not in RANGE_SORTS:
+            raise ValueError(f"Ordenamiento desconocido: {sort}. Use uno de: {', '.join(RANGE_SORTS)}")
+        if not 1 <= page_size <= 1000:
+            raise ValueError("El tamaño de página debe estar entre 1 y 1000")
+        ticker_prefix, start_date, end_date = self._range_filters(ticker_prefix, start_date, end_date)
+        return self.model.query_ranges(
+            ticker, ticker_prefix, start_date, end_date, sort, descending, cursor, page_size
+        )
+
+    def get_ranges_stats(self,
+                         ticker_prefix: Optional[str] = None,
+                         start_date: Optional[str] = None,
+                         end_date: Optional[str] = None,
+                         ticker: Optional[str] = None) -> Dict[str, int]:
+        """
+        Cuenta los rangos, tickers y barras que cumplen los filtros de get_ranges_page
+        
+        Returns:
+            Dict[str, int]: ranges, tickers y bars
+            
+        Raises:
+            ValueError: Si las fechas son inválidas
+            DatabaseError: Si hay un error al acceder a la base de datos
+        """
+        ticker_prefix, start_date, end_date = self._range_filters(ticker_prefix, start_date, end_date)
+        unfiltered = ticker is None and ticker_prefix is None and start_date is None and end_date is None
+        # Sólo el total sin filtros se conserva en la caché en memoria: los filtros son ilimitados
+        if unfiltered and self.warm_cache is not None:
+            return self.warm_cache.get("range_stats", self.model.count_ranges)
+        return self.model.count_ranges(ticker, ticker_prefix, start_date, end_date)
+
     def delete_ticker_data(self, ticker: str) -> None:
         """
         Elimina todos los datos de un ticker específico
@@ -400,6 +961,165 @@ class TickerService:
             raise ValueError(error_msg)
             
         try:
+            # Evitar que una escritura pendiente vuelva a crear los datos eliminados
+            if self.writer is not None:
+                self.writer.flush()
             self.model.delete_ticker_data(ticker)
+            if self.column_cache is not None:
+                self.column_cache.invalidate(ticker)
         except Exception as e:
             raise DatabaseError(f"Error al eliminar los datos del ticker {ticker}: {str(e)}")
+
+    def delete_ticker_range(self, ticker: str, start_date: str, end_date: str) -> int:
+        """
+        Elimina los datos de un ticker en un rango de fechas
+        
+        Args:
+            ticker (str): El ticker cuyos datos se eliminarán
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            
+        Returns:
+            int: Cantidad de barras eliminadas
+            
+        Raises:
+            ValueError: Si el ticker o las fechas son inválidos
+            DatabaseError: Si hay un error al eliminar los datos
+        """
+        is_valid, error_msg = self.validate_ticker(ticker)
+        if not is_valid:
+            raise ValueError(error_msg)
+            
+        if start_date > end_date:
+            raise ValueError("La fecha de inicio debe ser anterior o igual a la fecha de fin")
+            
+        try:
+            if self.writer is not None:
+                self.writer.flush()
+            deleted = self.model.delete_range(ticker, start_date, end_date)
+            self._refresh_column_cache(ticker)
+            return deleted
+        except Exception as e:
+            raise DatabaseError(f"Error al eliminar el rango del ticker {ticker}: {str(e)}")
+
+    def refetch_range(self,
+                      ticker: str,
+                      start_date: str,
+                      end_date: str,
+                      priority: Priority = Priority.BACKFILL) -> int:
+        """
+        Vuelve a descargar un rango de la API y reemplaza las barras almacenadas en él,
+        incluidas las que la API ya no devuelve (ej: barras con la fecha corrida). Lo
+        almacenado sólo se elimina después de obtener y validar la respuesta, en la
+        misma transacción en que se guarda la nueva (ver replace_range).
+        
+        Args:
+            ticker (str): El ticker a descargar
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            priority (Priority): Prioridad del request en la cola de la API
+            
+        Returns:
+            int: Cantidad de barras recibidas de la API (0 si no devolvió datos y no se modificó nada)
+            
+        Raises:
+            ValueError: Si el ticker o las fechas son inválidos
+            APIError: Si hay error al obtener datos de la API
+            DatabaseError: Si hay un error al reemplazar los datos
+        """
+        is_valid, error_msg = self.validate_ticker(ticker)
+        if not is_valid:
+            raise ValueError(error_msg)
+        is_valid, error_msg = validate_dates(start_date, end_date)
+        if not is_valid:
+            raise ValueError(error_msg)
+        
+        api_response = self._call_api(
+            ("aggs", ticker, start_date, end_date),
+            lambda: self.api.get_stock_data(ticker, start_date, end_date, adjusted=self._api_adjusted()),
+            priority
+        )
+        results = (api_response or {}).get('results') or []
+        # Sin respuesta (ej: fuera del histórico del plan) se conserva lo almacenado
+        if not results:
+            return 0
+        
+        try:
+            if self.writer is not None:
+                self.writer.flush()
+            self.model.replace_range(ticker, start_date, end_date, api_response)
+            self._refresh_column_cache(ticker)
+        except Exception as e:
+            raise DatabaseError(f"Error al reemplazar el rango del ticker {ticker}: {str(e)}")
+        return len(results)
+
+    def refresh_corporate_actions(self,
+                                  ticker: str,
+                                  priority: Priority = Priority.BACKFILL) -> Dict[str, int]:
+        """
+        Descarga los splits y dividendos del ticker y los guarda. Si cambiaron, el
+        almacenamiento recalcula las columnas ajustadas de ese ticker (y sólo de él).
+        
+        Args:
+            ticker (str): El ticker a actualizar
+            priority (Priority): Prioridad de los requests en la cola de la API
+            
+        Returns:
+            Dict[str, int]: splits y dividends recibidos, y changed (acciones nuevas,
+            modificadas o eliminadas; 0 si no hubo que recalcular nada)
+            
+        Raises:
+            ValueError: Si el ticker es inválido
+            APIError: Si hay error al obtener datos de la API
+            DatabaseError: Si el backend no guarda acciones corporativas o falla al guardarlas
+        """
+        is_valid, error_msg = self.validate_ticker(ticker)
+        if not is_valid:
+            raise ValueError(error_msg)
+        if not self.model.supports_adjusted:
+            raise DatabaseError(
+                f"El backend de almacenamiento {type(self.model).__name__} no guarda splits ni dividendos"
+            )
+        
+        splits = self._call_api(("splits", ticker), lambda: self.api.get_splits(ticker), priority)
+        dividends = self._call_api(("dividends", ticker), lambda: self.api.get_dividends(ticker), priority)
+        changed = self.model.save_corporate_actions(ticker, splits, dividends)
+        if changed:
+            # La caché de columnas guarda los precios ajustados recalculados
+            self._refresh_column_cache(ticker)
+        return {'splits': len(splits), 'dividends': len(dividends), 'changed': changed}
+
+    def get_adjusted_data(self, ticker: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """
+        Lee un rango del almacenamiento local con los precios ajustados por splits y
+        dividendos. Las columnas ajustadas están materializadas, así que la lectura
+        cuesta lo mismo que la de los precios sin ajustar.
+        
+        Args:
+            ticker (str): El ticker a consultar
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+            
+        Returns:
+            Optional[pd.DataFrame]: DataFrame indexado por fecha con las columnas de
+            BAR_COLUMNS (ajustadas) o None si no hay datos
+            
+        Raises:
+            ValueError: Si el ticker o las fechas son inválidos
+            DatabaseError: Si el backend no materializa precios ajustados o hay error al leer
+        """
+        is_valid, error_msg = self.validate_ticker(ticker)
+        if not is_valid:
+            raise ValueError(error_msg)
+        is_valid, error_msg = validate_dates(start_date, end_date)
+        if not is_valid:
+            raise ValueError(error_msg)
+        if not self.model.supports_adjusted:
+            raise DatabaseError(
+                f"El backend de almacenamiento {type(self.model).__name__} no guarda precios ajustados"
+            )
+            
+        df = self._read_stored_frame(ticker, start_date, end_date, adjusted=True)
+        if df is not None:
+            df.name = ticker
+        return df
@@ -0,0 +1,274 @@
+import atexit
+import logging
+import multiprocessing.util
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from src.models.column_cache import column_cache_for
+from src.models.storage import TickerStorage, payload_to_rows
+from src.models.warm_cache import get_warm_cache
+from src.utils import metrics
+from src.utils.exceptions import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# Respuestas pendientes de guardar como máximo; 0 guarda de forma sincrónica
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "64") or 0)
+# Respuestas máximas por transacción
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "32") or 32)
+# Segundos máximos que se esperan las escrituras pendientes antes de bifurcar el proceso
+WRITE_BEHIND_FORK_TIMEOUT = float(os.getenv("WRITE_BEHIND_FORK_TIMEOUT", "5") or 0)
+# Segundos máximos que se esperan las escrituras pendientes al terminar el proceso
+WRITE_BEHIND_EXIT_TIMEOUT = float(os.getenv("WRITE_BEHIND_EXIT_TIMEOUT", "10") or 0)
+
+
+class _WriteRequest:
+    __slots__ = ('ticker', 'data', 'rows', 'on_commit', 'on_error')
+
+    def __init__(self, ticker: str, data: Dict[str, Any], rows: List[Dict[str, Any]],
+                 on_commit: Optional[Callable[[], None]], on_error: Optional[Callable[[], None]]):
+        self.ticker = ticker
+        self.data = data
+        self.rows = rows
+        self.on_commit = on_commit
+        self.on_error = on_error
+
+
+class WriteBehindQueue:
+    """
+    Escritura diferida de respuestas de la API. Un hilo de fondo toma las respuestas
+    de una cola acotada y guarda varias en una única transacción, de modo que quien
+    consulta no espera el commit. Mientras una respuesta no se guardó, sus filas se
+    pueden leer con `pending_rows` para combinarlas con las del almacenamiento.
+    """
+    def __init__(self, storage: TickerStorage,
+                 max_pending: int = WRITE_BEHIND_MAX_PENDING,
+                 batch_size: int = WRITE_BEHIND_BATCH_SIZE):
+        """
+        Args:
+            storage (TickerStorage): Almacenamiento destino
+            max_pending (int): Tamaño de la cola; al llenarse, `submit` bloquea
+            batch_size (int): Respuestas máximas por transacción
+        """
+        self.storage = storage
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[_WriteRequest]" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[_WriteRequest]] = {}
+        self._worker: Optional[threading.Thread] = None
+
+    def submit(self,
+               ticker: str,
+               data: Dict[str, Any],
+               on_commit: Optional[Callable[[], None]] = None,
+               on_error: Optional[Callable[[], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Encola una respuesta de la API para guardarla en segundo plano
+
+        Args:
+            ticker (str): Símbolo del ticker
+            data (Dict[str, Any]): Respuesta de la API de agregados
+            on_commit (Callable[[], None], optional): Se llama desde el hilo de escritura al guardarla
+            on_error (Callable[[], None], optional): Se llama si no se pudo guardar
+
+        Returns:
+            List[Dict[str, Any]]: Filas de la respuesta, en el formato de get_ticker_data
+
+        Raises:
+            InvalidDataError: Si los datos son inválidos o están vacíos
+            DataValidationError: Si a algún resultado le faltan campos requeridos
+        """
+        request = _WriteRequest(ticker, data, payload_to_rows(ticker, data), on_commit, on_error)
+        with self._lock:
+            self._pending.setdefault(ticker, []).append(request)
+            self._ensure_worker()
+        # Si la cola está llena se espera: el límite acota la memoria retenida
+        self._queue.put(request)
+        metrics.inc("write_behind_total", outcome="queued")
+        return request.rows
+
+    def pending_rows(self, ticker: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """
+        Obtiene las filas todavía no guardadas del ticker en el rango
+
+        Args:
+            ticker (str): Símbolo del ticker
+            start_date (str): Fecha de inicio en formato YYYY-MM-DD
+            end_date (str): Fecha de fin en formato YYYY-MM-DD
+
+        Returns:
+            List[Dict[str, Any]]: Filas pendientes (vacía si no hay)
+        """
+        with self._lock:
+            requests = list(self._pending.get(ticker, ()))
+        return [
+            row for request in requests for row in request.rows
+            if start_date <= row['date'] <= end_date
+        ]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que se guarden todas las respuestas encoladas
+
+        Args:
+            timeout (float, optional): Segundos máximos de espera
+
+        Returns:
+            bool: True si la cola quedó vacía
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[_WriteRequest]) -> None:
+        start = time.perf_counter()
+        try:
+            self.storage.save_many([(r.ticker, r.data) for r in batch])
+            done, failed = batch, []
+        except Exception as e:
+            # Se reintenta de a una para que una respuesta inválida no descarte al resto
+            logger.warning("Error al guardar un lote de %d respuestas: %s", len(batch), e)
+            metrics.inc("write_behind_batches_failed_total")
+            done, failed = [], []
+            for request in batch:
+                try:
+                    self.storage.save_ticker_data(request.ticker, request.data)
+                    done.append(request)
+                except Exception as e:
+                    logger.error("No se pudieron guardar los datos de %s: %s", request.ticker, e)
+                    failed.append(request)
+        metrics.observe("write_behind_batch_seconds", time.perf_counter() - start)
+        if failed:
+            self._discard_cached({request.ticker for request in failed})
+
+        with self._lock:
+            for request in batch:
+                pending = self._pending.get(request.ticker, [])
+                if request in pending:
+                    pending.remove(request)
+                if not pending:
+                    self._pending.pop(request.ticker, None)
+
+        for request, callback, outcome in (
+            [(r, r.on_commit, "committed") for r in done] + [(r, r.on_error, "failed") for r in failed]
+        ):
+            metrics.inc("write_behind_total", outcome=outcome)
+            if callback:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error("Error en la notificación de escritura de %s: %s", request.ticker, e)
+
+    def _discard_cached(self, tickers: Set[str]) -> None:
+        """
+        Descarta las cachés de los tickers cuyas respuestas no se guardaron: la próxima
+        lectura vuelve al almacenamiento y, sin la cobertura registrada, pide el rango a la API
+        """
+        warm_cache = get_warm_cache(self.storage)
+        column_cache = column_cache_for(self.storage)
+        for ticker in tickers:
+            if warm_cache is not None:
+                warm_cache.discard(ticker)
+            if column_cache is not None:
+                try:
+                    column_cache.invalidate(ticker)
+                except DatabaseError as e:
+                    logger.error("No se pudo invalidar la caché de columnas de %s: %s", ticker, e)
+
+    def close(self, timeout: float = WRITE_BEHIND_EXIT_TIMEOUT) -> None:
+        """
+        Espera las escrituras pendientes al terminar el proceso, como máximo `timeout`
+        segundos: una escritura bloqueada (ej: la base tomada por otro proceso) no debe
+        impedir que el proceso termine
+        """
+        if not self.flush(timeout):
+            logger.warning(
+                "El proceso termina con escrituras pendientes en %s (espera máxima de %g s)",
+                self.storage.location, timeout
+            )
+
+
+_writers: Dict[str, WriteBehindQueue] = {}
+_writers_lock = threading.Lock()
+
+
+def _flush_before_fork() -> None:
+    """
+    Espera a que terminen las escrituras en curso: si el proceso se bifurca mientras
+    el hilo de escritura está dentro de SQLite, el hijo hereda sus locks tomados.
+    La espera se limita a WRITE_BEHIND_FORK_TIMEOUT segundos en total, para que una
+    escritura bloqueada (ej: la base tomada por otro proceso) no cuelgue el fork.
+    """
+    deadline = time.monotonic() + WRITE_BEHIND_FORK_TIMEOUT
+    for writer in list(_writers.values()):
+        if not writer.flush(max(0.0, deadline - time.monotonic())):
+            logger.warning(
+                "Se bifurca el proceso con escrituras pendientes en %s (espera máxima de %g s)",
+                writer.storage.location, WRITE_BEHIND_FORK_TIMEOUT
+            )
+
+
+def _reset_after_fork() -> None:
+    """
+    Un proceso hijo no hereda el hilo de escritura: las colas del padre quedan
+    en un estado inconsistente, así que el hijo crea las suyas
+    """
+    global _writers_lock
+    _writers.clear()
+    _writers_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_flush_before_fork, after_in_child=_reset_after_fork)
+
+
+def get_writer(storage: TickerStorage) -> Optional[WriteBehindQueue]:
+    """
+    Obtiene la cola de escritura diferida del almacenamiento, compartida por todas
+    las sesiones del proceso. Las respuestas pendientes se guardan al terminar el proceso.
+
+    Args:
+        storage (TickerStorage): Almacenamiento destino
+
+    Returns:
+        Optional[WriteBehindQueue]: Cola de escritura o None si WRITE_BEHIND_MAX_PENDING es 0
+    """
+    if WRITE_BEHIND_MAX_PENDING <= 0:
+        return None
+    key = os.path.abspath(storage.location)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = WriteBehindQueue(storage)
+            _writers[key] = writer
+            atexit.register(writer.close)
+            # Los procesos de multiprocessing terminan con os._exit y no ejecutan atexit
+            multiprocessing.util.Finalize(writer, writer.close, exitpriority=10)
+        return writer
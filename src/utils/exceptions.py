@@ -30,6 +30,14 @@ class APIConnectionError(APIError):
     """Raised when unable to connect to the API"""
     pass
 
+class APICircuitOpenError(APIConnectionError):
+    """Raised when the API is skipped because its circuit breaker is open"""
+    pass
+
+class APIQueueTimeoutError(APIError):
+    """Raised when a queued API request cannot run before its deadline"""
+    pass
+
 class DataValidationError(TickerBaseException):
     """Raised when data validation fails"""
     pass
@@ -0,0 +1,326 @@
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+
+# Buckets de latencia (en segundos) usados por todos los histogramas
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Descripciones de las métricas conocidas para el formato Prometheus
+METRIC_HELP = {
+    'api_requests_total': 'Cantidad de requests a la API de Polygon.io',
+    'api_request_duration_seconds': 'Latencia de los requests a la API de Polygon.io',
+    'api_response_bytes_total': 'Bytes recibidos desde la API de Polygon.io',
+    'api_dispatch_total': 'Requests de la cola de la API por resultado (executed, deduplicated, expired, rejected, cancelled)',
+    'api_retries_total': 'Requests reencolados tras un error 429 de la API',
+    'api_circuit_transitions_total': 'Cambios de estado del circuit breaker de cada endpoint (open, half_open, closed)',
+    'api_circuit_rejected_total': 'Requests rechazados sin llamar a la API por tener el circuito abierto',
+    'db_query_duration_seconds': 'Duración de las operaciones de TickerModel',
+    'db_rows_total': 'Filas leídas o escritas por TickerModel',
+    'db_reclaimed_bytes_total': 'Bytes devueltos al sistema por incremental_vacuum',
+    'service_requests_total': 'Consultas de TickerService por origen de los datos',
+    'service_cache_total': 'Consultas de TickerService resueltas (hit) o no (miss) desde la base local',
+    'service_request_duration_seconds': 'Duración de TickerService.get_ticker_data',
+    'service_partial_total': 'Consultas respondidas con datos locales parciales porque la API no estaba disponible',
+    'service_singleflight_total': 'Fetches de rangos faltantes ejecutados (leader) o compartidos con otro hilo o proceso',
+    'write_behind_total': 'Respuestas de la API encoladas, guardadas o descartadas por la escritura diferida',
+    'write_behind_batch_seconds': 'Duración de cada transacción de la escritura diferida',
+    'write_behind_batches_failed_total': 'Transacciones de la escritura diferida que fallaron y se reintentaron de a una respuesta',
+    'intraday_bars_total': 'Barras de un minuto descargadas por la ingesta intradiaria',
+    'stream_ticks_total': 'Ticks recibidos por el feed de cotizaciones en vivo',
+    'stream_reconnects_total': 'Reconexiones del feed de cotizaciones en vivo',
+    'portfolio_cache_total': 'Valuaciones de carteras servidas desde memoria (hit), extendidas con días nuevos (incremental) o completas (full)',
+    'screener_duration_seconds': 'Duración de cada ejecución de un filtro sobre el universo almacenado',
+    'prefetch_total': 'Precargas de rangos anteriores y tickers relacionados por resultado (scheduled, fetched, empty, cancelled, skipped, error, hit)',
+    'quality_scan_duration_seconds': 'Duración de cada análisis de calidad de las barras almacenadas',
+    'quality_issues_total': 'Hallazgos del análisis de calidad por regla',
+    'column_cache_total': 'Lecturas servidas (hit) o no (miss) desde la caché de columnas',
+    'column_cache_rebuilds_total': 'Reconstrucciones de archivos de la caché de columnas',
+    'warm_cache_total': 'Lecturas servidas desde la caché en memoria (hit), desde su instantánea (snapshot) o desde el almacenamiento (miss)',
+    'warm_cache_snapshot_total': 'Instantáneas de la caché en memoria guardadas, cargadas o descartadas (stale, invalid)',
+    'warm_cache_snapshot_seconds': 'Duración de cada escritura de la instantánea de la caché en memoria',
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class _Histogram:
+    """
+    Histograma acumulativo con buckets fijos
+    """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """
+    Registro en memoria de contadores e histogramas, exportable en formato Prometheus.
+    Cuando está deshabilitado, todas las operaciones retornan inmediatamente.
+    """
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+
+    @staticmethod
+    def _key(labels: Dict[str, Any]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Incrementa un contador
+
+        Args:
+            name (str): Nombre de la métrica
+            value (float): Valor a sumar
+            **labels: Etiquetas de la serie
+        """
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Registra una observación en un histograma
+
+        Args:
+            name (str): Nombre de la métrica
+            value (float): Valor observado (en segundos para latencias)
+            **labels: Etiquetas de la serie
+        """
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(DEFAULT_BUCKETS)
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        """
+        Elimina todas las series registradas
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene una vista tabular de las métricas registradas
+
+        Returns:
+            List[Dict[str, Any]]: Una fila por serie con nombre, etiquetas, cantidad, suma y promedio
+        """
+        rows = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                for key, value in sorted(series.items()):
+                    rows.append({
+                        'metric': name,
+                        'labels': ', '.join(f"{k}={v}" for k, v in key),
+                        'count': value,
+                        'sum': None,
+                        'avg': None
+                    })
+            for name, series in sorted(self._histograms.items()):
+                for key, histogram in sorted(series.items()):
+                    rows.append({
+                        'metric': name,
+                        'labels': ', '.join(f"{k}={v}" for k, v in key),
+                        'count': histogram.count,
+                        'sum': histogram.sum,
+                        'avg': histogram.sum / histogram.count if histogram.count else None
+                    })
+        return rows
+
+    def render_prometheus(self) -> str:
+        """
+        Serializa las métricas en el formato de texto de Prometheus (version 0.0.4)
+
+        Returns:
+            str: Texto listo para ser expuesto en un endpoint /metrics
+        """
+        def fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+            pairs = list(key) + ([extra] if extra else [])
+            if not pairs:
+                return ''
+            escaped = (f'{k}="{_escape_label(v)}"' for k, v in pairs)
+            return '{' + ','.join(escaped) + '}'
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{fmt_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{fmt_labels(key, ('le', f'{bound:g}'))} {count}")
+                    lines.append(f"{name}_bucket{fmt_labels(key, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{fmt_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{fmt_labels(key)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+
+class _NullTimer:
+    """
+    Temporizador vacío que se usa cuando las métricas están deshabilitadas
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Timer:
+    """
+    Mide la duración de un bloque y la registra en un histograma.
+    Si el bloque termina con una excepción se agrega la etiqueta outcome=error.
+    """
+    __slots__ = ('name', 'labels', 'start')
+
+    def __init__(self, name: str, labels: Dict[str, Any]):
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.labels.setdefault('outcome', 'error')
+        registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+# Registro global del proceso. Se habilita con METRICS_ENABLED=1
+registry = MetricsRegistry(enabled=_env_flag("METRICS_ENABLED"))
+
+_exporter: Optional[ThreadingHTTPServer] = None
+_exporter_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return registry.enabled
+
+
+def set_enabled(enabled: bool) -> None:
+    registry.enabled = enabled
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    if registry.enabled:
+        registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    if registry.enabled:
+        registry.observe(name, value, **labels)
+
+
+def timer(name: str, **labels):
+    """
+    Context manager que registra la duración del bloque en el histograma `name`.
+    Si las métricas están deshabilitadas retorna un objeto vacío sin costo de medición.
+    """
+    if not registry.enabled:
+        return _NULL_TIMER
+    return _Timer(name, labels)
+
+
+def timed(name: str, **labels):
+    """
+    Decorador que registra la duración de cada llamada en el histograma `name`.
+    Si las métricas están deshabilitadas llama directamente a la función.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            with _Timer(name, dict(labels)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render_prometheus() -> str:
+    return registry.render_prometheus()
+
+
+def start_http_exporter(port: int, host: str = "0.0.0.0") -> bool:
+    """
+    Expone las métricas en http://host:port/metrics desde un hilo en segundo plano.
+    Es idempotente: si el exportador ya está corriendo no hace nada.
+
+    Args:
+        port (int): Puerto en el que escuchar
+        host (str): Interfaz en la que escuchar
+
+    Returns:
+        bool: True si el exportador quedó iniciado (o ya lo estaba)
+    """
+    global _exporter
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with _exporter_lock:
+        if _exporter is not None:
+            return True
+        try:
+            _exporter = ThreadingHTTPServer((host, port), _Handler)
+        except OSError:
+            return False
+        thread = threading.Thread(target=_exporter.serve_forever, name="metrics-exporter", daemon=True)
+        thread.start()
+        return True
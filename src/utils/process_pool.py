@@ -0,0 +1,63 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+
+# Los procesos del pool no se crean con fork: el proceso principal tiene hilos (la cola
+# de la API, las precargas, Streamlit) y un hijo creado con fork podría heredar sus
+# locks tomados. forkserver crea los procesos a partir de un servidor sin hilos.
+_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+# Pools compartidos por todo el proceso, por cantidad de procesos
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Obtiene el pool de procesos de `workers` procesos compartido por todo el proceso
+    (análisis de calidad, filtros). Se crea la primera vez que se pide y se cierra al
+    terminar el intérprete.
+
+    Args:
+        workers (int): Cantidad de procesos del pool
+
+    Returns:
+        ProcessPoolExecutor: Pool de procesos
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=_CONTEXT)
+            _pools[workers] = pool
+        return pool
+
+
+def shutdown_pools() -> None:
+    """
+    Cierra los pools creados: descarta las tareas en cola y espera las que están en curso
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _reset_after_fork() -> None:
+    """
+    Un proceso hijo no hereda los procesos del pool del padre: crea los suyos
+    """
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+atexit.register(shutdown_pools)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,224 @@
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Sequence
+
+# Configuración por variables de entorno
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "").strip().lower() in ("1", "true", "yes", "on")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("data", "profiles"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0") or 0)
+
+SLOW_QUERY_LOG = "slow_queries.log"
+
+# cProfile no admite dos perfiladores activos a la vez en el mismo intérprete
+_profile_lock = threading.Lock()
+
+_slow_logger: Optional[logging.Logger] = None
+_slow_logger_lock = threading.Lock()
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_') or 'profile'
+
+
+@contextmanager
+def profile(name: str):
+    """
+    Perfila el bloque con cProfile y guarda el resultado en PROFILE_DIR/<fecha>_<name>.prof.
+    No hace nada si PROFILE_ENABLED no está activo o si ya hay otro perfil en curso.
+
+    Args:
+        name (str): Nombre descriptivo del bloque (ej: la página o el comando)
+    """
+    if not PROFILE_ENABLED or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{_slug(name)}.prof"
+        profiler.dump_stats(os.path.join(PROFILE_DIR, filename))
+    finally:
+        _profile_lock.release()
+
+
+def profiled(name: Optional[str] = None):
+    """
+    Decorador equivalente a `profile` para funciones completas (ej: comandos de consola)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """
+    Lista los perfiles guardados en PROFILE_DIR, del más reciente al más antiguo
+
+    Returns:
+        List[Dict[str, Any]]: Nombre, ruta, tamaño y fecha de cada perfil
+    """
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.is_file() and entry.name.endswith('.prof'):
+            stat = entry.stat()
+            profiles.append({
+                'name': entry.name,
+                'path': entry.path,
+                'size_kb': round(stat.st_size / 1024, 1),
+                'created_at': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+            })
+    return sorted(profiles, key=lambda p: p['name'], reverse=True)
+
+
+def summarize_profile(path: str, limit: int = 25, sort: str = 'cumulative') -> str:
+    """
+    Genera el resumen de texto de pstats para un perfil guardado
+
+    Args:
+        path (str): Ruta al archivo .prof
+        limit (int): Cantidad de funciones a mostrar
+        sort (str): Criterio de orden de pstats (cumulative, tottime, ...)
+
+    Returns:
+        str: Tabla de pstats
+    """
+    buffer = io.StringIO()
+    stats = pstats.Stats(path, stream=buffer)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return buffer.getvalue()
+
+
+def _get_slow_logger() -> logging.Logger:
+    global _slow_logger
+    with _slow_logger_lock:
+        if _slow_logger is None:
+            logger = logging.getLogger("tickers.slow_query")
+            logger.setLevel(logging.WARNING)
+            try:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                handler = logging.FileHandler(os.path.join(PROFILE_DIR, SLOW_QUERY_LOG), encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+                logger.addHandler(handler)
+            except OSError:
+                pass
+            _slow_logger = logger
+        return _slow_logger
+
+
+def slow_query_enabled() -> bool:
+    return SLOW_QUERY_MS > 0
+
+
+def log_slow_query(conn: sqlite3.Connection, sql: str, params: Sequence[Any], elapsed_ms: float) -> None:
+    """
+    Registra una sentencia que superó SLOW_QUERY_MS junto con su EXPLAIN QUERY PLAN
+
+    Args:
+        conn (sqlite3.Connection): Conexión en la que se ejecutó la sentencia
+        sql (str): Sentencia SQL
+        params (Sequence[Any]): Parámetros usados
+        elapsed_ms (float): Duración en milisegundos
+    """
+    statement = ' '.join(sql.split())
+    try:
+        plan_rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", tuple(params)).fetchall()
+        # Cada fila es (id, parent, notused, detail); se indenta según la profundidad
+        depth = {0: 0}
+        lines = []
+        for row in plan_rows:
+            depth[row[0]] = depth.get(row[1], 0) + 1
+            lines.append(f"{'  ' * (depth[row[0]] + 1)}{row[-1]}")
+        plan = '\n'.join(lines)
+    except sqlite3.Error as e:
+        plan = f"    (no se pudo obtener el plan: {e})"
+    _get_slow_logger().warning(
+        f"consulta lenta ({elapsed_ms:.1f} ms): {statement} params={tuple(params)!r}\n{plan}"
+    )
+
+
+def execute(cursor: sqlite3.Cursor, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+    """
+    Ejecuta una sentencia de escritura y la registra si supera SLOW_QUERY_MS.
+    Con el registro deshabilitado equivale a cursor.execute.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor sobre el que ejecutar
+        sql (str): Sentencia SQL
+        params (Sequence[Any]): Parámetros de la sentencia
+
+    Returns:
+        sqlite3.Cursor: El mismo cursor
+    """
+    if SLOW_QUERY_MS <= 0:
+        return cursor.execute(sql, params)
+
+    start = time.perf_counter()
+    cursor.execute(sql, params)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if elapsed_ms >= SLOW_QUERY_MS:
+        log_slow_query(cursor.connection, sql, params, elapsed_ms)
+    return cursor
+
+
+def fetchall(cursor: sqlite3.Cursor, sql: str, params: Sequence[Any] = ()) -> List[Any]:
+    """
+    Ejecuta una consulta y obtiene todas sus filas, registrándola si supera SLOW_QUERY_MS.
+    Se mide también la lectura de las filas, donde SQLite hace la mayor parte del trabajo.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor sobre el que ejecutar
+        sql (str): Consulta SQL
+        params (Sequence[Any]): Parámetros de la consulta
+
+    Returns:
+        List[Any]: Filas obtenidas
+    """
+    if SLOW_QUERY_MS <= 0:
+        return cursor.execute(sql, params).fetchall()
+
+    start = time.perf_counter()
+    rows = cursor.execute(sql, params).fetchall()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if elapsed_ms >= SLOW_QUERY_MS:
+        log_slow_query(cursor.connection, sql, params, elapsed_ms)
+    return rows
+
+
+def read_slow_queries(max_lines: int = 200) -> str:
+    """
+    Obtiene las últimas líneas del registro de consultas lentas
+
+    Args:
+        max_lines (int): Cantidad máxima de líneas
+
+    Returns:
+        str: Contenido del registro o cadena vacía si no existe
+    """
+    path = os.path.join(PROFILE_DIR, SLOW_QUERY_LOG)
+    if not os.path.exists(path):
+        return ''
+    with open(path, encoding='utf-8') as f:
+        lines = f.readlines()
+    return ''.join(lines[-max_lines:])
@@ -7,7 +7,8 @@ parent_dir = os.path.join(current_dir, '..')
 sys.path.extend([parent_dir, current_dir])
 
 # Import views
-from views import home_view, historical_view, maintenance_view
+from views import home_view, comparison_view, screener_view, live_view, historical_view, maintenance_view
+from src.utils import metrics, profiling
 
 # Configuración de la página
 st.set_page_config(
@@ -26,9 +27,16 @@ def main():
     Punto de entrada principal de la aplicación Streamlit.
     Maneja la navegación entre páginas y la configuración global.
     """
+    # Exponer las métricas para Prometheus si se configuró un puerto
+    if metrics.is_enabled() and os.getenv("METRICS_PORT"):
+        metrics.start_http_exporter(int(os.getenv("METRICS_PORT")))
+    
     # Definir las páginas disponibles con sus íconos
     pages = {
         "🏠 Inicio": home_view.show,
+        "📊 Comparar": comparison_view.show,
+        "🔎 Filtros": screener_view.show,
+        "📡 En Vivo": live_view.show,
         "📚 Historial": historical_view.show,
         "🔧 Mantenimiento": maintenance_view.show
     }
@@ -61,8 +69,9 @@ def main():
         Trabajo Práctico Final ITBA
         """)
     
-    # Renderizar la página seleccionada
-    pages[page]()
+    # Renderizar la página seleccionada (perfilada si PROFILE_ENABLED está activo)
+    with profiling.profile(f"streamlit_{page}"):
+        pages[page]()
 
 if __name__ == "__main__":
     main()
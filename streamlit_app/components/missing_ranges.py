@@ -0,0 +1,29 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from typing import List, Tuple
+
+def render_missing_ranges(missing_ranges: List[Tuple[str, str, int]], missing_days: int, message: str):
+    """
+    Muestra un resumen desplegable de los tramos de días hábiles sin datos, en lugar
+    de listar cada fecha faltante.
+    
+    Args:
+        missing_ranges (List[Tuple[str, str, int]]): Tramos (inicio, fin, días hábiles) en formato YYYY-MM-DD
+        missing_days (int): Cantidad total de días hábiles sin datos
+        message (str): Texto inicial del resumen
+    """
+    if not missing_ranges:
+        return
+    
+    tramos = "1 tramo" if len(missing_ranges) == 1 else f"{len(missing_ranges)} tramos"
+    dias = "1 día hábil" if missing_days == 1 else f"{missing_days:,} días hábiles"
+    with st.expander(f"⚠️ {message}: {dias} en {tramos}"):
+        formato = lambda d: datetime.strptime(d, '%Y-%m-%d').strftime('%d/%m/%Y')
+        st.dataframe(
+            pd.DataFrame(
+                [(formato(start), formato(end), days) for start, end, days in missing_ranges],
+                columns=['Desde', 'Hasta', 'Días hábiles']
+            ),
+            hide_index=True
+        )
@@ -0,0 +1,140 @@
+import re
+import time
+import uuid
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.graph_objects as go
+from streamlit_app.components.date_selector import render_date_selector
+from src.services.ticker_service import TickerService
+
+# Tickers máximos por comparación
+MAX_COMPARE_TICKERS = 20
+
+def parse_tickers(text):
+    """
+    Separa la lista ingresada (comas o espacios) en tickers en mayúsculas, sin repetidos
+    """
+    tickers = []
+    for ticker in re.split(r"[,\s;]+", text.upper()):
+        if ticker and ticker not in tickers:
+            tickers.append(ticker)
+    return tickers
+
+def summarize_series(df):
+    """
+    Calcula las métricas de la tabla comparativa para un ticker
+    """
+    close = df['close'].dropna()
+    returns = close.pct_change().dropna()
+    drawdown = close / close.cummax() - 1
+    return {
+        'Precio Inicial': close.iloc[0],
+        'Precio Final': close.iloc[-1],
+        'Rendimiento %': (close.iloc[-1] / close.iloc[0] - 1) * 100,
+        'Volatilidad Anual %': returns.std() * np.sqrt(252) * 100 if len(returns) > 1 else None,
+        'Caída Máxima %': drawdown.min() * 100,
+        'Días': len(close),
+    }
+
+def plot_comparison(fig, ticker, df):
+    """
+    Agrega la serie del ticker al gráfico, normalizada a 100 en la primera fecha
+    """
+    close = df['close'].dropna()
+    fig.add_trace(go.Scatter(
+        x=close.index,
+        y=close / close.iloc[0] * 100,
+        mode="lines",
+        name=ticker
+    ))
+
+def show():
+    """
+    Renderiza la página de comparación de varios tickers.
+    """
+    st.title("📊 Comparar Tickers")
+
+    # La sesión agrupa las consultas del usuario en el registro que usan las precargas
+    service = TickerService(session_id=st.session_state.setdefault("session_id", uuid.uuid4().hex))
+
+    st.markdown(f"""
+    Ingrese hasta {MAX_COMPARE_TICKERS} tickers separados por coma. Cada serie se dibuja apenas
+    termina de cargarse, normalizada a 100 al inicio del período.
+    """)
+
+    text = st.text_input("Tickers (ejemplo: AAPL, MSFT, GOOGL)", key="compare_tickers")
+    fecha_inicio, fecha_fin = render_date_selector()
+
+    if not st.button("Comparar", type="primary"):
+        return
+
+    tickers = parse_tickers(text)
+    if not tickers:
+        st.warning("⚠️ Por favor, ingrese al menos un ticker.")
+        return
+    if len(tickers) > MAX_COMPARE_TICKERS:
+        st.warning(f"⚠️ Se pueden comparar hasta {MAX_COMPARE_TICKERS} tickers a la vez.")
+        return
+    if not fecha_inicio or not fecha_fin:
+        st.warning("⚠️ Por favor, seleccione fechas válidas.")
+        return
+
+    invalid = {}
+    for ticker in tickers:
+        is_valid, error_msg = service.validate_ticker(ticker)
+        if not is_valid:
+            invalid[ticker] = error_msg
+    for error_msg in invalid.values():
+        st.error(f"⚠️ {error_msg}")
+    tickers = [t for t in tickers if t not in invalid]
+    if not tickers:
+        return
+
+    progress = st.progress(0.0, text=f"Cargando {len(tickers)} tickers...")
+    chart = st.empty()
+    table = st.empty()
+
+    fig = go.Figure()
+    fig.update_layout(
+        title="Evolución relativa (base 100)",
+        yaxis_title="Valor (inicio = 100)",
+        xaxis_title="Fecha",
+        template="plotly_dark"
+    )
+    summary = {}
+    problems = []
+    start = time.perf_counter()
+
+    for done, (ticker, result, error) in enumerate(
+        service.iter_tickers_data(tickers, fecha_inicio, fecha_fin, adjusted=True), start=1
+    ):
+        if error is not None:
+            # Con datos parciales se muestra igual lo disponible; el resto se informa al final
+            problems.append(f"{ticker}: {error}")
+        elif result is None or result['data'].dropna(subset=['close']).empty:
+            problems.append(f"{ticker}: no hay datos para el período seleccionado")
+        else:
+            df = result['data']
+            plot_comparison(fig, ticker, df)
+            summary[ticker] = {**summarize_series(df), 'Origen': result['source']}
+            if result.get('partial'):
+                problems.append(f"{ticker}: datos almacenados sin actualizar ({result['api_error']})")
+            chart.plotly_chart(fig, use_container_width=True)
+            table.dataframe(
+                pd.DataFrame.from_dict(summary, orient='index').sort_values('Rendimiento %', ascending=False),
+                column_config={
+                    "Precio Inicial": st.column_config.NumberColumn(format="$%.2f"),
+                    "Precio Final": st.column_config.NumberColumn(format="$%.2f"),
+                    "Rendimiento %": st.column_config.NumberColumn(format="%.2f%%"),
+                    "Volatilidad Anual %": st.column_config.NumberColumn(format="%.2f%%"),
+                    "Caída Máxima %": st.column_config.NumberColumn(format="%.2f%%"),
+                }
+            )
+        progress.progress(done / len(tickers), text=f"{done} de {len(tickers)} tickers cargados")
+
+    progress.empty()
+    if summary:
+        st.success(f"✅ {len(summary)} tickers cargados en {time.perf_counter() - start:.1f} segundos")
+    for problem in problems:
+        st.warning(f"⚠️ {problem}")
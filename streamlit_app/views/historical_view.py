@@ -1,7 +1,8 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 from src.services.ticker_service import TickerService
+from views.ranges_table import range_filters, show_ranges_page
+from streamlit_app.components.missing_ranges import render_missing_ranges
 from src.utils.exceptions import (
     DatabaseError, APIError, InvalidDataError,
     DataValidationError
@@ -17,97 +18,45 @@ def show():
         # Inicializar el servicio
         service = TickerService()
         
-        # Obtener todos los tickers almacenados
-        stored_tickers = service.get_stored_tickers_summary()
-        
-        if not stored_tickers:
+        # Sin datos almacenados no hay nada que filtrar
+        if service.get_ranges_stats()['ranges'] == 0:
             st.info("No hay consultas históricas almacenadas.")
             return
         
-        # Preparar datos para visualización
-        records = []
-        for ticker_info in stored_tickers:
-            ticker = ticker_info['ticker']
-            for range_info in ticker_info['ranges']:
-                records.append({
-                    'ticker': ticker,
-                    'start_date': range_info['start_date'],
-                    'end_date': range_info['end_date'],
-                    'created_at': range_info['created_at'],
-                    'data_points': range_info['data_points']
-                })
-                
-        # Convertir a DataFrame para mejor manipulación
-        df = pd.DataFrame(records)
-        
-        # Agregar filtros
-        col1, col2 = st.columns(2)
-        with col1:
-            selected_tickers = st.multiselect(
-                "Filtrar por Ticker",
-                options=sorted(df['ticker'].unique()),
-                default=[]
-            )
-        
-        # Aplicar filtros
-        if selected_tickers:
-            df = df[df['ticker'].isin(selected_tickers)]
-        
-        # Mostrar datos en una tabla interactiva
-        st.dataframe(
-            df,
-            column_config={
-                "ticker": st.column_config.TextColumn(
-                    "Ticker",
-                    help="Símbolo del ticker"
-                ),
-                "start_date": st.column_config.TextColumn(
-                    "Fecha Inicio",
-                    help="Fecha de inicio de los datos almacenados"
-                ),
-                "end_date": st.column_config.TextColumn(
-                    "Fecha Fin",
-                    help="Fecha final de los datos almacenados"
-                ),
-                "created_at": st.column_config.TextColumn(
-                    "Fecha de Consulta",
-                    help="Fecha en que se realizó la consulta"
-                ),
-                "data_points": st.column_config.NumberColumn(
-                    "Puntos de Datos",
-                    help="Cantidad de datos almacenados en este rango"
-                )
-            },
-            hide_index=True
-        )
+        # Filtros, orden y paginación se resuelven en la base de datos: sólo se lee la página visible
+        filters = range_filters("history")
+        rows = show_ranges_page(service, filters, "history")
         
         # Mostrar estadísticas
-        if not df.empty:
+        if rows:
+            stats = service.get_ranges_stats(filters['ticker_prefix'], filters['start_date'], filters['end_date'])
             st.subheader("📊 Estadísticas")
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                st.metric("Total de Consultas", len(df))
+                st.metric("Total de Consultas", stats['ranges'])
             with col2:
-                st.metric("Tickers Únicos", df['ticker'].nunique())
+                st.metric("Tickers Únicos", stats['tickers'])
             with col3:
-                st.metric("Total de Datos", df['data_points'].sum())
+                st.metric("Total de Datos", stats['bars'])
             
             # Mostrar datos detallados por ticker seleccionado
             st.subheader("📈 Datos Detallados")
             selected_ticker = st.selectbox(
                 "Seleccionar Ticker para ver detalles",
-                options=[''] + sorted(df['ticker'].unique().tolist())
+                options=[''] + sorted({row['ticker'] for row in rows})
             )
             
             if selected_ticker:
-                # Obtener todos los rangos disponibles para el ticker seleccionado
-                ticker_ranges = df[df['ticker'] == selected_ticker].sort_values('created_at', ascending=False)
+                # Obtener los rangos del ticker seleccionado, de la consulta más reciente a la más antigua
+                ticker_ranges = service.get_ranges_page(
+                    ticker=selected_ticker, sort='created_at', descending=True, page_size=1000
+                )['rows']
                 
                 # Permitir al usuario seleccionar un rango específico
                 range_options = [
                     f"{row['start_date']} a {row['end_date']} ({row['data_points']} datos)"
-                    for _, row in ticker_ranges.iterrows()
+                    for row in ticker_ranges
                 ]
                 
                 selected_range = st.selectbox(
@@ -120,7 +69,7 @@ def show():
                     try:
                         # Obtener el índice del rango seleccionado
                         range_index = range_options.index(selected_range)
-                        ticker_row = ticker_ranges.iloc[range_index]
+                        ticker_row = ticker_ranges[range_index]
                         
                         # Obtener las fechas del rango seleccionado
                         start_date = ticker_row['start_date']
@@ -141,11 +90,10 @@ def show():
                             return
                         
                         # Mostrar advertencia si hay fechas faltantes
-                        if latest_data['missing_dates']:
-                            st.warning(
-                                "⚠️ No hay datos disponibles para las siguientes fechas:\n" +
-                                ", ".join(latest_data['missing_dates'])
-                            )
+                        render_missing_ranges(
+                            latest_data['missing_ranges'], latest_data['missing_days'],
+                            "No hay datos disponibles"
+                        )
                         
                         # Procesar datos para visualización
                         df_data = (latest_data['data'], latest_data['source'])
@@ -182,6 +130,8 @@ def show():
                     except Exception as e:
                         st.error(f"Error inesperado: {str(e)}")
                         
+    except ValueError as e:
+        st.error(f"❌ {str(e)}")
     except (DatabaseError, APIError) as e:
         st.error(f"Error al obtener los datos almacenados: {str(e)}")
     except (KeyError, TypeError) as e:
@@ -1,8 +1,10 @@
+import uuid
 import streamlit as st
 import plotly.graph_objects as go
 from datetime import datetime
 from streamlit_app.components.ticker_input import render_ticker_input
 from streamlit_app.components.date_selector import render_date_selector
+from streamlit_app.components.missing_ranges import render_missing_ranges
 from src.services.ticker_service import TickerService
 from src.utils.exceptions import (
     DatabaseError, APIError, InvalidDataError,
@@ -55,7 +57,8 @@ def show():
     st.title("🔍 Nueva Consulta")
     
     # Inicializar el servicio
-    service = TickerService()
+    # La sesión agrupa las consultas del usuario en el registro que usan las precargas
+    service = TickerService(session_id=st.session_state.setdefault("session_id", uuid.uuid4().hex))
     
     # Crear un contenedor para los inputs
     st.markdown("""
@@ -69,6 +72,13 @@ def show():
         # Renderizar el selector de fechas
         fecha_inicio, fecha_fin = render_date_selector()
         
+        # Sólo los backends que guardan splits y dividendos materializan precios ajustados
+        adjusted = service.model.supports_adjusted and st.toggle(
+            "Precios ajustados (splits y dividendos)",
+            value=True,
+            help="Ajusta los precios anteriores a cada split o dividendo ya descargado"
+        )
+        
         # Botón para ejecutar el análisis
         if st.button("Analizar", type="primary"):
             if not ticker:
@@ -89,12 +99,13 @@ def show():
                             ticker=ticker,
                             start_date=fecha_inicio,
                             end_date=fecha_fin,
-                            status_callback=update_status
+                            status_callback=update_status,
+                            adjusted=adjusted
                         )
-                    
+                        
                     if data is not None:
                         try:
-                            # Procesar y mostrar los datos
+                            # Procesary mostrar los datos
                             df_data = (data['data'], data['source'])
                             processed_data = service.process_ticker_data(df_data)
                             
@@ -107,13 +118,18 @@ def show():
                             
                             st.success(f"✅ Datos obtenidos para {ticker} desde {source_text}")
                             
-                            # Mostrar advertencia si hay fechas faltantes
-                            if data['missing_dates']:
+                            # Datos locales sin actualizar porque la API no está disponible
+                            if data.get('partial'):
                                 st.warning(
-                                    "⚠️ Algunos datos no están disponibles para las siguientes fechas:\n" +
-                                    ", ".join(data['missing_dates'])
+                                    f"⚠️ Se muestran los datos almacenados sin actualizar: {data['api_error']}"
                                 )
                             
+                            # Mostrar advertencia si hay fechas faltantes
+                            render_missing_ranges(
+                                data['missing_ranges'], data['missing_days'],
+                                "Algunos datos no están disponibles"
+                            )
+                            
                             # Mostrar el gráfico
                             st.plotly_chart(
                                 plot_stock_data(processed_data['data']),
@@ -0,0 +1,153 @@
+import os
+import uuid
+import streamlit as st
+import plotly.graph_objects as go
+from streamlit_app.views.comparison_view import parse_tickers
+from src.api.stream_feed import QUOTE_FEED
+from src.services.quote_stream import get_quote_stream, MAX_STREAM_SYMBOLS
+from src.utils.exceptions import APIError, DataValidationError
+
+# Segundos entre actualizaciones de la vista (sólo se vuelve a dibujar el panel en vivo)
+LIVE_REFRESH_SECONDS = float(os.getenv("LIVE_REFRESH_SECONDS", "2") or 2)
+# Ticks dibujados en el gráfico de operaciones
+LIVE_CHART_TICKS = 2000
+
+FEEDS = ["polygon", "simulated"]
+
+def plot_live_bars(bars, symbol):
+    """
+    Crea el gráfico de velas de un minuto construidas en vivo
+    """
+    fig = go.Figure(data=[go.Candlestick(
+        x=bars.index,
+        open=bars['open'],
+        high=bars['high'],
+        low=bars['low'],
+        close=bars['close'],
+        name=symbol
+    )])
+    fig.update_layout(
+        title=f"{symbol} - barras de un minuto",
+        yaxis_title="Precio",
+        xaxis_title="Hora (UTC)",
+        xaxis_rangeslider_visible=False,
+        template="plotly_dark"
+    )
+    return fig
+
+def plot_ticks(ticks, symbol):
+    """
+    Crea el gráfico de los últimos ticks
+    """
+    fig = go.Figure(data=[go.Scatter(x=ticks.index, y=ticks['price'], mode="lines", name=symbol)])
+    fig.update_layout(
+        title=f"{symbol} - últimos {len(ticks)} ticks",
+        yaxis_title="Precio",
+        xaxis_title="Hora (UTC)",
+        template="plotly_dark"
+    )
+    return fig
+
+def render_live_panel(stream, symbol, session_id):
+    """
+    Dibuja el estado en vivo de los símbolos de la sesión leyendo sólo los buffers del stream
+    """
+    # Cada actualización mantiene vigentes las suscripciones de la sesión
+    stream.touch(session_id)
+    status = stream.status()
+    if status['error']:
+        st.error(f"⚠️ Error del feed: {status['error']}")
+    else:
+        st.caption(f"Feed {status['feed']}: {status['status']} ({status['sessions']} sesiones)")
+
+    symbols = stream.symbols(session_id)
+    if not symbols:
+        st.info("Suscriba al menos un símbolo para comenzar.")
+        return
+
+    columns = st.columns(min(len(symbols), 5))
+    for i, sym in enumerate(symbols):
+        snapshot = stream.snapshot(sym)
+        with columns[i % len(columns)]:
+            if snapshot is None:
+                st.metric(sym, "—")
+            else:
+                change = f"{snapshot['change']:.2f}%" if snapshot['change'] is not None else None
+                st.metric(sym, f"${snapshot['price']:.2f}", change)
+
+    if symbol not in symbols:
+        return
+    bars = stream.get_minute_bars(symbol)
+    if bars.empty:
+        st.info(f"Esperando ticks de {symbol}...")
+        return
+    st.plotly_chart(plot_live_bars(bars, symbol), use_container_width=True)
+    st.plotly_chart(plot_ticks(stream.get_ticks(symbol, LIVE_CHART_TICKS), symbol), use_container_width=True)
+
+def show():
+    """
+    Renderiza la página de cotizaciones en vivo.
+    """
+    st.title("📡 En Vivo")
+
+    st.markdown(f"""
+    Cotizaciones en tiempo real desde un feed de trades. Se conservan los últimos ticks
+    y barras de un minuto de hasta {MAX_STREAM_SYMBOLS} símbolos; el panel se actualiza
+    cada {LIVE_REFRESH_SECONDS:g} segundos.
+    """)
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        text = st.text_input("Símbolos (ejemplo: AAPL, MSFT)", key="live_symbols")
+    with col2:
+        feed = st.selectbox(
+            "Feed",
+            options=FEEDS,
+            index=FEEDS.index(QUOTE_FEED) if QUOTE_FEED in FEEDS else 0,
+            key="live_feed"
+        )
+    if QUOTE_FEED not in FEEDS:
+        # Feeds configurados por entorno (por ejemplo replay:<archivo.csv>)
+        feed = QUOTE_FEED
+
+    try:
+        stream = get_quote_stream(feed)
+    except (APIError, DataValidationError) as e:
+        st.error(f"⚠️ No se pudo crear el feed: {str(e)}")
+        return
+
+    # El stream es compartido por el proceso: cada sesión sigue sólo sus símbolos
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+    previous_feed = st.session_state.get("live_stream_feed")
+    if previous_feed is not None and previous_feed != feed:
+        # Al cambiar de feed se liberan las suscripciones del anterior
+        get_quote_stream(previous_feed).release(session_id)
+    st.session_state["live_stream_feed"] = feed
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Suscribir", type="primary", help="Reemplaza los símbolos seguidos por esta sesión"):
+            symbols = parse_tickers(text)
+            if not symbols:
+                st.warning("⚠️ Por favor, ingrese al menos un símbolo.")
+            else:
+                try:
+                    dropped = set(stream.symbols(session_id)) - set(symbols)
+                    stream.subscribe(symbols, session_id)
+                    stream.unsubscribe(dropped, session_id)
+                    stream.start()
+                except DataValidationError as e:
+                    st.warning(f"⚠️ {str(e)}")
+    with col2:
+        # Sólo deja de seguir los símbolos de esta sesión; el feed sigue para las demás
+        if st.button("Detener", disabled=not stream.symbols(session_id)):
+            stream.release(session_id)
+
+    symbols = stream.symbols(session_id)
+    symbol = st.selectbox("Símbolo a graficar", options=symbols, key="live_chart_symbol") if symbols else None
+
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS if stream.running and symbols else None)
+    def live_panel():
+        render_live_panel(stream, symbol, session_id)
+
+    live_panel()
@@ -1,83 +1,371 @@
+import os
+import tempfile
 import streamlit as st
 import pandas as pd
 from src.services.ticker_service import TickerService
+from src.services import data_transfer, retention
+from src.services.data_quality import DataQualityService, RULES
+from views.ranges_table import range_filters, show_ranges_page
 from datetime import datetime
+from src.utils import metrics, profiling
 from src.utils.exceptions import (
     DatabaseError, APIError, InvalidDataError,
     DataValidationError
 )
 
+def show_metrics():
+    """
+    Muestra las métricas de instrumentación del proceso y permite exportarlas en formato Prometheus.
+    """
+    with st.expander("📈 Métricas de rendimiento"):
+        if not metrics.is_enabled():
+            st.info(
+                "Las métricas están deshabilitadas. Defina METRICS_ENABLED=1 en el archivo .env "
+                "para registrar latencias de la API, consultas a la base de datos y aciertos de caché."
+            )
+            return
+        
+        rows = metrics.registry.snapshot()
+        if not rows:
+            st.info("Todavía no se registraron métricas en este proceso.")
+            return
+        
+        st.dataframe(
+            pd.DataFrame(rows),
+            column_config={
+                "metric": st.column_config.TextColumn("Métrica"),
+                "labels": st.column_config.TextColumn("Etiquetas"),
+                "count": st.column_config.NumberColumn("Cantidad"),
+                "sum": st.column_config.NumberColumn("Suma (s)", format="%.4f"),
+                "avg": st.column_config.NumberColumn("Promedio (s)", format="%.4f")
+            },
+            hide_index=True
+        )
+        
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            st.download_button(
+                "Exportar (Prometheus)",
+                data=metrics.render_prometheus(),
+                file_name="metrics.prom",
+                mime="text/plain"
+            )
+        with col2:
+            if st.button("Reiniciar métricas"):
+                metrics.registry.reset()
+                st.rerun()
+
+def show_profiling():
+    """
+    Muestra los perfiles guardados y el registro de consultas lentas.
+    """
+    with st.expander("🩺 Perfilado y consultas lentas"):
+        if not profiling.PROFILE_ENABLED and not profiling.slow_query_enabled():
+            st.info(
+                "El perfilado está deshabilitado. Defina PROFILE_ENABLED=1 para guardar un perfil "
+                "por cada ejecución de página y SLOW_QUERY_MS=<umbral> para registrar las consultas lentas."
+            )
+            return
+        
+        profiles = profiling.list_profiles()
+        if profiles:
+            selected_profile = st.selectbox(
+                "Seleccionar perfil",
+                options=[p['name'] for p in profiles],
+                format_func=lambda name: next(
+                    f"{p['created_at']} - {p['name']} ({p['size_kb']} KB)" for p in profiles if p['name'] == name
+                )
+            )
+            sort = st.radio(
+                "Ordenar por",
+                options=["cumulative", "tottime"],
+                format_func=lambda x: "Tiempo acumulado" if x == "cumulative" else "Tiempo propio",
+                horizontal=True
+            )
+            path = next(p['path'] for p in profiles if p['name'] == selected_profile)
+            st.code(profiling.summarize_profile(path, sort=sort), language=None)
+        else:
+            st.info(f"No hay perfiles guardados en {profiling.PROFILE_DIR}.")
+        
+        st.markdown("**Consultas lentas**")
+        slow_queries = profiling.read_slow_queries()
+        if slow_queries:
+            st.code(slow_queries, language=None)
+        else:
+            st.caption("No se registraron consultas lentas.")
+
+def show_export(service: TickerService, tickers: list):
+    """
+    Genera una exportación de los datos almacenados y la ofrece para descargar.
+    El archivo se escribe por bloques en un archivo temporal.
+    """
+    st.subheader("📤 Exportar Datos")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        selected = st.multiselect(
+            "Tickers a exportar",
+            options=tickers,
+            placeholder="Todos los tickers"
+        )
+    with col2:
+        fmt = st.selectbox(
+            "Formato",
+            options=["csv", "parquet"],
+            format_func=lambda x: "CSV (gzip)" if x == "csv" else "Parquet"
+        )
+    
+    if st.button("Preparar exportación"):
+        # Eliminar la exportación anterior de esta sesión
+        previous = st.session_state.pop('export_path', None)
+        if previous and os.path.exists(previous):
+            os.remove(previous)
+        
+        suffix = ".csv.gz" if fmt == "csv" else ".parquet"
+        handle, path = tempfile.mkstemp(prefix="tickers_export_", suffix=suffix)
+        os.close(handle)
+        progress = st.empty()
+        try:
+            rows = data_transfer.export_bars(
+                service.model, path, selected or None,
+                progress=lambda n: progress.caption(f"{n:,} filas exportadas...")
+            )
+            progress.empty()
+            st.session_state['export_path'] = path
+            st.session_state['export_rows'] = rows
+            st.session_state['export_suffix'] = suffix
+        except (DatabaseError, DataValidationError) as e:
+            os.remove(path)
+            st.error(f"❌ Error al exportar datos: {str(e)}")
+    
+    path = st.session_state.get('export_path')
+    if path and os.path.exists(path):
+        with open(path, 'rb') as f:
+            st.download_button(
+                f"Descargar ({st.session_state['export_rows']:,} filas)",
+                data=f,
+                file_name=f"tickers_{datetime.now().strftime('%Y%m%d')}{st.session_state['export_suffix']}",
+                mime="application/octet-stream"
+            )
+
+def show_range_delete(service: TickerService, tickers: list):
+    """
+    Permite eliminar los datos de un ticker en un rango de fechas.
+    """
+    st.subheader("✂️ Eliminar Rango de Fechas")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        ticker = st.selectbox(
+            "Ticker",
+            options=[''] + tickers,
+            format_func=lambda x: 'Seleccione un ticker' if x == '' else x,
+            key="range_delete_ticker"
+        )
+    with col2:
+        start_date = st.date_input("Desde", key="range_delete_start")
+    with col3:
+        end_date = st.date_input("Hasta", key="range_delete_end")
+    
+    if ticker and st.button("Eliminar rango"):
+        try:
+            deleted = service.delete_ticker_range(
+                ticker, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+            )
+            st.success(f"✅ Se eliminaron {deleted:,} registros de {ticker}")
+            st.rerun()
+        except ValueError as e:
+            st.error(f"❌ {str(e)}")
+        except DatabaseError as e:
+            st.error(f"❌ Error al eliminar el rango: {str(e)}")
+
+def show_space_management(service: TickerService):
+    """
+    Muestra las reglas de retención y el espacio recuperable, y permite liberarlo de a pasos.
+    """
+    st.subheader("🧹 Retención y Espacio")
+    
+    try:
+        rules = retention.parse_rules(retention.RETENTION_RULES)
+    except DataValidationError as e:
+        st.error(f"❌ {str(e)}")
+        rules = []
+    
+    if not rules:
+        st.info(
+            "No hay reglas de retención configuradas. Defina RETENTION_RULES (ej: 10y,5y/90d "
+            "para conservar 10 años de todos los tickers y 5 de los no consultados en 90 días)."
+        )
+    else:
+        # El plan recorre todos los tickers: se calcula a pedido y se descarta cuando los
+        # datos o las reglas cambian
+        version = service.model.data_version()
+        state = st.session_state.get('retention_plan')
+        if state is not None and (state['version'] != version or state['rules'] != repr(rules)):
+            state = None
+        if st.button("Calcular retención"):
+            state = {
+                'version': version,
+                'rules': repr(rules),
+                'plan': retention.plan_retention(service.model, rules)
+            }
+        st.session_state['retention_plan'] = state
+        
+        if state is None:
+            st.caption(
+                f"Reglas de retención: {', '.join(map(repr, rules))}. Calcule la retención para "
+                "ver los registros que eliminaría."
+            )
+        elif state['plan']:
+            st.dataframe(
+                pd.DataFrame(state['plan']),
+                column_config={
+                    "ticker": st.column_config.TextColumn("Ticker"),
+                    "rule": st.column_config.TextColumn("Regla"),
+                    "cutoff": st.column_config.TextColumn("Conservar desde"),
+                    "rows": st.column_config.NumberColumn("Registros a eliminar")
+                },
+                hide_index=True
+            )
+            if st.button("Aplicar retención"):
+                deleted = retention.apply_retention(service.model, state['plan'])
+                st.session_state['retention_plan'] = None
+                st.success(f"✅ Se eliminaron {deleted:,} registros")
+                st.rerun()
+        else:
+            st.caption(f"Las reglas de retención ({', '.join(map(repr, rules))}) no afectan a ningún ticker.")
+    
+    stats = service.model.get_space_stats()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Tamaño en disco", f"{stats['size_bytes'] / 1024 / 1024:,.1f} MB")
+    with col2:
+        st.metric("Espacio recuperable", f"{stats['reclaimable_bytes'] / 1024 / 1024:,.1f} MB")
+    
+    if stats.get('auto_vacuum') not in (None, 'incremental'):
+        st.caption(
+            "La base no está en modo incremental. Para convertirla (operación única que bloquea "
+            "la base) ejecute: python main.py maintenance --enable-incremental-vacuum"
+        )
+    elif stats['reclaimable_bytes'] > 0 and st.button("Liberar espacio"):
+        # Pasos cortos con un presupuesto de tiempo para no bloquear otras sesiones
+        freed = service.model.reclaim_space(time_budget=2.0)
+        st.success(f"✅ Se liberaron {freed / 1024:,.0f} KB")
+        st.rerun()
+
+def show_data_quality(service: TickerService):
+    """
+    Muestra los hallazgos del análisis de calidad de las barras, permite ejecutarlo
+    y volver a descargar de la API los días con problemas.
+    """
+    st.subheader("🔎 Calidad de Datos")
+    quality = DataQualityService(service.model)
+    
+    last_scan = quality.issues.get_last_scan()
+    if last_scan:
+        st.caption(
+            f"Último análisis: {last_scan['started_at']} - {last_scan['bars']:,} barras de "
+            f"{last_scan['tickers']:,} tickers en {last_scan['seconds']:.1f} s"
+        )
+    else:
+        st.caption("Todavía no se analizó la calidad de los datos almacenados.")
+    
+    if st.button("Analizar todos los tickers"):
+        progress = st.progress(0.0)
+        result = quality.scan(progress=lambda done, total: progress.progress(
+            done / total, text=f"{done:,}/{total:,} tickers revisados"
+        ))
+        progress.empty()
+        st.success(f"✅ Análisis completo: {result['issues']:,} hallazgos en {result['seconds']:.1f} s")
+    
+    issues = quality.get_issues()
+    if issues.empty:
+        if last_scan:
+            st.info("No se encontraron problemas en los datos almacenados.")
+        return
+    
+    rules = st.multiselect(
+        "Reglas",
+        options=sorted(issues['rule'].unique()),
+        format_func=lambda rule: f"{rule} ({(issues['rule'] == rule).sum():,})",
+        placeholder="Todas las reglas"
+    )
+    if rules:
+        issues = issues[issues['rule'].isin(rules)]
+    st.dataframe(
+        issues.assign(description=issues['rule'].map(RULES)),
+        column_config={
+            "ticker": st.column_config.TextColumn("Ticker"),
+            "date": st.column_config.TextColumn("Fecha"),
+            "rule": st.column_config.TextColumn("Regla"),
+            "value": st.column_config.NumberColumn("Valor", format="%.2f"),
+            "detail": st.column_config.TextColumn("Detalle"),
+            "detected_at": st.column_config.TextColumn("Detectado"),
+            "description": st.column_config.TextColumn("Descripción")
+        },
+        hide_index=True
+    )
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        tickers = st.multiselect(
+            "Tickers a volver a descargar",
+            options=sorted(issues['ticker'].unique()),
+            placeholder="Todos los tickers con hallazgos"
+        )
+    with col2:
+        st.write("")
+        refetch = st.button("Volver a descargar")
+    if refetch:
+        with st.spinner("Descargando los días con hallazgos..."):
+            result = quality.refetch(service, tickers or sorted(issues['ticker'].unique()), rules or None)
+        st.success(f"✅ Se descargaron {result['ranges']} rangos ({result['bars']:,} barras)")
+        for ticker, error in result['errors'].items():
+            st.error(f"❌ {ticker}: {error}")
+        if not result['errors']:
+            st.rerun()
+
 def show():
     """
     Renderiza la página de mantenimiento de la base de datos.
     """
     st.title("🔧 Mantenimiento de Base de Datos")
     
+    show_metrics()
+    show_profiling()
+    
     try:
         # Inicializar el servicio
         service = TickerService()
         
-        # Obtener todos los tickers almacenados
-        stored_tickers = service.get_stored_tickers_summary()
+        # Resumen de los datos almacenados, contado en la base de datos
+        stats = service.get_ranges_stats()
         
-        if not stored_tickers:
+        if stats['ranges'] == 0:
             st.info("No hay datos almacenados en la base de datos.")
             return
         
-        # Preparar datos para visualización
-        records = []
-        for ticker_info in stored_tickers:
-            ticker = ticker_info['ticker']
-            for range_info in ticker_info['ranges']:
-                records.append({
-                    'ticker': ticker,
-                    'start_date': range_info['start_date'],
-                    'end_date': range_info['end_date'],
-                    'created_at': range_info['created_at'],
-                    'data_points': range_info['data_points']
-                })
-        
-        # Convertir a DataFrame para mejor manipulación
-        df = pd.DataFrame(records)
-        
         # Mostrar resumen de datos almacenados
         st.subheader("📊 Resumen de Datos Almacenados")
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total de Tickers", df['ticker'].nunique())
+            st.metric("Total de Tickers", stats['tickers'])
         with col2:
-            st.metric("Total de Rangos", len(df))
+            st.metric("Total de Rangos", stats['ranges'])
         with col3:
-            st.metric("Total de Datos", df['data_points'].sum())
+            st.metric("Total de Datos", stats['bars'])
         
-        # Mostrar datos en una tabla interactiva
+        # Mostrar sólo la página visible de los rangos, filtrada en la base de datos
         st.subheader("📋 Datos Almacenados")
-        st.dataframe(
-            df,
-            column_config={
-                "ticker": st.column_config.TextColumn(
-                    "Ticker",
-                    help="Símbolo del ticker"
-                ),
-                "start_date": st.column_config.TextColumn(
-                    "Fecha Inicio",
-                    help="Fecha de inicio de los datos"
-                ),
-                "end_date": st.column_config.TextColumn(
-                    "Fecha Fin",
-                    help="Fecha final de los datos"
-                ),
-                "created_at": st.column_config.TextColumn(
-                    "Fecha de Consulta",
-                    help="Fecha en que se realizó la consulta"
-                ),
-                "data_points": st.column_config.NumberColumn(
-                    "Puntos de Datos",
-                    help="Cantidad de datos en este rango"
-                )
-            },
-            hide_index=True
-        )
+        show_ranges_page(service, range_filters("maintenance"), "maintenance")
+        
+        tickers = service.list_stored_tickers()
+        
+        # Sección para exportar datos
+        show_export(service, tickers)
+        
+        # Sección para eliminar rangos, retención y espacio
+        show_range_delete(service, tickers)
+        show_space_management(service)
+        show_data_quality(service)
         
         # Sección para eliminar datos
         st.subheader("🗑️ Eliminar Datos")
@@ -85,17 +373,17 @@ def show():
         # Selector de ticker para eliminar
         ticker_to_delete = st.selectbox(
             "Seleccionar ticker para eliminar",
-            options=[''] + sorted(df['ticker'].unique().tolist()),
+            options=[''] + tickers,
             format_func=lambda x: 'Seleccione un ticker' if x == '' else x
         )
         
         if ticker_to_delete:
             # Mostrar información del ticker seleccionado
-            ticker_data = df[df['ticker'] == ticker_to_delete]
+            ticker_stats = service.get_ranges_stats(ticker=ticker_to_delete)
             st.info(
                 f"Se eliminarán todos los datos de {ticker_to_delete}:\n"
-                f"- {len(ticker_data)} rangos de fechas\n"
-                f"- {ticker_data['data_points'].sum()} puntos de datos"
+                f"- {ticker_stats['ranges']} rangos de fechas\n"
+                f"- {ticker_stats['bars']} puntos de datos"
             )
             
             # Mostrar advertencia y botón de confirmación
@@ -114,6 +402,8 @@ def show():
                     except Exception as e:
                         st.error(f"❌ Error inesperado: {str(e)}")
                         
+    except ValueError as e:
+        st.error(f"❌ {str(e)}")
     except (DatabaseError, APIError) as e:
         st.error(f"Error al obtener los datos almacenados: {str(e)}")
     except (KeyError, TypeError) as e:
@@ -0,0 +1,125 @@
+import streamlit as st
+import pandas as pd
+from typing import Any, Dict, List
+from src.services.ticker_service import TickerService
+
+# Columnas por las que se puede ordenar la tabla de rangos
+SORT_OPTIONS = {
+    'created_at': 'Fecha de Consulta',
+    'ticker': 'Ticker',
+    'start_date': 'Fecha Inicio',
+    'end_date': 'Fecha Fin'
+}
+
+PAGE_SIZES = [25, 50, 100, 200]
+
+RANGE_COLUMNS = ['ticker', 'start_date', 'end_date', 'created_at', 'data_points']
+
+COLUMN_CONFIG = {
+    "ticker": st.column_config.TextColumn(
+        "Ticker",
+        help="Símbolo del ticker"
+    ),
+    "start_date": st.column_config.TextColumn(
+        "Fecha Inicio",
+        help="Fecha de inicio de los datos almacenados"
+    ),
+    "end_date": st.column_config.TextColumn(
+        "Fecha Fin",
+        help="Fecha final de los datos almacenados"
+    ),
+    "created_at": st.column_config.TextColumn(
+        "Fecha de Consulta",
+        help="Fecha en que se realizó la consulta"
+    ),
+    "data_points": st.column_config.NumberColumn(
+        "Puntos de Datos",
+        help="Cantidad de datos almacenados en este rango"
+    )
+}
+
+def range_filters(key: str) -> Dict[str, Any]:
+    """
+    Renderiza los filtros de la tabla de rangos. Se aplican en la base de datos,
+    no sobre los datos ya cargados.
+
+    Args:
+        key (str): Prefijo de las claves de los widgets (una tabla por página)
+
+    Returns:
+        Dict[str, Any]: Filtros y orden para TickerService.get_ranges_page
+    """
+    col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
+    with col1:
+        ticker_prefix = st.text_input(
+            "Filtrar por Ticker",
+            placeholder="Prefijo del ticker (ej: AA)",
+            key=f"{key}_prefix"
+        )
+    with col2:
+        start_date = st.date_input("Desde", value=None, key=f"{key}_start")
+    with col3:
+        end_date = st.date_input("Hasta", value=None, key=f"{key}_end")
+    with col4:
+        sort = st.selectbox(
+            "Ordenar por",
+            options=list(SORT_OPTIONS),
+            format_func=SORT_OPTIONS.get,
+            key=f"{key}_sort"
+        )
+    with col5:
+        page_size = st.selectbox("Filas por página", options=PAGE_SIZES, index=1, key=f"{key}_page_size")
+        descending = st.toggle("Descendente", value=sort == 'created_at', key=f"{key}_descending")
+
+    return {
+        'ticker_prefix': ticker_prefix,
+        'start_date': start_date.strftime('%Y-%m-%d') if start_date else None,
+        'end_date': end_date.strftime('%Y-%m-%d') if end_date else None,
+        'sort': sort,
+        'descending': descending,
+        'page_size': page_size
+    }
+
+def show_ranges_page(service: TickerService, filters: Dict[str, Any], key: str) -> List[Dict[str, Any]]:
+    """
+    Muestra una página de la tabla de rangos con botones para avanzar y retroceder.
+    Sólo se consulta la página visible: se guardan los cursores de las páginas
+    recorridas y se vuelve a la primera cuando cambian los filtros.
+
+    Args:
+        service (TickerService): Servicio de tickers
+        filters (Dict[str, Any]): Resultado de range_filters
+        key (str): Prefijo de las claves de estado y de los widgets
+
+    Returns:
+        List[Dict[str, Any]]: Rangos de la página visible
+
+    Raises:
+        ValueError: Si los filtros son inválidos
+        DatabaseError: Si hay un error al acceder a la base de datos
+    """
+    state = st.session_state.setdefault(f"{key}_pages", {'filters': None, 'cursors': [None]})
+    if state['filters'] != filters:
+        state['filters'] = dict(filters)
+        state['cursors'] = [None]
+
+    page = service.get_ranges_page(cursor=state['cursors'][-1], **filters)
+    st.dataframe(
+        pd.DataFrame(page['rows'], columns=RANGE_COLUMNS),
+        column_config=COLUMN_CONFIG,
+        hide_index=True
+    )
+
+    col1, col2, col3 = st.columns([1, 1, 4])
+    with col1:
+        if st.button("← Anterior", disabled=len(state['cursors']) == 1, key=f"{key}_previous"):
+            state['cursors'].pop()
+            st.rerun()
+    with col2:
+        if st.button("Siguiente →", disabled=page['next'] is None, key=f"{key}_next"):
+            state['cursors'].append(page['next'])
+            st.rerun()
+    with col3:
+        st.caption(f"Página {len(state['cursors'])}")
+
+    return page['rows']
@@ -0,0 +1,92 @@
+import streamlit as st
+from src.services.screener import ScreenerService
+from src.utils.exceptions import DatabaseError, DataValidationError
+
+NEW_SCREEN = "(nuevo filtro)"
+
+HELP = """
+Columnas: `open`, `high`, `low`, `close`, `volume`, `vwap`. Funciones: `sma(serie, n)`,
+`ema(serie, n)`, `rsi(serie, n=14)`, `highest(serie, n)`, `lowest(serie, n)`,
+`prev(serie, n=1)` (valor de hace n barras) y `change(serie, n=1)` (variación % en n barras).
+Se combinan con `+ - * /`, comparaciones y `and`/`or`/`not`. La condición se evalúa en la
+última barra de cada ticker, por ejemplo:
+`close > sma(close, 200) and rsi(close, 14) < 30 and volume > 2 * sma(volume, 20)`
+"""
+
+def show():
+    """
+    Renderiza la página de filtros sobre todos los tickers almacenados.
+    """
+    st.title("🔎 Filtros")
+
+    service = ScreenerService()
+
+    st.markdown("Busque, entre todos los tickers almacenados, los que cumplen una condición.")
+    with st.expander("ℹ️ Sintaxis de los filtros"):
+        st.markdown(HELP)
+
+    try:
+        screens = service.list_screens()
+    except DataValidationError as e:
+        st.error(f"⚠️ {str(e)}")
+        screens = {}
+
+    selected = st.selectbox("Filtro guardado", options=[NEW_SCREEN] + list(screens), key="screen_selected")
+    expression = st.text_area(
+        "Condición",
+        value=screens.get(selected, ""),
+        key=f"screen_expression_{selected}",
+        height=80
+    )
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        run = st.button("Ejecutar", type="primary")
+    with col2:
+        name = st.text_input(
+            "Nombre",
+            value="" if selected == NEW_SCREEN else selected,
+            key=f"screen_name_{selected}",
+            label_visibility="collapsed",
+            placeholder="Nombre del filtro"
+        )
+        if st.button("💾 Guardar filtro"):
+            try:
+                service.save_screen(name, expression)
+                st.success(f"✅ Filtro '{name.strip()}' guardado")
+            except DataValidationError as e:
+                st.error(f"⚠️ {str(e)}")
+    with col3:
+        if selected != NEW_SCREEN and st.button("🗑️ Eliminar filtro"):
+            service.delete_screen(selected)
+            st.rerun()
+
+    if not run:
+        return
+
+    try:
+        with st.spinner("Evaluando el filtro..."):
+            result = service.run(expression)
+    except DataValidationError as e:
+        st.error(f"⚠️ {str(e)}")
+        return
+    except DatabaseError as e:
+        st.error(f"Error al leer los datos almacenados: {str(e)}")
+        return
+
+    matches = result['matches']
+    st.success(
+        f"✅ {len(matches)} de {result['screened']} tickers cumplen la condición "
+        f"({result['bars']} barras por ticker, {result['seconds']:.2f} segundos)"
+    )
+    if not matches.empty:
+        st.dataframe(
+            matches,
+            hide_index=True,
+            column_config={
+                "ticker": "Ticker",
+                "date": "Última Barra",
+                "close": st.column_config.NumberColumn("Cierre", format="$%.2f"),
+            },
+            use_container_width=True
+        )
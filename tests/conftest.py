@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos de src se importan desde la raíz del repositorio, como en la aplicación
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
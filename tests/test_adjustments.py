@@ -0,0 +1,116 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from src.models.column_cache import ColumnCache
+from src.models.storage import adjustment_factors
+from src.models.ticker_model import TickerModel
+
+
+def _payload(dates, close=100.0):
+    """
+    Respuesta de la API de agregados con una barra por fecha (medianoche local)
+    """
+    return {'results': [
+        {'t': int(datetime.strptime(date, '%Y-%m-%d').timestamp() * 1000),
+         'o': close, 'h': close, 'l': close, 'c': close, 'v': 1000, 'vw': close}
+        for date in dates
+    ]}
+
+
+def test_no_corporate_actions_no_factors():
+    assert adjustment_factors([], [], {}) == []
+
+
+def test_split_factors_accumulate_backwards():
+    splits = [('2020-01-10', 1, 2), ('2021-06-01', 1, 4)]
+    assert adjustment_factors(splits, [], {}) == [
+        ('2020-01-10', 0.125, 8.0),
+        ('2021-06-01', 0.25, 4.0),
+    ]
+
+
+def test_dividend_uses_previous_close():
+    factors = adjustment_factors([], [('2022-03-01', 2.0)], {'2022-03-01': 100.0})
+    assert factors == [('2022-03-01', pytest.approx(0.98), 1.0)]
+
+
+def test_dividend_without_previous_close_or_out_of_range_is_ignored():
+    assert adjustment_factors([], [('2022-03-01', 2.0)], {'2022-03-01': None}) == []
+    assert adjustment_factors([], [('2022-03-01', 200.0)], {'2022-03-01': 100.0}) == []
+
+
+def test_split_and_dividend_on_the_same_date_combine():
+    factors = adjustment_factors([('2022-03-01', 1, 2)], [('2022-03-01', 5.0)], {'2022-03-01': 100.0})
+    assert factors == [('2022-03-01', pytest.approx(0.5 * 0.95), 2.0)]
+
+
+def test_stored_bars_are_adjusted_before_the_split(tmp_path):
+    model = TickerModel(str(tmp_path / 'ticker.db'))
+    model.save_ticker_data('AAPL', _payload(['2024-01-02', '2024-01-03', '2024-01-04']))
+    model.save_corporate_actions('AAPL', [
+        {'execution_date': '2024-01-04', 'split_from': 1, 'split_to': 2},
+    ], [])
+
+    bars = model.scan(['AAPL'], columns=['close', 'adj_close', 'adj_volume'])
+    assert bars['close'].tolist() == [100.0, 100.0, 100.0]
+    assert bars['adj_close'].tolist() == [50.0, 50.0, 100.0]
+    assert bars['adj_volume'].tolist() == [2000.0, 2000.0, 1000.0]
+
+
+def test_legacy_bars_are_not_adjusted_again(tmp_path):
+    # Barras guardadas antes de la versión 4 (ya ajustadas por la API)
+    path = str(tmp_path / 'ticker.db')
+    model = TickerModel(path)
+    model.save_ticker_data('AAPL', _payload(['2024-01-02', '2024-01-03']))
+    with sqlite3.connect(path) as conn:
+        conn.execute('UPDATE ticker_data SET raw = 0')
+    model.save_corporate_actions('AAPL', [
+        {'execution_date': '2024-01-04', 'split_from': 1, 'split_to': 2},
+    ], [])
+    assert model.legacy_range('AAPL') == ('2024-01-02', '2024-01-03')
+    assert model.scan(['AAPL'], columns=['adj_close'])['adj_close'].tolist() == [100.0, 100.0]
+
+    # Al volver a descargarlas sin ajustar se reemplazan y reciben los factores
+    model.save_ticker_data('AAPL', _payload(['2024-01-02', '2024-01-03'], close=200.0))
+    assert model.legacy_range('AAPL') is None
+    bars = model.scan(['AAPL'], columns=['close', 'adj_close'])
+    assert bars['close'].tolist() == [200.0, 200.0]
+    assert bars['adj_close'].tolist() == [100.0, 100.0]
+
+
+def test_migration_marks_existing_bars_as_legacy(tmp_path):
+    path = str(tmp_path / 'old.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute('''
+            CREATE TABLE ticker_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, ticker TEXT NOT NULL, date TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume INTEGER, vwap REAL,
+                UNIQUE(ticker, date)
+            )
+        ''')
+        conn.execute("INSERT INTO ticker_data (ticker, date, open, high, low, close, volume, vwap) "
+                     "VALUES ('AAPL', '2024-01-02', 1, 1, 1, 1, 10, 1)")
+        conn.execute('PRAGMA user_version = 2')
+
+    model = TickerModel(path)
+    assert model.legacy_range('AAPL') == ('2024-01-02', '2024-01-02')
+    model.save_ticker_data('AAPL', _payload(['2024-01-03']))
+    assert model.legacy_range('AAPL') == ('2024-01-02', '2024-01-02')
+
+
+def test_column_cache_serves_raw_and_adjusted_prices(tmp_path):
+    model = TickerModel(str(tmp_path / 'ticker.db'))
+    model.save_ticker_data('AAPL', _payload(['2024-01-02', '2024-01-03', '2024-01-04']))
+    model.save_corporate_actions('AAPL', [
+        {'execution_date': '2024-01-04', 'split_from': 1, 'split_to': 2},
+    ], [])
+
+    cache = ColumnCache(str(tmp_path / 'columns'))
+    assert cache.rebuild('AAPL', model) == 3
+    raw = cache.read('AAPL', '2024-01-01', '2024-01-31')
+    adjusted = cache.read('AAPL', '2024-01-01', '2024-01-31', adjusted=True)
+    assert raw['close'].tolist() == [100.0, 100.0, 100.0]
+    assert adjusted['close'].tolist() == [50.0, 50.0, 100.0]
+    assert adjusted['volume'].tolist() == [2000.0, 2000.0, 1000.0]
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from src.models.ticker_model import TickerModel
+from src.services.data_transfer import export_bars, import_bars
+from src.utils.exceptions import DataValidationError
+
+
+def _write_dump(path, dates, close=100.0):
+    """
+    Volcado de un proveedor (sin columna raw) con una barra de AAPL por fecha
+    """
+    pd.DataFrame({
+        'ticker': 'AAPL', 'date': dates, 'open': close, 'high': close,
+        'low': close, 'close': close, 'volume': 1000,
+    }).to_csv(path, index=False)
+
+
+def test_dump_without_raw_column_requires_adjusted(tmp_path):
+    path = str(tmp_path / 'dump.csv')
+    _write_dump(path, ['2024-01-02', '2024-01-03'])
+    model = TickerModel(str(tmp_path / 'ticker.db'))
+
+    with pytest.raises(DataValidationError, match='columna raw'):
+        import_bars(model, path)
+
+    assert import_bars(model, path, adjusted=True)['rows'] == 2
+    assert model.legacy_range('AAPL') == ('2024-01-02', '2024-01-03')
+    assert import_bars(model, path, adjusted=False)['rows'] == 2
+    assert model.legacy_range('AAPL') is None
+
+
+def test_export_and_import_keep_the_raw_flag(tmp_path):
+    path = str(tmp_path / 'dump.csv')
+    source = TickerModel(str(tmp_path / 'source.db'))
+    _write_dump(path, ['2024-01-02', '2024-01-03'])
+    import_bars(source, path, adjusted=False)
+    _write_dump(path, ['2024-01-04', '2024-01-05'])
+    import_bars(source, path, adjusted=True)
+
+    exported = str(tmp_path / 'export.csv.gz')
+    assert export_bars(source, exported) == 4
+    assert pd.read_csv(exported)['raw'].tolist() == [1, 1, 0, 0]
+
+    target = TickerModel(str(tmp_path / 'target.db'))
+    # La columna raw del archivo prevalece sobre `adjusted`
+    import_bars(target, exported, adjusted=False)
+    assert target.legacy_range('AAPL') == ('2024-01-04', '2024-01-05')
@@ -0,0 +1,139 @@
+import threading
+
+import pytest
+
+from src.api.dispatcher import APIDispatcher, Priority
+from src.utils.exceptions import APIQueueTimeoutError, APIRateLimitError
+
+# Ningún Future de estas pruebas debería tardar más que esto en resolverse
+TIMEOUT = 10
+
+
+def _blocking(gate: threading.Event, started: threading.Event, value):
+    """
+    Función de request que avisa cuando empieza y espera a `gate` para terminar
+    """
+    def fn():
+        started.set()
+        assert gate.wait(TIMEOUT)
+        return value
+    return fn
+
+
+def test_pending_requests_with_same_key_are_deduplicated():
+    dispatcher = APIDispatcher(requests_per_minute=0)
+    gate, started = threading.Event(), threading.Event()
+    blocker = dispatcher.submit("blocker", _blocking(gate, started, None))
+    assert started.wait(TIMEOUT)
+
+    calls = []
+    first = dispatcher.submit("key", lambda: calls.append(1) or "ok", Priority.BACKFILL)
+    second = dispatcher.submit("key", lambda: calls.append(2) or "other")
+    assert first is second
+    assert dispatcher.queue_size() == 1
+
+    gate.set()
+    assert first.result(TIMEOUT) == "ok"
+    assert blocker.result(TIMEOUT) is None
+    assert calls == [1]
+
+
+def test_submit_while_executing_returns_the_running_future():
+    dispatcher = APIDispatcher(requests_per_minute=0)
+    gate, started = threading.Event(), threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return _blocking(gate, started, "ok")()
+
+    first = dispatcher.submit("key", fn)
+    assert started.wait(TIMEOUT)
+    second = dispatcher.submit("key", fn)
+    assert second is first
+
+    gate.set()
+    assert first.result(TIMEOUT) == "ok"
+    assert calls == [1]
+
+
+def test_rate_limited_request_is_retried_for_every_caller():
+    # Un 429 reencola el request: quien lo pidió mientras se ejecutaba no debe quedar colgado
+    dispatcher = APIDispatcher(requests_per_minute=0, max_retries=2)
+    gate, started = threading.Event(), threading.Event()
+    attempts = []
+
+    def fn():
+        attempts.append(1)
+        if len(attempts) == 1:
+            started.set()
+            assert gate.wait(TIMEOUT)
+            raise APIRateLimitError("429")
+        return "ok"
+
+    first = dispatcher.submit("key", fn)
+    assert started.wait(TIMEOUT)
+    second = dispatcher.submit("key", fn, Priority.BACKFILL)
+
+    gate.set()
+    assert first.result(TIMEOUT) == "ok"
+    assert second.result(TIMEOUT) == "ok"
+    assert len(attempts) == 2
+    assert dispatcher.queue_size() == 0
+
+
+def test_rate_limit_error_propagates_after_max_retries():
+    dispatcher = APIDispatcher(requests_per_minute=0, max_retries=1)
+    attempts = []
+
+    def fn():
+        attempts.append(1)
+        raise APIRateLimitError("429")
+
+    future = dispatcher.submit("key", fn)
+    with pytest.raises(APIRateLimitError):
+        future.result(TIMEOUT)
+    assert len(attempts) == 2
+
+
+def test_higher_priority_runs_first():
+    dispatcher = APIDispatcher(requests_per_minute=0)
+    gate, started = threading.Event(), threading.Event()
+    dispatcher.submit("blocker", _blocking(gate, started, None))
+    assert started.wait(TIMEOUT)
+
+    order = []
+    backfill = dispatcher.submit("backfill", lambda: order.append("backfill"), Priority.BACKFILL)
+    scheduled = dispatcher.submit("scheduled", lambda: order.append("scheduled"), Priority.SCHEDULED)
+    interactive = dispatcher.submit("interactive", lambda: order.append("interactive"))
+
+    gate.set()
+    for future in (backfill, scheduled, interactive):
+        future.result(TIMEOUT)
+    assert order == ["interactive", "scheduled", "backfill"]
+
+
+def test_promote_and_cancel_pending_requests():
+    dispatcher = APIDispatcher(requests_per_minute=0)
+    gate, started = threading.Event(), threading.Event()
+    dispatcher.submit("blocker", _blocking(gate, started, None))
+    assert started.wait(TIMEOUT)
+
+    promoted = dispatcher.submit("promoted", lambda: "ok", Priority.BACKFILL)
+    cancelled = dispatcher.submit("cancelled", lambda: "never", Priority.BACKFILL)
+    assert dispatcher.promote("promoted", Priority.INTERACTIVE)
+    # Un request elevado por otro llamador no se cancela como precarga
+    assert not dispatcher.cancel("promoted")
+    assert dispatcher.cancel("cancelled")
+
+    gate.set()
+    assert promoted.result(TIMEOUT) == "ok"
+    assert cancelled.cancelled()
+
+
+def test_submit_rejects_when_estimated_wait_exceeds_max_wait():
+    dispatcher = APIDispatcher(requests_per_minute=1)
+    dispatcher.submit("first", lambda: "ok").result(TIMEOUT)
+    # El próximo turno de la cuota está a un minuto
+    with pytest.raises(APIQueueTimeoutError):
+        dispatcher.submit("second", lambda: "ok", max_wait=1)
@@ -0,0 +1,41 @@
+import pytest
+
+from src.api.circuit_breaker import get_circuit_breaker
+from src.models.intraday_model import IntradayModel
+from src.services.intraday_service import IntradayService
+from src.utils.exceptions import APICircuitOpenError
+
+
+class _UnreachableAPI:
+    """
+    Cliente que registra los requests recibidos
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def get_aggregates_page(self, *args, **kwargs):
+        self.calls += 1
+        raise AssertionError("no debería llamarse a la API")
+
+
+@pytest.fixture
+def open_circuit():
+    """
+    Abre el circuit breaker de agregados y lo cierra al terminar
+    """
+    breaker = get_circuit_breaker("aggs")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    yield breaker
+    breaker.record_success()
+
+
+def test_open_circuit_fails_without_queueing(tmp_path, open_circuit):
+    api = _UnreachableAPI()
+    service = IntradayService(api, IntradayModel(str(tmp_path / 'intraday.db')))
+
+    with pytest.raises(APICircuitOpenError):
+        service.get_bars('AAPL', '2024-01-02', '2024-01-03', max_wait=1)
+    assert api.calls == 0
+    # Sin barras descargadas, los días siguen faltando
+    assert service.missing_days('AAPL', '2024-01-02', '2024-01-03') == ['2024-01-02', '2024-01-03']
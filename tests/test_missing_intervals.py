@@ -0,0 +1,30 @@
+from src.models.storage import missing_intervals
+
+
+def test_gaps_between_stored_dates():
+    dates = ['2023-07-03', '2023-07-05', '2023-07-10']
+    assert missing_intervals(dates, '2023-06-30', '2023-07-11') == [
+        ('2023-06-30', '2023-06-30', 1),
+        ('2023-07-04', '2023-07-04', 1),
+        ('2023-07-06', '2023-07-07', 2),
+        ('2023-07-11', '2023-07-11', 1),
+    ]
+
+
+def test_covered_days_are_not_missing():
+    # 2023-07-04 es feriado: el rango ya consultado no tiene barra ese día
+    dates = ['2023-07-03', '2023-07-05']
+    assert missing_intervals(dates, '2023-07-03', '2023-07-05', [('2023-07-03', '2023-07-05')]) == []
+
+
+def test_coverage_splits_and_trims_gaps_to_business_days():
+    covered = [('2023-07-05', '2023-07-10'), ('2023-07-20', '2023-07-20')]
+    assert missing_intervals(None, '2023-07-03', '2023-07-31', covered) == [
+        ('2023-07-03', '2023-07-04', 2),
+        ('2023-07-11', '2023-07-19', 7),
+        ('2023-07-21', '2023-07-31', 7),
+    ]
+    # Un intervalo que termina un viernes deja el tramo siguiente desde el lunes
+    assert missing_intervals(None, '2023-07-03', '2023-07-11', [('2023-07-03', '2023-07-07')]) == [
+        ('2023-07-10', '2023-07-11', 2),
+    ]
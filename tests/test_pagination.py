@@ -0,0 +1,90 @@
+import pytest
+
+from src.models.sharded_model import ShardedTickerModel
+from src.models.storage import RANGE_SORTS
+from src.models.ticker_model import TickerModel
+from src.utils.exceptions import DataValidationError
+
+TICKERS = ['AAPL', 'AMD', 'AMZN', 'MSFT', 'NVDA', 'TSLA']
+
+
+@pytest.fixture(params=['single', 'sharded'])
+def storage(request, tmp_path):
+    """
+    Almacenamiento con varios rangos por ticker (algunos con el mismo inicio o fin)
+    """
+    if request.param == 'single':
+        model = TickerModel(str(tmp_path / 'ticker.db'))
+    else:
+        model = ShardedTickerModel(str(tmp_path / 'shards'), shard_count=3)
+    for i, ticker in enumerate(TICKERS):
+        model.add_coverage(ticker, '2024-01-01', '2024-01-31')
+        model.add_coverage(ticker, f'2024-02-{i + 1:02d}', '2024-02-28')
+        model.add_coverage(ticker, '2024-03-01', f'2024-03-{i + 10:02d}')
+    return model
+
+
+def _pages(storage, limit, **filters):
+    """
+    Recorre todas las páginas y devuelve las filas y la cantidad de páginas
+    """
+    rows, pages, after = [], 0, None
+    while True:
+        page = storage.query_ranges(after=after, limit=limit, **filters)
+        pages += 1
+        assert len(page['rows']) <= limit
+        rows.extend(page['rows'])
+        if page['next'] is None:
+            return rows, pages
+        after = page['next']
+
+
+def _key(row):
+    return row['ticker'], row['start_date'], row['end_date']
+
+
+@pytest.mark.parametrize('sort', sorted(RANGE_SORTS))
+@pytest.mark.parametrize('descending', [False, True])
+def test_pages_cover_every_range_once_in_order(storage, sort, descending):
+    full = storage.query_ranges(sort=sort, descending=descending, limit=1000)
+    assert full['next'] is None
+    assert len(full['rows']) == 3 * len(TICKERS)
+
+    rows, pages = _pages(storage, 4, sort=sort, descending=descending)
+    assert [_key(row) for row in rows] == [_key(row) for row in full['rows']]
+    assert len({_key(row) for row in rows}) == len(rows)
+    assert pages == 5
+
+    values = [row[sort] for row in rows]
+    assert values == sorted(values, reverse=descending)
+
+
+def test_last_full_page_has_no_next(storage):
+    page = storage.query_ranges(limit=3 * len(TICKERS))
+    assert len(page['rows']) == 3 * len(TICKERS)
+    assert page['next'] is None
+
+
+def test_filters_apply_to_pages_and_counts(storage):
+    rows, _ = _pages(storage, 2, ticker_prefix='AM')
+    assert {row['ticker'] for row in rows} == {'AMD', 'AMZN'}
+    assert len(rows) == 6
+
+    counts = storage.count_ranges(ticker_prefix='AM')
+    assert counts['ranges'] == len(rows)
+    assert counts['tickers'] == 2
+
+    rows, _ = _pages(storage, 2, start_date='2024-03-01')
+    assert len(rows) == len(TICKERS)
+    assert all(row['end_date'] >= '2024-03-01' for row in rows)
+    assert storage.count_ranges(start_date='2024-03-01')['ranges'] == len(rows)
+
+    rows, _ = _pages(storage, 2, ticker='TSLA', end_date='2024-02-28')
+    assert [(row['start_date'], row['end_date']) for row in rows] == [
+        ('2024-01-01', '2024-01-31'), ('2024-02-06', '2024-02-28'),
+    ]
+
+
+def test_invalid_sort_is_rejected(storage):
+    with pytest.raises(DataValidationError):
+        storage.query_ranges(sort='data_points')
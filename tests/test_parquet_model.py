@@ -0,0 +1,38 @@
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from src.models.parquet_model import ParquetTickerModel  # noqa: E402
+
+
+def _bars(days):
+    """
+    Lote de barras de AAPL, una por día
+    """
+    return pd.DataFrame({
+        'ticker': 'AAPL', 'date': [day.strftime('%Y-%m-%d') for day in days],
+        'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 100, 'vwap': 1.0,
+    })
+
+
+def test_instances_do_not_lose_each_others_rows(tmp_path):
+    root = str(tmp_path / 'parquet')
+    models = [ParquetTickerModel(root) for _ in range(4)]
+    first = date(2024, 1, 1)
+    batches = [[first + timedelta(days=i * 20 + j) for j in range(20)] for i in range(8)]
+
+    threads = [
+        threading.Thread(target=models[i % len(models)].upsert_bars, args=(_bars(days),))
+        for i, days in enumerate(batches)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    rows = models[0].get_ticker_data('AAPL', '2024-01-01', '2024-12-31')
+    assert len(rows) == sum(len(days) for days in batches)
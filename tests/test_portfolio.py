@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.portfolio import PortfolioService
+
+DATES = pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05'])
+
+
+def _trades(rows):
+    trades = pd.DataFrame(rows, columns=['date', 'ticker', 'quantity', 'price', 'fees'])
+    trades['date'] = pd.to_datetime(trades['date'])
+    return trades
+
+
+def _closes(values, dates=DATES):
+    return pd.DataFrame({'AAPL': values}, index=dates)
+
+
+def test_extend_values_returns_and_drawdown():
+    trades = _trades([('2024-01-02', 'AAPL', 10.0, 100.0, 0.0)])
+    entry = PortfolioService._extend(
+        PortfolioService._empty_state(['AAPL']), _closes([100.0, 110.0, 99.0, 104.94]), trades
+    )
+    daily = entry['daily']
+    assert daily['value'].tolist() == pytest.approx([1000.0, 1100.0, 990.0, 1049.4])
+    assert daily['flows'].tolist() == pytest.approx([1000.0, 0.0, 0.0, 0.0])
+    assert daily['pnl'].tolist() == pytest.approx([0.0, 100.0, -110.0, 59.4])
+    assert daily['return'].tolist() == pytest.approx([0.0, 0.1, -0.1, 0.06])
+    assert daily['cum_return'].tolist() == pytest.approx([0.0, 0.1, -0.01, 0.0494])
+    assert daily['drawdown'].tolist() == pytest.approx([0.0, 0.0, -0.1, 1.0494 / 1.1 - 1])
+
+
+def test_contributions_are_not_returns():
+    # Comprar más a mitad del período no cuenta como ganancia
+    trades = _trades([
+        ('2024-01-02', 'AAPL', 10.0, 100.0, 0.0),
+        ('2024-01-04', 'AAPL', 10.0, 100.0, 1.0),
+        ('2024-01-05', 'AAPL', -5.0, 100.0, 0.0),
+    ])
+    entry = PortfolioService._extend(
+        PortfolioService._empty_state(['AAPL']), _closes([100.0, 100.0, 100.0, 100.0]), trades
+    )
+    daily = entry['daily']
+    assert daily['flows'].tolist() == pytest.approx([1000.0, 0.0, 1001.0, -500.0])
+    assert daily['pnl'].tolist() == pytest.approx([0.0, 0.0, -1.0, 0.0])
+    assert daily['return'].tolist() == pytest.approx([0.0, 0.0, -1.0 / 2001.0, 0.0])
+    assert entry['state']['quantity']['AAPL'] == 15.0
+
+
+def test_incremental_extension_matches_full_computation():
+    trades = _trades([
+        ('2024-01-02', 'AAPL', 10.0, 100.0, 1.0),
+        ('2024-01-05', 'AAPL', -4.0, 103.0, 1.0),
+    ])
+    closes = _closes([100.0, 102.0, 97.0, 105.0])
+    full = PortfolioService._extend(PortfolioService._empty_state(['AAPL']), closes, trades)
+
+    first = PortfolioService._extend(PortfolioService._empty_state(['AAPL']), closes.iloc[:2], trades)
+    later = trades[trades['date'] > DATES[1]]
+    extended = PortfolioService._extend(first, closes.iloc[2:], later)
+    pd.testing.assert_frame_equal(extended['daily'], full['daily'])
+
+
+def test_split_is_not_a_loss():
+    # 2:1 el 2024-01-04: el cierre sin ajustar cae a la mitad
+    splits = {'AAPL': [(pd.Timestamp('2024-01-04'), 2.0)]}
+    trades = PortfolioService._to_current_shares(
+        _trades([('2024-01-02', 'AAPL', 10.0, 100.0, 0.0)]), splits, '2024-01-02'
+    )
+    assert trades['quantity'].tolist() == [20.0]
+    assert trades['price'].tolist() == [50.0]
+
+    raw = np.array([100.0, 100.0, 50.0, 50.0])
+    closes = _closes(raw / PortfolioService._share_factors(splits['AAPL'], DATES))
+    entry = PortfolioService._extend(PortfolioService._empty_state(['AAPL']), closes, trades)
+    assert entry['daily']['value'].tolist() == pytest.approx([1000.0] * 4)
+    assert entry['daily']['cum_return'].tolist() == pytest.approx([0.0] * 4)
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from src.api.stream_feed import QuoteFeed
+from src.services.quote_stream import QuoteStream
+from src.utils.exceptions import DataValidationError
+
+
+class _IdleFeed(QuoteFeed):
+    """
+    Feed sin ticks que sólo espera la señal de detención
+    """
+    name = "idle"
+
+    def run(self, on_ticks, stop):
+        stop.wait()
+
+
+def _stream(**kwargs):
+    return QuoteStream(_IdleFeed(), tick_capacity=8, bar_capacity=4, **kwargs)
+
+
+def test_symbol_is_unsubscribed_when_no_session_follows_it():
+    stream = _stream()
+    stream.subscribe(['AAPL', 'MSFT'], 'a')
+    stream.subscribe(['aapl'], 'b')
+    assert stream.symbols('b') == ['AAPL']
+
+    stream.unsubscribe(['AAPL'], 'a')
+    assert sorted(stream.symbols()) == ['AAPL', 'MSFT']
+    stream.unsubscribe(['AAPL'], 'b')
+    assert stream.symbols() == ['MSFT']
+    assert stream.feed.symbols == {'MSFT'}
+    assert stream.feed._take_removed_symbols() == {'AAPL'}
+
+
+def test_release_keeps_the_feed_running_for_other_sessions():
+    stream = _stream()
+    stream.subscribe(['AAPL'], 'a')
+    stream.subscribe(['MSFT'], 'b')
+    stream.start()
+    try:
+        stream.release('a')
+        assert stream.running
+        assert stream.symbols() == ['MSFT']
+
+        stream.release('b')
+        assert not stream.running
+        assert stream.feed.symbols == set()
+
+        # Una sesión nueva vuelve a iniciar el feed
+        stream.subscribe(['TSLA'], 'c')
+        stream.start()
+        assert stream.running
+    finally:
+        stream.stop()
+
+
+def test_inactive_sessions_expire():
+    stream = _stream(session_timeout=0.05)
+    stream.subscribe(['AAPL'], 'a')
+    stream.subscribe(['MSFT'], 'b')
+    time.sleep(0.1)
+    # La sesión activa se mantiene; la otra se libera
+    stream.touch('b')
+    assert stream.symbols('a') == []
+    assert stream.symbols('b') == ['MSFT']
+    assert stream.symbols() == ['MSFT']
+
+
+def test_symbol_limit_counts_distinct_symbols():
+    stream = _stream(max_symbols=2)
+    stream.subscribe(['AAPL', 'MSFT'], 'a')
+    stream.subscribe(['AAPL'], 'b')
+    with pytest.raises(DataValidationError):
+        stream.subscribe(['TSLA'], 'b')
+    stream.release('a')
+    stream.subscribe(['TSLA'], 'b')
+    assert sorted(stream.symbols()) == ['AAPL', 'TSLA']
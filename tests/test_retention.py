@@ -0,0 +1,54 @@
+import os
+from datetime import datetime
+
+from src.models.access_log import AccessLogModel, access_log_for
+from src.models.sharded_model import ShardedTickerModel
+from src.models.ticker_model import TickerModel
+from src.services import retention
+from src.services.retention import RetentionRule
+
+
+def _payload(dates, close=100.0):
+    """
+    Respuesta de la API de agregados con una barra por fecha (medianoche local)
+    """
+    return {'results': [
+        {'t': int(datetime.strptime(date, '%Y-%m-%d').timestamp() * 1000),
+         'o': close, 'h': close, 'l': close, 'c': close, 'v': 1000, 'vw': close}
+        for date in dates
+    ]}
+
+
+DATES = ['2019-12-31', '2020-01-02', '2020-06-01', '2024-01-02']
+NOW = datetime(2025, 3, 1)
+
+
+def test_count_bars_counts_dates_before_the_cutoff(tmp_path):
+    for model in (TickerModel(str(tmp_path / 'ticker.db')),
+                  ShardedTickerModel(str(tmp_path / 'shards'), shard_count=2)):
+        model.save_ticker_data('AAPL', _payload(DATES))
+        assert model.count_bars('AAPL', '2020-06-01') == 2
+        assert model.count_bars('AAPL', '2030-01-01') == 4
+        assert model.count_bars('MSFT', '2030-01-01') == 0
+
+
+def test_plan_and_apply_retention(tmp_path):
+    model = TickerModel(str(tmp_path / 'ticker.db'))
+    model.save_ticker_data('AAPL', _payload(DATES))
+    access_log = AccessLogModel(str(tmp_path / 'access_log.db'))
+
+    plan = retention.plan_retention(model, [RetentionRule(5)], now=NOW, access_log=access_log)
+    assert [(item['ticker'], item['rows']) for item in plan] == [('AAPL', 2)]
+    cutoff = plan[0]['cutoff']
+    assert '2020-01-02' < cutoff <= '2020-06-01'
+
+    assert retention.apply_retention(model, plan) == 2
+    assert model.count_bars('AAPL', '2030-01-01') == 2
+    assert retention.plan_retention(model, [RetentionRule(5)], now=NOW, access_log=access_log) == []
+
+
+def test_access_log_lives_next_to_the_storage(tmp_path):
+    model = TickerModel(str(tmp_path / 'ticker.db'))
+    access_log = access_log_for(model)
+    assert access_log.db_path == os.path.join(str(tmp_path), 'access_log.db')
+    assert access_log_for(model) is access_log
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from src.models.sharded_model import ShardedTickerModel, shard_for
+
+
+def _payload(dates, close=100.0):
+    """
+    Respuesta de la API de agregados con una barra por fecha (medianoche local)
+    """
+    return {'results': [
+        {'t': int(datetime.strptime(date, '%Y-%m-%d').timestamp() * 1000),
+         'o': close, 'h': close, 'l': close, 'c': close, 'v': 1000, 'vw': close}
+        for date in dates
+    ]}
+
+
+def test_shard_for_is_stable():
+    assert shard_for('AAPL', 8) == shard_for('AAPL', 8)
+    assert 0 <= shard_for('MSFT', 8) < 8
+
+
+def test_shard_count_is_read_from_the_catalog(tmp_path):
+    root = str(tmp_path / 'shards')
+    ShardedTickerModel(root, shard_count=4)
+    assert ShardedTickerModel(root, shard_count=8).shard_count == 4
+
+
+def test_catalog_is_shared_between_instances(tmp_path):
+    root = str(tmp_path / 'shards')
+    first = ShardedTickerModel(root, shard_count=4)
+    second = ShardedTickerModel(root, shard_count=4)
+
+    first.save_ticker_data('AAPL', _payload(['2024-01-02']))
+    first.save_many([('MSFT', _payload(['2024-01-02'])), ('TSLA', _payload(['2024-01-02']))])
+    assert second.list_tickers() == ['AAPL', 'MSFT', 'TSLA']
+    assert len(second.get_ticker_data('AAPL', '2024-01-01', '2024-01-31')) == 1
+
+
+def test_ticker_deleted_by_another_instance_is_registered_again(tmp_path):
+    root = str(tmp_path / 'shards')
+    first = ShardedTickerModel(root, shard_count=4)
+    second = ShardedTickerModel(root, shard_count=4)
+
+    first.save_ticker_data('AAPL', _payload(['2024-01-02']))
+    second.delete_ticker_data('AAPL')
+    assert first.list_tickers() == []
+
+    # La primera instancia ya había registrado el ticker: no debe confiar en una caché propia
+    first.save_ticker_data('AAPL', _payload(['2024-01-03']))
+    assert second.list_tickers() == ['AAPL']
+
+
+def test_delete_range_unregisters_ticker_left_empty(tmp_path):
+    model = ShardedTickerModel(str(tmp_path / 'shards'), shard_count=4)
+    model.save_ticker_data('AAPL', _payload(['2024-01-02', '2024-01-03']))
+
+    assert model.delete_range('AAPL', '2024-01-02', '2024-01-02') == 1
+    assert model.list_tickers() == ['AAPL']
+    assert model.delete_range('AAPL', '2024-01-03', '2024-01-03') == 1
+    assert model.list_tickers() == []
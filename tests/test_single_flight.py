@@ -0,0 +1,49 @@
+import os
+import time
+
+import pytest
+
+from src.services import single_flight
+from src.services.single_flight import InterProcessLock
+
+
+def test_different_keys_do_not_block_each_other(tmp_path):
+    lock_dir = str(tmp_path / 'locks')
+    with InterProcessLock(lock_dir, ('AAPL', '2024-01-01', '2024-01-31')).acquire():
+        with InterProcessLock(lock_dir, ('MSFT', '2024-01-01', '2024-01-31')).acquire(timeout=0.2):
+            pass
+
+
+def test_same_key_waits_for_the_holder(tmp_path):
+    lock_dir = str(tmp_path / 'locks')
+    key = ('AAPL', '2024-01-01', '2024-01-31')
+    with InterProcessLock(lock_dir, key).acquire():
+        with pytest.raises(TimeoutError):
+            with InterProcessLock(lock_dir, key).acquire(timeout=0.2):
+                pass
+
+
+def test_completion_is_recorded_per_key(tmp_path):
+    lock_dir = str(tmp_path / 'locks')
+    started = time.time()
+    with InterProcessLock(lock_dir, 'AAPL').acquire() as lock:
+        lock.mark_completed()
+    with InterProcessLock(lock_dir, 'MSFT').acquire() as lock:
+        assert lock.completed_at() == 0.0
+    with InterProcessLock(lock_dir, 'AAPL').acquire() as lock:
+        assert lock.completed_at() >= started
+
+
+def test_stale_lock_files_are_removed(tmp_path, monkeypatch):
+    lock_dir = str(tmp_path / 'locks')
+    stale = InterProcessLock(lock_dir, 'AAPL').path
+    open(stale, 'w').close()
+    old = time.time() - 2 * single_flight.LOCK_FILE_MAX_AGE
+    os.utime(stale, (old, old))
+
+    monkeypatch.setattr(single_flight, '_last_cleanup', {})
+    fresh = InterProcessLock(lock_dir, 'MSFT')
+    with fresh.acquire():
+        pass
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh.path)
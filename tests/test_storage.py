@@ -0,0 +1,56 @@
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from src.models.storage import aggs_columns, ms_to_days
+from src.utils.exceptions import DataValidationError, InvalidDataError
+
+# Medianoches, mediodías y valores al azar (incluye fechas anteriores a 1970 y cambios de horario)
+TIMESTAMPS = np.concatenate([
+    np.arange(-400, 20000, 7, dtype=np.int64) * 86_400_000,
+    np.arange(-400, 20000, 7, dtype=np.int64) * 86_400_000 + 12 * 3_600_000,
+    np.random.default_rng(0).integers(-10**12, 4 * 10**12, 5000),
+])
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    """
+    Cambia la zona horaria local del proceso y la restaura al terminar
+    """
+    def set_tz(tz):
+        monkeypatch.setenv('TZ', tz)
+        time.tzset()
+    yield set_tz
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize('tz', ['UTC', 'America/New_York', 'Europe/Berlin', 'Australia/Sydney',
+                                'EST5EDT,M3.2.0,M11.1.0'])
+def test_ms_to_days_matches_fromtimestamp(local_tz, tz):
+    local_tz(tz)
+    expected = np.array([datetime.fromtimestamp(ms / 1000).strftime('%Y-%m-%d') for ms in TIMESTAMPS.tolist()],
+                        dtype='datetime64[D]')
+    assert (ms_to_days(TIMESTAMPS) == expected).all()
+
+
+def _bar(**fields):
+    bar = {'t': 1704153600000, 'o': 1.0, 'h': 2.0, 'l': 0.5, 'c': 1.5, 'v': 100, 'vw': 1.2}
+    bar.update(fields)
+    return {k: v for k, v in bar.items() if v is not ...}
+
+
+def test_aggs_columns_reports_invalid_results():
+    assert aggs_columns({'results': [_bar(), _bar(t=1704240000000)]})['close'].tolist() == [1.5, 1.5]
+
+    with pytest.raises(DataValidationError, match='Faltan campos requeridos en los datos: vw'):
+        aggs_columns({'results': [_bar(), _bar(vw=...)]})
+    with pytest.raises(DataValidationError, match='Faltan campos requeridos en los datos: o'):
+        aggs_columns({'results': [_bar(o=None)]})
+    with pytest.raises(DataValidationError, match='Valores no numéricos'):
+        aggs_columns({'results': [_bar(h='x')]})
+    with pytest.raises(InvalidDataError):
+        aggs_columns({'results': [_bar(), 'x']})
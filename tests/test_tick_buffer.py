@@ -0,0 +1,67 @@
+import numpy as np
+
+from src.models.tick_buffer import MINUTE_MS, MinuteBarRing, TickRingBuffer
+
+
+def _ticks(start: int, count: int):
+    ts = np.arange(start, start + count, dtype=np.int64)
+    return ts, ts.astype(np.float64), np.ones(count)
+
+
+def test_tick_buffer_keeps_the_latest_ticks_after_wrapping():
+    buffer = TickRingBuffer(capacity=5)
+    assert buffer.last() is None
+
+    buffer.extend(*_ticks(0, 3))
+    buffer.extend(*_ticks(3, 4))
+    ts, price, size = buffer.snapshot()
+    assert len(buffer) == 5
+    assert buffer.total == 7
+    assert ts.tolist() == [2, 3, 4, 5, 6]
+    assert price.tolist() == [2.0, 3.0, 4.0, 5.0, 6.0]
+    assert size.tolist() == [1.0] * 5
+    assert buffer.last() == (6, 6.0)
+
+    ts, _, _ = buffer.snapshot(last=2)
+    assert ts.tolist() == [5, 6]
+
+
+def test_tick_buffer_batch_larger_than_capacity():
+    buffer = TickRingBuffer(capacity=4)
+    buffer.extend(*_ticks(0, 2))
+    buffer.extend(*_ticks(2, 10))
+    ts, _, _ = buffer.snapshot()
+    assert ts.tolist() == [8, 9, 10, 11]
+    assert buffer.total == 12
+
+
+def test_minute_bars_aggregate_ticks():
+    ring = MinuteBarRing(capacity=3)
+    ts = np.array([0, 10_000, 20_000, MINUTE_MS + 5_000], dtype=np.int64)
+    price = np.array([10.0, 12.0, 9.0, 11.0])
+    size = np.array([1.0, 2.0, 1.0, 4.0])
+    ring.add(ts, price, size)
+
+    frame = ring.to_frame()
+    assert len(frame) == 2
+    first = frame.iloc[0]
+    assert (first['open'], first['high'], first['low'], first['close']) == (10.0, 12.0, 9.0, 9.0)
+    assert first['volume'] == 4.0
+    assert first['vwap'] == (10.0 + 24.0 + 9.0) / 4.0
+
+
+def test_minute_bars_wrap_and_drop_ticks_older_than_the_ring():
+    ring = MinuteBarRing(capacity=3)
+    for minute in range(5):
+        ring.add(np.array([minute * MINUTE_MS], dtype=np.int64), np.array([float(minute)]), np.array([1.0]))
+    frame = ring.to_frame()
+    assert len(ring) == 3
+    assert [int(t.timestamp() * 1000) for t in frame.index] == [2 * MINUTE_MS, 3 * MINUTE_MS, 4 * MINUTE_MS]
+    assert frame['close'].tolist() == [2.0, 3.0, 4.0]
+
+    # Un tick atrasado de un minuto todavía en el anillo lo actualiza; uno más viejo se descarta
+    ring.add(np.array([2 * MINUTE_MS + 1, 0], dtype=np.int64), np.array([7.0, 99.0]), np.array([1.0, 1.0]))
+    frame = ring.to_frame()
+    assert frame['close'].tolist() == [7.0, 3.0, 4.0]
+    assert frame['high'].tolist() == [7.0, 3.0, 4.0]
+    assert frame['volume'].tolist() == [2.0, 1.0, 1.0]
@@ -0,0 +1,75 @@
+import threading
+from datetime import datetime
+
+from src.models import column_cache, warm_cache
+from src.models.column_cache import ColumnCache
+from src.models.ticker_model import TickerModel
+from src.services.write_behind import WriteBehindQueue
+from src.utils.exceptions import DatabaseError
+
+
+def _payload(dates, close=100.0):
+    """
+    Respuesta de la API de agregados con una barra por fecha (medianoche local)
+    """
+    return {'results': [
+        {'t': int(datetime.strptime(date, '%Y-%m-%d').timestamp() * 1000),
+         'o': close, 'h': close, 'l': close, 'c': close, 'v': 1000, 'vw': close}
+        for date in dates
+    ]}
+
+
+class _FailingModel(TickerModel):
+    """
+    Almacenamiento que rechaza las escrituras mientras `failing` está activo
+    """
+    failing = False
+
+    def save_many(self, items):
+        if self.failing:
+            raise DatabaseError("base bloqueada")
+        return super().save_many(items)
+
+    def save_ticker_data(self, ticker, data):
+        if self.failing:
+            raise DatabaseError("base bloqueada")
+        return super().save_ticker_data(ticker, data)
+
+
+def test_failed_write_discards_cached_ticker(tmp_path, monkeypatch):
+    monkeypatch.setattr(column_cache, 'COLUMN_CACHE_ENABLED', True)
+    monkeypatch.setattr(warm_cache, 'WARM_CACHE_ENABLED', True)
+    monkeypatch.setattr(warm_cache, 'WARM_CACHE_SNAPSHOT_SECONDS', 0)
+    model = _FailingModel(str(tmp_path / 'ticker.db'))
+    model.save_ticker_data('AAPL', _payload(['2024-01-02', '2024-01-03']))
+
+    columns = ColumnCache(str(tmp_path / 'columns'))
+    columns.rebuild('AAPL', model)
+    warm = warm_cache.get_warm_cache(model)
+    assert len(warm.read('AAPL', '2024-01-01', '2024-01-31')) == 2
+    assert columns.is_cached('AAPL')
+
+    model.failing = True
+    failed = threading.Event()
+    writer = WriteBehindQueue(model)
+    writer.submit('AAPL', _payload(['2024-01-04']), on_error=failed.set)
+    assert writer.flush(5)
+    assert failed.is_set()
+    assert not columns.is_cached('AAPL')
+    assert 'AAPL' not in warm._frames
+    assert writer.pending_rows('AAPL', '2024-01-01', '2024-01-31') == []
+
+
+def test_close_waits_at_most_the_timeout(tmp_path):
+    model = TickerModel(str(tmp_path / 'ticker.db'))
+    writer = WriteBehindQueue(model)
+    release = threading.Event()
+    original = model.save_many
+    model.save_many = lambda items: (release.wait(5), original(items))[1]
+
+    writer.submit('AAPL', _payload(['2024-01-02']))
+    writer.close(timeout=0.1)
+    assert writer.pending_rows('AAPL', '2024-01-01', '2024-01-31')
+    release.set()
+    assert writer.flush(5)
+    assert len(model.get_ticker_data('AAPL', '2024-01-01', '2024-01-31')) == 1